@@ -0,0 +1,39 @@
+"""add cluster_cache table
+
+Revision ID: a4b5c6d7e8f9
+Revises: f3a4b5c6d7e8
+Create Date: 2026-10-19
+
+Per-diagram LLM labels for deterministic candidate event groups, so
+detect_clusters() only calls the LLM for groups whose events changed.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'a4b5c6d7e8f9'
+down_revision = 'f3a4b5c6d7e8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'cluster_cache',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column(
+            'diagram_id',
+            sa.Integer(),
+            sa.ForeignKey('diagrams.id', ondelete='CASCADE'),
+            nullable=False,
+        ),
+        sa.Column('key', sa.String(length=64), nullable=False),
+        sa.Column('data', sa.JSON(), nullable=False),
+        sa.UniqueConstraint('diagram_id', 'key'),
+    )
+
+
+def downgrade():
+    op.drop_table('cluster_cache')
@@ -0,0 +1,33 @@
+"""add discussions.last_order
+
+Revision ID: b5c6d7e8f9a0
+Revises: a4b5c6d7e8f9
+Create Date: 2026-10-19
+
+Per-discussion statement order counter, advanced atomically by
+Discussion.reserve_order_block() instead of reading max(statements.order)
+under a row lock for every statement.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'b5c6d7e8f9a0'
+down_revision = 'a4b5c6d7e8f9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'discussions', sa.Column('last_order', sa.Integer(), nullable=True)
+    )
+    op.execute(
+        "UPDATE discussions SET last_order = ("
+        "SELECT max(statements.\"order\") FROM statements "
+        "WHERE statements.discussion_id = discussions.id)"
+    )
+
+
+def downgrade():
+    op.drop_column('discussions', 'last_order')
@@ -0,0 +1,57 @@
+"""add statement_metric_index table
+
+Revision ID: d1e2f3a4b5c6
+Revises: c8f1a2d3e4b5
+Create Date: 2026-10-19
+
+Inverted (metric, outcome) -> statement index behind the system-wide
+analysis view. Starts empty; rows are built by the refresh_f1_snapshots task
+or the "Index now" action on that view, never by a page visit.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'd1e2f3a4b5c6'
+down_revision = 'c8f1a2d3e4b5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'statement_metric_index',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('metric', sa.String(length=50), nullable=False),
+        sa.Column('outcome', sa.String(length=20), nullable=False),
+        sa.Column(
+            'statement_id',
+            sa.Integer(),
+            sa.ForeignKey('statements.id', ondelete='CASCADE'),
+            nullable=False,
+        ),
+        sa.Column(
+            'discussion_id',
+            sa.Integer(),
+            sa.ForeignKey('discussions.id', ondelete='CASCADE'),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        'index_statement_metric_lookup',
+        'statement_metric_index',
+        ['metric', 'outcome', 'discussion_id', 'statement_id'],
+    )
+    op.create_index(
+        'index_statement_metric_discussion',
+        'statement_metric_index',
+        ['discussion_id'],
+    )
+
+
+def downgrade():
+    op.drop_index('index_statement_metric_discussion', 'statement_metric_index')
+    op.drop_index('index_statement_metric_lookup', 'statement_metric_index')
+    op.drop_table('statement_metric_index')
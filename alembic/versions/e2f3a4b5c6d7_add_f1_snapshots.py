@@ -0,0 +1,32 @@
+"""add f1_snapshots table
+
+Revision ID: e2f3a4b5c6d7
+Revises: d1e2f3a4b5c6
+Create Date: 2026-10-19
+
+Precomputed SystemCumulativeF1 for the auditor dashboard card, refreshed by
+the refresh_f1_snapshots celery task.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'e2f3a4b5c6d7'
+down_revision = 'd1e2f3a4b5c6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'f1_snapshots',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('include_synthetic', sa.Boolean(), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table('f1_snapshots')
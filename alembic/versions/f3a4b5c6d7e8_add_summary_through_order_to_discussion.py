@@ -0,0 +1,29 @@
+"""add rolling chat summary cursor to discussion
+
+Revision ID: f3a4b5c6d7e8
+Revises: e2f3a4b5c6d7
+Create Date: 2026-10-19
+
+Highest Statement.order folded into Discussion.summary for chat context.
+Nullable; NULL = nothing folded, chat sends the whole history as before
+until the first compaction.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'f3a4b5c6d7e8'
+down_revision = 'e2f3a4b5c6d7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'discussions',
+        sa.Column('summary_through_order', sa.Integer(), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_column('discussions', 'summary_through_order')
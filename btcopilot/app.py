@@ -10,7 +10,7 @@ _log = logging.getLogger(__name__)
 
 def create_app(config: dict = None, **kwargs):
     from btcopilot.pro.copilot.engine import Engine
-    from btcopilot import auth, extensions, pro, personal, training
+    from btcopilot import auth, extensions, queryprofile, pro, personal, training
 
     # Flask CLI may pass script_info as a kwarg, we ignore it
     kwargs.pop("script_info", None)
@@ -147,6 +147,7 @@ def create_app(config: dict = None, **kwargs):
 
     ## Initialize Modules
 
+    queryprofile.init_app(app)
     extensions.init_app(app)
     pro.init_app(app)
     personal.init_app(app)
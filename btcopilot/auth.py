@@ -1,16 +1,42 @@
 import sys
+import hmac
+import json
 import logging
+import datetime
+import threading
+import email.utils
+from dataclasses import dataclass
 from functools import wraps
 from typing import Union
 
-from flask import g, request, abort, session, redirect, url_for
+from cachetools import TTLCache
+from flask import g, request, abort, session, redirect, url_for, current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session as SQLASession
 
 import btcopilot
+from btcopilot.extensions import db
 from btcopilot.pro.models import User
 
 
 _log = logging.getLogger(__name__)
 
+# Signed requests whose Date header is further than this from server time are
+# rejected before any lookup, which also bounds how long a captured request can
+# be replayed.
+AUTH_MAX_CLOCK_SKEW = datetime.timedelta(minutes=15)
+
+# username -> credentials, so signature checks for hot users skip the
+# username query. Changes to a user's secret, password, roles or active flag
+# evict the entry on commit; other processes see the change within the TTL.
+# Set AUTH_CACHE_REDIS_URL to share entries across processes.
+AUTH_CACHE_TTL = 30
+AUTH_CACHE_SIZE = 10000
+# On a signature mismatch the username is re-read from the database at most
+# once per interval, so bad signatures can't be used to hammer the users table.
+AUTH_REFRESH_INTERVAL = 5
+_AUTH_FIELDS = ("username", "secret", "password", "roles", "active")
+
 
 def is_pro_app_request():
     return request.path.startswith("/v1/")
@@ -33,7 +59,9 @@ def _set_tracing_tags(user):
         if span and not getattr(user, "IS_ANONYMOUS", False):
             span.set_tag("user.id", user.id)
             span.set_tag("user.username", user.username)
-            span.set_tag("user.name", f"{user.first_name} {user.last_name}")
+            # CachedUser has no name without loading the row.
+            if isinstance(user, User):
+                span.set_tag("user.name", f"{user.first_name} {user.last_name}")
 
 
 class AnonUser:
@@ -196,6 +224,219 @@ def minimum_role(role):
     return decorator
 
 
+@dataclass(frozen=True)
+class Credentials:
+    user_id: int
+    secret: bytes
+    roles: str
+
+
+class CachedUser:
+    """
+    The signed-in user of a /v1 or /personal request, built from cached
+    Credentials. id, username and role checks need no query; any other
+    attribute loads the User row on first use and is read from or written to
+    it, so routes that only authorize never touch the users table.
+    """
+
+    IS_ANONYMOUS = False
+
+    __slots__ = ("id", "username", "roles", "_row")
+
+    def __init__(self, username: str, creds: Credentials):
+        object.__setattr__(self, "id", creds.user_id)
+        object.__setattr__(self, "username", username)
+        object.__setattr__(self, "roles", creds.roles)
+        object.__setattr__(self, "_row", None)
+
+    def has_role(self, role: str) -> bool:
+        return User.has_role(self, role)
+
+    def _user(self) -> User:
+        if self._row is None:
+            row = db.session.get(User, self.id)
+            if row is None:
+                invalidate_credentials(self.username)
+                abort(401)
+            object.__setattr__(self, "_row", row)
+        return self._row
+
+    def __getattr__(self, name):
+        return getattr(self._user(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._user(), name, value)
+        if name in CachedUser.__slots__:
+            object.__setattr__(self, name, value)
+
+    def __str__(self):
+        return f"<User id: {self.id}, {self.username}>"
+
+
+_credentials = TTLCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL)
+_refreshed = TTLCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_REFRESH_INTERVAL)
+_credentials_lock = threading.Lock()
+_redis_clients = {}
+
+
+def _credentials_redis():
+    url = current_app.config.get("AUTH_CACHE_REDIS_URL")
+    if not url:
+        return None
+    if url not in _redis_clients:
+        import redis
+
+        _redis_clients[url] = redis.from_url(url)
+    return _redis_clients[url]
+
+
+def _redis_key(username: str) -> str:
+    return f"auth:credentials:v1:{username}"
+
+
+def lookup_credentials(username: str) -> Credentials | None:
+    """Credentials for `username` from the in-process cache, then Redis (if
+    configured), then the database."""
+    with _credentials_lock:
+        creds = _credentials.get(username)
+    if creds is not None:
+        return creds
+
+    client = _credentials_redis()
+    if client is not None:
+        try:
+            cached = client.get(_redis_key(username))
+        except Exception as e:
+            _log.warning(f"Auth cache read failed: {e}")
+            cached = None
+        if cached:
+            data = json.loads(cached)
+            creds = Credentials(
+                data["user_id"], data["secret"].encode("utf-8"), data["roles"]
+            )
+
+    if creds is None:
+        creds = _load_credentials(username)
+        if creds is None:
+            return None
+        if client is not None:
+            try:
+                client.setex(
+                    _redis_key(username),
+                    AUTH_CACHE_TTL,
+                    json.dumps(
+                        {
+                            "user_id": creds.user_id,
+                            "secret": creds.secret.decode("utf-8"),
+                            "roles": creds.roles,
+                        }
+                    ),
+                )
+            except Exception as e:
+                _log.warning(f"Auth cache write failed: {e}")
+
+    with _credentials_lock:
+        _credentials[username] = creds
+    return creds
+
+
+def _load_credentials(username: str) -> Credentials | None:
+    row = (
+        db.session.query(User.id, User.secret, User.roles)
+        .filter(User.username == username)
+        .first()
+    )
+    if row is None:
+        return None
+    return Credentials(row.id, (row.secret or "").encode("utf-8"), row.roles)
+
+
+def refresh_credentials(username: str) -> Credentials | None:
+    """
+    Re-read `username` from the database after a signature mismatch, at most
+    once per AUTH_REFRESH_INTERVAL (None when rate-limited).
+
+    Only this process's entry is replaced. The shared Redis entry is left
+    alone: the request is unauthenticated, and commits that change
+    credentials already evict it.
+    """
+    with _credentials_lock:
+        if username in _refreshed:
+            return None
+        _refreshed[username] = True
+    creds = _load_credentials(username)
+    with _credentials_lock:
+        if creds is None:
+            _credentials.pop(username, None)
+        else:
+            _credentials[username] = creds
+    return creds
+
+
+def invalidate_credentials(*usernames: str):
+    """Drop cached credentials for `usernames`, or all of them (and the
+    re-read rate limits) if none given."""
+    with _credentials_lock:
+        if usernames:
+            for username in usernames:
+                _credentials.pop(username, None)
+        else:
+            _credentials.clear()
+            _refreshed.clear()
+    if not usernames:
+        return
+    try:
+        client = _credentials_redis()
+        if client is not None:
+            client.delete(*[_redis_key(u) for u in usernames])
+    except Exception as e:
+        _log.warning(f"Auth cache invalidate failed: {e}")
+
+
+@event.listens_for(SQLASession, "after_flush")
+def _collect_credential_changes(session, flush_context):
+    changed = session.info.setdefault("auth_changed_usernames", set())
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            changed.add(obj.username)
+    for obj in session.dirty:
+        if not isinstance(obj, User):
+            continue
+        state = db.inspect(obj)
+        for field in _AUTH_FIELDS:
+            history = state.attrs[field].history
+            if history.has_changes():
+                changed.add(obj.username)
+                # A rename must also evict the old username.
+                if field == "username":
+                    changed.update(u for u in history.deleted if u)
+
+
+@event.listens_for(SQLASession, "after_commit")
+def _invalidate_changed_credentials(session):
+    changed = session.info.pop("auth_changed_usernames", None)
+    if changed:
+        invalidate_credentials(*changed)
+
+
+@event.listens_for(SQLASession, "after_rollback")
+def _discard_credential_changes(session):
+    session.info.pop("auth_changed_usernames", None)
+
+
+def _date_is_fresh(date: str | None) -> bool:
+    if not date:
+        return False
+    try:
+        sent = email.utils.parsedate_to_datetime(date)
+    except (TypeError, ValueError):
+        return False
+    if sent.tzinfo is None:
+        sent = sent.replace(tzinfo=datetime.timezone.utc)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return abs(now - sent) <= AUTH_MAX_CLOCK_SKEW
+
+
 def _authenticate_pro_personal_apps() -> User | None:
     """Handle desktop app authentication using FD-Authentication header.
 
@@ -208,33 +449,51 @@ def _authenticate_pro_personal_apps() -> User | None:
         return abort(401)
 
     authParts = auth_header.split(":")
+    if len(authParts) < 3:
+        return abort(401)
     if authParts[1] == btcopilot.ANON_USER:
         user = AnonUser()
         secret = btcopilot.ANON_SECRET
     else:
         username = authParts[1]
-        user = User.query.filter_by(username=username).first()
-        if not user:
+        date = headers.get("Date")
+        if not _date_is_fresh(date):
+            _log.debug(f"Auth rejected stale or missing Date header: {date}")
             return abort(401)
-        secret = user.secret.encode("utf-8")
 
         # Verify signature
         theirSignature = authParts[2]
         content_md5 = headers.get("Content-MD5")
         content_type = headers.get("Content-Type")
-        date = headers.get("Date")
 
         if request.query_string:
             resource = request.path + "?" + request.query_string.decode("utf-8")
         else:
             resource = request.path
-        ourSignature = btcopilot.sign(
-            secret, request.method, content_md5, content_type, date, resource
-        )
-        if ourSignature != theirSignature:
-            _log.debug("Auth signature %s != %s" % (theirSignature, ourSignature))
+
+        def verify(creds):
+            ourSignature = btcopilot.sign(
+                creds.secret, request.method, content_md5, content_type, date, resource
+            )
+            return hmac.compare_digest(
+                ourSignature.encode("utf-8"), theirSignature.encode("utf-8")
+            )
+
+        creds = lookup_credentials(username)
+        if creds and not verify(creds):
+            # The cached secret may predate a change made in another process.
+            fresh = refresh_credentials(username)
+            if not fresh or fresh == creds or not verify(fresh):
+                _log.debug(f"Auth signature mismatch for {username}")
+                return abort(401)
+            creds = fresh
+        if not creds:
             return abort(401)
 
+        # The User row is only loaded if the route needs more than id,
+        # username and roles.
+        user = CachedUser(username, creds)
+
     g.current_user = user
     _set_tracing_tags(user)
     return user
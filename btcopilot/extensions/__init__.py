@@ -32,6 +32,7 @@ from celery import Celery
 from btcopilot import version
 from .handlers import ColorfulSMTPHandler
 from .chroma import Chroma
+from . import celeryqueues
 
 SERVER_FOLDER_PATH = os.path.realpath(
     os.path.join(os.path.dirname(os.path.realpath(__file__)), "..")
@@ -40,6 +41,28 @@ SERVER_FOLDER_PATH = os.path.realpath(
 
 EMBEDDINGS_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 
+# sync_with_stripe() page size (Stripe's maximum) and DB commit size.
+STRIPE_PAGE_SIZE = 100
+STRIPE_SYNC_CHUNK_SIZE = 1000
+
+CELERY_BEAT_SCHEDULE = {
+    "sync-with-stripe-daily": {
+        "task": "sync_with_stripe",
+        "schedule": 86400.0,  # 24 hours
+    },
+    "expire-stale-sessions-hourly": {
+        "task": "expire_stale_sessions",
+        "schedule": 3600.0,  # 1 hour
+    },
+    "refresh-f1-snapshots": {
+        "task": "refresh_f1_snapshots",
+        "schedule": 900.0,  # 15 minutes
+        # Staleness checks only see new approvals; pick up un-approvals, GT
+        # edits, re-extractions and deletes here.
+        "kwargs": {"force": True},
+    },
+}
+
 
 _log = logging.getLogger(__name__)
 
@@ -355,17 +378,10 @@ def init_celery(app):
         enable_utc=True,
         worker_hijack_root_logger=False,
         worker_redirect_stdouts=False,
-        beat_schedule={
-            "sync-with-stripe-daily": {
-                "task": "sync_with_stripe",
-                "schedule": 86400.0,  # 24 hours
-            },
-            "expire-stale-sessions-hourly": {
-                "task": "expire_stale_sessions",
-                "schedule": 3600.0,  # 1 hour
-            },
-        },
+        beat_schedule=CELERY_BEAT_SCHEDULE,
+        **celeryqueues.celery_config(),
     )
+    celeryqueues.configure_worker(celery)
 
     class ContextTask(celery.Task):
         """Make celery tasks work with Flask app context."""
@@ -532,81 +548,125 @@ def create_stripe_Subscription(user, policy, license, card):
 
 
 ## TODO: Maybe also cancel licenses in a webhook from Stripe?
-def sync_with_stripe():
-    import stripe
+def sync_with_stripe(stripe=None, chunk_size: int = STRIPE_SYNC_CHUNK_SIZE):
+    """
+    Reconcile local licenses with Stripe subscriptions.
+
+    Subscriptions are streamed page by page and indexed by id, then joined
+    against active licenses in a single pass, so the cost is linear in
+    licenses + subscriptions. Updates are issued and committed `chunk_size`
+    licenses at a time. `stripe` defaults to the stripe module; tests pass a
+    fake.
+    """
+    if stripe is None:
+        import stripe
     from btcopilot.pro.models import License, Policy, User
 
     _log.info(f"Starting...")
     # Expire old subscriptions
-    stripeSubs = stripe.Subscription.list(status="canceled")["data"]
-    licenses = License.query.filter_by(active=True).all()
-    _log.info(f"Found {len(licenses)} active local licenses.")
-    for license in licenses:
-        stripeSub = None
-        for entry in stripeSubs:
-            if entry["id"] == license.stripe_id:
-                stripeSub = entry
-                break
-        if stripeSub:
-            _log.info("Canceling license: %s" % license.as_dict())
-            if (
-                stripeSub["ended_at"] != None
-            ):  # stripeSub['status'] in ('active', 'trialing', 'past_due'):
-                license.active = False
-            if stripeSub["status"] == "canceled":
-                license.canceled = True
-    deactivated = [l for l in licenses if l.active is False]
-    canceled = [l for l in licenses if l.canceled is True]
+    ended = {}
+    for stripeSub in stripe.Subscription.list(
+        status="canceled", limit=STRIPE_PAGE_SIZE
+    ).auto_paging_iter():
+        # (no longer usable, canceled)
+        ended[stripeSub["id"]] = (
+            stripeSub["ended_at"] != None,
+            stripeSub["status"] == "canceled",
+        )
+    _log.info(f"Found {len(ended)} canceled Stripe subscriptions.")
+
+    num_licenses = 0
+    deactivate, cancel = [], []
+    for license_id, stripe_id in (
+        db.session.query(License.id, License.stripe_id)
+        .filter(License.active == True, License.stripe_id != None)
+        .yield_per(chunk_size)
+    ):
+        num_licenses += 1
+        if stripe_id not in ended:
+            continue
+        is_ended, is_canceled = ended[stripe_id]
+        if is_ended:
+            deactivate.append(license_id)
+        if is_canceled:
+            cancel.append(license_id)
+    _log.info(f"Found {num_licenses} active local licenses with subscriptions.")
+
+    for ids, values in ((cancel, {"canceled": True}), (deactivate, {"active": False})):
+        for i in range(0, len(ids), chunk_size):
+            License.query.filter(License.id.in_(ids[i : i + chunk_size])).update(
+                values, synchronize_session=False
+            )
+            db.session.commit()
     _log.info(
-        f"Deactivated {len(deactivated)} licenses, canceled {len(canceled)} licenses."
+        f"Deactivated {len(deactivate)} licenses, canceled {len(cancel)} licenses."
     )
-    db.session.commit()
 
-    # Sync new subscriptions added through web interface.
+    # Sync new subscriptions added through web interface. Rare, so each
+    # License is committed and written back to Stripe before the next one; a
+    # License left without fd_id by a failed write-back is re-linked, not
+    # duplicated, on the next run.
     num_created = 0
-    stripeSubs = stripe.Subscription.list(status="active")["data"]
-    _log.info(f"Found {len(stripeSubs)} active Stripe subscriptions.")
-    for subEntry in stripeSubs:
-        if not subEntry["metadata"].get(
+    policies = {}
+
+    num_active = 0
+    for subEntry in stripe.Subscription.list(
+        status="active", limit=STRIPE_PAGE_SIZE
+    ).auto_paging_iter():
+        num_active += 1
+        if subEntry["metadata"].get(
             "fd_id"
         ):  # Assume no metadata means subscription was manually entered online.
+            continue
+        _log.info(
+            "Found manually entered Stripe Subscription %s, creating local License to match."
+            % subEntry["id"]
+        )
+        existing = License.query.filter_by(stripe_id=subEntry["id"]).first()
+        if existing:
+            _log.info(f"Re-linking existing License {existing.id} to Stripe.")
+            stripe.Subscription.modify(subEntry["id"], metadata={"fd_id": existing.id})
+            continue
+        _log.info(f"Querying Stripe Customer {subEntry['customer']}")
+        try:
+            stripeCustomer = stripe.Customer.retrieve(subEntry["customer"])
+        except stripe.error.InvalidRequestError as e:
+            _log.error(e, exc_info=True)
+            continue
+        # Assume that a customer can only be added through the app and so has appropriate metadata.
+        fd_user_id = stripeCustomer["metadata"]["fd_user_id"]
+        user = db.session.get(User, int(fd_user_id))
+        if not user:
+            _log.info(f"Could not find local user {fd_user_id} for this subscription.")
+            continue
+        _log.info(
+            "Found local user ID %s, %s for this subscription."
+            % (user.id, user.full_name())
+        )
+        # Also assume that the Policy/Product don't need any further setup.
+        priceEntry = subEntry["items"]["data"][0]["price"]
+        fd_policy_id = priceEntry["metadata"]["fd_id"]
+        if fd_policy_id not in policies:
+            policies[fd_policy_id] = Policy.query.filter_by(code=fd_policy_id).first()
+        policy = policies[fd_policy_id]
+        if not policy:
             _log.info(
-                "Found manually entered Stripe Subscription %s, creating local License to match."
-                % subEntry["id"]
-            )
-            customerId = subEntry["customer"]
-            _log.info("Querying Stripe Customer", subEntry["customer"])
-            try:
-                stripeCustomer = stripe.Customer.retrieve(subEntry["customer"])
-            except stripe.error.InvalidRequestError as e:
-                _log.error(e, exc_info=True)
-                continue
-            # Assume that a customer can only be added through the app and so has appropriate metadata.
-            fd_user_id = stripeCustomer["metadata"]["fd_user_id"]
-            user = User.query.get(fd_user_id)
-            _log.info(
-                "Found local user ID %s, %s for this subscription."
-                % (user.id, user.full_name())
-            )
-            # Also assume that the Policy/Product don't need any further setup.
-            priceEntry = subEntry["items"]["data"][0]["price"]
-            fd_policy_id = priceEntry["metadata"]["fd_id"]
-            policy = Policy.query.filter_by(code=fd_policy_id)[0]
-            if not policy:
-                _log.info(
-                    "Could not find Policy %s that matched Stripe Price %s for Stripe Product %s"
-                    % (fd_policy_id, priceEntry["id"], priceEntry["product"])
-                )
-                continue
-            _log.info("")
-            license = License(
-                user=user, policy=policy, activated_at=datetime.datetime.utcnow()
+                "Could not find Policy %s that matched Stripe Price %s for Stripe Product %s"
+                % (fd_policy_id, priceEntry["id"], priceEntry["product"])
             )
-            db.session.add(license)
-            db.session.commit()
-            db.session.refresh(license)
-            _log.info(f"Created License {license.id} for user {user.id}.")
-            _log.info("Updating subscription metadata with License info.")
-            stripe.Subscription.modify(subEntry["id"], metadata={"fd_id": license.id})
+            continue
+        license = License(
+            user=user,
+            policy=policy,
+            activated_at=datetime.datetime.utcnow(),
+            stripe_id=subEntry["id"],
+        )
+        db.session.add(license)
+        db.session.commit()
+        _log.info(f"Created License {license.id} for user {user.id}.")
+        _log.info("Updating subscription metadata with License info.")
+        stripe.Subscription.modify(subEntry["id"], metadata={"fd_id": license.id})
+        num_created += 1
+    _log.info(f"Found {num_active} active Stripe subscriptions.")
     _log.info(f"Created {num_created} local licenses for Stripe subscriptions.")
     _log.info(f"Done.")
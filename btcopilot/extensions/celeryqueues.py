@@ -0,0 +1,130 @@
+"""
+Celery queue topology.
+
+Tasks are routed to lanes so interactive work never waits behind bulk jobs:
+
+    chat        follow-up work for a live chat turn (summary compaction)
+    extraction  extraction a user is waiting on (journal import)
+    batch       long LLM jobs (deep re-extraction, synthetic discussions)
+    eval        scoring runs (F1 snapshots)
+    celery      maintenance (Stripe sync, session expiry), the default queue
+
+Each lane is its own Redis queue with its own worker profile, started with
+
+    FD_CELERY_LANE=<lane> celery -A btcopilot.celery:celery worker -n <lane>@%h
+
+which consumes only that queue at the lane's concurrency and prefetch. A
+worker started without FD_CELERY_LANE consumes every queue, which is all local
+development needs.
+
+Long lanes prefetch one message per process: a prefetched message isn't
+acknowledged until it starts, and one that waits longer than the broker's
+visibility timeout would be delivered twice. Priorities order tasks sharing a
+queue and follow the Redis transport's convention, 0 being the highest.
+"""
+
+import os
+from dataclasses import dataclass
+
+from kombu import Exchange, Queue
+
+DEFAULT_LANE = "celery"
+DEFAULT_PRIORITY = 5
+PRIORITY_STEPS = list(range(10))
+
+
+@dataclass(frozen=True)
+class Lane:
+    concurrency: int
+    prefetch_multiplier: int
+
+
+@dataclass(frozen=True)
+class TaskPolicy:
+    lane: str
+    priority: int
+    soft_time_limit: int  # seconds; raises SoftTimeLimitExceeded in the task
+    time_limit: int  # seconds; the worker process is killed
+
+
+LANES = {
+    "chat": Lane(concurrency=4, prefetch_multiplier=4),
+    "extraction": Lane(concurrency=4, prefetch_multiplier=1),
+    "batch": Lane(concurrency=2, prefetch_multiplier=1),
+    "eval": Lane(concurrency=1, prefetch_multiplier=1),
+    DEFAULT_LANE: Lane(concurrency=2, prefetch_multiplier=4),
+}
+
+TASKS = {
+    "compact_chat_summary": TaskPolicy(
+        "chat", priority=0, soft_time_limit=120, time_limit=150
+    ),
+    "import_text": TaskPolicy(
+        "extraction", priority=0, soft_time_limit=600, time_limit=660
+    ),
+    "deep_reextract": TaskPolicy(
+        "batch", priority=3, soft_time_limit=1800, time_limit=1900
+    ),
+    "generate_synthetic_discussion": TaskPolicy(
+        "batch", priority=6, soft_time_limit=1200, time_limit=1300
+    ),
+    "refresh_f1_snapshots": TaskPolicy(
+        "eval", priority=DEFAULT_PRIORITY, soft_time_limit=600, time_limit=660
+    ),
+    "sync_with_stripe": TaskPolicy(
+        DEFAULT_LANE, priority=DEFAULT_PRIORITY, soft_time_limit=900, time_limit=960
+    ),
+    "expire_stale_sessions": TaskPolicy(
+        DEFAULT_LANE, priority=DEFAULT_PRIORITY, soft_time_limit=300, time_limit=360
+    ),
+}
+
+
+def celery_config() -> dict:
+    """Settings for celery.conf.update() that declare the lanes and routes."""
+    longest = max(policy.time_limit for policy in TASKS.values())
+    return dict(
+        task_queues=[
+            Queue(name, Exchange(name, type="direct"), routing_key=name)
+            for name in LANES
+        ],
+        task_default_queue=DEFAULT_LANE,
+        task_default_exchange=DEFAULT_LANE,
+        task_default_routing_key=DEFAULT_LANE,
+        # Routes apply to send_task() by name, which is how the app enqueues.
+        task_routes={
+            name: {"queue": policy.lane, "priority": policy.priority}
+            for name, policy in TASKS.items()
+        },
+        # Time limits are read from the task on the worker.
+        task_annotations={
+            name: {
+                "soft_time_limit": policy.soft_time_limit,
+                "time_limit": policy.time_limit,
+            }
+            for name, policy in TASKS.items()
+        },
+        broker_transport_options={
+            "queue_order_strategy": "priority",
+            "priority_steps": PRIORITY_STEPS,
+            "sep": ":",
+            "visibility_timeout": 2 * longest,
+        },
+    )
+
+
+def configure_worker(celery, lane: str | None = None):
+    """
+    Restrict this process to `lane` (default: FD_CELERY_LANE) with the lane's
+    concurrency and prefetch. Command-line worker options still win.
+    """
+    lane = lane or os.getenv("FD_CELERY_LANE")
+    if not lane:
+        return
+    if lane not in LANES:
+        raise ValueError(f"Unknown celery lane: {lane}")
+    celery.conf.update(
+        worker_concurrency=LANES[lane].concurrency,
+        worker_prefetch_multiplier=LANES[lane].prefetch_multiplier,
+    )
+    celery.select_queues([lane])
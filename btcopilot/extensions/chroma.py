@@ -1,11 +1,28 @@
 import os.path
+import threading
 
+from cachetools import LRUCache
 from flask import current_app
 
+COLLECTION_NAME = "chat_messages"
+QUERY_EMBEDDING_CACHE_SIZE = 4096
+
 
 class Chroma:
-    def __init__(self, app=None):
+    """
+    Similarity search over the chat_messages collection.
+
+    The collection handle is looked up once per app (process) and reused.
+    Query embeddings are computed here rather than inside collection.query()
+    so repeated questions hit an LRU instead of the embedding model, and any
+    number of questions go to Chroma in a single query call.
+    """
+
+    def __init__(self, app=None, embedding_function=None):
         self.client = None
+        self._embedding_function = embedding_function
+        self._embeddings = LRUCache(maxsize=QUERY_EMBEDDING_CACHE_SIZE)
+        self._lock = threading.Lock()
         if app is not None:
             self.init_app(app)
 
@@ -24,14 +41,71 @@ class Chroma:
         if not hasattr(app, "extensions"):
             app.extensions = {}
         app.extensions["chroma"] = client
+        app.extensions.pop("chroma_collection", None)
 
-    def similarity_search_with_score(self, question: str, k: int):
-        client = current_app.extensions["chroma"]
-        collection = client.get_or_create_collection(name="chat_messages")
-        results = collection.query(
-            query_texts=[question], n_results=k, include=["distances"]
-        )
-        if results["ids"][0]:
-            return list(zip(results["documents"][0], results["distances"][0]))
-        else:
+    def embedding_function(self):
+        if self._embedding_function is None:
+            from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+
+            self._embedding_function = DefaultEmbeddingFunction()
+        return self._embedding_function
+
+    def collection(self):
+        collection = current_app.extensions.get("chroma_collection")
+        if collection is None:
+            client = current_app.extensions["chroma"]
+            collection = client.get_or_create_collection(
+                name=current_app.config.get("CHROMA_COLLECTION", COLLECTION_NAME),
+                embedding_function=self.embedding_function(),
+            )
+            current_app.extensions["chroma_collection"] = collection
+        return collection
+
+    def embed(self, questions: list[str]) -> list:
+        """Query embeddings, computing only those not already cached."""
+        with self._lock:
+            cached = {q: self._embeddings.get(q) for q in questions}
+        missing = list(dict.fromkeys(q for q, v in cached.items() if v is None))
+        if missing:
+            vectors = self.embedding_function()(missing)
+            with self._lock:
+                for q, v in zip(missing, vectors):
+                    self._embeddings[q] = v
+                    cached[q] = v
+        return [cached[q] for q in questions]
+
+    def similarity_search_batch(
+        self, questions: list[str], k: int, **filters
+    ) -> list[list[tuple[str, float]]]:
+        """
+        Top-k (document, distance) pairs for each question, in one query.
+
+        `filters` are metadata equality constraints (e.g. discussion_id=3,
+        user_id=7) applied before ranking, so only matching messages are
+        searched.
+        """
+        if not questions:
             return []
+        results = self.collection().query(
+            query_embeddings=self.embed(questions),
+            n_results=k,
+            where=_where(filters),
+            include=["documents", "distances"],
+        )
+        return [
+            list(zip(documents, distances))
+            for documents, distances in zip(results["documents"], results["distances"])
+        ]
+
+    def similarity_search_with_score(self, question: str, k: int, **filters):
+        return self.similarity_search_batch([question], k, **filters)[0]
+
+
+def _where(filters: dict) -> dict | None:
+    clauses = [{key: value} for key, value in filters.items() if value is not None]
+    if not clauses:
+        return None
+    elif len(clauses) == 1:
+        return clauses[0]
+    else:
+        return {"$and": clauses}
@@ -53,55 +53,159 @@ def speaker_ids(people: list) -> tuple[int | None, int | None]:
     return user, assistant
 
 
-def components(people: list, pair_bonds: list) -> list[set[int]]:
+class FamilyGraph:
     """
-    Connected components of the family graph, sorted by non-default member
-    count descending — the main tree first, floating components after.
+    Incremental connectivity over the family graph: a union-find (path halving,
+    union by size) that is built once and then takes people, pair bonds and
+    parent links as they are added. The component count and the largest
+    component's non-default size are kept up to date on every union, so
+    lcc_percent() doesn't walk the graph.
+
+    Edges can arrive before their endpoints (a bond before its people, a child
+    before its parents bond); they are held until both ends exist. Removals are
+    not supported — project a hypothetical commit onto a copy() instead.
     """
-    default = default_ids(people)
-    nodes = {person_id(p) for p in people} - {None, 2}
-    adj: dict[int, set[int]] = {n: set() for n in nodes}
 
-    bond_by_id: dict[int, tuple[int | None, int | None]] = {}
-    for pb in pair_bonds:
+    def __init__(self, people: list = (), pair_bonds: list = ()):
+        self._parent: dict[int, int] = {}
+        # Non-default members per root.
+        self._size: dict[int, int] = {}
+        self._default: set[int] = set()
+        self._bonds: dict[int, set[tuple[int | None, int | None]]] = {}
+        self._children: dict[int, set[int]] = {}
+        # Missing node id -> the endpoints waiting to link to it.
+        self._pending: dict[int, list[int]] = {}
+        self.total = 0
+        self.count = 0
+        self.lcc = 0
+        self.add(people, pair_bonds)
+
+    def copy(self) -> "FamilyGraph":
+        other = FamilyGraph.__new__(FamilyGraph)
+        other._parent = dict(self._parent)
+        other._size = dict(self._size)
+        other._default = set(self._default)
+        other._bonds = {k: set(v) for k, v in self._bonds.items()}
+        other._children = {k: set(v) for k, v in self._children.items()}
+        other._pending = {k: list(v) for k, v in self._pending.items()}
+        other.total = self.total
+        other.count = self.count
+        other.lcc = self.lcc
+        return other
+
+    def add(self, people: list = (), pair_bonds: list = ()) -> None:
+        for pb in pair_bonds:
+            self.add_pair_bond(pb)
+        for p in people:
+            self.add_person(p)
+
+    def add_person(self, p) -> None:
+        """Add a person, or apply the parents link of one already present."""
+        pid = person_id(p)
+        if pid is None or pid == 2:
+            return
+        default = person_primary(p) or pid in (1, 2)
+        if pid not in self._parent:
+            self._parent[pid] = pid
+            self._size[pid] = 0 if default else 1
+            self.count += 1
+            if default:
+                self._default.add(pid)
+            else:
+                self.total += 1
+                self.lcc = max(self.lcc, 1)
+            for other in self._pending.pop(pid, ()):
+                self._link(pid, other)
+        elif default and pid not in self._default:
+            self._default.add(pid)
+            self.total -= 1
+            self._size[self._find(pid)] -= 1
+            self.lcc = max((self._size[r] for r in self._roots()), default=0)
+        self.set_parents(pid, person_parents(p))
+
+    def add_pair_bond(self, pb) -> None:
         a, b = bond_endpoints(pb)
         pb_id = bond_id(pb)
         if pb_id is not None:
-            bond_by_id[pb_id] = (a, b)
-        if a in nodes and b in nodes:
-            adj[a].add(b)
-            adj[b].add(a)
+            self._bonds.setdefault(pb_id, set()).add((a, b))
+            for child in self._children.get(pb_id, ()):
+                self._link(child, a)
+                self._link(child, b)
+        self._link(a, b)
+
+    def set_parents(self, pid: int, parents: int | None) -> None:
+        """Connect `pid` to both members of its parents bond."""
+        if parents is None:
+            return
+        self._children.setdefault(parents, set()).add(pid)
+        for a, b in self._bonds.get(parents, ()):
+            self._link(pid, a)
+            self._link(pid, b)
+
+    def components(self) -> list[set[int]]:
+        """
+        Connected components sorted by non-default member count descending —
+        the main tree first, floating components after.
+        """
+        by_root: dict[int, set[int]] = {}
+        for node in self._parent:
+            by_root.setdefault(self._find(node), set()).add(node)
+        roots = sorted(by_root, key=lambda r: self._size[r], reverse=True)
+        return [by_root[r] for r in roots]
+
+    def floating(self) -> tuple[set[int], list[set[int]]]:
+        """(main tree, the other components with at least one non-default
+        member)."""
+        comps = self.components()
+        if not comps:
+            return set(), []
+        return comps[0], [c for c in comps[1:] if c - self._default]
+
+    def lcc_percent(self) -> dict:
+        """See lcc_percent()."""
+        if self.count == 0 or self.total == 0:
+            return {"total": self.total, "components": 0, "lcc": 0, "lcc_pct": 0.0}
+        return {
+            "total": self.total,
+            "components": self.count,
+            "lcc": self.lcc,
+            "lcc_pct": round(self.lcc / self.total * 100, 1),
+        }
+
+    def _roots(self):
+        return (n for n, parent in self._parent.items() if n == parent)
+
+    def _find(self, x: int) -> int:
+        parent = self._parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def _link(self, a: int | None, b: int | None) -> None:
+        if a is None or b is None:
+            return
+        for missing, other in ((a, b), (b, a)):
+            if missing not in self._parent:
+                self._pending.setdefault(missing, []).append(other)
+                return
+        ra, rb = self._find(a), self._find(b)
+        if ra == rb:
+            return
+        if self._size[ra] < self._size[rb]:
+            ra, rb = rb, ra
+        self._parent[rb] = ra
+        self._size[ra] += self._size.pop(rb)
+        self.count -= 1
+        self.lcc = max(self.lcc, self._size[ra])
 
-    for p in people:
-        pid = person_id(p)
-        if pid not in nodes:
-            continue
-        bond = bond_by_id.get(person_parents(p))
-        if bond is None:
-            continue
-        for parent in bond:
-            if parent in nodes:
-                adj[pid].add(parent)
-                adj[parent].add(pid)
-
-    visited: set[int] = set()
-    comps: list[set[int]] = []
-    for start in nodes:
-        if start in visited:
-            continue
-        queue, comp = [start], {start}
-        visited.add(start)
-        while queue:
-            cur = queue.pop()
-            for nb in adj[cur]:
-                if nb not in visited:
-                    visited.add(nb)
-                    comp.add(nb)
-                    queue.append(nb)
-        comps.append(comp)
-
-    comps.sort(key=lambda c: len(c - default), reverse=True)
-    return comps
+
+def components(people: list, pair_bonds: list) -> list[set[int]]:
+    """
+    Connected components of the family graph, sorted by non-default member
+    count descending — the main tree first, floating components after.
+    """
+    return FamilyGraph(people, pair_bonds).components()
 
 
 def lcc_percent(people: list, pair_bonds: list) -> dict:
@@ -118,18 +222,4 @@ def lcc_percent(people: list, pair_bonds: list) -> dict:
         lcc: int — non-default members of the largest component
         lcc_pct: float — lcc / total * 100 (0.0 if total == 0)
     """
-    default = default_ids(people)
-    total = sum(
-        1 for p in people if person_id(p) is not None and person_id(p) not in default
-    )
-    comps = components(people, pair_bonds)
-    if not comps or total == 0:
-        return {"total": total, "components": 0, "lcc": 0, "lcc_pct": 0.0}
-
-    lcc = len(comps[0] - default)
-    return {
-        "total": total,
-        "components": len(comps),
-        "lcc": lcc,
-        "lcc_pct": round(lcc / total * 100, 1),
-    }
+    return FamilyGraph(people, pair_bonds).lcc_percent()
@@ -0,0 +1,440 @@
+"""
+Per-call LLM telemetry for every llmutil entry point.
+
+Each provider call opens a `track()` context that records model, caller tag,
+queue wait, time to first byte, total latency, token counts, retries and an
+estimated cost, then hands the finished `LLMCall` to every registered sink.
+
+Caller tags come from the `llm_caller()` context manager so call sites don't
+have to thread a tag through llmutil signatures; it rides on a contextvar and
+so survives asyncio.run() and gather():
+
+    with llm_caller("dock"):
+        asyncio.run(gemini_structured(...))
+
+Sinks:
+  - LogSink: one JSON line per call on the `btcopilot.llmtelemetry` logger.
+  - MetricsRegistry: in-process Prometheus-style counters and latency
+    histograms; `REGISTRY.render()` returns the text exposition format.
+  - SQLiteSink: appends rows to a SQLite file for offline reports. Enabled
+    when BTCOPILOT_LLM_TELEMETRY_DB is set.
+
+Report per caller (p50/p95 latency and TTFB, tokens, cost):
+
+    python -m btcopilot.llmtelemetry report /path/to/llm_calls.db
+"""
+
+import argparse
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+
+_log = logging.getLogger(__name__)
+
+
+# USD per million tokens: (input, output, cached input). Estimates only; the
+# first matching prefix wins so list specific models before families.
+MODEL_PRICES = [
+    ("claude-opus", (5.0, 25.0, 0.5)),
+    ("claude-sonnet", (3.0, 15.0, 0.3)),
+    ("claude-haiku", (1.0, 5.0, 0.1)),
+    ("claude-", (10.0, 50.0, 1.0)),
+    ("gemini-3.1-flash-lite", (0.10, 0.40, 0.025)),
+    ("gemini-2.5-flash", (0.30, 2.50, 0.075)),
+    ("gemini-", (0.50, 3.00, 0.125)),
+    ("gpt-4o-mini", (0.15, 0.60, 0.075)),
+]
+CACHE_WRITE_MULTIPLIER = 1.25  # Anthropic bills cache writes at 1.25x input
+
+
+def estimate_cost(
+    model: str,
+    input_tokens: int,
+    output_tokens: int,
+    cached_tokens: int = 0,
+    cache_write_tokens: int = 0,
+) -> float:
+    for prefix, (inp, out, cached) in MODEL_PRICES:
+        if model.startswith(prefix):
+            break
+    else:
+        return 0.0
+    return (
+        input_tokens * inp
+        + cache_write_tokens * inp * CACHE_WRITE_MULTIPLIER
+        + cached_tokens * cached
+        + output_tokens * out
+    ) / 1e6
+
+
+@dataclass
+class LLMCall:
+    """One provider call. Times are seconds; `queue_wait` is entry into the
+    llmutil function until the first request leaves, `ttfb` until the first
+    response byte (whole response for non-streaming calls)."""
+
+    function: str
+    model: str
+    caller: str
+    started_at: float = field(default_factory=time.time)
+    queue_wait: float | None = None
+    ttfb: float | None = None
+    latency: float | None = None
+    input_tokens: int = 0
+    output_tokens: int = 0
+    thinking_tokens: int = 0
+    cached_tokens: int = 0
+    cache_write_tokens: int = 0
+    retries: int = 0
+    cost_usd: float = 0.0
+    error: str | None = None
+
+    def __post_init__(self):
+        self._t0 = time.perf_counter()
+
+    def mark_sent(self):
+        if self.queue_wait is None:
+            self.queue_wait = time.perf_counter() - self._t0
+
+    def mark_first_byte(self):
+        if self.ttfb is None:
+            self.ttfb = time.perf_counter() - self._t0
+
+    def add_usage(
+        self,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        thinking_tokens: int = 0,
+        cached_tokens: int = 0,
+        cache_write_tokens: int = 0,
+    ):
+        self.input_tokens += input_tokens or 0
+        self.output_tokens += output_tokens or 0
+        self.thinking_tokens += thinking_tokens or 0
+        self.cached_tokens += cached_tokens or 0
+        self.cache_write_tokens += cache_write_tokens or 0
+
+    def finish(self):
+        self.latency = time.perf_counter() - self._t0
+        self.cost_usd = estimate_cost(
+            self.model,
+            self.input_tokens,
+            self.output_tokens + self.thinking_tokens,
+            self.cached_tokens,
+            self.cache_write_tokens,
+        )
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+# --- Sinks ---
+
+
+class LogSink:
+    def __init__(self, logger: logging.Logger | None = None):
+        self.logger = logger or _log
+
+    def record(self, call: LLMCall):
+        self.logger.info(json.dumps(call.as_dict()))
+
+
+class MetricsRegistry:
+    """Minimal Prometheus-style registry: counters and cumulative latency
+    histograms labelled by (caller, model)."""
+
+    BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300, float("inf"))
+    COUNTERS = (
+        "calls",
+        "errors",
+        "retries",
+        "input_tokens",
+        "output_tokens",
+        "thinking_tokens",
+        "cached_tokens",
+        "cost_usd",
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.counters: dict[tuple[str, str, str], float] = {}
+        self.histograms: dict[tuple[str, str], list] = {}
+        self.timings: dict[tuple[str, tuple], list] = {}
+
+    def _observe(self, hist: list, seconds: float):
+        for i, bound in enumerate(self.BUCKETS):
+            if seconds <= bound:
+                hist[i] += 1
+        hist[-2] += seconds
+        hist[-1] += 1
+
+    def observe(self, name: str, seconds: float, **labels):
+        """Latency outside a single LLM call (e.g. copilot retrieval), kept
+        as a `{name}_seconds` histogram with the given labels."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self.timings.setdefault(key, [0] * len(self.BUCKETS) + [0.0, 0])
+            self._observe(hist, seconds)
+
+    def record(self, call: LLMCall):
+        labels = (call.caller, call.model)
+        values = {
+            "calls": 1,
+            "errors": 1 if call.error else 0,
+            "retries": call.retries,
+            "input_tokens": call.input_tokens,
+            "output_tokens": call.output_tokens,
+            "thinking_tokens": call.thinking_tokens,
+            "cached_tokens": call.cached_tokens,
+            "cost_usd": call.cost_usd,
+        }
+        with self._lock:
+            for name, value in values.items():
+                key = (name, *labels)
+                self.counters[key] = self.counters.get(key, 0) + value
+            # [bucket counts..., sum, count]
+            hist = self.histograms.setdefault(
+                labels, [0] * len(self.BUCKETS) + [0.0, 0]
+            )
+            self._observe(hist, call.latency)
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name in self.COUNTERS:
+                lines.append(f"# TYPE llm_{name}_total counter")
+                for (n, caller, model), value in sorted(self.counters.items()):
+                    if n == name:
+                        lines.append(
+                            f'llm_{name}_total{{caller="{caller}",model="{model}"}} {value}'
+                        )
+            lines.append("# TYPE llm_latency_seconds histogram")
+            for (caller, model), hist in sorted(self.histograms.items()):
+                labels = f'caller="{caller}",model="{model}"'
+                for bound, count in zip(self.BUCKETS, hist):
+                    le = "+Inf" if bound == float("inf") else bound
+                    lines.append(
+                        f'llm_latency_seconds_bucket{{{labels},le="{le}"}} {count}'
+                    )
+                lines.append(f"llm_latency_seconds_sum{{{labels}}} {hist[-2]}")
+                lines.append(f"llm_latency_seconds_count{{{labels}}} {hist[-1]}")
+            for name in sorted({name for name, _ in self.timings}):
+                lines.append(f"# TYPE {name}_seconds histogram")
+                for (n, pairs), hist in sorted(self.timings.items()):
+                    if n != name:
+                        continue
+                    labels = ",".join(f'{k}="{v}"' for k, v in pairs)
+                    sep = "," if labels else ""
+                    for bound, count in zip(self.BUCKETS, hist):
+                        le = "+Inf" if bound == float("inf") else bound
+                        lines.append(
+                            f'{name}_seconds_bucket{{{labels}{sep}le="{le}"}} {count}'
+                        )
+                    lines.append(f"{name}_seconds_sum{{{labels}}} {hist[-2]}")
+                    lines.append(f"{name}_seconds_count{{{labels}}} {hist[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+SQLITE_COLUMNS = [
+    "function",
+    "model",
+    "caller",
+    "started_at",
+    "queue_wait",
+    "ttfb",
+    "latency",
+    "input_tokens",
+    "output_tokens",
+    "thinking_tokens",
+    "cached_tokens",
+    "cache_write_tokens",
+    "retries",
+    "cost_usd",
+    "error",
+]
+
+
+class SQLiteSink:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS llm_calls ({', '.join(SQLITE_COLUMNS)})"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def record(self, call: LLMCall):
+        row = call.as_dict()
+        placeholders = ", ".join("?" for _ in SQLITE_COLUMNS)
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                f"INSERT INTO llm_calls ({', '.join(SQLITE_COLUMNS)}) "
+                f"VALUES ({placeholders})",
+                [row[c] for c in SQLITE_COLUMNS],
+            )
+
+
+REGISTRY = MetricsRegistry()
+_sinks: list = [LogSink(), REGISTRY]
+if os.getenv("BTCOPILOT_LLM_TELEMETRY_DB"):
+    _sinks.append(SQLiteSink(os.environ["BTCOPILOT_LLM_TELEMETRY_DB"]))
+
+
+def add_sink(sink):
+    _sinks.append(sink)
+
+
+def remove_sink(sink):
+    if sink in _sinks:
+        _sinks.remove(sink)
+
+
+# --- Instrumentation ---
+
+
+_caller: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "llm_caller", default=None
+)
+
+
+@contextlib.contextmanager
+def llm_caller(tag: str):
+    """Tag every LLM call made inside this block (including in tasks spawned
+    from it) with `tag`."""
+    token = _caller.set(tag)
+    try:
+        yield
+    finally:
+        _caller.reset(token)
+
+
+def current_caller() -> str | None:
+    return _caller.get()
+
+
+@contextlib.contextmanager
+def track(function: str, model: str):
+    call = LLMCall(function=function, model=model, caller=_caller.get() or function)
+    try:
+        yield call
+    except BaseException as e:
+        call.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        call.finish()
+        for sink in list(_sinks):
+            try:
+                sink.record(call)
+            except Exception:
+                _log.exception(f"LLM telemetry sink {sink!r} failed")
+
+
+# --- Report ---
+
+
+def _percentile(values: list[float], pct: float) -> float | None:
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return None
+    k = (len(values) - 1) * pct
+    lo = int(k)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def report(path: str, since: float | None = None) -> list[dict]:
+    """Aggregate a SQLiteSink file per caller, slowest p95 first."""
+    with sqlite3.connect(path) as conn:
+        conn.row_factory = sqlite3.Row
+        query = "SELECT * FROM llm_calls"
+        params = []
+        if since is not None:
+            query += " WHERE started_at >= ?"
+            params.append(since)
+        rows = conn.execute(query, params).fetchall()
+
+    by_caller: dict[str, list] = {}
+    for row in rows:
+        by_caller.setdefault(row["caller"], []).append(row)
+
+    out = []
+    for caller, calls in by_caller.items():
+        latencies = [c["latency"] for c in calls]
+        ttfbs = [c["ttfb"] for c in calls]
+        out.append(
+            {
+                "caller": caller,
+                "calls": len(calls),
+                "errors": sum(1 for c in calls if c["error"]),
+                "retries": sum(c["retries"] for c in calls),
+                "p50_latency": _percentile(latencies, 0.5),
+                "p95_latency": _percentile(latencies, 0.95),
+                "p50_ttfb": _percentile(ttfbs, 0.5),
+                "p95_ttfb": _percentile(ttfbs, 0.95),
+                "total_latency": sum(l for l in latencies if l is not None),
+                "input_tokens": sum(c["input_tokens"] for c in calls),
+                "output_tokens": sum(c["output_tokens"] for c in calls),
+                "cached_tokens": sum(c["cached_tokens"] for c in calls),
+                "cost_usd": sum(c["cost_usd"] for c in calls),
+            }
+        )
+    out.sort(key=lambda r: r["p95_latency"] or 0, reverse=True)
+    return out
+
+
+def format_report(rows: list[dict]) -> str:
+    def fmt(v):
+        return "-" if v is None else f"{v:.2f}"
+
+    header = (
+        f"{'caller':<32} {'calls':>6} {'err':>4} {'retry':>5} "
+        f"{'p50 s':>7} {'p95 s':>7} {'p50 ttfb':>8} {'p95 ttfb':>8} "
+        f"{'in tok':>10} {'out tok':>9} {'cached':>10} {'cost $':>8}"
+    )
+    lines = [header, "-" * len(header)]
+    for r in rows:
+        lines.append(
+            f"{r['caller']:<32} {r['calls']:>6} {r['errors']:>4} {r['retries']:>5} "
+            f"{fmt(r['p50_latency']):>7} {fmt(r['p95_latency']):>7} "
+            f"{fmt(r['p50_ttfb']):>8} {fmt(r['p95_ttfb']):>8} "
+            f"{r['input_tokens']:>10} {r['output_tokens']:>9} "
+            f"{r['cached_tokens']:>10} {r['cost_usd']:>8.2f}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM call telemetry")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rep = sub.add_parser("report", help="p50/p95 latency and cost per caller")
+    rep.add_argument(
+        "db",
+        nargs="?",
+        default=os.getenv("BTCOPILOT_LLM_TELEMETRY_DB"),
+        help="SQLite file written by SQLiteSink",
+    )
+    rep.add_argument("--hours", type=float, help="Only calls in the last N hours")
+    rep.add_argument("--json", action="store_true", help="Output JSON")
+    args = parser.parse_args()
+
+    if not args.db:
+        parser.error("no db path given and BTCOPILOT_LLM_TELEMETRY_DB unset")
+    since = time.time() - args.hours * 3600 if args.hours else None
+    rows = report(args.db, since=since)
+    print(json.dumps(rows, indent=2) if args.json else format_report(rows))
+
+
+if __name__ == "__main__":
+    main()
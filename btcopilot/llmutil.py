@@ -1,14 +1,19 @@
 import asyncio
+import contextvars
+import hashlib
 import os
 import enum
 import json
 import time
 import logging
+import threading
 from dataclasses import fields, MISSING
 from typing import get_origin, get_args, Union
 
+from cachetools import TTLCache
 from google.genai.errors import ClientError, ServerError
 
+from btcopilot.llmtelemetry import track
 from btcopilot.schema import from_dict
 
 _log = logging.getLogger(__name__)
@@ -58,6 +63,34 @@ class OutputTruncatedError(Exception):
     pass
 
 
+def _tokens(usage, name: str) -> int:
+    """Token count from a provider usage object; absent/None counts as 0."""
+    return int(getattr(usage, name, None) or 0)
+
+
+def _record_claude_usage(call, usage) -> None:
+    call.add_usage(
+        input_tokens=_tokens(usage, "input_tokens"),
+        output_tokens=_tokens(usage, "output_tokens"),
+        cached_tokens=_tokens(usage, "cache_read_input_tokens"),
+        cache_write_tokens=_tokens(usage, "cache_creation_input_tokens"),
+    )
+
+
+def _record_gemini_call_usage(call, response) -> None:
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    cached = _tokens(usage, "cached_content_token_count")
+    call.add_usage(
+        # prompt_token_count includes the cached portion
+        input_tokens=_tokens(usage, "prompt_token_count") - cached,
+        output_tokens=_tokens(usage, "candidates_token_count"),
+        thinking_tokens=_tokens(usage, "thoughts_token_count"),
+        cached_tokens=cached,
+    )
+
+
 # --- JSON Schema generation for Gemini structured output ---
 
 
@@ -279,6 +312,84 @@ def _prepare_claude_messages(prompt=None, turns=None):
     return merged
 
 
+# --- Prompt-prefix caching ---
+#
+# Extraction retries and chat turns resend a large, byte-identical prefix
+# (instructions, committed state, conversation). Callers hand that part over as
+# `prefix` and only the per-attempt tail as `prompt`; providers cache the
+# prefix. Anthropic: ephemeral cache_control breakpoint (~5 min TTL, reads bill
+# at 0.1x). Gemini: an explicit context cache, created the first time a prefix
+# is reused so one-shot prompts never pay for cache storage.
+
+CLAUDE_CACHE_CONTROL = {"type": "ephemeral"}
+
+GEMINI_CACHE_TTL = 600  # seconds
+GEMINI_CACHE_MIN_CHARS = 16_000  # ~4k tokens, above every model's cache minimum
+GEMINI_PREFIX_CACHE_SIZE = 1024
+
+# (model, prefix sha256) -> cache name, or None when seen once but not cached.
+# Entries expire a little before the server-side cache so we never reference a
+# dead one, and the least recently used go first once the map is full.
+_gemini_prefix_caches = TTLCache(
+    maxsize=GEMINI_PREFIX_CACHE_SIZE, ttl=GEMINI_CACHE_TTL - 30
+)
+_gemini_prefix_lock = threading.Lock()
+
+
+def _prefix_key(model: str, prefix: str) -> tuple[str, str]:
+    return model, hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+
+
+async def _gemini_cached_prefix(
+    client, model: str, prefix: str, create: bool = True
+) -> str | None:
+    """Return an explicit cache name for `prefix`, creating it on first reuse.
+
+    Returns None when the prefix is too small to be cacheable, on first sight,
+    when `create` is False, or when cache creation fails (the caller then
+    sends the prefix inline).
+    """
+    from google.genai import types
+
+    if len(prefix) < GEMINI_CACHE_MIN_CHARS:
+        return None
+    key = _prefix_key(model, prefix)
+    with _gemini_prefix_lock:
+        seen = key in _gemini_prefix_caches
+        name = _gemini_prefix_caches.get(key)
+        if not seen:
+            _gemini_prefix_caches[key] = None
+    if not seen or not create:
+        return None
+    if name:
+        return name
+    try:
+        cache = await client.aio.caches.create(
+            model=model,
+            config=types.CreateCachedContentConfig(
+                contents=[
+                    types.Content(role="user", parts=[types.Part(text=prefix)])
+                ],
+                ttl=f"{GEMINI_CACHE_TTL}s",
+            ),
+        )
+    except (ClientError, ServerError) as e:
+        _log.warning(f"Gemini context cache creation failed, sending inline: {e}")
+        return None
+    with _gemini_prefix_lock:
+        _gemini_prefix_caches[key] = cache.name
+    return cache.name
+
+
+def _mark_claude_cache_breakpoint(messages: list[dict]) -> None:
+    """Put a cache_control breakpoint on the last message so the next turn
+    reads the whole prior conversation from cache."""
+    last = messages[-1]
+    if isinstance(last["content"], str):
+        last["content"] = [{"type": "text", "text": last["content"]}]
+    last["content"][-1]["cache_control"] = CLAUDE_CACHE_CONTROL
+
+
 async def claude_text(prompt=None, **kwargs):
     """Generate unstructured text using Claude (Anthropic API).
 
@@ -293,6 +404,9 @@ async def claude_text(prompt=None, **kwargs):
     When CLAUDE_THINKING_ENABLED, adaptive extended thinking is on (forces
     temperature=1.0 per Anthropic API). Otherwise thinking is off and
     temperature from kwargs is respected.
+
+    The system instruction and, for multi-turn calls, the conversation so far
+    carry cache_control breakpoints so the next turn reads them from cache.
     """
     start_time = time.time()
     model = kwargs.get("model", RESPONSE_MODEL)
@@ -314,10 +428,22 @@ async def claude_text(prompt=None, **kwargs):
         temperature = kwargs.get("temperature", 0.45)
         api_kwargs["temperature"] = temperature
     if system_instruction:
-        api_kwargs["system"] = system_instruction
+        api_kwargs["system"] = [
+            {
+                "type": "text",
+                "text": system_instruction,
+                "cache_control": CLAUDE_CACHE_CONTROL,
+            }
+        ]
+    if kwargs.get("turns"):
+        _mark_claude_cache_breakpoint(messages)
 
     try:
-        response = await client.messages.create(**api_kwargs)
+        with track("claude_text", resolved_model) as call:
+            call.mark_sent()
+            response = await client.messages.create(**api_kwargs)
+            call.mark_first_byte()
+            _record_claude_usage(call, getattr(response, "usage", None))
         content = "".join(
             block.text for block in response.content if block.type == "text"
         )
@@ -365,44 +491,60 @@ def response_text_sync(prompt=None, model=None, **kwargs):
 # --- Public API ---
 
 
-async def gemini_structured(prompt, response_format, large=False, model=None):
-    from google.genai import types
-
+async def gemini_structured(
+    prompt, response_format, large=False, model=None, prefix: str | None = None
+):
+    """Structured extraction call. `prefix`, when given, is the stable part of
+    the prompt sent before `prompt` and cached provider-side (see
+    Prompt-prefix caching above)."""
     model = model or (EXTRACTION_MODEL_LARGE if large else EXTRACTION_MODEL)
+    collector = batch_collector.get()
+    if collector is not None:
+        return await collector.submit(model, prompt, response_format, prefix)
     if _is_claude_model(model):
+        if prefix:
+            return await claude_structured(
+                prompt, response_format, model, prefix=prefix
+            )
         return await claude_structured(prompt, response_format, model)
 
     start_time = time.time()
-    response_schema = dataclass_to_json_schema(
-        response_format, PDP_SCHEMA_DESCRIPTIONS, PDP_FORCE_REQUIRED
-    )
-
-    client = _client()
-    config = types.GenerateContentConfig(
-        temperature=0.1,
-        max_output_tokens=65536,
-        response_mime_type="application/json",
-        response_schema=response_schema,
-        thinking_config=types.ThinkingConfig(thinking_budget=1024),
-    )
-
-    for attempt in range(GEMINI_MAX_RETRIES):
-        try:
-            response = await client.aio.models.generate_content(
-                model=model,
-                contents=prompt,
-                config=config,
-            )
-            break
-        except ServerError as e:
-            if attempt == GEMINI_MAX_RETRIES - 1:
-                raise
-            delay = GEMINI_RETRY_BACKOFF * (2**attempt)
-            _log.warning(
-                f"Gemini ServerError (attempt {attempt + 1}/{GEMINI_MAX_RETRIES}), "
-                f"retrying in {delay}s: {e}"
+    with track("gemini_structured", model) as call:
+        client = _client()
+        config = gemini_structured_config(response_format)
+        contents = prompt
+        if prefix:
+            # Gemini rejects empty contents, so a prefix-only call is only noted.
+            cache_name = await _gemini_cached_prefix(
+                client, model, prefix, create=bool(prompt)
             )
-            await asyncio.sleep(delay)
+            if cache_name:
+                config.cached_content = cache_name
+            else:
+                contents = prefix + prompt
+
+        call.mark_sent()
+        for attempt in range(GEMINI_MAX_RETRIES):
+            try:
+                response = await client.aio.models.generate_content(
+                    model=model,
+                    contents=contents,
+                    config=config,
+                )
+                break
+            except ServerError as e:
+                if attempt == GEMINI_MAX_RETRIES - 1:
+                    raise
+                call.retries += 1
+                delay = GEMINI_RETRY_BACKOFF * (2**attempt)
+                _log.warning(
+                    f"Gemini ServerError (attempt {attempt + 1}/{GEMINI_MAX_RETRIES}), "
+                    f"retrying in {delay}s: {e}"
+                )
+                await asyncio.sleep(delay)
+        call.mark_first_byte()
+        _record_gemini_usage(response)
+        _record_gemini_call_usage(call, response)
 
     _log.debug(f"Completed response in {time.time() - start_time} seconds")
     finish_reason = response.candidates[0].finish_reason
@@ -424,7 +566,72 @@ def gemini_structured_sync(prompt, response_format, large=False):
     return asyncio.run(gemini_structured(prompt, response_format, large=large))
 
 
-CLAUDE_STRUCTURED_USAGE = {"calls": 0, "input_tokens": 0, "output_tokens": 0}
+def gemini_structured_config(response_format):
+    from google.genai import types
+
+    response_schema = dataclass_to_json_schema(
+        response_format, PDP_SCHEMA_DESCRIPTIONS, PDP_FORCE_REQUIRED
+    )
+    return types.GenerateContentConfig(
+        temperature=0.1,
+        max_output_tokens=65536,
+        response_mime_type="application/json",
+        response_schema=response_schema,
+        thinking_config=types.ThinkingConfig(thinking_budget=1024),
+    )
+
+
+def parse_structured_text(text: str, response_format):
+    """Parse a structured-extraction reply, tolerating a markdown fence."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1].rsplit("```", 1)[0]
+    return from_dict(response_format, json.loads(text))
+
+
+# --- Batch collection ---
+#
+# Offline evaluations run extract_full() over a whole corpus. When a collector
+# is set, gemini_structured() hands each request to it instead of calling the
+# provider, so requests can be submitted together through a batch API (see
+# training/batch_extract.py). The collector's submit() returns the parsed
+# result just like gemini_structured() would.
+
+batch_collector: contextvars.ContextVar = contextvars.ContextVar(
+    "llm_batch_collector", default=None
+)
+
+
+GEMINI_STRUCTURED_USAGE = {
+    "calls": 0,
+    "input_tokens": 0,
+    "output_tokens": 0,
+    "cached_input_tokens": 0,
+}
+
+
+def _record_gemini_usage(response) -> None:
+    usage = getattr(response, "usage_metadata", None)
+    GEMINI_STRUCTURED_USAGE["calls"] += 1
+    if usage is None:
+        return
+    GEMINI_STRUCTURED_USAGE["input_tokens"] += _tokens(usage, "prompt_token_count")
+    GEMINI_STRUCTURED_USAGE["output_tokens"] += _tokens(
+        usage, "candidates_token_count"
+    )
+    GEMINI_STRUCTURED_USAGE["cached_input_tokens"] += _tokens(
+        usage, "cached_content_token_count"
+    )
+
+
+CLAUDE_STRUCTURED_USAGE = {
+    "calls": 0,
+    "input_tokens": 0,
+    "output_tokens": 0,
+    "cache_read_input_tokens": 0,
+    "cache_creation_input_tokens": 0,
+    "cost_usd": 0.0,
+}
 
 # Constrained decoding (output_config.format) rejects the PDPDeltas schema:
 # >16 nullable params is over the union limit, and subset-required objects
@@ -437,28 +644,55 @@ OUTPUT FORMAT: Respond with ONLY a single valid JSON object conforming to this J
 {schema}"""
 
 
-async def claude_structured(prompt, response_format, model):
-    start_time = time.time()
+def claude_structured_content(prompt, response_format, prefix: str | None = None):
     schema = dataclass_to_json_schema(
         response_format, PDP_SCHEMA_DESCRIPTIONS, PDP_FORCE_REQUIRED
     )
     full_prompt = prompt + CLAUDE_JSON_INSTRUCTION.format(schema=json.dumps(schema))
-
-    client = _extraction_anthropic_client()
-    async with client.messages.stream(
-        model=model,
-        max_tokens=32000,
-        thinking={"type": "adaptive"},
-        messages=[{"role": "user", "content": full_prompt}],
-    ) as stream:
-        response = await stream.get_final_message()
-
+    if not prefix:
+        return full_prompt
+    return [
+        {"type": "text", "text": prefix, "cache_control": CLAUDE_CACHE_CONTROL},
+        {"type": "text", "text": full_prompt},
+    ]
+
+
+async def claude_structured(
+    prompt, response_format, model, prefix: str | None = None
+):
+    """`prefix`, when given, goes first in its own cache_control block so
+    retries with a different `prompt` tail read it from cache."""
+    start_time = time.time()
+    content = claude_structured_content(prompt, response_format, prefix)
+
+    with track("claude_structured", model) as call:
+        client = _extraction_anthropic_client()
+        call.mark_sent()
+        async with client.messages.stream(
+            model=model,
+            max_tokens=32000,
+            thinking={"type": "adaptive"},
+            messages=[{"role": "user", "content": content}],
+        ) as stream:
+            async for _event in stream:
+                call.mark_first_byte()
+            response = await stream.get_final_message()
+        call.mark_first_byte()
+        _record_claude_usage(call, response.usage)
+
+    usage = response.usage
+    cache_read = _tokens(usage, "cache_read_input_tokens")
+    cache_write = _tokens(usage, "cache_creation_input_tokens")
     CLAUDE_STRUCTURED_USAGE["calls"] += 1
-    CLAUDE_STRUCTURED_USAGE["input_tokens"] += response.usage.input_tokens
-    CLAUDE_STRUCTURED_USAGE["output_tokens"] += response.usage.output_tokens
+    CLAUDE_STRUCTURED_USAGE["input_tokens"] += usage.input_tokens
+    CLAUDE_STRUCTURED_USAGE["output_tokens"] += usage.output_tokens
+    CLAUDE_STRUCTURED_USAGE["cache_read_input_tokens"] += cache_read
+    CLAUDE_STRUCTURED_USAGE["cache_creation_input_tokens"] += cache_write
+    CLAUDE_STRUCTURED_USAGE["cost_usd"] += call.cost_usd
     _log.info(
         f"claude_structured({model}): {time.time() - start_time:.1f}s, "
-        f"in={response.usage.input_tokens} out={response.usage.output_tokens}"
+        f"in={usage.input_tokens} out={usage.output_tokens} "
+        f"cache_read={cache_read} cache_write={cache_write}"
     )
 
     if response.stop_reason == "max_tokens":
@@ -468,11 +702,8 @@ async def claude_structured(prompt, response_format, model):
     if response.stop_reason == "refusal":
         raise RuntimeError(f"claude_structured refusal: {response.stop_details}")
 
-    text = next(b.text for b in response.content if b.type == "text").strip()
-    if text.startswith("```"):
-        text = text.split("\n", 1)[1].rsplit("```", 1)[0]
-    data = json.loads(text)
-    result = from_dict(response_format, data)
+    text = next(b.text for b in response.content if b.type == "text")
+    result = parse_structured_text(text, response_format)
     _log.debug(f"claude_structured(): --> {result}")
     return result
 
@@ -503,25 +734,30 @@ async def gemini_text(prompt=None, **kwargs):
     else:
         contents = prompt
 
-    client = _client()
-    for attempt in range(GEMINI_MAX_RETRIES):
-        try:
-            resolved_model = kwargs.get("model", GEMINI_RESPONSE_MODEL)
-            response = await client.aio.models.generate_content(
-                model=resolved_model,
-                contents=contents,
-                config=config,
-            )
-            break
-        except ServerError as e:
-            if attempt == GEMINI_MAX_RETRIES - 1:
-                raise
-            delay = GEMINI_RETRY_BACKOFF * (2**attempt)
-            _log.warning(
-                f"Gemini ServerError (attempt {attempt + 1}/{GEMINI_MAX_RETRIES}), "
-                f"retrying in {delay}s: {e}"
-            )
-            await asyncio.sleep(delay)
+    with track("gemini_text", model) as call:
+        client = _client()
+        call.mark_sent()
+        for attempt in range(GEMINI_MAX_RETRIES):
+            try:
+                resolved_model = kwargs.get("model", GEMINI_RESPONSE_MODEL)
+                response = await client.aio.models.generate_content(
+                    model=resolved_model,
+                    contents=contents,
+                    config=config,
+                )
+                break
+            except ServerError as e:
+                if attempt == GEMINI_MAX_RETRIES - 1:
+                    raise
+                call.retries += 1
+                delay = GEMINI_RETRY_BACKOFF * (2**attempt)
+                _log.warning(
+                    f"Gemini ServerError (attempt {attempt + 1}/{GEMINI_MAX_RETRIES}), "
+                    f"retrying in {delay}s: {e}"
+                )
+                await asyncio.sleep(delay)
+        call.mark_first_byte()
+        _record_gemini_call_usage(call, response)
 
     content = response.text
     _log.debug(f"Completed response in {time.time() - start_time} seconds")
@@ -552,33 +788,39 @@ async def gemini_calibration(prompt, system_instruction=None, deep=False, max_ou
     if system_instruction:
         config.system_instruction = system_instruction
 
-    client = _client()
-    for attempt in range(GEMINI_MAX_RETRIES):
-        try:
-            response = await client.aio.models.generate_content(
-                model=CALIBRATION_MODEL,
-                contents=prompt,
-                config=config,
-            )
-            break
-        except ClientError as e:
-            if "RESOURCE_EXHAUSTED" not in str(e) or attempt == GEMINI_MAX_RETRIES - 1:
-                raise
-            delay = 30 * (attempt + 1)
-            _log.warning(
-                f"Gemini rate limit (attempt {attempt + 1}/{GEMINI_MAX_RETRIES}), "
-                f"retrying in {delay}s"
-            )
-            await asyncio.sleep(delay)
-        except ServerError as e:
-            if attempt == GEMINI_MAX_RETRIES - 1:
-                raise
-            delay = GEMINI_RETRY_BACKOFF * (2**attempt)
-            _log.warning(
-                f"Gemini ServerError (attempt {attempt + 1}/{GEMINI_MAX_RETRIES}), "
-                f"retrying in {delay}s: {e}"
-            )
-            await asyncio.sleep(delay)
+    with track("gemini_calibration", CALIBRATION_MODEL) as call:
+        client = _client()
+        call.mark_sent()
+        for attempt in range(GEMINI_MAX_RETRIES):
+            try:
+                response = await client.aio.models.generate_content(
+                    model=CALIBRATION_MODEL,
+                    contents=prompt,
+                    config=config,
+                )
+                break
+            except ClientError as e:
+                if "RESOURCE_EXHAUSTED" not in str(e) or attempt == GEMINI_MAX_RETRIES - 1:
+                    raise
+                call.retries += 1
+                delay = 30 * (attempt + 1)
+                _log.warning(
+                    f"Gemini rate limit (attempt {attempt + 1}/{GEMINI_MAX_RETRIES}), "
+                    f"retrying in {delay}s"
+                )
+                await asyncio.sleep(delay)
+            except ServerError as e:
+                if attempt == GEMINI_MAX_RETRIES - 1:
+                    raise
+                call.retries += 1
+                delay = GEMINI_RETRY_BACKOFF * (2**attempt)
+                _log.warning(
+                    f"Gemini ServerError (attempt {attempt + 1}/{GEMINI_MAX_RETRIES}), "
+                    f"retrying in {delay}s: {e}"
+                )
+                await asyncio.sleep(delay)
+        call.mark_first_byte()
+        _record_gemini_call_usage(call, response)
 
     content = response.text
     _log.debug(f"gemini_calibration() completed in {time.time() - start_time}s")
@@ -17,8 +17,11 @@ def main_celery():
 
     Usage:
         celery -A btcopilot.celery:celery worker --loglevel=info
+        FD_CELERY_LANE=batch celery -A btcopilot.celery:celery worker -n batch@%h
         celery -A btcopilot.celery:celery beat --loglevel=info
         celery -A btcopilot.celery:celery flower
+
+    Lanes and their worker profiles are in btcopilot.extensions.celeryqueues.
     """
 
     import os, sys
@@ -1,3 +1,4 @@
+import copy
 import datetime
 import decimal
 import logging
@@ -13,6 +14,135 @@ from btcopilot.extensions import db
 _log = logging.getLogger(__name__)
 
 
+# Values as_dict() passes through untouched, so plain columns can skip
+# _marshal_attr().
+_PLAIN_TYPES = frozenset(
+    (str, int, float, bool, type(None), datetime.datetime, datetime.date)
+)
+
+# (model class, frozen include/exclude/only) -> _Plan
+_plans = {}
+_mappers = {}
+
+
+class _Plan:
+    """
+    What as_dict() serializes for one model class and include/exclude/only
+    spec. `fields` are (attr, kwargs, check) in output order, where `check`
+    marks attributes that aren't mapped and so must be looked up on each
+    instance; `missing` are requested attributes that are never serialized.
+    """
+
+    __slots__ = ("fields", "missing")
+
+    def __init__(self, fields, missing):
+        self.fields = fields
+        self.missing = missing
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return ("dict", tuple((k, _freeze(v)) for k, v in value.items()))
+    elif isinstance(value, list):
+        return ("list", tuple(_freeze(x) for x in value))
+    elif isinstance(value, tuple):
+        return ("tuple", tuple(_freeze(x) for x in value))
+    return value
+
+
+def _mapped_attrs(ModelClass) -> tuple[list[str], set[str]]:
+    """Column and relationship names of `ModelClass`, looked up once."""
+    mapped = _mappers.get(ModelClass)
+    if mapped is None:
+        columns = [
+            x.key
+            for x in class_mapper(ModelClass).iterate_properties
+            if isinstance(x, ColumnProperty)
+        ]
+        relationships = {x.key for x in inspect(ModelClass).relationships}
+        mapped = _mappers[ModelClass] = (columns, relationships)
+    return mapped
+
+
+def _compile_plan(ModelClass, include, exclude, only) -> _Plan:
+    columns, relationships = _mapped_attrs(ModelClass)
+    mapped = set(columns) | relationships
+
+    only = AsDictMixin._fixup_param_value(only)
+
+    # compile the list of names to add
+    if only:
+        fields = [
+            (attr, copy.deepcopy(kwargs), attr not in mapped)
+            for attr, kwargs in only.items()
+            if attr
+        ]
+        # Note: For backward compatibility, timestamps are included by default
+        return _Plan(fields, [])
+
+    # include
+    if isinstance(include, str):
+        _include = {include: {}}
+    elif isinstance(include, list):
+        _include = {x: {} for x in include}
+    elif include is None:
+        _include = {}
+    else:
+        _include = dict(include)
+
+    # exclude
+    if isinstance(exclude, str):
+        _exclude = [exclude]
+    elif isinstance(exclude, list):
+        _exclude = list(exclude)
+    else:
+        _exclude = []
+    # Note: created_at and updated_at are included by default for backward compatibility
+
+    fields = {}
+    for attr in columns + list(_include.keys()):
+        if attr and attr not in _exclude and attr not in fields:
+            fields[attr] = (
+                attr,
+                copy.deepcopy(_include.get(attr, {})),
+                attr not in mapped,
+            )
+    missing = [attr for attr in _include if attr and attr in _exclude]
+    return _Plan(list(fields.values()), missing)
+
+
+def _plan(ModelClass, include, exclude, only) -> _Plan:
+    try:
+        key = (ModelClass, _freeze(include), _freeze(exclude), _freeze(only))
+        plan = _plans.get(key)
+    except TypeError:  # unhashable spec; don't cache
+        return _compile_plan(ModelClass, include, exclude, only)
+    if plan is None:
+        plan = _plans[key] = _compile_plan(ModelClass, include, exclude, only)
+    return plan
+
+
+def as_dicts(rows, **kwargs) -> list:
+    """
+    [row.as_dict(**kwargs) for row in rows], with the plan compiled once for
+    the whole list when the rows share a class that doesn't override
+    as_dict().
+    """
+    rows = list(rows)
+    if not rows:
+        return []
+    ModelClass = type(rows[0])
+    if ModelClass.as_dict is not AsDictMixin.as_dict or any(
+        type(row) is not ModelClass for row in rows
+    ):
+        return [row.as_dict(**kwargs) for row in rows]
+    plan = _plan(
+        ModelClass, kwargs.get("include"), kwargs.get("exclude"), kwargs.get("only")
+    )
+    update = kwargs.get("update")
+    return [row._apply_plan(plan, update) for row in rows]
+
+
 class AsDictMixin:
     def _warn_no_attr(self, attr):
         _log.warning(f"The model {self.__class__.__name__} has no attribute `{attr}`.")
@@ -31,81 +161,34 @@ class AsDictMixin:
         Pass either a list of attr names or a dictionary of attr names with
         similar sub-args.
         created_at, updated_at are left out unless included in `include`.
+
+        Which attributes to serialize is worked out once per model class and
+        include/exclude/only spec (see _plan()); use as_dicts() for lists.
         """
-        ModelClass = self.__class__
-        columns_by_name = {
-            x.key: x
-            for x in class_mapper(ModelClass).iterate_properties
-            if isinstance(x, ColumnProperty)
-        }
-        rels_by_name = {x.key: x for x in inspect(ModelClass).relationships}
-
-        only = self._fixup_param_value(only)
-
-        # compile the list of names to add
-        if only:
-            to_add = {
-                attr: kwargs
-                for attr, kwargs in only.items()
-                if (
-                    attr
-                    and attr in columns_by_name
-                    or attr in rels_by_name
-                    or hasattr(self, attr)
-                )
-            }
-            # Note: For backward compatibility, timestamps are included by default
-            # Uncomment below to exclude timestamps unless explicitly included in only:
-            # if "created_at" in to_add and "created_at" not in only:
-            #     to_add.pop("created_at", None)
-            # if "updated_at" in to_add and "updated_at" not in only:
-            #     to_add.pop("updated_at", None)
-
-            for attr in only.keys():
-                if attr and not attr in to_add:
+        return self._apply_plan(_plan(self.__class__, include, exclude, only), update)
+
+    def _apply_plan(self, plan: _Plan, update=None) -> dict:
+        for attr in plan.missing:
+            self._warn_no_attr(attr)
+        # Loaded mapped attributes live in the instance dict; reading them
+        # there skips the attribute descriptor, and anything not loaded yet
+        # still goes through getattr().
+        loaded = self.__dict__
+        result = {}
+        for attr, kwargs, check in plan.fields:
+            if check:
+                if not hasattr(self, attr):
                     self._warn_no_attr(attr)
-        else:
-            # include
-            if isinstance(include, str):
-                _include = {include: {}}
-            elif isinstance(include, list):
-                _include = {x: {} for x in include}
-            elif include is None:
-                _include = {}
+                    continue
+                value = getattr(self, attr)
+            elif attr in loaded:
+                value = loaded[attr]
             else:
-                _include = dict(include)
-
-            # exclude
-            if isinstance(exclude, str):
-                _exclude = [exclude]
-            elif isinstance(exclude, list):
-                _exclude = list(exclude)
+                value = getattr(self, attr)
+            if type(value) in _PLAIN_TYPES:
+                result[attr] = value
             else:
-                _exclude = []
-            # Note: created_at and updated_at are included by default for backward compatibility
-            # if "created_at" not in _include:
-            #     _exclude.append("created_at")
-            # if "updated_at" not in _include:
-            #     _exclude.append("updated_at")
-
-            # _included_rels = [x for x in rels_by_name.keys() if x in _include]
-            to_add = {
-                attr: _include.get(attr, {})
-                for attr in (list(columns_by_name.keys()) + list(_include.keys()))
-                if attr and hasattr(self, attr) and attr not in _exclude
-            }
-            for attr in _include:
-                if attr and not attr in to_add:
-                    self._warn_no_attr(attr)
-
-        # __only = only if only else ""
-        # _log.debug(f"{self.__class__.__name__}[{self.id}].as_dict({__only})")
-
-        result = {}
-        for attr, kwargs in to_add.items():
-            # All values should be valid at this point.
-            value = getattr(self, attr)
-            result[attr] = self._marshal_attr(attr, value, kwargs)
+                result[attr] = self._marshal_attr(attr, value, kwargs)
 
         # Just one level until there is a use case for more levels.
         if update:
@@ -121,14 +204,12 @@ class AsDictMixin:
 
         ret = None
         if isinstance(value, InstrumentedList):
-            ret = [
-                x.as_dict(
-                    include=kwargs.get("include", {}),
-                    exclude=kwargs.get("exclude", {}),
-                    only=kwargs.get("only", {}),
-                )
-                for x in value
-            ]
+            ret = as_dicts(
+                value,
+                include=kwargs.get("include", {}),
+                exclude=kwargs.get("exclude", {}),
+                only=kwargs.get("only", {}),
+            )
         elif isinstance(value, db.Model):
             kwargs = self._fixup_param_value(kwargs)
             ret = value.as_dict(
@@ -145,7 +226,7 @@ class AsDictMixin:
         elif isinstance(value, list):
             if value and isinstance(value[0], db.Model):
                 # _kwargs = kwargs.get(attr, {})
-                ret = [x.as_dict(**kwargs) for x in value]
+                ret = as_dicts(value, **kwargs)
             else:
                 ret = list(value)
         elif callable(value):
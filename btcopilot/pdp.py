@@ -7,6 +7,7 @@ from datetime import date, datetime
 import json
 
 from btcopilot.extensions import ai_log
+from btcopilot.llmtelemetry import llm_caller
 from btcopilot.llmutil import gemini_structured, SARF_REVIEW_MODEL
 from btcopilot.personal.models import SpeakerType
 from btcopilot.training.f1_metrics import match_people
@@ -1034,19 +1035,26 @@ async def _extract_and_validate(
     source: str,
     large: bool = False,
     base_pdp: PDP | None = None,
+    suffix: str = "",
 ) -> tuple[PDP, PDPDeltas]:
-    """Submit extraction prompt to LLM, validate, retry up to MAX_EXTRACTION_RETRIES on failure."""
+    """Submit extraction prompt to LLM, validate, retry up to MAX_EXTRACTION_RETRIES on failure.
+
+    `prompt` is the stable prefix (instructions, committed state, conversation)
+    and is sent as a provider-cached prefix; `suffix` plus any correction text
+    is the per-attempt tail, so retries only pay full price for the tail."""
     is_dev = os.getenv("FLASK_CONFIG") == "development"
     pdp = base_pdp if base_pdp is not None else diagram_data.pdp
-    current_prompt = prompt
+    current_suffix = suffix
     error_history: list[tuple[int, list[str]]] = []
 
     for attempt in range(1 + MAX_EXTRACTION_RETRIES):
-        pdp_deltas = await gemini_structured(
-            current_prompt,
-            PDPDeltas,
-            large=large,
-        )
+        with llm_caller(source):
+            pdp_deltas = await gemini_structured(
+                current_suffix,
+                PDPDeltas,
+                large=large,
+                prefix=prompt,
+            )
 
         if is_dev:
             label = "DELTAS" if attempt == 0 else f"RETRY {attempt} DELTAS"
@@ -1090,7 +1098,7 @@ async def _extract_and_validate(
             committed_person_ids = sorted(
                 p["id"] for p in diagram_data.people if "id" in p
             )
-            current_prompt = prompt + DATA_EXTRACTION_CORRECTION.format(
+            current_suffix = suffix + DATA_EXTRACTION_CORRECTION.format(
                 failed_deltas=json.dumps(asdict(pdp_deltas), indent=2, default=str),
                 error_history="\n".join(history_lines),
                 committed_person_ids=committed_person_ids,
@@ -1123,6 +1131,53 @@ def _committed_state_for_prompt(diagram_data: DiagramData) -> dict:
     }
 
 
+def _build_pass1_prompt(
+    diagram_data: DiagramData,
+    conversation_history: str,
+    current_date: str,
+    cursor_nonce: str | None = None,
+) -> tuple[str, str]:
+    """Pass 1 prompt as (stable prefix, variable suffix). The prefix is
+    byte-identical across retries so providers can serve it from cache."""
+    committed_state = _committed_state_for_prompt(diagram_data)
+    prefix = DATA_EXTRACTION_PASS1_PROMPT.format(
+        current_date=current_date
+    ) + DATA_EXTRACTION_PASS1_CONTEXT.format(
+        diagram_data=json.dumps(committed_state, indent=2, default=str),
+        conversation_history=conversation_history,
+    )
+    suffix = (
+        CURSOR_EXTRACTION_RULE_TEMPLATE.format(nonce=cursor_nonce)
+        if cursor_nonce
+        else ""
+    )
+    return prefix, suffix
+
+
+def _build_pass2_prompt(
+    diagram_data: DiagramData,
+    pass1_pdp: PDP,
+    conversation_history: str,
+    current_date: str,
+    template: str | None = None,
+) -> str:
+    """Pass 2 stable prefix; pass 2 has no variable suffix beyond corrections."""
+    pass1_data = json.dumps(asdict(pass1_pdp), indent=2, default=str)
+    committed_shifts = [e for e in diagram_data.events if e.get("kind") == "shift"]
+    committed_shift_json = (
+        json.dumps(committed_shifts, indent=2, default=str)
+        if committed_shifts
+        else "None"
+    )
+    return (template or DATA_EXTRACTION_PASS2_PROMPT).format(
+        current_date=current_date
+    ) + DATA_EXTRACTION_PASS2_CONTEXT.format(
+        pass1_data=pass1_data,
+        committed_shift_events=committed_shift_json,
+        conversation_history=conversation_history,
+    )
+
+
 async def _two_pass_extract(
     diagram_data: DiagramData,
     conversation_history: str,
@@ -1132,12 +1187,15 @@ async def _two_pass_extract(
     sarf_review_prompt: str | None = None,
     sarf_review_model: str | None = None,
     cursor_nonce: str | None = None,
+    on_progress=None,
 ) -> tuple[PDP, PDPDeltas]:
     """Two-pass extraction: people+structure first, then shifts+SARF.
 
     cursor_nonce: when set, conversation_history contains the nonced cursor
     marker; append the matching cursor rule so Pass 1 emits items only for
-    content after it."""
+    content after it.
+
+    on_progress(current, total, label) is called as each pass starts."""
     _log.info(
         f"PDP {source.upper()} INPUTS:\n"
         f"  conversation_history length: {len(conversation_history)}\n"
@@ -1147,40 +1205,31 @@ async def _two_pass_extract(
     )
 
     # Pass 1: People + PairBonds + Structural Events
-    committed_state = _committed_state_for_prompt(diagram_data)
-    prompt1 = DATA_EXTRACTION_PASS1_PROMPT.format(
-        current_date=current_date
-    ) + DATA_EXTRACTION_PASS1_CONTEXT.format(
-        diagram_data=json.dumps(committed_state, indent=2, default=str),
-        conversation_history=conversation_history,
+    if on_progress:
+        on_progress(0, 3, "Finding people and relationships…")
+    prefix1, suffix1 = _build_pass1_prompt(
+        diagram_data, conversation_history, current_date, cursor_nonce
     )
-    if cursor_nonce:
-        prompt1 += CURSOR_EXTRACTION_RULE_TEMPLATE.format(nonce=cursor_nonce)
     pass1_pdp, pass1_deltas = await _extract_and_validate(
-        prompt1,
+        prefix1,
         diagram_data,
         f"{source}_pass1",
         large=True,
+        suffix=suffix1,
     )
 
     # Pass 2: Shift Events + SARF (given Pass 1 output)
-    pass1_data = json.dumps(asdict(pass1_pdp), indent=2, default=str)
-    committed_shifts = [e for e in diagram_data.events if e.get("kind") == "shift"]
-    committed_shift_json = (
-        json.dumps(committed_shifts, indent=2, default=str)
-        if committed_shifts
-        else "None"
-    )
-    _pass2_prompt = pass2_prompt or DATA_EXTRACTION_PASS2_PROMPT
-    prompt2 = _pass2_prompt.format(
-        current_date=current_date
-    ) + DATA_EXTRACTION_PASS2_CONTEXT.format(
-        pass1_data=pass1_data,
-        committed_shift_events=committed_shift_json,
-        conversation_history=conversation_history,
+    if on_progress:
+        on_progress(1, 3, "Finding events…")
+    prefix2 = _build_pass2_prompt(
+        diagram_data,
+        pass1_pdp,
+        conversation_history,
+        current_date,
+        template=pass2_prompt,
     )
     pass2_pdp, pass2_deltas = await _extract_and_validate(
-        prompt2,
+        prefix2,
         diagram_data,
         f"{source}_pass2",
         large=True,
@@ -1190,6 +1239,8 @@ async def _two_pass_extract(
     # Pass 3: SARF review — re-evaluate all SARF variables against operational definitions
     shift_events = [e for e in pass2_pdp.events if e.kind == EventKind.Shift]
     if shift_events:
+        if on_progress:
+            on_progress(2, 3, "Reviewing shifts…")
         events_json = json.dumps(
             [asdict(e) for e in shift_events], indent=2, default=str
         )
@@ -1202,12 +1253,13 @@ async def _two_pass_extract(
             people_json=people_json,
             conversation_history=conversation_history,
         )
-        review_deltas = await gemini_structured(
-            review_prompt,
-            PDPDeltas,
-            large=True,
-            model=sarf_review_model or SARF_REVIEW_MODEL,
-        )
+        with llm_caller("sarf_review"):
+            review_deltas = await gemini_structured(
+                review_prompt,
+                PDPDeltas,
+                large=True,
+                model=sarf_review_model or SARF_REVIEW_MODEL,
+            )
         reviewed = {e.id: e for e in review_deltas.events}
         valid_ids = {p.id for p in pass2_pdp.people if p.id is not None} | {
             p["id"] for p in diagram_data.people
@@ -1447,6 +1499,7 @@ async def import_text(
     diagram_data: DiagramData,
     text: str,
     reference_date: date | None = None,
+    on_progress=None,
 ) -> tuple[PDP, PDPDeltas]:
     diagram_data.pdp = PDP()
     if reference_date is None:
@@ -1456,6 +1509,7 @@ async def import_text(
         text,
         reference_date.isoformat(),
         "import_text",
+        on_progress=on_progress,
     )
 
 
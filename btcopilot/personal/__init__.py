@@ -22,3 +22,14 @@ def init_celery(celery):
         retry_jitter=True,
         max_retries=5,
     )
+    celery.task(
+        tasks.import_text_task,
+        name="import_text",
+        bind=True,
+        autoretry_for=(ClientError, PermissionDeniedError, RateLimitError),
+        retry_backoff=60,
+        retry_backoff_max=600,
+        retry_jitter=True,
+        max_retries=5,
+    )
+    celery.task(tasks.compact_chat_summary, name="compact_chat_summary")
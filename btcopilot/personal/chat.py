@@ -1,9 +1,14 @@
 import logging
+import threading
 
 from dataclasses import dataclass
+from cachetools import LRUCache
 from flask import g
+from sqlalchemy import event
+from sqlalchemy.orm import Session
 
 from btcopilot.extensions import db, ai_log
+from btcopilot.llmtelemetry import llm_caller
 from btcopilot.llmutil import response_text_sync
 from btcopilot.personal.intake import (
     coverage,
@@ -11,12 +16,35 @@ from btcopilot.personal.intake import (
     roster_for_prompt,
 )
 from btcopilot.personal.models import Discussion, Statement
-from btcopilot.personal.prompts import get_conversation_flow_prompt
+from btcopilot.personal.prompts import (
+    CONVERSATION_SUMMARY_CONTEXT,
+    get_conversation_flow_prompt,
+)
 from btcopilot.schema import DiagramData
 
 
 _log = logging.getLogger(__name__)
 
+# Rolling context: the last CHAT_VERBATIM_TURNS statements are always sent
+# verbatim; older ones are folded into Discussion.summary once
+# CHAT_SUMMARY_EVERY more have accumulated beyond that window.
+CHAT_VERBATIM_TURNS = 24
+CHAT_SUMMARY_EVERY = 12
+
+# Discussions whose compaction is sent once the current transaction commits
+# (Session.info key), and the Redis flag that keeps one compaction in flight
+# per discussion until the task clears it.
+COMPACTION_SESSION_KEY = "compact_chat_summary"
+COMPACTION_PENDING_KEY = "chat:compaction-pending:{discussion_id}"
+
+# Rendered committed state + system prompt per (diagram id, version,
+# updated_at, model). Client writes bump version and set_diagram_data() stamps
+# updated_at, so entries never go stale; they just stop being hit and fall off
+# the LRU end. Shared by request threads, so reads and writes take the lock.
+PROMPT_CACHE_SIZE = 256
+_prompt_cache = LRUCache(maxsize=PROMPT_CACHE_SIZE)
+_prompt_cache_lock = threading.Lock()
+
 
 def summarize_committed_state(diagram_data: DiagramData | None) -> str:
     if diagram_data is None:
@@ -31,6 +59,30 @@ def summarize_committed_state(diagram_data: DiagramData | None) -> str:
     return "\n".join(part for part in (roster, cov) if part)
 
 
+def system_prompt_for(diagram, model: str | None = None) -> str:
+    """Conversation-flow system prompt with the diagram's committed state,
+    cached on (diagram id, version, updated_at, model) so unchanged diagrams
+    are not unpickled and re-summarized on every turn."""
+    if diagram is None:
+        return get_conversation_flow_prompt(model, committed_state="")
+    # Uncommitted edits have no stable version yet; render them fresh.
+    cacheable = diagram.id is not None and not db.session.is_modified(diagram)
+    key = (diagram.id, diagram.version, diagram.updated_at, model)
+    if cacheable:
+        with _prompt_cache_lock:
+            prompt = _prompt_cache.get(key)
+        if prompt is not None:
+            return prompt
+    prompt = get_conversation_flow_prompt(
+        model,
+        committed_state=summarize_committed_state(diagram.get_diagram_data()),
+    )
+    if cacheable:
+        with _prompt_cache_lock:
+            _prompt_cache[key] = prompt
+    return prompt
+
+
 @dataclass
 class Response:
     statement: str
@@ -42,55 +94,138 @@ def ask(
 
     ai_log.info(f"User statement: {user_statement}")
 
-    committed_state = ""
-    if discussion.diagram is not None:
-        committed_state = summarize_committed_state(
-            discussion.diagram.get_diagram_data()
-        )
-
     # Build structured conversation turns before adding new statement to session
-    system_instruction = get_conversation_flow_prompt(
-        model, committed_state=committed_state
-    )
+    system_instruction = system_prompt_for(discussion.diagram, model)
     if hasattr(g, "custom_prompts"):
         system_instruction = g.custom_prompts.get(
             "CONVERSATION_FLOW_PROMPT", system_instruction
         )
 
+    # Rolling context: turns folded into discussion.summary go in as a
+    # summary appended to the (cached) system instruction; the rest verbatim.
+    if discussion.summary_through_order is not None and discussion.summary:
+        system_instruction += CONVERSATION_SUMMARY_CONTEXT.format(
+            summary=discussion.summary
+        )
+    recent = _unfolded_statements(discussion)
     turns = []
-    for s in discussion.statements:
+    for s in recent:
         role = "model" if s.speaker_id == discussion.chat_ai_speaker_id else "user"
         turns.append((role, s.text))
     turns.append(("user", user_statement))
 
+    ai_response = _generate_response(system_instruction, turns, model=model)
+    ai_log.info(f"AI response: {ai_response}")
+
+    # Reserve both orders after the model call, so the discussion row isn't
+    # locked while waiting on the LLM.
+    user_order, ai_order = discussion.reserve_order_block(2)
     statement = Statement(
         discussion_id=discussion.id,
         text=user_statement,
         speaker=discussion.chat_user_speaker,
-        order=discussion.next_order(),
+        order=user_order,
     )
     db.session.add(statement)
 
-    ai_response = _generate_response(system_instruction, turns, model=model)
-    ai_log.info(f"AI response: {ai_response}")
-
     ai_statement = Statement(
         discussion_id=discussion.id,
         text=ai_response,
         speaker=discussion.chat_ai_speaker,
-        order=discussion.next_order(),
+        order=ai_order,
     )
     db.session.add(ai_statement)
+
+    if len(turns) + 1 >= CHAT_VERBATIM_TURNS + CHAT_SUMMARY_EVERY:
+        _queue_compaction(discussion)
     return Response(statement=ai_response)
 
 
+def _unfolded_statements(discussion: Discussion) -> list[Statement]:
+    """Statements not yet folded into the rolling summary, in order."""
+    query = Statement.query.filter(Statement.discussion_id == discussion.id)
+    if discussion.summary_through_order is not None:
+        query = query.filter(Statement.order > discussion.summary_through_order)
+    return query.order_by(Statement.order, Statement.id).all()
+
+
+def _queue_compaction(discussion: Discussion):
+    """Fold older turns into the summary off the request path.
+
+    Runs every CHAT_SUMMARY_EVERY turns once past the verbatim window, so the
+    cached system + summary prefix is stable in between. The task is sent
+    after the caller commits the new statements, so the worker sees them.
+    Without a celery worker the fold runs inline.
+    """
+    from btcopilot.extensions import celery
+
+    if celery is not None:
+        db.session.info.setdefault(COMPACTION_SESSION_KEY, set()).add(discussion.id)
+    else:
+        discussion.compact_summary(CHAT_VERBATIM_TURNS)
+
+
+def _claim_compaction(discussion_id: int) -> bool:
+    """Set the discussion's pending flag; False if a compaction is in flight.
+
+    The flag expires with the task's time limit in case the worker dies. If
+    Redis is unreachable the compaction is sent anyway; the fold itself is a
+    compare-and-set, so a duplicate only costs an LLM call.
+    """
+    from btcopilot.extensions.celeryqueues import TASKS
+    from btcopilot.training.sse import sse_manager
+
+    try:
+        return bool(
+            sse_manager.redis().set(
+                COMPACTION_PENDING_KEY.format(discussion_id=discussion_id),
+                1,
+                nx=True,
+                ex=TASKS["compact_chat_summary"].time_limit,
+            )
+        )
+    except Exception as e:
+        _log.warning(f"Could not set compaction flag for {discussion_id}: {e}")
+        return True
+
+
+def release_compaction(discussion_id: int):
+    """Clear the pending flag once compact_chat_summary has run."""
+    from btcopilot.training.sse import sse_manager
+
+    try:
+        sse_manager.redis().delete(
+            COMPACTION_PENDING_KEY.format(discussion_id=discussion_id)
+        )
+    except Exception as e:
+        _log.warning(f"Could not clear compaction flag for {discussion_id}: {e}")
+
+
+@event.listens_for(Session, "after_commit")
+def _send_queued_compactions(session):
+    from btcopilot.extensions import celery
+
+    discussion_ids = session.info.pop(COMPACTION_SESSION_KEY, None)
+    if not discussion_ids or celery is None:
+        return
+    for discussion_id in sorted(discussion_ids):
+        if _claim_compaction(discussion_id):
+            celery.send_task("compact_chat_summary", args=[discussion_id])
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_queued_compactions(session):
+    session.info.pop(COMPACTION_SESSION_KEY, None)
+
+
 def _generate_response(
     system_instruction: str, turns: list[tuple[str, str]], model: str | None = None
 ) -> str:
-    ai_response = response_text_sync(
-        system_instruction=system_instruction,
-        turns=turns,
-        temperature=0.45,
-        model=model,
-    )
+    with llm_caller("chat"):
+        ai_response = response_text_sync(
+            system_instruction=system_instruction,
+            turns=turns,
+            temperature=0.45,
+            model=model,
+        )
     return ai_response.strip()
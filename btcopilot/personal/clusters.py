@@ -1,7 +1,10 @@
 import json
 import logging
+import datetime
 from dataclasses import dataclass, field
 
+from btcopilot import params
+from btcopilot.llmtelemetry import llm_caller
 from btcopilot.llmutil import gemini_structured_sync
 from btcopilot.schema import (
     Event,
@@ -14,6 +17,13 @@ from btcopilot.schema import (
 
 _log = logging.getLogger(__name__)
 
+# Pre-clustering: consecutive events this many days apart or less share a
+# candidate, as do events up to CLUSTER_LINK_GAP_DAYS apart that involve a
+# person already in the candidate. Kept tighter than the prompt's ~2 week rule
+# because the LLM can merge candidates but not split them.
+CLUSTER_GAP_DAYS = 7
+CLUSTER_LINK_GAP_DAYS = 14
+
 CLUSTER_PROMPT = """You are analyzing a behavioral health case timeline to identify clinically meaningful event clusters.
 
 ## SARF Theory Context
@@ -35,13 +45,19 @@ Four variables track family system dynamics:
 - **functioning_gain**: Stressor → emotional processing → F↑
 - **work_family_spillover**: Work A↑ cascades into family dynamics
 
-## Events (chronological)
+## Candidate clusters (chronological)
+
+The events have already been grouped into candidate clusters by date gaps and
+shared people:
 
-{events_json}
+{candidates_json}
 
 ## Task
 
-Group these events into clusters. Events belong in the same cluster when they:
+Label these candidate clusters. Each cluster you return must be made of whole
+candidates: keep a candidate as its own cluster, merge neighboring candidates
+that belong to the same arc, or leave a candidate out. List every event of the
+candidates you include in `eventIds`. Events belong in the same cluster when they:
 1. *Required:* Occur in a relatively clustered time frame within the total timeseries. There is often gaps of weeks, months or years between clusters.
 2. Form a narrative arc (trigger → escalation → peak → processing → resolution)
 3. Optional: Show SARF interaction patterns (cascades, reciprocal effects)
@@ -93,45 +109,201 @@ def compute_cache_key(events: list[Event]) -> str:
     return hash_sarf_dicts(event_data)
 
 
-def detect_clusters(events: list[Event]) -> ClusterResult:
+def _event_date(e: Event) -> datetime.date | None:
+    if not e.dateTime:
+        return None
+    try:
+        return params.datetime(e.dateTime).date()
+    except (ValueError, OverflowError):
+        return None
+
+
+def _event_people(e: Event) -> set[int]:
+    return {e.person, e.spouse, e.child, *e.relationshipTargets} - {None}
+
+
+@dataclass
+class Candidate:
+    """Events the deterministic pre-pass put together; the LLM only labels
+    or merges these."""
+
+    key: str
+    events: list[Event]
+
+
+def candidate_groups(events: list[Event]) -> list[Candidate]:
+    """
+    Split dated events into candidates at gaps longer than CLUSTER_GAP_DAYS,
+    or CLUSTER_LINK_GAP_DAYS when the next event shares a person with the
+    group. Undated events can't be placed on the timeline and are left out.
+    """
+    dated = sorted(
+        ((d, e) for e in events if (d := _event_date(e))),
+        key=lambda x: (x[0], x[1].id),
+    )
+    groups = []
+    last_date = people = None
+    for date, e in dated:
+        gap = (date - last_date).days if groups else None
+        if gap is not None and (
+            gap <= CLUSTER_GAP_DAYS
+            or (gap <= CLUSTER_LINK_GAP_DAYS and _event_people(e) & people)
+        ):
+            groups[-1].append(e)
+            people |= _event_people(e)
+        else:
+            groups.append([e])
+            people = _event_people(e)
+        last_date = date
+    return [Candidate(key=compute_cache_key(g), events=g) for g in groups]
+
+
+def _event_for_prompt(e: Event) -> dict:
+    event_dict = {
+        "id": e.id,
+        "date": e.dateTime,
+        "description": e.description or "",
+    }
+    if e.symptom:
+        event_dict["symptom"] = _enum_value(e.symptom)
+    if e.anxiety:
+        event_dict["anxiety"] = _enum_value(e.anxiety)
+    if e.relationship:
+        event_dict["relationship"] = _enum_value(e.relationship)
+    if e.functioning:
+        event_dict["functioning"] = _enum_value(e.functioning)
+    if e.notes:
+        event_dict["notes"] = e.notes
+    return event_dict
+
+
+def _label_candidates(candidates: list[Candidate]) -> dict[str, dict] | None:
+    """Cache entries (see ClusterCache) for `candidates` from one LLM call, or
+    None if the LLM gave no answer."""
+    candidates_json = json.dumps(
+        [
+            {
+                "candidate": i + 1,
+                "events": [_event_for_prompt(e) for e in c.events],
+            }
+            for i, c in enumerate(candidates)
+        ],
+        indent=2,
+    )
+    prompt = CLUSTER_PROMPT.format(candidates_json=candidates_json)
+
+    _log.info(f"Labeling {len(candidates)} candidate clusters")
+
+    with llm_caller("clusters"):
+        response = gemini_structured_sync(prompt, ClusterListResponse)
+    if not response:
+        return None
+
+    entries = {}
+    for c in response.clusters:
+        # Snap to whole candidates not already claimed by another cluster.
+        members = [
+            candidate.key
+            for candidate in candidates
+            if candidate.key not in entries
+            and any(e.id in c.eventIds for e in candidate.events)
+        ]
+        if not members:
+            continue
+        label = {
+            "title": c.title,
+            "summary": c.summary,
+            "pattern": _enum_value(c.pattern) if c.pattern else None,
+            "dominantVariable": c.dominantVariable,
+        }
+        for key in members:
+            entries[key] = {"members": members, "cluster": label}
+    for candidate in candidates:
+        entries.setdefault(candidate.key, {"members": [candidate.key], "cluster": None})
+    return entries
+
+
+def _load_entries(diagram_id: int) -> dict[str, dict]:
+    from btcopilot.personal.models import ClusterCache
+
+    return {
+        row.key: row.data for row in ClusterCache.query.filter_by(diagram_id=diagram_id)
+    }
+
+
+def _save_entries(diagram_id: int, entries: dict[str, dict]):
+    """Replace the diagram's cached entries with `entries`. Caller commits."""
+    from btcopilot.extensions import db
+    from btcopilot.personal.models import ClusterCache
+
+    ClusterCache.query.filter_by(diagram_id=diagram_id).delete(
+        synchronize_session=False
+    )
+    db.session.add_all(
+        ClusterCache(diagram_id=diagram_id, key=key, data=data)
+        for key, data in entries.items()
+    )
+
+
+def detect_clusters(
+    events: list[Event], diagram_id: int | None = None
+) -> ClusterResult:
+    """
+    With `diagram_id`, candidate groups whose events are unchanged since the
+    last call reuse their persisted labels, and the LLM only sees the rest
+    (no call at all when nothing changed). Caller commits.
+    """
     if not events:
         return ClusterResult(clusters=[], cacheKey="empty")
 
     cache_key = compute_cache_key(events)
-
-    events_for_prompt = []
-    for e in events:
-        event_dict = {
-            "id": e.id,
-            "date": e.dateTime,
-            "description": e.description or "",
-        }
-        if e.symptom:
-            event_dict["symptom"] = _enum_value(e.symptom)
-        if e.anxiety:
-            event_dict["anxiety"] = _enum_value(e.anxiety)
-        if e.relationship:
-            event_dict["relationship"] = _enum_value(e.relationship)
-        if e.functioning:
-            event_dict["functioning"] = _enum_value(e.functioning)
-        if e.notes:
-            event_dict["notes"] = e.notes
-        events_for_prompt.append(event_dict)
-
-    events_json = json.dumps(events_for_prompt, indent=2)
-    prompt = CLUSTER_PROMPT.format(events_json=events_json)
-
-    _log.info(f"Detecting clusters for {len(events)} events")
-
-    response = gemini_structured_sync(prompt, ClusterListResponse)
-
-    clusters = response.clusters if response else []
-
-    for c in clusters:
-        event_dates = [e.dateTime for e in events if e.id in c.eventIds and e.dateTime]
-        if event_dates:
-            c.startDate = min(event_dates)
-            c.endDate = max(event_dates)
+    candidates = candidate_groups(events)
+    current = {c.key for c in candidates}
+
+    cached = _load_entries(diagram_id) if diagram_id else {}
+    # A merged label is only valid while every group it merged is unchanged.
+    entries = {
+        key: entry
+        for key, entry in cached.items()
+        if key in current and set(entry["members"]) <= current
+    }
+    stale = [c for c in candidates if c.key not in entries]
+
+    _log.info(
+        f"Detecting clusters for {len(events)} events: {len(candidates)} candidates, "
+        f"{len(stale)} to label"
+    )
+
+    if stale:
+        labeled = _label_candidates(stale)
+        if labeled is not None:
+            entries.update(labeled)
+    if diagram_id and entries != cached:
+        _save_entries(diagram_id, entries)
+
+    by_key = {c.key: c for c in candidates}
+    clusters = []
+    emitted = set()
+    for candidate in candidates:
+        entry = entries.get(candidate.key)
+        if not entry or not entry["cluster"] or candidate.key in emitted:
+            continue
+        emitted.update(entry["members"])
+        members = [by_key[key] for key in entry["members"]]
+        member_events = [e for m in members for e in m.events]
+        label = entry["cluster"]
+        clusters.append(
+            Cluster(
+                id=hash_sarf_dicts(entry["members"]),
+                title=label["title"],
+                summary=label["summary"],
+                eventIds=[e.id for e in member_events],
+                startDate=min(e.dateTime for e in member_events),
+                endDate=max(e.dateTime for e in member_events),
+                pattern=ClusterPattern(label["pattern"]) if label["pattern"] else None,
+                dominantVariable=label["dominantVariable"],
+            )
+        )
 
     _log.info(f"Detected {len(clusters)} clusters")
 
@@ -19,6 +19,7 @@ import json
 import re
 from dataclasses import dataclass
 
+from btcopilot.llmtelemetry import llm_caller
 from btcopilot.llmutil import gemini_text_sync
 
 _BOOL_KEYS = (
@@ -129,13 +130,14 @@ def evaluate_coach(turns: list[tuple[str, str]], known_names: list[str]) -> Coac
     )
     d = None
     for _ in range(2):  # gemini-2.5-flash occasionally truncates the JSON tail
-        raw = gemini_text_sync(
-            turns=[("user", prompt)],
-            system_instruction="You are a precise auditor. Output only JSON.",
-            model="gemini-2.5-flash",
-            temperature=0.0,
-            max_output_tokens=4096,
-        )
+        with llm_caller("coach_eval"):
+            raw = gemini_text_sync(
+                turns=[("user", prompt)],
+                system_instruction="You are a precise auditor. Output only JSON.",
+                model="gemini-2.5-flash",
+                temperature=0.0,
+                max_output_tokens=4096,
+            )
         d = _parse_judge(raw)
         if d is not None:
             break
@@ -27,7 +27,7 @@ from btcopilot.schema import (
 )
 from btcopilot import pdp as pdp_mod
 from btcopilot.familygraph import default_ids, speaker_ids
-from btcopilot.personal.dock import dock, transcript_text
+from btcopilot.personal.dock import dock, transcript_index
 from btcopilot.training.f1_metrics import match_people, normalize_name_for_matching
 
 _log = logging.getLogger(__name__)
@@ -635,7 +635,7 @@ def deep_reextract(
     # failure (after the SDK's own retries) degrades to the un-docked delta.
     # Validation/programming errors still raise.
     try:
-        delta_pdp = dock(committed_dd, delta_pdp, transcript_text(sibling_discs))
+        delta_pdp = dock(committed_dd, delta_pdp, transcript_index(sibling_discs))
     except (ServerError, OutputTruncatedError) as e:
         _log.error(
             f"deep_reextract: dock transport failure ({type(e).__name__}), "
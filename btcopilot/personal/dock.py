@@ -15,12 +15,13 @@ import asyncio
 import copy
 import enum
 import logging
-import re
 from dataclasses import dataclass
 
-from btcopilot.familygraph import bond_endpoints, components, default_ids, person_id
+from btcopilot.familygraph import FamilyGraph, bond_endpoints, person_id
+from btcopilot.llmtelemetry import llm_caller
 from btcopilot.llmutil import SARF_REVIEW_MODEL, gemini_structured
 from btcopilot.personal.prompts import DOCK_PROMPT
+from btcopilot.personal.transcriptindex import TranscriptIndex
 from btcopilot.schema import (
     DiagramData,
     PDP,
@@ -68,17 +69,14 @@ class DockResult:
     groups: list[DockGroup]
 
 
-def transcript_text(discussions) -> str:
-    lines = []
+def transcript_index(discussions) -> TranscriptIndex:
+    lines, statement_ids = [], []
     for disc in discussions:
         for st in sorted(disc.statements, key=lambda s: s.order or 0):
             speaker = st.speaker.name if st.speaker else f"speaker-{st.speaker_id}"
             lines.append(f"[disc {disc.id}] {speaker}: {st.text}")
-    return "\n".join(lines)
-
-
-def _norm(s: str) -> str:
-    return re.sub(r"\s+", " ", s).strip().lower()
+            statement_ids.append(st.id)
+    return TranscriptIndex(lines, statement_ids)
 
 
 def _person_name(p) -> str | None:
@@ -95,14 +93,6 @@ def _names(people: list) -> dict[int, str]:
     return names
 
 
-def _floats(people: list, pair_bonds: list) -> tuple[set[int], list[set[int]]]:
-    """(main-tree ids, floating components with at least one non-default member)."""
-    comps = components(people, pair_bonds)
-    default = default_ids(people)
-    main = comps[0] if comps else set()
-    return main, [c for c in comps[1:] if c - default]
-
-
 def _lines(ids, names: dict[int, str], partners: dict[int, list[int]]) -> str:
     out = []
     for pid in sorted(ids):
@@ -140,15 +130,18 @@ def _prompt(
 
 
 def _gated(
-    result: DockResult, transcript: str, main: set[int], floats: list[set[int]]
+    result: DockResult,
+    transcript: TranscriptIndex,
+    main: set[int],
+    floats: list[set[int]],
 ) -> list[DockEdge]:
-    tnorm = _norm(transcript)
     floating = set().union(*floats) if floats else set()
     group_of = {pid: i for i, c in enumerate(floats) for pid in c}
     edges = []
     for group in result.groups:
         for edge in group.edges:
-            if _norm(edge.quote) not in tnorm:
+            match = transcript.find(edge.quote)
+            if match is None:
                 reason = "quote not verbatim"
             elif edge.member_id not in floating:
                 reason = "member not floating"
@@ -158,6 +151,12 @@ def _gated(
             ):
                 reason = "anchor not in main tree or member's own group"
             else:
+                if match.edits:
+                    _log.info(
+                        f"dock: near-verbatim quote ({match.edits} edits) for "
+                        f"{edge.member_id} {edge.relation.value} {edge.anchor_id}, "
+                        f"statement {match.statement_id}"
+                    )
                 edges.append(edge)
                 continue
             _log.warning(
@@ -293,19 +292,25 @@ class _Applier:
         return bid
 
 
-def dock(committed: DiagramData, delta: PDP, transcript: str) -> PDP:
+def dock(committed: DiagramData, delta: PDP, transcript: str | TranscriptIndex) -> PDP:
     """Return delta with floating components docked to the main tree, or the
     unchanged delta when fully connected, no edge survives the gates, or the
     floating-component count does not strictly drop."""
+    if isinstance(transcript, str):
+        transcript = TranscriptIndex.from_text(transcript)
     people = committed.people + delta.people
     bonds = committed.pair_bonds + delta.pair_bonds
-    main, floats = _floats(people, bonds)
+    graph = FamilyGraph(people, bonds)
+    main, floats = graph.floating()
     if not floats:
         _log.info("dock: fully connected, skipping")
         return delta
 
-    prompt = _prompt(people, bonds, main, floats, transcript)
-    result = asyncio.run(gemini_structured(prompt, DockResult, model=SARF_REVIEW_MODEL))
+    prompt = _prompt(people, bonds, main, floats, transcript.text)
+    with llm_caller("dock"):
+        result = asyncio.run(
+            gemini_structured(prompt, DockResult, model=SARF_REVIEW_MODEL)
+        )
 
     edges = _gated(result, transcript, main, floats)
     if not edges:
@@ -314,9 +319,11 @@ def dock(committed: DiagramData, delta: PDP, transcript: str) -> PDP:
 
     docked = copy.deepcopy(delta)
     _Applier(committed, docked).apply(edges)
-    _, after = _floats(
-        committed.people + docked.people, committed.pair_bonds + docked.pair_bonds
-    )
+    # The applier only adds people, bonds and parents links, so replaying the
+    # delta onto a copy of the graph is enough to re-measure.
+    graph = graph.copy()
+    graph.add(docked.people, docked.pair_bonds[len(delta.pair_bonds) :])
+    _, after = graph.floating()
     if len(after) < len(floats):
         _log.info(f"dock: floating components {len(floats)} -> {len(after)}, accepted")
         return docked
@@ -63,17 +63,16 @@ def coverage(diagram_data: DiagramData | None) -> dict[DataCategory, CategoryCov
         )
         return result
 
-    people = diagram_data.people or []
     events = diagram_data.events or []
-    pair_bonds = diagram_data.pair_bonds or []
+    family = FamilyIndex(diagram_data)
 
-    speaker_id = _speaker_id(people)
-    speaker = _person_by_id(people, speaker_id) if speaker_id else None
+    speaker_id = family.speaker_id
+    speaker = family.person(speaker_id)
     parents_pb_id = speaker.get("parents") if speaker else None
-    parents_pb = _pair_bond_by_id(pair_bonds, parents_pb_id) if parents_pb_id else None
+    parents_pb = family.pair_bond(parents_pb_id)
 
-    mother = _find_parent(parents_pb, people, "female")
-    father = _find_parent(parents_pb, people, "male")
+    mother = _find_parent(parents_pb, family, "female")
+    father = _find_parent(parents_pb, family, "male")
 
     result = {
         DataCategory.PresentingProblem: CategoryCoverage(
@@ -81,40 +80,33 @@ def coverage(diagram_data: DiagramData | None) -> dict[DataCategory, CategoryCov
             CoverageStatus.Covered,
             "(conversation-derived)",
         ),
-        DataCategory.Mother: _parent_coverage(parents_pb, people, "female", DataCategory.Mother),
-        DataCategory.Father: _parent_coverage(parents_pb, people, "male", DataCategory.Father),
+        DataCategory.Mother: _parent_coverage(parents_pb, family, "female", DataCategory.Mother),
+        DataCategory.Father: _parent_coverage(parents_pb, family, "male", DataCategory.Father),
         DataCategory.ParentsStatus: _parents_status_coverage(parents_pb, events),
         DataCategory.Siblings: _list_coverage(
-            [p for p in people
-             if parents_pb_id is not None
-             and p.get("parents") == parents_pb_id
-             and p.get("id") != speaker_id],
+            [p for p in family.children_of(parents_pb_id)
+             if p.get("id") != speaker_id],
             DataCategory.Siblings, "siblings",
         ),
         DataCategory.MaternalGrandparents: _grandparents_coverage(
-            mother, people, pair_bonds, DataCategory.MaternalGrandparents,
+            mother, family, DataCategory.MaternalGrandparents,
         ),
         DataCategory.PaternalGrandparents: _grandparents_coverage(
-            father, people, pair_bonds, DataCategory.PaternalGrandparents,
+            father, family, DataCategory.PaternalGrandparents,
         ),
         DataCategory.AuntsUncles: _list_coverage(
-            _aunts_uncles(mother, father, people), DataCategory.AuntsUncles, "aunts/uncles",
+            _aunts_uncles(mother, father, family), DataCategory.AuntsUncles, "aunts/uncles",
         ),
     }
 
-    speaker_pbs = [
-        pb for pb in pair_bonds
-        if speaker_id is not None
-        and (pb.get("person_a") == speaker_id or pb.get("person_b") == speaker_id)
-    ]
-    spouses = [_other_person(pb, speaker_id, people) for pb in speaker_pbs]
+    speaker_pbs = family.bonds_of(speaker_id)
+    spouses = [_other_person(pb, speaker_id, family) for pb in speaker_pbs]
     spouses = [s for s in spouses if s is not None]
     result[DataCategory.Spouse] = _list_coverage(spouses, DataCategory.Spouse, "spouse(s)")
 
     children = []
     for pb in speaker_pbs:
-        pb_id = pb.get("id")
-        children.extend(p for p in people if p.get("parents") == pb_id)
+        children.extend(family.children_of(pb.get("id")))
     result[DataCategory.Children] = _list_coverage(children, DataCategory.Children, "children")
 
     nodal = [e for e in events if e.get("kind") in _NODAL_KINDS]
@@ -164,14 +156,10 @@ def roster_for_prompt(diagram_data: DiagramData | None) -> str:
     if diagram_data is None:
         return ""
     people = diagram_data.people or []
-    pair_bonds = diagram_data.pair_bonds or []
-    speaker_id = _speaker_id(people)
+    family = FamilyIndex(diagram_data)
+    speaker_id = family.speaker_id
 
     events = diagram_data.events or []
-    by_id = {
-        p["id"]: p for p in people
-        if isinstance(p, dict) and p.get("id") is not None
-    }
     life = _life_facts_index(events)
     named = []
     for p in people:
@@ -193,7 +181,7 @@ def roster_for_prompt(diagram_data: DiagramData | None) -> str:
         if p.get("id") == speaker_id:
             label += " — the user"
         else:
-            partner = _roster_partner(p, speaker_id, pair_bonds, by_id)
+            partner = _roster_partner(p, family)
             if partner:
                 label += f" — partner of {partner}"
         facts = life.get(p.get("id"), "")
@@ -240,19 +228,20 @@ def _life_facts_index(events):
     return out
 
 
-def _roster_partner(person, speaker_id, pair_bonds, by_id):
+def _roster_partner(person, family):
     pid = person.get("id")
-    for pb in pair_bonds:
+    for pb in family.bonds_of(pid):
         a, b = pb.get("person_a"), pb.get("person_b")
-        if pid not in (a, b):
-            continue
-        other = by_id.get(b if a == pid else a)
+        other = family.person(b if a == pid else a)
         other_name = ((other or {}).get("name") or "").strip()
         if not other_name or other_name.lower() in _PLACEHOLDER_NAMES:
             continue
         if any(frag in other_name for frag in _PLACEHOLDER_NAME_FRAGMENTS):
             continue
-        return "the user" if other and other.get("id") == speaker_id else other_name
+        return (
+            "the user" if other and other.get("id") == family.speaker_id
+            else other_name
+        )
     return None
 
 
@@ -291,38 +280,66 @@ def _speaker_id(people):
     return None
 
 
-def _person_by_id(people, pid):
-    if pid is None:
-        return None
-    return next(
-        (p for p in people if isinstance(p, dict) and p.get("id") == pid),
-        None,
-    )
-
-
-def _pair_bond_by_id(pair_bonds, pbid):
-    if pbid is None:
-        return None
-    return next((pb for pb in pair_bonds if pb.get("id") == pbid), None)
-
-
-def _find_parent(pair_bond, people, gender):
+class FamilyIndex:
+    """One pass over a diagram's people and pair bonds, so coverage() can
+    walk the family tree with dict lookups instead of rescanning every list
+    for each parent, sibling, child and aunt/uncle.
+
+    Lists keep diagram order, matching the linear scans this replaces: the
+    first person or bond with a given id wins."""
+
+    def __init__(self, diagram_data: DiagramData):
+        people = diagram_data.people or []
+        pair_bonds = diagram_data.pair_bonds or []
+        self.speaker_id = _speaker_id(people)
+        self.people_by_id = {}
+        self.children_by_bond = {}
+        for p in people:
+            if not isinstance(p, dict):
+                continue
+            if p.get("id") is not None:
+                self.people_by_id.setdefault(p["id"], p)
+            if p.get("parents") is not None:
+                self.children_by_bond.setdefault(p["parents"], []).append(p)
+        self.bonds_by_id = {}
+        self.bonds_by_person = {}
+        for pb in pair_bonds:
+            if pb.get("id") is not None:
+                self.bonds_by_id.setdefault(pb["id"], pb)
+            ends = {pb.get("person_a"), pb.get("person_b")} - {None}
+            for pid in ends:
+                self.bonds_by_person.setdefault(pid, []).append(pb)
+
+    def person(self, pid):
+        return self.people_by_id.get(pid) if pid is not None else None
+
+    def pair_bond(self, pbid):
+        return self.bonds_by_id.get(pbid) if pbid is not None else None
+
+    def children_of(self, pbid):
+        return self.children_by_bond.get(pbid, []) if pbid is not None else []
+
+    def bonds_of(self, pid):
+        return self.bonds_by_person.get(pid, []) if pid is not None else []
+
+
+def _find_parent(pair_bond, family, gender):
     if not pair_bond:
         return None
     for side in ("person_a", "person_b"):
-        person = _person_by_id(people, pair_bond.get(side))
+        person = family.person(pair_bond.get(side))
         if person and person.get("gender") == gender:
             return person
     return None
 
 
-def _other_person(pair_bond, person_id, people):
+def _other_person(pair_bond, person_id, family):
     a, b = pair_bond.get("person_a"), pair_bond.get("person_b")
     other_id = b if a == person_id else a
-    return _person_by_id(people, other_id)
+    return family.person(other_id)
 
 
-def _aunts_uncles(mother, father, people):
+def _aunts_uncles(mother, father, family):
     out = []
     for parent in (mother, father):
         if not parent:
@@ -331,16 +348,16 @@ def _aunts_uncles(mother, father, people):
         if not parent_pb:
             continue
         out.extend(
-            p for p in people
-            if p.get("parents") == parent_pb and p.get("id") != parent.get("id")
+            p for p in family.children_of(parent_pb)
+            if p.get("id") != parent.get("id")
         )
     return out
 
 
-def _parent_coverage(parents_pb, people, gender, cat):
+def _parent_coverage(parents_pb, family, gender, cat):
     if not parents_pb:
         return CategoryCoverage(cat, CoverageStatus.NotCovered)
-    parent = _find_parent(parents_pb, people, gender)
+    parent = _find_parent(parents_pb, family, gender)
     if parent and parent.get("name"):
         return CategoryCoverage(cat, CoverageStatus.Covered, parent["name"])
     return CategoryCoverage(
@@ -518,14 +535,14 @@ def _date_label(s):
     return d.isoformat() if d else "unknown"
 
 
-def _grandparents_coverage(parent, people, pair_bonds, cat):
+def _grandparents_coverage(parent, family, cat):
     if not parent:
         return CategoryCoverage(cat, CoverageStatus.NotCovered)
-    gp_pb = _pair_bond_by_id(pair_bonds, parent.get("parents"))
+    gp_pb = family.pair_bond(parent.get("parents"))
     if not gp_pb:
         return CategoryCoverage(cat, CoverageStatus.NotCovered)
-    gma = _find_parent(gp_pb, people, "female")
-    gpa = _find_parent(gp_pb, people, "male")
+    gma = _find_parent(gp_pb, family, "female")
+    gpa = _find_parent(gp_pb, family, "male")
     found = [p for p in (gma, gpa) if p and p.get("name")]
     if len(found) == 2:
         return CategoryCoverage(
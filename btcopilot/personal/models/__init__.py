@@ -2,3 +2,4 @@ from .statement import Statement
 from .discussion import Discussion, DiscussionStatus
 from .speaker import Speaker, SpeakerType
 from .syntheticpersona import SyntheticPersona
+from .clustercache import ClusterCache
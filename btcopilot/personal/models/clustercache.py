@@ -0,0 +1,22 @@
+from sqlalchemy import Column, ForeignKey, Integer, String, JSON, UniqueConstraint
+
+from btcopilot.extensions import db
+from btcopilot.modelmixin import ModelMixin
+
+
+class ClusterCache(db.Model, ModelMixin):
+    """LLM cluster labels for one candidate event group of a diagram.
+
+    `key` is the group's compute_cache_key(); `data` is
+    {"members": [keys of the groups merged into this cluster],
+     "cluster": {title, summary, pattern, dominantVariable} or None}.
+    """
+
+    __tablename__ = "cluster_cache"
+    __table_args__ = (UniqueConstraint("diagram_id", "key"),)
+
+    diagram_id = Column(
+        Integer, ForeignKey("diagrams.id", ondelete="CASCADE"), nullable=False
+    )
+    key = Column(String(64), nullable=False)
+    data = Column(JSON, nullable=False)
@@ -1,12 +1,19 @@
+import datetime
 import enum
 
 from sqlalchemy import Column, Text, Integer, Boolean, Date, JSON, Enum
+from sqlalchemy import insert, update as sql_update
 from sqlalchemy.orm import relationship
+from sqlalchemy.orm.attributes import set_committed_value
 
 from btcopilot.extensions import db
+from btcopilot.llmtelemetry import llm_caller
 from btcopilot.llmutil import response_text_sync
 from btcopilot.modelmixin import ModelMixin
 
+# Rows per multi-row INSERT when bulk-adding statements.
+STATEMENT_INSERT_CHUNK_SIZE = 500
+
 
 class DiscussionStatus(enum.StrEnum):
     Pending = "pending"
@@ -79,6 +86,20 @@ class Discussion(db.Model, ModelMixin):
         "until that PDP is accepted; on full accept it is promoted to "
         "extracted_through_order. NULL when no extract awaits acceptance.",
     )
+    summary_through_order = Column(
+        Integer,
+        nullable=True,
+        comment="Rolling chat context: highest Statement.order folded into "
+        "`summary`. Later statements are sent to the chat model verbatim. NULL = "
+        "nothing folded yet (summary, if any, is not chat context).",
+    )
+    last_order = Column(
+        Integer,
+        nullable=True,
+        comment="Highest Statement.order handed out by reserve_order_block(). "
+        "Orders are unique and increasing but may have gaps. NULL = derive from "
+        "the statements on first use.",
+    )
     user = relationship("User")
     diagram = relationship("Diagram", back_populates="discussions")
     statements = relationship(
@@ -139,31 +160,162 @@ class Discussion(db.Model, ModelMixin):
     def update_summary(self):
         from btcopilot.personal.prompts import SUMMARIZE_MESSAGES_PROMPT
 
-        self.summary = response_text_sync(
-            SUMMARIZE_MESSAGES_PROMPT.format(
-                conversation_history=self.conversation_history()
-            ),
+        with llm_caller("chat_summary"):
+            self.summary = response_text_sync(
+                SUMMARIZE_MESSAGES_PROMPT.format(
+                    conversation_history=self.conversation_history()
+                ),
+            )
+
+    def compact_summary(self, verbatim_turns: int) -> bool:
+        """Fold all but the last `verbatim_turns` unfolded statements into
+        `summary`, advancing `summary_through_order`.
+
+        Incremental: only the previous summary and the newly folded turns go
+        to the model. The LLM call holds no lock; the result is written with a
+        compare-and-set on summary_through_order so a concurrent compaction
+        that got there first wins. Returns True if this call advanced it.
+        """
+        from btcopilot.personal.models import Statement
+        from btcopilot.personal.prompts import FOLD_SUMMARY_PROMPT
+
+        through = self.summary_through_order
+        query = Statement.query.filter(Statement.discussion_id == self.id)
+        if through is not None:
+            query = query.filter(Statement.order > through)
+        pending = query.order_by(Statement.order, Statement.id).all()
+        fold = pending[: max(len(pending) - verbatim_turns, 0)]
+        if not fold:
+            return False
+
+        with llm_caller("chat_summary"):
+            summary = response_text_sync(
+                FOLD_SUMMARY_PROMPT.format(
+                    summary=self.summary if through is not None else "(none yet)",
+                    conversation_history="\n".join(
+                        f"{s.speaker.name if s.speaker else 'Unknown'}: {s.text}"
+                        for s in fold
+                    ),
+                )
+            ).strip()
+
+        claimed = db.session.execute(
+            sql_update(Discussion)
+            .where(
+                Discussion.id == self.id,
+                (
+                    Discussion.summary_through_order.is_(None)
+                    if through is None
+                    else Discussion.summary_through_order == through
+                ),
+            )
+            .values(summary=summary, summary_through_order=fold[-1].order)
+        ).rowcount
+        if claimed:
+            db.session.refresh(self, ["summary", "summary_through_order"])
+        return bool(claimed)
+
+    def reserve_order_block(self, count: int) -> tuple[int, int]:
+        """
+        Reserve `count` consecutive Statement.order values, returned as
+        (start, end) inclusive.
+
+        A single UPDATE ... RETURNING advances `last_order`, so concurrent
+        writers can't read the same maximum and collide (PostgreSQL makes the
+        second UPDATE wait for the first transaction and then re-read the
+        counter), and nothing scans `statements` once the counter is set.
+        Every block is above all earlier ones. Orders may have gaps: a block
+        needn't be used in full. Reserve as late as possible, since the
+        discussion row stays locked until the transaction ends.
+
+        Statements given an order any other way must come before the first
+        reservation (e.g. a freshly imported discussion).
+        """
+        from btcopilot.personal.models import Statement
+
+        if count <= 0:
+            raise ValueError(f"count must be > 0, got {count}")
+        current = db.func.coalesce(
+            Discussion.last_order,
+            db.select(db.func.max(Statement.order))
+            .where(Statement.discussion_id == Discussion.id)
+            .scalar_subquery(),
+            0,
         )
+        end = db.session.execute(
+            sql_update(Discussion)
+            .where(Discussion.id == self.id)
+            .values(last_order=current + count)
+            .returning(Discussion.last_order)
+            .execution_options(synchronize_session=False)
+        ).scalar_one()
+        set_committed_value(self, "last_order", end)
+        return end - count + 1, end
 
     def next_order(self) -> int:
-        from btcopilot.personal.models import Statement
+        return self.reserve_order_block(1)[0]
+
+    def resolve_speakers(self, names: list[str], type=None) -> dict[str, int]:
+        """
+        Speaker ids by name, creating the speakers this discussion doesn't
+        have yet (as `type`, default Subject) in a single INSERT.
+        """
+        from btcopilot.personal.models import Speaker, SpeakerType
 
-        # Serialize order allocation per discussion. A bare max+1 lets two
-        # concurrent chat turns read the same max and assign duplicate
-        # Statement.order, which corrupts the re-extraction window boundary
-        # (statements on the cursor edge get misclassified, silently dropping
-        # or duplicating conversation in the next extract). The SELECT FOR
-        # UPDATE on the parent row blocks a second writer until this turn
-        # commits, so each turn sees the prior turn's committed orders.
-        # SQLite (tests) ignores FOR UPDATE; PostgreSQL (prod) enforces it.
-        # Proven on dev Postgres: 12 concurrent writers without this lock all
-        # got order=1 (11/12 lost); with it, a clean 1..12.
-        db.session.query(Discussion).filter(
-            Discussion.id == self.id
-        ).with_for_update().one()
-        max_order = (
-            db.session.query(db.func.max(Statement.order))
-            .filter(Statement.discussion_id == self.id)
-            .scalar()
+        names = list(dict.fromkeys(names))
+        ids = dict(
+            db.session.query(Speaker.name, Speaker.id).filter(
+                Speaker.discussion_id == self.id, Speaker.name.in_(names)
+            )
         )
-        return (max_order or 0) + 1
+        missing = [name for name in names if name not in ids]
+        if missing:
+            created = db.session.execute(
+                insert(Speaker).returning(Speaker.name, Speaker.id),
+                [
+                    {
+                        "discussion_id": self.id,
+                        "name": name,
+                        "type": type or SpeakerType.Subject,
+                    }
+                    for name in missing
+                ],
+            )
+            ids.update(created.all())
+        return ids
+
+    def add_statements(
+        self,
+        rows: list[tuple[int, str]],
+        chunk_size: int = STATEMENT_INSERT_CHUNK_SIZE,
+    ) -> int:
+        """
+        Append (speaker_id, text) rows as statements with multi-row INSERTs,
+        numbered from one reserve_order_block(), so a transcript of thousands
+        of utterances costs a handful of round trips. Bypasses the ORM: the
+        `statements` relationship isn't updated until it is reloaded. Returns
+        the first order assigned.
+        """
+        from btcopilot.personal.models import Statement
+
+        if not rows:
+            raise ValueError("No statements to add")
+        first, _ = self.reserve_order_block(len(rows))
+        now = datetime.datetime.utcnow()
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start : start + chunk_size]
+            db.session.execute(
+                insert(Statement).values(
+                    [
+                        {
+                            "discussion_id": self.id,
+                            "speaker_id": speaker_id,
+                            "text": text,
+                            "order": first + start + i,
+                            "created_at": now,
+                        }
+                        for i, (speaker_id, text) in enumerate(chunk)
+                    ]
+                )
+            )
+        return first
@@ -24,6 +24,25 @@ Summarize the following discussion.
 {conversation_history}
 """
 
+FOLD_SUMMARY_PROMPT = """
+You maintain a running summary of a family systems coaching conversation.
+Update the summary below so it also covers the new turns. Keep every family
+member, relationship, date, event and open thread the consultant may need to
+refer back to; drop pleasantries. Reply with the updated summary only.
+
+Summary so far:
+{summary}
+
+New turns:
+{conversation_history}
+"""
+
+CONVERSATION_SUMMARY_CONTEXT = """
+
+**Earlier in this conversation** (summary of turns no longer shown verbatim):
+{summary}
+"""
+
 
 # ── Conversation flow ─────────────────────────────────────────────────────────
 #
@@ -192,6 +211,8 @@ if _prompts_path:
             # Override prompt constants from private file.
             for _var in (
                 "SUMMARIZE_MESSAGES_PROMPT",
+                "FOLD_SUMMARY_PROMPT",
+                "CONVERSATION_SUMMARY_CONTEXT",
                 "DATA_EXTRACTION_CORRECTION",
                 "DATA_EXTRACTION_PASS1_PROMPT",
                 "DATA_EXTRACTION_PASS1_CONTEXT",
@@ -2,16 +2,23 @@ import logging
 import base64
 import pickle
 from flask import Blueprint, request, jsonify, abort
-from sqlalchemy.orm import subqueryload
+from sqlalchemy.orm import defer, subqueryload
 
 import asyncio
 import btcopilot
 from btcopilot import auth, pdp
 from btcopilot.extensions import db
 from btcopilot.schema import DiagramData, Event, asdict, from_dict
+from btcopilot.pro import wire
 from btcopilot.pro.models import Diagram, AccessRight
 from btcopilot.personal.models import Discussion, Statement
 from btcopilot.personal import clusters
+from btcopilot.training.sse import (
+    sse_manager,
+    diagram_channel,
+    event_stream_response,
+    last_event_id,
+)
 
 _log = logging.getLogger(__name__)
 
@@ -72,13 +79,24 @@ def list_diagrams():
 def get(diagram_id):
     user = auth.current_user()
 
-    diagram = Diagram.query.get(diagram_id)
+    binary = wire.wants_binary()
+    query = Diagram.query
+    if binary:
+        query = query.options(defer(Diagram.data))
+    diagram = query.get(diagram_id)
     if not diagram:
         abort(404)
 
     if diagram.user_id != user.id and not user.has_role(btcopilot.ROLE_ADMIN):
         abort(403)
 
+    if binary:
+        # Discussions are left to /<id>/discussions so the header stays small.
+        _log.info(f"Fetched diagram {diagram.id}, version: {diagram.version}")
+        return wire.diagram_response(
+            diagram, diagram.as_dict(include=["access_rights"], exclude="data")
+        )
+
     ret = diagram.as_dict(
         include={
             "discussions": {"include": ["statements", "speakers"]},
@@ -103,6 +121,21 @@ def update(diagram_id):
     if not diagram.check_write_access(user):
         abort(403)
 
+    if wire.is_binary_upload():
+        try:
+            new_data = wire.decode_upload()
+        except ValueError as e:
+            return jsonify(error=str(e)), 400
+        success, new_version = diagram.update_with_version_check(
+            wire.expected_version(diagram), new_data=new_data
+        )
+        meta = diagram.as_dict(include=["access_rights"], exclude="data")
+        if not success:
+            return wire.diagram_response(diagram, meta, status=409)
+        _log.info(f"Updated diagram {diagram.id} new_version: {new_version}")
+        db.session.commit()
+        return wire.diagram_response(diagram, meta, status=204)
+
     if request.json is None:
         _log.error(
             f"request.json is None. Content-Type: {request.content_type}, "
@@ -181,6 +214,20 @@ def import_journal(diagram_id):
     if not text.strip():
         return jsonify(error="Text cannot be empty"), 400
 
+    if data.get("background"):
+        # Long journals: extract in a worker, report progress on the
+        # diagram's event stream and import-text/<task_id>.
+        from btcopilot.extensions import celery
+
+        if celery is None:
+            abort(503, description="Celery not available")
+        task = celery.send_task("import_text", args=[diagram_id, text])
+        _log.info(
+            f"User {user.username} started import_text task {task.id} "
+            f"for diagram {diagram_id}"
+        )
+        return jsonify(task_id=task.id), 202
+
     diagram_data = diagram.get_diagram_data()
 
     new_pdp, deltas = asyncio.run(pdp.import_text(diagram_data, text))
@@ -202,6 +249,56 @@ def import_journal(diagram_id):
     return jsonify(success=True, pdp=asdict(new_pdp), summary=summary)
 
 
+@diagrams_bp.route("/<int:diagram_id>/import-text/<task_id>", methods=["GET"])
+def import_journal_status(diagram_id, task_id):
+    from btcopilot.extensions import celery
+    from celery.result import AsyncResult
+
+    user = auth.current_user()
+
+    diagram = Diagram.query.get(diagram_id)
+    if not diagram:
+        abort(404)
+
+    if not diagram.check_write_access(user):
+        abort(403)
+
+    if celery is None:
+        return jsonify(status="error", error="Celery not available"), 503
+
+    result = AsyncResult(task_id, app=celery)
+    if result.failed():
+        return jsonify(status="error", error=str(result.result))
+    if result.ready():
+        return jsonify(status="complete", **result.get())
+    if result.state == "PROGRESS":
+        meta = result.info or {}
+        return jsonify(
+            status="progress",
+            current=meta.get("current", 0),
+            total=meta.get("total", 0),
+            label=meta.get("label", ""),
+        )
+    return jsonify(status="pending")
+
+
+@diagrams_bp.route("/<int:diagram_id>/events", methods=["GET"])
+def events(diagram_id):
+    """Server-sent progress of background jobs on this diagram."""
+    user = auth.current_user()
+
+    diagram = Diagram.query.get(diagram_id)
+    if not diagram:
+        abort(404)
+
+    if not diagram.check_write_access(user):
+        abort(403)
+
+    return event_stream_response(
+        sse_manager.stream(diagram_channel(diagram_id), last_event_id=last_event_id())
+    )
+
+
 @diagrams_bp.route("/<int:diagram_id>/clusters", methods=["POST"])
 def detect_clusters(diagram_id):
     user = auth.current_user()
@@ -221,7 +318,8 @@ def detect_clusters(diagram_id):
 
     _log.info(f"Detecting clusters for diagram {diagram_id} with {len(events)} events")
 
-    result = clusters.detect_clusters(events)
+    result = clusters.detect_clusters(events, diagram_id=diagram.id)
+    db.session.commit()
 
     return jsonify(
         clusters=[asdict(c) for c in result.clusters],
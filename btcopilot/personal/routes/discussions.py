@@ -8,6 +8,7 @@ from sqlalchemy.orm import subqueryload
 import asyncio
 from btcopilot import auth, pdp
 from btcopilot.extensions import db
+from btcopilot.modelmixin import as_dicts
 from btcopilot.pro.models import Diagram
 from btcopilot.schema import asdict, get_all_pdp_item_ids, is_parents_edit
 from btcopilot.personal import Response, ask
@@ -18,6 +19,12 @@ from btcopilot.personal.deepreextract import (
     request_rebuild_cancel,
 )
 from btcopilot.personal.models import Discussion, Speaker, SpeakerType
+from btcopilot.training.sse import (
+    sse_manager,
+    discussion_channel,
+    event_stream_response,
+    last_event_id,
+)
 
 _log = logging.getLogger(__name__)
 
@@ -89,7 +96,7 @@ def index():
         .filter_by(user_id=auth.current_user().id)
         .all()
     )
-    return jsonify([discussion.as_dict() for discussion in discussions])
+    return jsonify(as_dicts(discussions))
 
 
 @bp.route("/<int:discussion_id>", methods=["GET"])
@@ -242,6 +249,16 @@ def extract(discussion_id: int):
     db.session.commit()
     if not claimed:
         abort(409, description="An extraction is already in progress")
+    channel = discussion_channel(discussion_id)
+    sse_manager.publish({"type": "extracting", "extracting": True}, channel=channel)
+    windows = {"done": 0}
+
+    def on_window():
+        windows["done"] += 1
+        sse_manager.publish(
+            {"type": "extract", "status": "progress", "windows_done": windows["done"]},
+            channel=channel,
+        )
 
     try:
         diagram_data = discussion.diagram.get_diagram_data()
@@ -252,7 +269,9 @@ def extract(discussion_id: int):
         orders = [s.order for s in discussion.statements if s.order is not None]
         pending_through = max(orders) if orders else None
 
-        new_pdp, _ = asyncio.run(pdp.extract_full(discussion, diagram_data))
+        new_pdp, _ = asyncio.run(
+            pdp.extract_full(discussion, diagram_data, on_window=on_window)
+        )
         diagram_data.pdp = new_pdp
 
         ok, _ = discussion.diagram.update_with_version_check(
@@ -271,6 +290,9 @@ def extract(discussion_id: int):
             .values(extracting=False)
         )
         db.session.commit()
+        sse_manager.publish(
+            {"type": "extracting", "extracting": False}, channel=channel
+        )
 
     return jsonify(
         success=True,
@@ -473,6 +495,32 @@ def deep_reextract_status(discussion_id: int, task_id: str):
     return jsonify({"status": "pending"})
 
 
+@bp.route("/<int:discussion_id>/events", methods=["GET"])
+def events(discussion_id: int):
+    """Server-sent extraction and deep re-extract progress for a discussion,
+    replacing polling of deep-reextract-status and the `extracting` flag.
+
+    With ?task_id=, the open stream also keeps that rebuild alive the way
+    status polls do."""
+    user = auth.current_user()
+    discussion = Discussion.query.get(discussion_id)
+    if not discussion:
+        abort(404)
+    if discussion.user_id != user.id:
+        abort(401)
+
+    task_id = request.args.get("task_id")
+    if task_id:
+        mark_rebuild_alive(task_id)
+    return event_stream_response(
+        sse_manager.stream(
+            discussion_channel(discussion_id),
+            last_event_id=last_event_id(),
+            on_heartbeat=(lambda: mark_rebuild_alive(task_id)) if task_id else None,
+        )
+    )
+
+
 @bp.route("/<int:discussion_id>/deep-reextract/<task_id>/cancel", methods=["POST"])
 def deep_reextract_cancel(discussion_id: int, task_id: str):
     """Cancel a running rebuild: flag it so the worker aborts on its next window,
@@ -1,9 +1,11 @@
-import copy
+import asyncio
 import logging
 
 from sqlalchemy import update as sql_update
 
+from btcopilot import pdp
 from btcopilot.extensions import db
+from btcopilot.pro.models import Diagram
 from btcopilot.personal.models import Discussion
 from btcopilot.personal.deepreextract import (
     deep_reextract,
@@ -13,6 +15,7 @@ from btcopilot.personal.deepreextract import (
 )
 from btcopilot.schema import asdict
 from btcopilot.familygraph import lcc_percent
+from btcopilot.training.sse import sse_manager, diagram_channel, discussion_channel
 
 _log = logging.getLogger(__name__)
 
@@ -21,6 +24,13 @@ def deep_reextract_task(self, discussion_id: int, k: int):
     _log.info(f"deep_reextract_task() discussion={discussion_id}, k={k}")
     task_id = self.request.id
     mark_rebuild_alive(task_id)
+    channel = discussion_channel(discussion_id)
+
+    def publish(status, **kwargs):
+        sse_manager.publish(
+            {"type": "deep_reextract", "task_id": task_id, "status": status, **kwargs},
+            channel=channel,
+        )
 
     try:
 
@@ -29,6 +39,7 @@ def deep_reextract_task(self, discussion_id: int, k: int):
                 state="PROGRESS",
                 meta={"current": current, "total": total, "label": label},
             )
+            publish("progress", current=current, total=total, label=label)
 
         delta_pdp, _, runs_used = deep_reextract(
             discussion_id,
@@ -62,32 +73,41 @@ def deep_reextract_task(self, discussion_id: int, k: int):
 
         db.session.commit()
 
-        # Projected connectivity if the user accepts the whole staged delta —
-        # commit it onto a throwaway copy and measure. (diagram_data itself only
-        # holds the delta as a pending pdp; its committed people are unchanged.)
-        projected = copy.deepcopy(diagram_data)
-        neg_ids = [p.id for p in delta_pdp.people if p.id is not None and p.id < 0]
-        neg_ids += [
-            pb.id for pb in delta_pdp.pair_bonds if pb.id is not None and pb.id < 0
-        ]
-        if neg_ids:
-            projected.commit_pdp_items(neg_ids)
-        projected.apply_parent_edits()
-        stats = lcc_percent(projected.people, projected.pair_bonds)
-
-        return {
+        result = {
             "success": True,
             "people_count": len(delta_pdp.people),
             "events_count": len(delta_pdp.events),
             "pair_bonds_count": len(delta_pdp.pair_bonds),
             "pdp": asdict(delta_pdp),
-            "lcc_pct": stats["lcc_pct"],
             "k": k,
             "runs_used": runs_used,
         }
+
+        # Projected connectivity if the user accepts the whole staged delta.
+        # diagram_data has already been written, so commit the delta onto it
+        # in place and measure; the result above holds the staged PDP as it
+        # was before commit_pdp_items consumes it.
+        neg_ids = [p.id for p in delta_pdp.people if p.id is not None and p.id < 0]
+        neg_ids += [
+            pb.id for pb in delta_pdp.pair_bonds if pb.id is not None and pb.id < 0
+        ]
+        if neg_ids:
+            diagram_data.commit_pdp_items(neg_ids)
+        diagram_data.apply_parent_edits()
+        stats = lcc_percent(diagram_data.people, diagram_data.pair_bonds)
+        result["lcc_pct"] = stats["lcc_pct"]
+
+        # The full result (with the PDP) stays with the task; subscribers
+        # fetch it from deep-reextract-status once.
+        publish("complete", lcc_pct=stats["lcc_pct"], k=k, runs_used=runs_used)
+        return result
     except RebuildCancelled:
         _log.info(f"deep_reextract_task cancelled (discussion={discussion_id})")
+        publish("cancelled")
         return {"cancelled": True}
+    except Exception as e:
+        publish("error", error=str(e))
+        raise
     finally:
         db.session.execute(
             sql_update(Discussion)
@@ -95,3 +115,78 @@ def deep_reextract_task(self, discussion_id: int, k: int):
             .values(extracting=False)
         )
         db.session.commit()
+        sse_manager.publish(
+            {"type": "extracting", "extracting": False}, channel=channel
+        )
+
+
+def import_text_task(self, diagram_id: int, text: str):
+    """Background half of POST /personal/diagrams/<id>/import-text."""
+    _log.info(f"import_text_task() diagram={diagram_id}, {len(text)} chars")
+    task_id = self.request.id
+    channel = diagram_channel(diagram_id)
+
+    def publish(status, **kwargs):
+        sse_manager.publish(
+            {"type": "import_text", "task_id": task_id, "status": status, **kwargs},
+            channel=channel,
+        )
+
+    def on_progress(current, total, label):
+        self.update_state(
+            state="PROGRESS",
+            meta={"current": current, "total": total, "label": label},
+        )
+        publish("progress", current=current, total=total, label=label)
+
+    try:
+        diagram = db.session.get(Diagram, diagram_id)
+        if diagram is None:
+            raise ValueError(f"Diagram {diagram_id} not found")
+        new_pdp, deltas = asyncio.run(
+            pdp.import_text(diagram.get_diagram_data(), text, on_progress=on_progress)
+        )
+
+        for _ in range(32):
+            db.session.refresh(diagram)
+            expected_version = diagram.version
+            diagram_data = diagram.get_diagram_data()
+            diagram_data.pdp = new_pdp
+            ok, _ = diagram.update_with_version_check(
+                expected_version, diagram_data=diagram_data
+            )
+            if ok:
+                break
+            db.session.rollback()
+        else:
+            raise RuntimeError("Diagram write contention; import_text_task failed")
+        db.session.commit()
+
+        summary = {
+            "people": len(deltas.people),
+            "events": len(deltas.events),
+            "pairBonds": len(deltas.pair_bonds),
+        }
+        publish("complete", summary=summary)
+        return {"success": True, "pdp": asdict(new_pdp), "summary": summary}
+    except Exception as e:
+        publish("error", error=str(e))
+        raise
+
+
+def compact_chat_summary(discussion_id: int):
+    """Background half of chat.ask's rolling context (see _queue_compaction)."""
+    from btcopilot.personal.chat import CHAT_VERBATIM_TURNS, release_compaction
+
+    try:
+        discussion = db.session.get(Discussion, discussion_id)
+        if discussion is None:
+            return
+        if discussion.compact_summary(CHAT_VERBATIM_TURNS):
+            db.session.commit()
+            _log.info(
+                f"compact_chat_summary() discussion={discussion_id} folded through "
+                f"order {discussion.summary_through_order}"
+            )
+    finally:
+        release_compaction(discussion_id)
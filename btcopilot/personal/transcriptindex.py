@@ -0,0 +1,143 @@
+"""
+Normalized, searchable transcript for quote gating.
+
+The text is normalized once (Unicode compatibility forms, case, apostrophes
+and other punctuation, whitespace) and kept with the offset at which each
+statement starts, so a quote lookup is a substring search of the prepared
+text that reports which statement it hit. On a miss, a bounded-edit-distance
+search looks for a near-verbatim occurrence, aligning only the few windows a
+pigeonhole filter leaves instead of the whole transcript.
+
+Near-exact matching tolerates the small differences a model introduces when
+quoting speech (a dropped filler word, a misspelling) without accepting a
+paraphrase: at most QUOTE_EDIT_RATIO edits per normalized character, and none
+for quotes shorter than QUOTE_MIN_FUZZY_LENGTH.
+"""
+
+import bisect
+import re
+import unicodedata
+from dataclasses import dataclass
+
+QUOTE_EDIT_RATIO = 0.05
+# Shorter quotes (normalized characters) must match exactly: a single edit
+# there is as likely to be a different name as a typo.
+QUOTE_MIN_FUZZY_LENGTH = 40
+
+_APOSTROPHES = re.compile("['`‘’ʼ]")
+_PUNCTUATION = re.compile(r"[^\w\s]|_")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    """Lowercased words separated by single spaces; "Don’t!" -> "dont"."""
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = _APOSTROPHES.sub("", text)
+    text = _PUNCTUATION.sub(" ", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+@dataclass
+class QuoteMatch:
+    start: int  # offsets into TranscriptIndex.normalized
+    end: int
+    edits: int
+    line: int
+    statement_id: int | None
+
+
+class TranscriptIndex:
+    """
+    `lines` are the transcript lines as shown to the model; `statement_ids`
+    (parallel to `lines`, optional) lets matches name the statement they came
+    from.
+    """
+
+    def __init__(self, lines: list[str], statement_ids: list | None = None):
+        self.lines = lines
+        self.statement_ids = statement_ids or [None] * len(lines)
+        self.text = "\n".join(lines)
+        normalized = [normalize(line) for line in lines]
+        self._line_starts = []
+        offset = 0
+        for line in normalized:
+            self._line_starts.append(offset)
+            offset += len(line) + 1
+        self.normalized = " ".join(normalized)
+
+    @classmethod
+    def from_text(cls, text: str) -> "TranscriptIndex":
+        return cls(text.splitlines())
+
+    def find(self, quote: str, max_edits: int | None = None) -> QuoteMatch | None:
+        """
+        Where `quote` occurs in the transcript, exactly or within `max_edits`
+        character edits (default: QUOTE_EDIT_RATIO of its normalized length,
+        or none below QUOTE_MIN_FUZZY_LENGTH).
+        The fewest-edit occurrence wins. None if there is none, or if the quote
+        normalizes to nothing.
+        """
+        q = normalize(quote)
+        if not q:
+            return None
+        start = self.normalized.find(q)
+        if start >= 0:
+            return self._match(start, start + len(q), 0)
+        if max_edits is None:
+            if len(q) < QUOTE_MIN_FUZZY_LENGTH:
+                return None
+            max_edits = int(len(q) * QUOTE_EDIT_RATIO)
+        if max_edits <= 0:
+            return None
+        return self._find_near(q, max_edits)
+
+    def _find_near(self, q: str, k: int) -> QuoteMatch | None:
+        # Split the quote into k+1 pieces: k edits can't touch all of them, so
+        # any occurrence within k edits contains one piece verbatim. Locating
+        # the pieces is a C-speed substring search of the normalized text; only
+        # the windows around their hits are aligned character by character.
+        bounds = [i * len(q) // (k + 1) for i in range(k + 2)]
+        best = None
+        checked = set()
+        for lo_q, hi_q in zip(bounds, bounds[1:]):
+            piece = q[lo_q:hi_q]
+            hit = self.normalized.find(piece)
+            while hit >= 0:
+                origin = hit - lo_q
+                if origin not in checked:
+                    checked.add(origin)
+                    lo = max(0, origin - k)
+                    window = self.normalized[lo : origin + len(q) + k]
+                    aligned = _approximate(q, window, k)
+                    if aligned is not None and (best is None or aligned[0] < best[0]):
+                        best = (aligned[0], lo + aligned[1])
+                hit = self.normalized.find(piece, hit + 1)
+        if best is None:
+            return None
+        edits, end = best
+        return self._match(max(0, end - len(q)), end, edits)
+
+    def _match(self, start: int, end: int, edits: int) -> QuoteMatch:
+        line = bisect.bisect_right(self._line_starts, start) - 1
+        return QuoteMatch(
+            start=start,
+            end=end,
+            edits=edits,
+            line=line,
+            statement_id=self.statement_ids[line],
+        )
+
+
+def _approximate(pattern: str, text: str, k: int) -> tuple[int, int] | None:
+    """(edits, end offset) of the closest occurrence of `pattern` anywhere in
+    `text` if it is within `k` edits (Sellers' algorithm)."""
+    prev = [0] * (len(text) + 1)
+    for i, pc in enumerate(pattern, 1):
+        cur = [i]
+        for j, tc in enumerate(text, 1):
+            cur.append(min(prev[j - 1] + (pc != tc), prev[j] + 1, cur[j - 1] + 1))
+        if min(cur) > k:
+            return None
+        prev = cur
+    edits = min(prev)
+    return edits, prev.index(edits)
@@ -7,16 +7,30 @@ EXPERIMENTATION:
 - llm model
 """
 
-# from cachetools import TTLCache
-
+import hashlib
 import os
 import logging
+import threading
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+
+import numpy as np
+from cachetools import LRUCache, TTLCache
+
+from btcopilot.llmtelemetry import REGISTRY, llm_caller, track
 
 _log = logging.getLogger(__name__)
 
 LLM_MODEL = "gpt-4o-mini"
+EMBEDDINGS_MODEL = "text-embedding-3-small"
+
+# Semantic answer cache: a question whose embedding is at least this cosine
+# similar to a cached question, asked against the same timeline, gets the
+# cached answer without retrieval or an LLM call.
+ANSWER_CACHE_THRESHOLD = 0.95
+ANSWER_CACHE_SIZE = 1000
+ANSWER_CACHE_TTL = 3600
+EMBEDDING_CACHE_SIZE = 4096
 
 
 PROMPT_TEMPLATE = """
@@ -58,6 +72,7 @@ class Response:
     vectors_time: float = 0.0
     llm_time: float = 0.0
     total_time: float = 0.0
+    cached: bool = False
 
     def __str__(self):
         return (
@@ -66,6 +81,7 @@ class Response:
             f"Vector DB Time: {self.vectors_time}\n"
             f"LLM Time: {self.llm_time}\n"
             f"Total Time: {self.total_time}\n"
+            f"Cached: {self.cached}\n"
         )
 
 
@@ -90,6 +106,67 @@ def format_timeline_data(events: list[Event]) -> str:
     return timeline_data
 
 
+def timeline_hash(events: list[Event] | None) -> str:
+    if not events:
+        return ""
+    return hashlib.sha256(format_timeline_data(events).encode()).hexdigest()
+
+
+class SemanticCache:
+    """
+    Answers keyed by (timeline hash, question embedding). A lookup hits when
+    a cached question for the same timeline is within `threshold` cosine
+    similarity. Entries expire after `ttl` seconds and the least recently
+    used are evicted past `maxsize`. Thread-safe.
+    """
+
+    def __init__(
+        self,
+        threshold: float = ANSWER_CACHE_THRESHOLD,
+        maxsize: int = ANSWER_CACHE_SIZE,
+        ttl: float = ANSWER_CACHE_TTL,
+        timer=time.monotonic,
+    ):
+        self.threshold = threshold
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl, timer=timer)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, vector, timeline: str) -> Response | None:
+        query = _unit(vector)
+        with self._lock:
+            candidates = [
+                (key, unit)
+                for key, (unit, _response) in self._entries.items()
+                if key[0] == timeline
+            ]
+            if not candidates:
+                return None
+            scores = np.stack([unit for _key, unit in candidates]) @ query
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                return None
+            # Indexing (not .items()) marks the entry as recently used.
+            return self._entries[candidates[best][0]][1]
+
+    def put(self, question: str, vector, timeline: str, response: Response):
+        with self._lock:
+            self._entries[(timeline, question)] = (_unit(vector), response)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _unit(vector) -> np.ndarray:
+    v = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(v)
+    return v / norm if norm else v
+
+
 class Engine:
     """
     The resource-intensive part of the app. Can be shared across tests if necessary.
@@ -100,6 +177,10 @@ class Engine:
         self._vector_db = None
         self._data_dir = data_dir
         self._k = k
+        self._embeddings = None
+        self._embedding_cache = LRUCache(maxsize=EMBEDDING_CACHE_SIZE)
+        self._embedding_lock = threading.Lock()
+        self.answer_cache = SemanticCache()
         # self._conversation_chains = TTLCache(maxsize=1000, ttl=3600)
 
     def data_dir(self) -> str:
@@ -127,33 +208,65 @@ class Engine:
         """
         Translate from various return types to a simple string.
         """
+        with llm_caller("copilot"), track("ChatOpenAI.invoke", LLM_MODEL) as call:
+            call.mark_sent()
+            ai_message = self.get_llm().invoke(question)
+            call.mark_first_byte()
+            return self._message_text(ai_message, call)
+
+    @staticmethod
+    def _message_text(ai_message, call) -> str:
         from langchain_core.messages import AIMessage
 
-        ai_message = self.get_llm().invoke(question)
         if isinstance(ai_message, AIMessage):
+            usage = ai_message.usage_metadata or {}
+            call.add_usage(
+                input_tokens=usage.get("input_tokens", 0),
+                output_tokens=usage.get("output_tokens", 0),
+            )
             response_text = ai_message.content
         else:
             response_text = ai_message
         return response_text.strip()
 
+    def get_embeddings(self):
+        if not self._embeddings:
+            from langchain_openai import OpenAIEmbeddings
+
+            self._embeddings = OpenAIEmbeddings(
+                model=EMBEDDINGS_MODEL,
+                openai_api_key=os.getenv("OPENAI_API_KEY"),
+            )
+        return self._embeddings
+
     def get_vector_db(self):
         if not self._vector_db:
             _log.info(f"Loading vector db from {self.data_dir()}...")
-            from langchain_openai import OpenAIEmbeddings
             from langchain_chroma import Chroma
 
-            embeddings = OpenAIEmbeddings(
-                model="text-embedding-3-small",
-                openai_api_key=os.getenv("OPENAI_API_KEY"),
-            )
             self._vector_db = Chroma(
                 collection_name="btcopilot",
                 persist_directory=self.data_dir(),
-                embedding_function=embeddings,
+                embedding_function=self.get_embeddings(),
             )
             _log.info(f"Loaded vector db from {self.data_dir()}")
         return self._vector_db
 
+    def _cached_embedding(self, question: str):
+        with self._embedding_lock:
+            return self._embedding_cache.get(question)
+
+    def _cache_embedding(self, question: str, vector):
+        with self._embedding_lock:
+            self._embedding_cache[question] = vector
+
+    def embed_question(self, question: str) -> list[float]:
+        vector = self._cached_embedding(question)
+        if vector is None:
+            vector = self.get_embeddings().embed_query(question)
+            self._cache_embedding(question, vector)
+        return vector
+
     def _chat_template(self, kind):
         """
         Mockable stub
@@ -169,12 +282,36 @@ class Engine:
         _log.info(f"Query with question: {question}")
 
         total_start_time = vector_start_time = time.perf_counter()
-        doc_results = self.get_vector_db().similarity_search_with_score(
-            question, k=self._k
+        vector = self.embed_question(question)
+        timeline = timeline_hash(events)
+        cached = self.answer_cache.get(vector, timeline)
+        if cached is not None:
+            return self._cache_hit(cached, total_start_time)
+        doc_results = (
+            self.get_vector_db().similarity_search_by_vector_with_relevance_scores(
+                vector, k=self._k
+            )
         )
         vector_end_time = time.perf_counter()
-        _log.info(f"Using {len(doc_results)} matching results for this query.")
 
+        prompt = self._prompt(question, events, doc_results)
+        llm_start_time = time.perf_counter()
+        response_text = self.invoke_llm(prompt)
+        total_end_time = llm_end_time = time.perf_counter()
+
+        response = self._response(
+            response_text,
+            doc_results,
+            vectors_time=(vector_end_time - vector_start_time),
+            llm_time=(llm_end_time - llm_start_time),
+            total_time=(total_end_time - total_start_time),
+        )
+        self.answer_cache.put(question, vector, timeline, response)
+        self._on_response(response)
+        return response
+
+    def _prompt(self, question: str, events: list[Event], doc_results) -> str:
+        _log.info(f"Using {len(doc_results)} matching results for this query.")
         context_literature = "\n\n---\n\n".join(
             [doc.page_content for doc, _score in doc_results]
         )
@@ -182,19 +319,18 @@ class Engine:
             _log.info(f"Using {len(events)} timeline events for this query.")
             context_timeseries = format_timeline_data(events)
             prompt_template = self._chat_template(PROMPT_TEMPLATE_WITH_TIMESERIES)
-            prompt = prompt_template.format(
+            return prompt_template.format(
                 literature=context_literature,
                 question=question,
                 timeseries=context_timeseries,
             )
         else:
             prompt_template = self._chat_template(PROMPT_TEMPLATE)
-            prompt = prompt_template.format(
+            return prompt_template.format(
                 literature=context_literature, question=question
             )
-        llm_start_time = time.perf_counter()
-        response_text = self.invoke_llm(prompt)
-        total_end_time = llm_end_time = time.perf_counter()
+
+    def _response(self, response_text: str, doc_results, **times) -> Response:
         sources = [
             {
                 "fd_file_name": doc.metadata["fd_file_name"],
@@ -205,18 +341,22 @@ class Engine:
             for doc, _score in doc_results
         ]
         _log.info(f"Response: {response_text}")
-        response = Response(
-            answer=response_text,
-            sources=sources,
-            vectors_time=(vector_end_time - vector_start_time),
-            llm_time=(llm_end_time - llm_start_time),
-            total_time=(total_end_time - total_start_time),
+        return Response(answer=response_text, sources=sources, **times)
+
+    def _cache_hit(self, cached: Response, total_start_time: float) -> Response:
+        elapsed = time.perf_counter() - total_start_time
+        _log.info(f"Answered from semantic cache in {elapsed:.3f}s")
+        response = replace(
+            cached, vectors_time=elapsed, llm_time=0.0, total_time=elapsed, cached=True
         )
         self._on_response(response)
         return response
 
     def _on_response(self, response: Response):
-        pass
+        cache = "hit" if response.cached else "miss"
+        REGISTRY.observe("copilot_vectors", response.vectors_time, cache=cache)
+        REGISTRY.observe("copilot_llm", response.llm_time, cache=cache)
+        REGISTRY.observe("copilot_total", response.total_time, cache=cache)
 
 
 # from langchain_ollama import OllamaEmbeddings
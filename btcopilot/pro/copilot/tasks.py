@@ -5,8 +5,11 @@ Command-line tools to manage the database and service.
 import sys
 import re
 import os.path
+import json
+import asyncio
 import logging
 import hashlib
+from concurrent.futures import ProcessPoolExecutor
 
 import click
 
@@ -16,6 +19,12 @@ from btcopilot.pro.copilot.splitting import split_markdown_semantically
 _log = logging.getLogger(__name__)
 
 
+INGEST_WORKERS = int(os.getenv("BTCOPILOT_INGEST_WORKERS", "4"))
+EMBED_BATCH_SIZE = 256
+EMBED_CONCURRENCY = int(os.getenv("BTCOPILOT_EMBED_CONCURRENCY", "4"))
+MANIFEST_FILE = "ingest_manifest.json"
+
+
 def normalize_whitespace(text):
     return re.sub(r"\s+", " ", text).strip()
 
@@ -24,21 +33,192 @@ def doc_id(text):
     return hashlib.md5(text.encode()).hexdigest()
 
 
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def load_source(entry) -> list:
+    """
+    Read and split one source into chunk Documents. Runs in a worker process.
+    """
+    from langchain_core.documents import Document
+
+    fpath = entry["path"]
+    _log.info(f"Reading {fpath}...")
+
+    if fpath.endswith(".pdf"):
+        from langchain_community.document_loaders import PyPDFLoader
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+        loader = PyPDFLoader(fpath)
+        docs = loader.load()
+        for doc in docs:
+            doc.page_content = normalize_whitespace(doc.page_content)
+        docs = RecursiveCharacterTextSplitter(
+            chunk_size=1000,
+            chunk_overlap=200,
+            add_start_index=True,  # track index in original document
+        ).split_documents(docs)
+    elif fpath.endswith(".md"):
+        docs = [
+            Document(page_content=x)
+            for x in split_markdown_semantically(file_path=fpath)
+        ]
+    else:
+        raise ValueError(f"Unsupported file type: {fpath}")
+    for doc in docs:
+        doc.metadata["fd_file_name"] = fpath
+        doc.metadata["fd_title"] = entry["title"]
+        doc.metadata["fd_authors"] = ",".join(entry["authors"])
+    return docs
+
+
+def chunk_ids(fpath, docs) -> dict:
+    """
+    {content-hash id: Document}. The file name is part of the hash so the same
+    passage quoted in two sources stays two vectors; repeats within one file
+    collapse to one.
+    """
+    name = os.path.basename(fpath)
+    return {doc_id(f"{name}\0{doc.page_content}"): doc for doc in docs}
+
+
+def load_manifest(path) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(path, manifest):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _batches(items, size):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def existing_ids(vector_db, ids) -> set:
+    found = set()
+    for batch in _batches(list(ids), EMBED_BATCH_SIZE * 4):
+        found.update(vector_db.get(ids=batch, include=[])["ids"])
+    return found
+
+
+async def _add_batches(vector_db, documents, ids, batch_size, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(docs, batch_ids):
+        async with semaphore:
+            await vector_db.aadd_documents(docs, ids=batch_ids)
+
+    await asyncio.gather(
+        *(
+            one(documents[i : i + batch_size], ids[i : i + batch_size])
+            for i in range(0, len(documents), batch_size)
+        )
+    )
+
+
+def ingest_sources(
+    vector_db,
+    entries,
+    manifest_path,
+    load=load_source,
+    workers=INGEST_WORKERS,
+    batch_size=EMBED_BATCH_SIZE,
+    concurrency=EMBED_CONCURRENCY,
+) -> dict:
+    """
+    Bring `vector_db` in line with `entries`, embedding only what changed.
+
+    Sources whose mtime and size match the manifest are skipped unread; the
+    rest are hashed, and only those whose hash changed are re-split (in a
+    process pool when workers > 0). Chunk ids are content hashes, so chunks
+    already in the db are not re-embedded, and chunks a changed or removed
+    source no longer produces are deleted. Returns counts for logging.
+    """
+    manifest = load_manifest(manifest_path)
+    stats = {"sources": len(entries), "changed": 0, "added": 0, "deleted": 0}
+
+    changed = []
+    for entry in entries:
+        fpath = entry["path"]
+        st = os.stat(fpath)
+        prev = manifest.get(fpath)
+        if prev and (prev["mtime"], prev["size"]) == (st.st_mtime, st.st_size):
+            continue
+        sha = file_hash(fpath)
+        if prev and prev["sha256"] == sha:
+            prev["mtime"], prev["size"] = st.st_mtime, st.st_size
+            continue
+        changed.append((entry, st, sha))
+
+    if workers and len(changed) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            loaded = list(pool.map(load, [entry for entry, _st, _sha in changed]))
+    else:
+        loaded = [load(entry) for entry, _st, _sha in changed]
+
+    new_ids, new_docs, stale = [], [], set()
+    for (entry, st, sha), docs in zip(changed, loaded):
+        fpath = entry["path"]
+        chunks = chunk_ids(fpath, docs)
+        stale.update(set(manifest.get(fpath, {}).get("ids", [])) - set(chunks))
+        new_ids.extend(chunks)
+        new_docs.extend(chunks.values())
+        manifest[fpath] = {
+            "mtime": st.st_mtime,
+            "size": st.st_size,
+            "sha256": sha,
+            "ids": list(chunks),
+        }
+    stats["changed"] = len(changed)
+
+    current = {entry["path"] for entry in entries}
+    for fpath in [f for f in manifest if f not in current]:
+        stale.update(manifest.pop(fpath)["ids"])
+    # A chunk moved between sources is still live.
+    stale -= {i for info in manifest.values() for i in info["ids"]}
+
+    if new_ids:
+        have = existing_ids(vector_db, new_ids)
+        todo = [(i, d) for i, d in zip(new_ids, new_docs) if i not in have]
+        if todo:
+            ids, documents = [i for i, _d in todo], [d for _i, d in todo]
+            asyncio.run(
+                _add_batches(vector_db, documents, ids, batch_size, concurrency)
+            )
+        stats["added"] = len(todo)
+    if stale:
+        vector_db.delete(ids=sorted(stale))
+        stats["deleted"] = len(stale)
+
+    save_manifest(manifest_path, manifest)
+    return stats
+
+
 @click.command()
 @click.option("--sources-dir", default=None)
 @click.option("--data-dir", default=None)
-def ingest(sources_dir, data_dir):
+@click.option("--workers", default=INGEST_WORKERS, help="PDF/markdown loader processes")
+@click.option(
+    "--concurrency", default=EMBED_CONCURRENCY, help="Embedding batches in flight"
+)
+def ingest(sources_dir, data_dir, workers, concurrency):
     """
-    Sync the database with the sources directory.
+    Sync the database with the sources directory. Incremental: unchanged
+    sources and chunks already in the database are skipped.
     """
 
-    from langchain_community.document_loaders import PyPDFLoader, TextLoader
-    from langchain_core.documents import Document
-    from langchain_text_splitters import (
-        RecursiveCharacterTextSplitter,
-        MarkdownTextSplitter,
-    )
-
     if data_dir is None:
         data_dir = os.path.join(os.getcwd(), "vector_db")
     engine = Engine(data_dir)
@@ -67,60 +247,22 @@ def ingest(sources_dir, data_dir):
         for entry in entries:
             entry["path"] = str(Path(__file__).parent.parent / entry["path"])
 
-    documents = []
-    for entry in entries:
-        fpath = entry["path"]
-        _log.info(f"Reading {fpath}...")
-
-        if fpath.endswith(".pdf"):
-            loader = PyPDFLoader(entry["path"])
-            docs = loader.load()
-            for doc in docs:
-                doc.page_content = normalize_whitespace(doc.page_content)
-            docs = RecursiveCharacterTextSplitter(
-                chunk_size=1000,
-                chunk_overlap=200,
-                add_start_index=True,  # track index in original document
-            ).split_documents(docs)
-        elif fpath.endswith(".md"):
-            docs = [
-                Document(page_content=x)
-                for x in split_markdown_semantically(file_path=fpath)
-            ]
-        else:
-            raise ValueError(f"Unsupported file type: {entry['path']}")
-        for doc in docs:
-            doc.metadata["fd_file_name"] = fpath
-            doc.metadata["fd_title"] = entry["title"]
-            doc.metadata["fd_authors"] = ",".join(entry["authors"])
-        # file_text = " ".join(doc.page_content for doc in docs)
-        # doc = Document(
-        #     page_content=file_text,
-        #     metadata={
-        #         "title": entry["title"],
-        #         "authors": ",".join(entry["authors"]),
-        #     },
-        # )
-        documents.extend(docs)
-        # ids.append(doc_id(doc.page_content))
-    if not documents:
+    if not entries:
         _log.error(f"No documents found in sources directory {sources_dir}")
         return
 
-    _log.info(f"Read {len(documents)} files into memory, loading into vector db...")
-    # # For filtering out existing documents
-    # # id's are included by default
-    # existing_docs = btcopilot.vector_db.db.get(include=[])
-    # existing_ids = existing_docs["ids"]
-
-    # # Figure out how to use the flask app's engine with custom arguments.
-    # with current_app.app_context():
-    #     # To set explicit id's for upsert logic
-    #     # , ids=[doc.id for doc in documents])
-    #     engine = current_app.engine
-    engine.get_vector_db().add_documents(documents)
-
-    _log.info(f"{len(documents)} document splits ingested and stored.")
+    os.makedirs(data_dir, exist_ok=True)
+    stats = ingest_sources(
+        engine.get_vector_db(),
+        entries,
+        os.path.join(data_dir, MANIFEST_FILE),
+        workers=workers,
+        concurrency=concurrency,
+    )
+    _log.info(
+        f"{stats['changed']} of {stats['sources']} source(s) changed: "
+        f"{stats['added']} chunk(s) embedded, {stats['deleted']} removed."
+    )
 
 
 # def update_from_sources_dir()
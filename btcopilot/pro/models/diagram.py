@@ -1,3 +1,4 @@
+import datetime
 import pickle
 import re
 
@@ -105,6 +106,9 @@ class Diagram(db.Model, ModelMixin):
         data["pair_bonds"] = diagram_data.pair_bonds
 
         self.data = pickle.dumps(data)
+        # Leaves version alone so clients editing it don't get a 409, but marks
+        # the blob changed for ETags and cached prompts.
+        self.updated_at = datetime.datetime.utcnow()
 
     def grant_access(self, user, right, _commit=False):
         from btcopilot.pro.models import AccessRight
@@ -1,9 +1,11 @@
-from sqlalchemy import Column, Boolean, String, Integer, Float
+import threading
+
+from sqlalchemy import Column, Boolean, String, Integer, Float, func
 from sqlalchemy.orm import relationship
 
 import btcopilot
 from btcopilot.extensions import db
-from btcopilot.modelmixin import ModelMixin
+from btcopilot.modelmixin import ModelMixin, as_dicts
 
 
 ## TODO: Refactor to 'Plan'?? Though this is both a product and a plan here by virtue of `product`
@@ -85,3 +87,32 @@ class Policy(db.Model, ModelMixin):
             "description": "Unlimited family diagrams with full functionality.",
         },
     ]
+
+
+# Per-process cache of the public policy list sent with every session payload.
+# Keyed on (row count, latest updated_at) so an update-policies run in another
+# process is picked up on the next request; update_policies() also clears it.
+_public_policies_lock = threading.Lock()
+_public_policies = None
+
+
+def public_policies() -> list[dict]:
+    global _public_policies
+
+    stamp = tuple(
+        db.session.query(func.count(Policy.id), func.max(Policy.updated_at)).one()
+    )
+    with _public_policies_lock:
+        if _public_policies is None or _public_policies[0] != stamp:
+            _public_policies = (
+                stamp,
+                as_dicts(Policy.query.filter_by(public=True)),
+            )
+        return [dict(p) for p in _public_policies[1]]
+
+
+def invalidate_public_policies():
+    global _public_policies
+
+    with _public_policies_lock:
+        _public_policies = None
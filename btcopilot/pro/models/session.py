@@ -1,4 +1,6 @@
 import uuid, datetime
+import hashlib
+import json
 import logging
 
 from sqlalchemy import Column, String, Integer, ForeignKey
@@ -36,27 +38,33 @@ class Session(db.Model, ModelMixin):
         return token
 
     def account_editor_dict(self):
-        from btcopilot.pro.models import User, Policy, License, Activation, Machine
+        """
+        The account payload for this session's user: their own user record,
+        licenses, activations and free diagram, plus public policies. Nothing
+        here scales with the size of the user base.
+        """
+        from btcopilot.pro.models import License, Activation
+        from btcopilot.pro.models.policy import public_policies
         from btcopilot import pro
 
-        if not self.user.free_diagram:
+        if self.user and not self.user.free_diagram:
             _log.info(f"Auto-adding free diagram to user {self.user.username}")
             self.user.set_free_diagram(_commit=True)
 
         ret = {
-            "users": [
-                u.as_dict()
-                for u in User.query.options(
-                    selectinload(User.licenses).options(
-                        selectinload(License.activations).joinedload(Activation.machine),
-                        joinedload(License.policy),
-                    )
-                ).filter_by(active=True)
-            ],
-            "policies": [p.as_dict() for p in Policy.query.filter_by(public=True)],
+            "users": [self.user.as_dict()] if self.user else [],
+            "policies": public_policies(),
             "deactivated_versions": pro.DEACTIVATED_VERSIONS,
         }
         if self.id:
+            licenses = (
+                License.query.options(
+                    selectinload(License.activations).joinedload(Activation.machine),
+                    joinedload(License.policy),
+                )
+                .filter_by(user_id=self.user_id)
+                .order_by(License.id)
+            )
             ret["session"] = self.as_dict(
                 {
                     "user": self.user.as_dict(
@@ -71,7 +79,7 @@ class Session(db.Model, ModelMixin):
                                         "policy": l.policy.as_dict(),
                                     },
                                 )
-                                for l in self.user.licenses
+                                for l in licenses
                             ],
                             "free_diagram": (
                                 self.user.free_diagram.as_dict(
@@ -88,3 +96,18 @@ class Session(db.Model, ModelMixin):
         else:
             ret["session"] = None
         return ret
+
+
+def account_etag(payload: dict) -> str:
+    """
+    Fingerprint of an account payload for ETag / If-None-Match. The session's
+    own updated_at is bumped on every access, so it is left out.
+    """
+    session = payload.get("session")
+    if session:
+        payload = {
+            **payload,
+            "session": {k: v for k, v in session.items() if k != "updated_at"},
+        }
+    blob = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()
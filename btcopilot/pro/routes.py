@@ -37,7 +37,8 @@ from sqlalchemy.orm import defer
 
 import btcopilot
 
-from btcopilot import version, auth
+from btcopilot import version, auth, params
+from btcopilot.pro import wire
 from btcopilot.extensions import (
     db,
     mail,
@@ -54,6 +55,8 @@ from btcopilot.pro.models import (
     Session,
     User,
 )
+from btcopilot.modelmixin import as_dicts
+from btcopilot.pro.models.session import account_etag
 from btcopilot.pro import (
     DEACTIVATED_VERSIONS,
     IS_TEST,
@@ -102,7 +105,7 @@ def encrypted(func):
 
         ## Encrypt response
 
-        if response.status_code not in (200, 409) and isinstance(
+        if response.status_code not in (200, 204, 304, 409) and isinstance(
             response.data, (str, bytes)
         ):
             if isinstance(response.data, bytes):
@@ -212,7 +215,12 @@ def diagrams(id=None):
             _log.info(f"Created new diagram, id: {diagram.id}")
             return pickle.dumps(diagram.as_dict())
     else:
-        diagram = Diagram.query.get(id)
+        binary = wire.wants_binary()
+        query = Diagram.query
+        if binary and request.method == "GET":
+            # Not needed for a 304.
+            query = query.options(defer(Diagram.data))
+        diagram = query.get(id)
         if not diagram:
             return ("Not Found", 404)
         if request.method in ("GET", "HEAD"):  # data
@@ -227,14 +235,29 @@ def diagrams(id=None):
             #     _log.debug(f"    Scene contains persons: {len(persons)}")
             #     _log.debug(f"    Diagram.updated_at: {diagram.updated_at}")
             _log.info(f"Fetched diagram {id}, version: {diagram.version}")
+            if binary:
+                return wire.diagram_response(diagram, diagram.as_dict(exclude="data"))
             return pickle.dumps(diagram.as_dict())
         elif request.method == "HEAD":  # verify
             return ("Success", 200)
         elif request.method in ("PATCH", "PUT"):  # update
             if not diagram.check_write_access(g.user):
                 return ("Access Denied", 401)
-            data = pickle.loads(request.data)
-            expected_version = data.get("expected_version")
+            if wire.is_binary_upload():
+                try:
+                    data = {
+                        "data": wire.decode_upload(),
+                        "updated_at": params.datetime(
+                            request.headers.get("FD-Diagram-Updated-At")
+                        )
+                        or diagram.updated_at,
+                    }
+                except ValueError as e:
+                    return (str(e), 400)
+                expected_version = wire.expected_version(diagram)
+            else:
+                data = pickle.loads(request.data)
+                expected_version = data.get("expected_version")
 
             # Support either sending a pickled dict of db model attributes or the pickled scene data.
             # To sync with the client's `updated_at` so that it doesn't think
@@ -249,6 +272,10 @@ def diagrams(id=None):
                 _log.info(
                     f"Conflict updating diagram {diagram.id} for user: {g.user.username}, expected_version: {expected_version}, current_version: {diagram.version}"
                 )
+                if binary:
+                    return wire.diagram_response(
+                        diagram, diagram.as_dict(exclude="data"), status=409
+                    )
                 response_data = pickle.dumps(
                     {"version": diagram.version, "data": diagram.data}
                 )
@@ -265,6 +292,11 @@ def diagrams(id=None):
                 f"bytes: {len(diagram.data)} updated_at: {diagram.updated_at} "
                 f"version: {new_version}"
             )
+            if binary:
+                # The stored blob is exactly what the client sent.
+                return wire.diagram_response(
+                    diagram, diagram.as_dict(exclude="data"), status=204
+                )
             # Returns canonical post-write blob so client can refresh its
             # snapshot (latent fix 3a in 2026-05-01--mvp-merge-fix).
             return pickle.dumps(
@@ -479,6 +511,19 @@ def users_free_diagram(user_id):
 ## Sessions
 
 
+def _account_response(data):
+    """
+    Pickled account payload with an ETag; 304 when the client already has it.
+    """
+    etag = account_etag(data)
+    if etag in request.if_none_match:
+        response = make_response("", 304)
+    else:
+        response = make_response(pickle.dumps(data))
+    response.set_etag(etag)
+    return response
+
+
 @bp.route("/init", methods=("GET",))
 @encrypted
 def sessions_init():
@@ -506,12 +551,11 @@ def sessions_init():
         License.active == True
     )
     g.user = session.user
-    data["licenses"] = [x.as_dict(include="policy") for x in licenses_q]
+    data["licenses"] = as_dicts(licenses_q, include="policy")
     #
-    bdata = pickle.dumps(data)
     if not IS_TEST:
         _log.info("Re-logged in user: %s" % session.user)
-    return bdata
+    return _account_response(data)
 
 
 @bp.route("/sessions", methods=("POST",))
@@ -543,11 +587,10 @@ def sessions_login():
     db.session.add(session)
     db.session.commit()
     account_editor_dict = session.account_editor_dict()
-    bdata = pickle.dumps(account_editor_dict)
     g.user = session.user
     if not IS_TEST:
         _log.info(f"Logged in user: {user}")
-    return bdata
+    return _account_response(account_editor_dict)
 
 
 @bp.route("/sessions/<token>", methods=("GET", "DELETE"))
@@ -565,9 +608,8 @@ def sessions_session(token):
     if request.method == "GET":
         session.updated_at = datetime.datetime.utcnow()  # set when accessing
         db.session.commit()
-        bdata = pickle.dumps(session.account_editor_dict())
         _log.info("Re-logged in user: %s" % session.user)
-        return bdata
+        return _account_response(session.account_editor_dict())
     elif request.method == "DELETE":
         db.session.delete(session)
         db.session.commit()
@@ -9,6 +9,7 @@ from btcopilot.extensions import db, ensure_stripe_Plan, sync_with_stripe
 from btcopilot.pro import tasks, SESSION_EXPIRATION_DAYS
 from btcopilot.pro.routes import bp
 from btcopilot.pro.models import License, Policy, Session, User
+from btcopilot.pro.models.policy import invalidate_public_policies
 
 
 _log = logging.getLogger(__name__)
@@ -114,6 +115,7 @@ def update_policies():
             stripe_plan = ensure_stripe_Plan(policy)
 
     db.session.commit()
+    invalidate_public_policies()
 
 
 @bp.cli.command("update-policies")
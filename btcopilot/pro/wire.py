@@ -0,0 +1,163 @@
+"""
+Binary wire format for diagram blobs.
+
+Clients that send `Accept: application/vnd.fd.diagram` get `Diagram.data` as
+the raw response body, zstd-compressed when they also accept that encoding,
+with everything else about the diagram in headers:
+
+    ETag: "<id>.<version>.<updated_at>"
+    FD-Diagram-Id, FD-Diagram-Version
+    FD-Diagram-Meta: JSON of the diagram's non-blob fields (btcopilot.json)
+
+Conditional GETs (`If-None-Match`) are answered with 304 and the same headers
+but no body, so an unchanged blob is never re-sent and, since the ETag only
+depends on the version and the server-side write stamp, never even loaded from
+the database.
+
+Uploads use the same content type: the body is the raw (optionally
+zstd-encoded) blob and `If-Match` carries the ETag of the version the client
+edited. A successful write is acknowledged with 204 and the new ETag rather
+than echoing the blob back; a conflict returns the current blob with 409.
+
+Clients that don't ask for the binary format keep the legacy pickled/base64
+payloads.
+"""
+
+import io
+
+from flask import request, make_response
+
+from btcopilot import json
+
+DIAGRAM_MIMETYPE = "application/vnd.fd.diagram"
+
+# Blobs smaller than this aren't worth a compression round trip.
+ZSTD_MIN_SIZE = 4096
+ZSTD_LEVEL = 3
+
+# Cap on an uploaded blob after decompression, a few times the largest
+# diagram seen in practice, so a small zstd bomb can't exhaust memory.
+MAX_DIAGRAM_SIZE = 256 * 1024 * 1024
+ZSTD_READ_SIZE = 1024 * 1024
+
+
+def _zstd():
+    try:
+        import zstandard
+
+        return zstandard
+    except ImportError:
+        return None
+
+
+def wants_binary() -> bool:
+    """True if the client explicitly accepts the binary diagram format."""
+    return any(
+        mimetype == DIAGRAM_MIMETYPE and quality > 0
+        for mimetype, quality in request.accept_mimetypes
+    )
+
+
+def is_binary_upload() -> bool:
+    return request.mimetype == DIAGRAM_MIMETYPE
+
+
+def diagram_etag(diagram) -> str:
+    """Changes on client writes (version) and on server-side edits through
+    set_diagram_data(), which stamp updated_at without bumping the version."""
+    stamp = diagram.updated_at.strftime("%Y%m%d%H%M%S%f") if diagram.updated_at else 0
+    return f"{diagram.id}.{diagram.version}.{stamp}"
+
+
+def etag_version(diagram, etag: str | None) -> int | None:
+    """The version encoded in an ETag issued for `diagram`, if it is one.
+
+    Only the version matters for If-Match; "<id>.<version>" ETags from before
+    the stamp was added are still accepted.
+    """
+    if not etag:
+        return None
+    diagram_id, _, rest = etag.strip().strip('"').partition(".")
+    version = rest.partition(".")[0]
+    if diagram_id != str(diagram.id) or not version.isdigit():
+        return None
+    return int(version)
+
+
+def expected_version(diagram) -> int | None:
+    """The version named by an upload's If-Match header, if any."""
+    for etag in request.if_match.as_set():
+        return etag_version(diagram, etag)
+    return None
+
+
+def is_fresh(diagram) -> bool:
+    """True if the client already holds this version of the blob."""
+    return diagram_etag(diagram) in request.if_none_match
+
+
+def _accepts_zstd() -> bool:
+    return request.accept_encodings["zstd"] > 0 and _zstd() is not None
+
+
+def encode(data: bytes) -> tuple[bytes, str | None]:
+    """(body, content-encoding) for `data` as this client can receive it."""
+    if len(data) >= ZSTD_MIN_SIZE and _accepts_zstd():
+        return _zstd().ZstdCompressor(level=ZSTD_LEVEL).compress(data), "zstd"
+    return data, None
+
+
+def decode_upload() -> bytes:
+    """The raw blob from a binary upload, decompressed if needed.
+
+    Raises ValueError (a 400 for the routes) for unsupported encodings and for
+    blobs larger than MAX_DIAGRAM_SIZE once decompressed.
+    """
+    data = request.get_data()
+    encoding = request.headers.get("Content-Encoding")
+    if encoding == "zstd":
+        zstd = _zstd()
+        if zstd is None:
+            raise ValueError("zstd content-encoding is not supported")
+        # Streaming decompression, so the frame need not declare its size and
+        # the cap is checked as output is produced, not after.
+        chunks, total = [], 0
+        try:
+            with zstd.ZstdDecompressor().stream_reader(io.BytesIO(data)) as reader:
+                while chunk := reader.read(ZSTD_READ_SIZE):
+                    total += len(chunk)
+                    if total > MAX_DIAGRAM_SIZE:
+                        raise ValueError("Diagram exceeds the maximum size")
+                    chunks.append(chunk)
+        except zstd.ZstdError as e:
+            raise ValueError(f"Invalid zstd data: {e}")
+        return b"".join(chunks)
+    elif encoding not in (None, "identity"):
+        raise ValueError(f"Unsupported content-encoding: {encoding}")
+    if len(data) > MAX_DIAGRAM_SIZE:
+        raise ValueError("Diagram exceeds the maximum size")
+    return data
+
+
+def diagram_response(diagram, meta: dict, status: int = 200):
+    """
+    Binary response for `diagram`. `meta` is sent as the FD-Diagram-Meta
+    header. A 200 becomes a 304 without touching `diagram.data` when the
+    client's copy is current; a 204 never carries the blob.
+    """
+    if status == 200 and is_fresh(diagram):
+        response = make_response("", 304)
+    elif status == 204:
+        response = make_response("", 204)
+    else:
+        body, encoding = encode(diagram.data or b"")
+        response = make_response(body, status)
+        response.mimetype = DIAGRAM_MIMETYPE
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+    response.set_etag(diagram_etag(diagram))
+    response.headers["FD-Diagram-Id"] = str(diagram.id)
+    response.headers["FD-Diagram-Version"] = str(diagram.version)
+    response.headers["FD-Diagram-Meta"] = json.dumps(meta)
+    response.vary.update(("Accept", "Accept-Encoding"))
+    return response
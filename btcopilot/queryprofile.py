@@ -0,0 +1,227 @@
+"""
+Per-request SQL profiling.
+
+Every statement sent through SQLAlchemy while a request is being handled is
+timed by `before_cursor_execute`/`after_cursor_execute` listeners and kept on
+that request's `RequestProfile`. When the request finishes its totals are:
+
+  - folded into `STATS`, aggregated per endpoint (request count, queries and
+    DB time per request, latency, repeated statements, the slowest statements
+    seen), shown on the admin page at /training/admin/queries;
+  - sent back as response headers when the app is in debug mode or
+    QUERY_PROFILE_HEADERS is set:
+
+        X-DB-Query-Count, X-DB-Duplicate-Queries, X-DB-Time-Ms,
+        X-Request-Time-Ms, Server-Timing
+
+A statement "repeats" when the same SQL text runs more than once in one
+request, whatever its parameters; that is the signature of an N+1 loop. Each
+endpoint keeps only its REPEATED_STATEMENTS most repeated statements.
+
+Profiling is on in debug and testing; set QUERY_PROFILE to override, e.g. to
+profile a production instance for a while.
+
+Tests assert budgets with `capture()`:
+
+    with queryprofile.capture() as profiles:
+        client.get("/training/admin/")
+    assert profiles[0].count <= 20
+"""
+
+import contextlib
+import heapq
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SLOWEST_STATEMENTS = 10
+REPEATED_STATEMENTS = 50
+STATEMENT_PREVIEW = 500  # characters of SQL kept for display
+
+
+@dataclass
+class RequestProfile:
+    endpoint: str
+    started: float = field(default_factory=time.perf_counter)
+    latency: float = 0.0
+    queries: list[tuple[str, float]] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def db_time(self) -> float:
+        return sum(seconds for _, seconds in self.queries)
+
+    def repeated(self) -> dict[str, int]:
+        """SQL text -> executions, for statements run more than once."""
+        counts = Counter(statement for statement, _ in self.queries)
+        return {statement: n for statement, n in counts.items() if n > 1}
+
+    @property
+    def duplicates(self) -> int:
+        """Executions beyond the first of each repeated statement."""
+        return sum(n - 1 for n in self.repeated().values())
+
+    def slowest(self, n: int = SLOWEST_STATEMENTS) -> list[tuple[str, float]]:
+        return heapq.nlargest(n, self.queries, key=lambda query: query[1])
+
+
+@dataclass
+class EndpointStats:
+    requests: int = 0
+    queries: int = 0
+    max_queries: int = 0
+    duplicates: int = 0
+    db_time: float = 0.0
+    latency: float = 0.0
+    max_latency: float = 0.0
+    repeated: Counter = field(default_factory=Counter)
+    # min-heap of (seconds, statement), the slowest SLOWEST_STATEMENTS
+    slowest: list = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        n = self.requests or 1
+        return {
+            "requests": self.requests,
+            "avg_queries": self.queries / n,
+            "max_queries": self.max_queries,
+            "avg_duplicates": self.duplicates / n,
+            "avg_db_ms": self.db_time / n * 1000,
+            "avg_latency_ms": self.latency / n * 1000,
+            "max_latency_ms": self.max_latency * 1000,
+            "top_repeated": self.repeated.most_common(3),
+            "slowest": [
+                (statement, seconds * 1000)
+                for seconds, statement in sorted(self.slowest, reverse=True)
+            ],
+        }
+
+
+class QueryStats:
+    """Totals per endpoint since the process started (or clear())."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.endpoints: dict[str, EndpointStats] = {}
+
+    def record(self, profile: RequestProfile):
+        repeated = profile.repeated()
+        with self._lock:
+            stats = self.endpoints.setdefault(profile.endpoint, EndpointStats())
+            stats.requests += 1
+            stats.queries += profile.count
+            stats.max_queries = max(stats.max_queries, profile.count)
+            stats.duplicates += profile.duplicates
+            stats.db_time += profile.db_time
+            stats.latency += profile.latency
+            stats.max_latency = max(stats.max_latency, profile.latency)
+            stats.repeated.update(
+                {statement: n - 1 for statement, n in repeated.items()}
+            )
+            if len(stats.repeated) > REPEATED_STATEMENTS:
+                stats.repeated = Counter(
+                    dict(stats.repeated.most_common(REPEATED_STATEMENTS))
+                )
+            for statement, seconds in profile.slowest():
+                item = (seconds, statement)
+                if len(stats.slowest) < SLOWEST_STATEMENTS:
+                    heapq.heappush(stats.slowest, item)
+                elif item > stats.slowest[0]:
+                    heapq.heapreplace(stats.slowest, item)
+
+    def summary(self) -> list[dict]:
+        """One row per endpoint, most DB time first."""
+        with self._lock:
+            rows = [
+                {"endpoint": endpoint, **stats.as_dict()}
+                for endpoint, stats in self.endpoints.items()
+            ]
+        return sorted(rows, key=lambda row: -row["avg_db_ms"] * row["requests"])
+
+
+STATS = QueryStats()
+
+_captures: list[list] = []
+
+
+@contextlib.contextmanager
+def capture():
+    """Collect the RequestProfile of every request that finishes inside the
+    block."""
+    profiles = []
+    _captures.append(profiles)
+    try:
+        yield profiles
+    finally:
+        _captures.remove(profiles)
+
+
+def current_profile() -> RequestProfile | None:
+    if not has_request_context():
+        return None
+    return g.get("_query_profile")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_profile() is not None:
+        conn.info.setdefault("_query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = current_profile()
+    started = conn.info.get("_query_started")
+    if profile is None or not started:
+        return
+    profile.queries.append(
+        (statement[:STATEMENT_PREVIEW], time.perf_counter() - started.pop())
+    )
+
+
+def _start():
+    g._query_profile = RequestProfile(endpoint=request.endpoint or "<unmatched>")
+
+
+def _finish(response):
+    profile = g.pop("_query_profile", None)
+    if profile is None:
+        return response
+    profile.latency = time.perf_counter() - profile.started
+    STATS.record(profile)
+    for profiles in _captures:
+        profiles.append(profile)
+    if current_app.debug or current_app.config.get("QUERY_PROFILE_HEADERS"):
+        db_ms = profile.db_time * 1000
+        total_ms = profile.latency * 1000
+        response.headers["X-DB-Query-Count"] = str(profile.count)
+        response.headers["X-DB-Duplicate-Queries"] = str(profile.duplicates)
+        response.headers["X-DB-Time-Ms"] = f"{db_ms:.1f}"
+        response.headers["X-Request-Time-Ms"] = f"{total_ms:.1f}"
+        response.headers["Server-Timing"] = (
+            f'db;dur={db_ms:.1f};desc="{profile.count} queries", '
+            f"total;dur={total_ms:.1f}"
+        )
+    return response
+
+
+def enabled(app) -> bool:
+    return app.config.get("QUERY_PROFILE", app.debug or app.testing)
+
+
+def init_app(app):
+    if not enabled(app):
+        return
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    app.before_request(_start)
+    app.after_request(_finish)
@@ -35,6 +35,7 @@ from flask_mail import Mail
 
 
 import btcopilot
+from btcopilot import auth
 from btcopilot.app import create_app
 from btcopilot.extensions import db
 import btcopilot.extensions as extensions
@@ -70,6 +71,12 @@ def pytest_addoption(parser):
         default=False,
         help="Run end-to-end tests with third-party api calls (costs money)",
     )
+    parser.addoption(
+        "--benchmark",
+        action="store_true",
+        default=False,
+        help="Run large-dataset benchmarks (slow; prints timings)",
+    )
 
 
 def pytest_configure(config):
@@ -80,6 +87,9 @@ def pytest_configure(config):
     config.addinivalue_line(
         "markers", "e2e: Run end-to-end test cases which access paid third-party tools"
     )
+    config.addinivalue_line(
+        "markers", "benchmark: Large-dataset timing runs, skipped without --benchmark"
+    )
     config.addinivalue_line(
         "markers", "init_datadog: Un-mock the init_datadog extension"
     )
@@ -107,6 +117,13 @@ def e2e(request):
             pytest.skip("need --e2e option to run")
 
 
+@pytest.fixture(autouse=True)
+def benchmark(request):
+    if request.node.get_closest_marker("benchmark") is not None:
+        if not request.config.getoption("--benchmark"):
+            pytest.skip("need --benchmark option to run")
+
+
 @pytest.fixture(autouse=True)
 def fast_passwords(request):
     """
@@ -229,6 +246,8 @@ def flask_app(request, tmp_path):
         yield app
         db.session.remove()
         db.drop_all()
+        # Usernames repeat across tests with fresh secrets.
+        auth.invalidate_credentials()
 
 
 @pytest.fixture
@@ -382,6 +401,61 @@ def mock_celery():
     extensions.celery = original_celery
 
 
+@pytest.fixture
+def query_budget():
+    """
+    Fail if any request made inside the block runs more than `queries` SQL
+    statements, or more than `repeats` repeats of one it already ran:
+
+        with query_budget(12, repeats=0):
+            admin.get("/training/admin/")
+
+    Yields the queryprofile.RequestProfile of each request.
+    """
+    from btcopilot import queryprofile
+
+    @contextlib.contextmanager
+    def budget(queries: int, repeats: int | None = None):
+        with queryprofile.capture() as profiles:
+            yield profiles
+        assert profiles, "No requests were profiled"
+        for profile in profiles:
+            repeated = "\n".join(
+                f"  x{n}: {statement}" for statement, n in profile.repeated().items()
+            )
+            name = profile.endpoint
+            assert profile.count <= queries, (
+                f"{name} ran {profile.count} queries (budget {queries})\n{repeated}"
+            )
+            if repeats is not None:
+                assert profile.duplicates <= repeats, (
+                    f"{name} repeated {profile.duplicates} queries "
+                    f"(budget {repeats})\n{repeated}"
+                )
+
+    return budget
+
+
+@pytest.fixture
+def eager_celery(request, flask_app):
+    """
+    The real celery app, queue topology and tasks over the in-memory broker.
+    task.delay() runs inline; send_task() still publishes, so routing can be
+    checked with the before_task_publish signal.
+    """
+    from btcopilot import extensions
+
+    init_celery = request.getfixturevalue("extensions")["init_celery"]
+    original_celery = extensions.celery
+    extensions.celery = None
+    init_celery(flask_app)
+    extensions.celery.conf.update(task_always_eager=True, task_eager_propagates=True)
+
+    yield extensions.celery
+
+    extensions.celery = original_celery
+
+
 NEW_SCENE_DATA = {
     "id": None,
     "tags": [],
@@ -438,6 +512,21 @@ def test_user_diagrams(test_user, test_user_2):
     return Diagram.query.filter(Diagram.id.in_(ids)).all()
 
 
+@pytest.fixture
+def sse_redis(flask_app):
+    """In-memory Redis behind training.sse.sse_manager."""
+    import fakeredis
+
+    client = fakeredis.FakeRedis()
+    flask_app.extensions["sse_redis"] = client
+    yield client
+    from btcopilot.training.sse import sse_manager
+
+    for q in list(sse_manager.subscribers):
+        sse_manager.unsubscribe(q)
+    flask_app.extensions.pop("sse_redis", None)
+
+
 @pytest.fixture
 def anonymous(flask_app):
     flask_app.test_client_class = FlaskClient
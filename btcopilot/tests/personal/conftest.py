@@ -43,6 +43,16 @@ def chat_flow(request):
         yield ret
 
 
+@pytest.fixture(autouse=True)
+def prompt_cache():
+    """Keep cached prompts from leaking between tests."""
+    from btcopilot.personal.chat import _prompt_cache
+
+    _prompt_cache.clear()
+    yield _prompt_cache
+    _prompt_cache.clear()
+
+
 @pytest.fixture
 def discussions(test_user):
     items = [
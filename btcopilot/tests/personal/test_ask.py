@@ -1,10 +1,13 @@
 import logging
 
 import pytest
+from mock import patch
 
 from btcopilot.extensions import db
 from btcopilot.personal import ask
-from btcopilot.personal.models import Discussion
+from btcopilot.personal.models import Discussion, Statement
+from btcopilot.pro.models import Diagram
+from btcopilot.schema import DiagramData
 
 
 @pytest.mark.chat_flow(response="That's too bad")
@@ -48,3 +51,164 @@ def test_ask_e2e(test_user):
     db.session.commit()
 
     ask(discussion, message)
+
+
+def _chat_discussion(test_user, texts, **kwargs):
+    discussion = Discussion(user=test_user, **kwargs)
+    db.session.add(discussion)
+    db.session.flush()
+    db.session.add_all(
+        Statement(discussion_id=discussion.id, text=text, order=i)
+        for i, text in enumerate(texts, start=1)
+    )
+    db.session.commit()
+    return discussion
+
+
+def test_ask_sends_summary_and_unfolded_turns_only(test_user):
+    discussion = _chat_discussion(
+        test_user,
+        ["one", "two", "three", "four", "five"],
+        summary="Mom died in 2019.",
+        summary_through_order=3,
+    )
+
+    with patch(
+        "btcopilot.personal.chat._generate_response", return_value="ok"
+    ) as generate:
+        ask(discussion, "six")
+
+    system_instruction, turns = generate.call_args.args
+    assert "Mom died in 2019." in system_instruction
+    assert [text for _, text in turns] == ["four", "five", "six"]
+
+
+def test_ask_queues_compaction_past_window(test_user, sse_redis):
+    discussion = _chat_discussion(test_user, ["one", "two"])
+
+    with (
+        patch("btcopilot.personal.chat.CHAT_VERBATIM_TURNS", 2),
+        patch("btcopilot.personal.chat.CHAT_SUMMARY_EVERY", 2),
+        patch("btcopilot.personal.chat._generate_response", return_value="ok"),
+        patch("btcopilot.extensions.celery") as celery,
+    ):
+        ask(discussion, "three")
+        celery.send_task.assert_not_called()  # not before the turn is committed
+        db.session.commit()
+        celery.send_task.assert_called_once_with(
+            "compact_chat_summary", args=[discussion.id]
+        )
+
+        # Still past the window, but a compaction is already pending.
+        ask(discussion, "four")
+        db.session.commit()
+        celery.send_task.assert_called_once()
+
+
+def test_ask_drops_compaction_on_rollback(test_user, sse_redis):
+    discussion = _chat_discussion(test_user, ["one", "two"])
+
+    with (
+        patch("btcopilot.personal.chat.CHAT_VERBATIM_TURNS", 2),
+        patch("btcopilot.personal.chat.CHAT_SUMMARY_EVERY", 2),
+        patch("btcopilot.personal.chat._generate_response", return_value="ok"),
+        patch("btcopilot.extensions.celery") as celery,
+    ):
+        ask(discussion, "three")
+        db.session.rollback()
+        db.session.commit()
+    celery.send_task.assert_not_called()
+
+
+def test_compact_chat_summary_clears_pending_flag(test_user, sse_redis):
+    from btcopilot.personal.chat import COMPACTION_PENDING_KEY
+    from btcopilot.personal.tasks import compact_chat_summary
+
+    discussion = _chat_discussion(test_user, ["one", "two", "three"])
+    key = COMPACTION_PENDING_KEY.format(discussion_id=discussion.id)
+    sse_redis.set(key, 1)
+
+    with (
+        patch("btcopilot.personal.chat.CHAT_VERBATIM_TURNS", 2),
+        patch(
+            "btcopilot.personal.models.discussion.response_text_sync",
+            return_value="folded",
+        ),
+    ):
+        compact_chat_summary(discussion.id)
+
+    assert sse_redis.get(key) is None
+    assert db.session.get(Discussion, discussion.id).summary == "folded"
+
+
+def test_compact_summary_folds_incrementally(test_user):
+    discussion = _chat_discussion(test_user, ["a1", "a2", "a3", "a4", "a5"])
+
+    with patch(
+        "btcopilot.personal.models.discussion.response_text_sync",
+        return_value=" first fold ",
+    ) as llm:
+        assert discussion.compact_summary(verbatim_turns=2) is True
+    prompt = llm.call_args.args[0]
+    assert "(none yet)" in prompt
+    assert "a3" in prompt and "a4" not in prompt
+    assert (discussion.summary, discussion.summary_through_order) == ("first fold", 3)
+
+    db.session.add_all(
+        Statement(discussion_id=discussion.id, text=f"b{i}", order=5 + i)
+        for i in (1, 2)
+    )
+    db.session.commit()
+    with patch(
+        "btcopilot.personal.models.discussion.response_text_sync",
+        return_value="second fold",
+    ) as llm:
+        assert discussion.compact_summary(verbatim_turns=2) is True
+    prompt = llm.call_args.args[0]
+    assert "first fold" in prompt
+    assert "a4" in prompt and "a5" in prompt and "a3" not in prompt
+    assert discussion.summary_through_order == 5
+
+    # Nothing beyond the verbatim window left to fold.
+    assert discussion.compact_summary(verbatim_turns=2) is False
+
+
+def test_ask_caches_system_prompt_per_diagram_data(test_user):
+    diagram = test_user.free_diagram
+    diagram.set_diagram_data(
+        DiagramData(people=[{"id": 1, "name": "Jane", "primary": True}])
+    )
+    discussion = _chat_discussion(test_user, ["hi"], diagram_id=diagram.id)
+
+    def prompts():
+        return [call.args[0] for call in generate.call_args_list]
+
+    with (
+        patch(
+            "btcopilot.personal.chat.get_conversation_flow_prompt",
+            side_effect=lambda model, committed_state: committed_state,
+        ),
+        patch.object(
+            Diagram,
+            "get_diagram_data",
+            autospec=True,
+            side_effect=Diagram.get_diagram_data,
+        ) as get_diagram_data,
+        patch(
+            "btcopilot.personal.chat._generate_response", return_value="ok"
+        ) as generate,
+    ):
+        ask(discussion, "one")
+        ask(discussion, "two")
+        assert get_diagram_data.call_count == 1
+        assert "Jane" in prompts()[1]
+
+        version = diagram.version
+        diagram.set_diagram_data(
+            DiagramData(people=[{"id": 1, "name": "Oscar", "primary": True}])
+        )
+        db.session.commit()
+        assert diagram.version == version  # desktop clients own the version
+        ask(discussion, "three")
+        assert get_diagram_data.call_count == 2
+        assert "Oscar" in prompts()[2] and "Jane" not in prompts()[2]
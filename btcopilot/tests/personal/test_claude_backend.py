@@ -105,11 +105,24 @@ async def test_claude_text_with_turns():
 
     assert result == "AI response"
     call_kwargs = mock_create.call_args[1]
-    assert call_kwargs["system"] == "You are a coach."
+    assert call_kwargs["system"] == [
+        {
+            "type": "text",
+            "text": "You are a coach.",
+            "cache_control": {"type": "ephemeral"},
+        }
+    ]
     messages = call_kwargs["messages"]
     assert messages[0]["role"] == "user"
     assert messages[1]["role"] == "assistant"
     assert messages[2]["role"] == "user"
+    assert messages[2]["content"] == [
+        {
+            "type": "text",
+            "text": "How are you?",
+            "cache_control": {"type": "ephemeral"},
+        }
+    ]
 
 
 @pytest.mark.asyncio
@@ -11,6 +11,7 @@ from btcopilot.llmutil import (
     CLAUDE_STRUCTURED_USAGE,
     OutputTruncatedError,
 )
+from btcopilot.llmtelemetry import estimate_cost
 from btcopilot.schema import PDPDeltas
 
 
@@ -19,7 +20,12 @@ def stream_client(text, stop_reason="end_turn", in_tokens=100, out_tokens=50):
     response = MagicMock(
         content=[block],
         stop_reason=stop_reason,
-        usage=MagicMock(input_tokens=in_tokens, output_tokens=out_tokens),
+        usage=MagicMock(
+            input_tokens=in_tokens,
+            output_tokens=out_tokens,
+            cache_read_input_tokens=0,
+            cache_creation_input_tokens=0,
+        ),
     )
     stream = MagicMock()
     stream.get_final_message = AsyncMock(return_value=response)
@@ -66,3 +72,33 @@ async def test_claude_structured_raises_on_truncation():
     with patch("btcopilot.llmutil._extraction_anthropic_client", return_value=client):
         with pytest.raises(OutputTruncatedError):
             await claude_structured("extract", PDPDeltas, "claude-fable-5")
+
+
+@pytest.mark.asyncio
+async def test_claude_structured_caches_prefix_and_counts_cache_tokens():
+    client = stream_client('{"people": []}')
+    response = client.messages.stream.return_value.__aenter__.return_value
+    response.get_final_message.return_value.usage = MagicMock(
+        input_tokens=10,
+        output_tokens=5,
+        cache_read_input_tokens=900,
+        cache_creation_input_tokens=0,
+    )
+    reads_before = CLAUDE_STRUCTURED_USAGE["cache_read_input_tokens"]
+    cost_before = CLAUDE_STRUCTURED_USAGE["cost_usd"]
+    with patch("btcopilot.llmutil._extraction_anthropic_client", return_value=client):
+        await claude_structured(
+            "fix these", PDPDeltas, "claude-fable-5", prefix="instructions"
+        )
+    content = client.messages.stream.call_args.kwargs["messages"][0]["content"]
+    assert content[0] == {
+        "type": "text",
+        "text": "instructions",
+        "cache_control": {"type": "ephemeral"},
+    }
+    assert content[1]["text"].startswith("fix these")
+    assert "cache_control" not in content[1]
+    assert CLAUDE_STRUCTURED_USAGE["cache_read_input_tokens"] == reads_before + 900
+    assert CLAUDE_STRUCTURED_USAGE["cost_usd"] - cost_before == pytest.approx(
+        estimate_cost("claude-fable-5", 10, 5, cached_tokens=900)
+    )
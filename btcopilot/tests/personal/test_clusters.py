@@ -1,3 +1,4 @@
+import json
 import pickle
 from enum import Enum
 
@@ -14,7 +15,13 @@ from btcopilot.schema import (
     ClusterResult,
     asdict,
 )
-from btcopilot.personal.clusters import compute_cache_key, detect_clusters, _enum_value
+from btcopilot.personal.clusters import (
+    candidate_groups,
+    compute_cache_key,
+    detect_clusters,
+    _enum_value,
+)
+from btcopilot.personal.models import ClusterCache
 
 
 def test_enum_value_with_enum():
@@ -426,3 +433,102 @@ def test_auto_detect_clusters_after_pdp_accept(subscriber):
         )
 
     assert response2.get_json()["cacheKey"] == first_cache_key
+
+
+def _shift(id, date, person=None, **kwargs):
+    return Event(id=id, kind=EventKind.Shift, dateTime=date, person=person, **kwargs)
+
+
+def _two_arcs():
+    return [
+        _shift(1, "2024-06-01", anxiety="up"),
+        _shift(2, "2024-06-03", symptom="up"),
+        _shift(3, "2024-07-01", anxiety="up"),
+        _shift(4, "2024-07-02", symptom="up"),
+    ]
+
+
+def _label_each(prompt, response_format):
+    """Fake LLM: one cluster per candidate in the prompt."""
+    candidates = json.loads(prompt.split("shared people:\n\n")[1].split("\n\n##")[0])
+    response = MagicMock()
+    response.clusters = [
+        Cluster(
+            id=f"c{c['candidate']}",
+            title=f"Arc starting {c['events'][0]['date']}",
+            summary="",
+            eventIds=[e["id"] for e in c["events"]],
+        )
+        for c in candidates
+    ]
+    return response
+
+
+def test_candidate_groups_split_on_gaps_and_people():
+    events = [
+        _shift(1, "2024-01-01", person=10),
+        _shift(2, "2024-01-07", person=11),  # 6 days: same candidate
+        _shift(3, "2024-01-19", person=10),  # 12 days, shares person 10
+        _shift(4, "2024-01-31", person=12),  # 12 days, nobody shared
+        _shift(5, None),  # undated
+    ]
+    groups = candidate_groups(events)
+    assert [[e.id for e in g.events] for g in groups] == [[1, 2, 3], [4]]
+    assert groups[0].key == compute_cache_key(events[:3])
+
+
+def test_detect_clusters_reuses_persisted_labels(test_user):
+    diagram_id = test_user.free_diagram_id
+    events = _two_arcs()
+
+    with patch(
+        "btcopilot.personal.clusters.gemini_structured_sync", side_effect=_label_each
+    ) as llm:
+        first = detect_clusters(events, diagram_id=diagram_id)
+        db.session.commit()
+        second = detect_clusters(events, diagram_id=diagram_id)
+
+    assert llm.call_count == 1
+    assert [c.eventIds for c in first.clusters] == [[1, 2], [3, 4]]
+    assert second == first
+    assert ClusterCache.query.filter_by(diagram_id=diagram_id).count() == 2
+
+
+def test_detect_clusters_only_relabels_changed_candidates(test_user):
+    diagram_id = test_user.free_diagram_id
+    events = _two_arcs()
+
+    with patch(
+        "btcopilot.personal.clusters.gemini_structured_sync", side_effect=_label_each
+    ) as llm:
+        first = detect_clusters(events, diagram_id=diagram_id)
+        events[3].symptom = "down"
+        second = detect_clusters(events, diagram_id=diagram_id)
+
+    assert llm.call_count == 2
+    prompt = llm.call_args[0][0]
+    assert '"id": 4' in prompt
+    assert '"id": 1' not in prompt
+    assert second.clusters[0] == first.clusters[0]
+    assert second.clusters[1].eventIds == [3, 4]
+    assert second.cacheKey != first.cacheKey
+
+
+def test_detect_clusters_merged_label_invalidated_by_member_change(test_user):
+    diagram_id = test_user.free_diagram_id
+    events = _two_arcs()
+    merged = MagicMock()
+    merged.clusters = [
+        Cluster(id="c1", title="Summer", summary="", eventIds=[1, 2, 3, 4])
+    ]
+
+    with patch(
+        "btcopilot.personal.clusters.gemini_structured_sync", return_value=merged
+    ) as llm:
+        first = detect_clusters(events, diagram_id=diagram_id)
+        events[3].symptom = "down"
+        detect_clusters(events, diagram_id=diagram_id)
+
+    assert [c.eventIds for c in first.clusters] == [[1, 2, 3, 4]]
+    # Both halves of the merged cluster are sent again, not just the changed one.
+    assert '"id": 1' in llm.call_args[0][0]
@@ -11,6 +11,7 @@ Family: 3 runs each missing a different bridge bond.
 """
 
 import copy
+import json
 import logging
 from unittest.mock import patch
 
@@ -568,6 +569,36 @@ def test_deep_reextract_task_result_includes_runs_used(discussion):
     assert result["k"] == 1
     assert result["runs_used"] == 1
     assert result["people_count"] == 1
+    # Projecting the commit must not consume the staged PDP being returned.
+    assert [p["name"] for p in result["pdp"]["people"]] == ["Dave"]
+    assert "lcc_pct" in result
+
+
+def test_deep_reextract_task_publishes_progress(discussion, sse_redis):
+    from types import SimpleNamespace
+    from btcopilot.personal import tasks as tasks_mod
+    from btcopilot.training.sse import sse_manager, discussion_channel
+
+    delta = PDP(people=[Person(id=-1, name="Dave")])
+    deltas = PDPDeltas(people=[Person(id=-1, name="Dave")])
+    celery_self = SimpleNamespace(
+        request=SimpleNamespace(id="task-1"), update_state=lambda **kw: None
+    )
+    q = sse_manager.subscribe(discussion_channel(discussion.id))
+    try:
+        with patch.object(tasks_mod, "deep_reextract", return_value=(delta, deltas, 1)):
+            tasks_mod.deep_reextract_task(celery_self, discussion.id, 1)
+        messages = []
+        while (event := q.get(timeout=0.1)) is not None:
+            messages.append(json.loads(event["data"]))
+    finally:
+        sse_manager.unsubscribe(q)
+
+    complete = next(m for m in messages if m.get("status") == "complete")
+    assert complete["type"] == "deep_reextract"
+    assert complete["task_id"] == "task-1"
+    assert complete["runs_used"] == 1
+    assert messages[-1] == {"type": "extracting", "extracting": False}
 
 
 def test_delta_raises_lcc_vs_committed():
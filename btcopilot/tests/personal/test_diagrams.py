@@ -1,7 +1,11 @@
+import json
 import pickle
 import base64
 
+import zstandard
+
 import btcopilot
+from btcopilot.pro import wire
 from btcopilot.pro.models import Diagram
 from btcopilot.schema import DiagramData, PDP, Person, Event, EventKind, asdict
 from btcopilot.extensions import db
@@ -88,6 +92,12 @@ def test_diagrams_get(subscriber):
     assert isinstance(data["data"], str)
 
 
+def test_diagrams_get_query_budget(subscriber, query_budget):
+    diagram = subscriber.user.free_diagram
+    with query_budget(3, repeats=0):
+        assert subscriber.get(f"/personal/diagrams/{diagram.id}").status_code == 200
+
+
 def test_diagrams_update(subscriber):
     diagram = subscriber.user.free_diagram
     initial_version = diagram.version
@@ -230,7 +240,106 @@ def test_get_diagram_discussions_forbidden(subscriber, test_user_2):
     db.session.commit()
     other_diagram = test_user_2.free_diagram
 
+    response = subscriber.get(f"/personal/diagrams/{other_diagram.id}/discussions")
+    assert response.status_code == 403
+
+
+def test_diagrams_get_binary(subscriber):
+    diagram = subscriber.user.free_diagram
+    diagram.data = pickle.dumps({"people": ["x" * 10000]})
+    db.session.commit()
+
     response = subscriber.get(
-        f"/personal/diagrams/{other_diagram.id}/discussions"
+        f"/personal/diagrams/{diagram.id}",
+        headers={"Accept": wire.DIAGRAM_MIMETYPE, "Accept-Encoding": "zstd"},
     )
-    assert response.status_code == 403
+    assert response.status_code == 200
+    assert response.mimetype == wire.DIAGRAM_MIMETYPE
+    assert response.headers["Content-Encoding"] == "zstd"
+    assert len(response.data) < len(diagram.data)
+    assert zstandard.decompress(response.data) == diagram.data
+    assert response.headers["FD-Diagram-Version"] == str(diagram.version)
+    assert json.loads(response.headers["FD-Diagram-Meta"])["name"] == diagram.name
+
+    response = subscriber.get(
+        f"/personal/diagrams/{diagram.id}",
+        headers={
+            "Accept": wire.DIAGRAM_MIMETYPE,
+            "If-None-Match": response.headers["ETag"],
+        },
+    )
+    assert response.status_code == 304
+    assert response.data == b""
+    assert response.headers["FD-Diagram-Version"] == str(diagram.version)
+
+
+def test_diagrams_get_binary_changed_since_etag(subscriber):
+    diagram = subscriber.user.free_diagram
+    etag = f'"{wire.diagram_etag(diagram)}"'
+    version = diagram.version
+    diagram.set_diagram_data(DiagramData())
+    db.session.commit()
+    assert diagram.version == version
+
+    response = subscriber.get(
+        f"/personal/diagrams/{diagram.id}",
+        headers={"Accept": wire.DIAGRAM_MIMETYPE, "If-None-Match": etag},
+    )
+    assert response.status_code == 200
+    assert response.data == diagram.data
+
+
+def test_diagrams_put_binary(subscriber):
+    diagram = subscriber.user.free_diagram
+    initial_version = diagram.version
+    new_data = pickle.dumps({"people": ["y" * 10000]})
+
+    response = subscriber.put(
+        f"/personal/diagrams/{diagram.id}",
+        data=zstandard.compress(new_data),
+        content_type=wire.DIAGRAM_MIMETYPE,
+        headers={
+            "Content-Encoding": "zstd",
+            "If-Match": f'"{wire.diagram_etag(diagram)}"',
+        },
+    )
+    assert response.status_code == 204
+    assert response.headers["FD-Diagram-Version"] == str(initial_version + 1)
+    assert Diagram.query.get(diagram.id).data == new_data
+
+
+def test_diagrams_put_binary_too_large(subscriber, monkeypatch):
+    monkeypatch.setattr(wire, "MAX_DIAGRAM_SIZE", 1000)
+    monkeypatch.setattr(wire, "ZSTD_READ_SIZE", 100)
+    diagram = subscriber.user.free_diagram
+    initial_version = diagram.version
+    # Streamed frame: no content size in the header.
+    compressor = zstandard.ZstdCompressor().compressobj()
+    body = compressor.compress(b"x" * 100000) + compressor.flush()
+
+    response = subscriber.put(
+        f"/personal/diagrams/{diagram.id}",
+        data=body,
+        content_type=wire.DIAGRAM_MIMETYPE,
+        headers={
+            "Content-Encoding": "zstd",
+            "If-Match": f'"{wire.diagram_etag(diagram)}"',
+        },
+    )
+    assert response.status_code == 400
+    assert Diagram.query.get(diagram.id).version == initial_version
+
+
+def test_diagrams_put_binary_conflict(subscriber):
+    diagram = subscriber.user.free_diagram
+    stale = f'"{diagram.id}.{diagram.version - 1}"'
+
+    response = subscriber.put(
+        f"/personal/diagrams/{diagram.id}",
+        data=b"new",
+        content_type=wire.DIAGRAM_MIMETYPE,
+        headers={"If-Match": stale},
+    )
+    assert response.status_code == 409
+    assert response.data == diagram.data
+    assert response.headers["FD-Diagram-Version"] == str(diagram.version)
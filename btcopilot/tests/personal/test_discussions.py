@@ -153,3 +153,34 @@ def test_deep_reextract_rejects_invalid_k(subscriber, discussion, mock_celery):
     )
     assert response.status_code == 400
     mock_celery.send_task.assert_not_called()
+
+
+def test_events_stream(subscriber, discussion, sse_redis):
+    from btcopilot.training.sse import sse_manager, discussion_channel
+
+    missed = sse_manager.publish(
+        {"type": "extracting", "extracting": True},
+        channel=discussion_channel(discussion.id),
+    )
+    response = subscriber.get(
+        f"/personal/discussions/{discussion.id}/events",
+        headers={"Last-Event-ID": str(missed - 1)},
+    )
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    frames = (frame.decode() for frame in response.response)
+    assert '"connected"' in next(frames)
+    assert next(frames) == (
+        f'id: {missed}\ndata: {{"type": "extracting", "extracting": true}}\n\n'
+    )
+    response.close()
+    assert sse_manager.subscribers == []
+
+
+def test_events_unauthorized(subscriber, test_user_2, sse_redis):
+    other_discussion = Discussion(user_id=test_user_2.id, summary="Other user's")
+    db.session.add(other_discussion)
+    db.session.commit()
+
+    response = subscriber.get(f"/personal/discussions/{other_discussion.id}/events")
+    assert response.status_code == 401
@@ -185,7 +185,8 @@ def test_dock_parent_of_emits_committed_parent_edit(monkeypatch):
         member_id=-1,
         relation=Relation.ParentOf,
         anchor_id=11,
-        quote="Mona is Bob's mother.",
+        # typographic apostrophe, no final punctuation — still verbatim
+        quote="Mona is Bob’s mother",
         reasoning="stated",
     )
     monkeypatch.setattr(dock_mod, "gemini_structured", _gemini(_attach(edge)))
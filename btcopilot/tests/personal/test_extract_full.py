@@ -216,6 +216,33 @@ def test_gemini_structured_accepts_model_override():
     assert "model" in inspect.signature(gemini_structured).parameters
 
 
+def test_gemini_structured_creates_context_cache_on_prefix_reuse():
+    from unittest.mock import MagicMock
+    from btcopilot import llmutil
+
+    response = MagicMock(text="{}", usage_metadata=None)
+    response.candidates = [MagicMock(finish_reason="STOP")]
+    client = MagicMock()
+    client.aio.models.generate_content = AsyncMock(return_value=response)
+    client.aio.caches.create = AsyncMock(return_value=MagicMock(name="cache"))
+    client.aio.caches.create.return_value.name = "cachedContents/abc"
+    prefix = "x" * llmutil.GEMINI_CACHE_MIN_CHARS
+
+    with (
+        patch.object(llmutil, "_client", return_value=client),
+        patch.dict(llmutil._gemini_prefix_caches, clear=True),
+    ):
+        asyncio.run(llmutil.gemini_structured("", PDPDeltas, prefix=prefix))
+        asyncio.run(llmutil.gemini_structured("fix", PDPDeltas, prefix=prefix))
+
+    first, retry = client.aio.models.generate_content.call_args_list
+    assert first.kwargs["contents"] == prefix
+    assert first.kwargs["config"].cached_content is None
+    assert retry.kwargs["contents"] == "fix"
+    assert retry.kwargs["config"].cached_content == "cachedContents/abc"
+    client.aio.caches.create.assert_awaited_once()
+
+
 def _sarf_review_passes():
     pass1_pdp = PDP(people=[Person(id=-1, name="Mom", confidence=0.8)])
     pass1_deltas = PDPDeltas(people=pass1_pdp.people)
@@ -391,3 +418,18 @@ def test_restage_new_items_keeps_committed_refs_positive():
     assert any(x < 0 for x in (bond.person_a, bond.person_b))
     kid = next(p for p in staged.people if p.name == "Kid")
     assert kid.parents == bond.id
+
+
+def test_gemini_prefix_cache_is_bounded():
+    from cachetools import TTLCache
+    from btcopilot import llmutil
+
+    client = object()  # never reached: every prefix is seen only once
+    with patch.object(llmutil, "_gemini_prefix_caches", TTLCache(maxsize=2, ttl=60)):
+        for i in range(5):
+            prefix = str(i) * llmutil.GEMINI_CACHE_MIN_CHARS
+            assert (
+                asyncio.run(llmutil._gemini_cached_prefix(client, "gemini-x", prefix))
+                is None
+            )
+        assert len(llmutil._gemini_prefix_caches) == 2
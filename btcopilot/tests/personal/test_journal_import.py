@@ -1,3 +1,5 @@
+import json
+
 import pytest
 from mock import patch, AsyncMock
 
@@ -107,6 +109,58 @@ def test_import_journal_no_access(subscriber, test_user_2):
     assert response.status_code == 403
 
 
+def test_import_journal_background(subscriber, mock_celery):
+    diagram = subscriber.user.free_diagram
+    mock_celery.send_task.return_value.id = "task-1"
+
+    response = subscriber.post(
+        f"/personal/diagrams/{diagram.id}/import-text",
+        json={"text": "Mom called me yesterday.", "background": True},
+    )
+
+    assert response.status_code == 202
+    assert response.get_json() == {"task_id": "task-1"}
+    mock_celery.send_task.assert_called_once_with(
+        "import_text", args=[diagram.id, "Mom called me yesterday."]
+    )
+
+
+def test_import_text_task(subscriber, sse_redis):
+    from types import SimpleNamespace
+    from btcopilot.personal import tasks
+    from btcopilot.training.sse import sse_manager, diagram_channel
+
+    diagram = subscriber.user.free_diagram
+    initial_version = diagram.version
+    mock_pdp = PDP(people=[Person(id=-1, name="Mom", confidence=0.8)])
+    mock_deltas = PDPDeltas(people=[Person(id=-1, name="Mom", confidence=0.8)])
+
+    async def import_text(diagram_data, text, on_progress=None):
+        on_progress(0, 3, "Finding people and relationships…")
+        return mock_pdp, mock_deltas
+
+    celery_self = SimpleNamespace(
+        request=SimpleNamespace(id="task-1"), update_state=lambda **kw: None
+    )
+    q = sse_manager.subscribe(diagram_channel(diagram.id))
+    try:
+        with patch("btcopilot.pdp.import_text", import_text):
+            result = tasks.import_text_task(celery_self, diagram.id, "Mom called.")
+        statuses = []
+        while (event := q.get(timeout=0.1)) is not None:
+            statuses.append(json.loads(event["data"])["status"])
+    finally:
+        sse_manager.unsubscribe(q)
+
+    assert result["summary"] == {"people": 1, "events": 0, "pairBonds": 0}
+    assert result["pdp"]["people"][0]["name"] == "Mom"
+    assert statuses == ["progress", "complete"]
+
+    diagram = Diagram.query.get(diagram.id)
+    assert diagram.version == initial_version + 1
+    assert diagram.get_diagram_data().pdp.people[0].name == "Mom"
+
+
 @pytest.mark.e2e
 def test_import_journal_real_llm(subscriber):
     """Integration test that calls the real LLM. Run with: pytest -m e2e"""
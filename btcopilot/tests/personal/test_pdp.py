@@ -639,6 +639,24 @@ def test_extract_and_validate_self_parent_repair_after_exhaustion(caplog):
     assert any("fix_self_parent_references:" in rec.message for rec in caplog.records)
 
 
+def test_extract_and_validate_retries_reuse_cached_prefix():
+    diagram_data = DiagramData()
+    mock = AsyncMock(side_effect=lambda *a, **k: _bad_self_parent_deltas())
+
+    with patch("btcopilot.pdp.gemini_structured", mock):
+        asyncio.run(
+            _extract_and_validate(
+                "stable prefix", diagram_data, "test_source", suffix="tail"
+            )
+        )
+
+    assert mock.call_count == 1 + MAX_EXTRACTION_RETRIES
+    assert {c.kwargs["prefix"] for c in mock.call_args_list} == {"stable prefix"}
+    assert mock.call_args_list[0].args[0] == "tail"
+    assert all(c.args[0].startswith("tail") for c in mock.call_args_list)
+    assert all(len(c.args[0]) > len("tail") for c in mock.call_args_list[1:])
+
+
 def test_extract_and_validate_birth_event_self_reference_repair_after_exhaustion(
     caplog,
 ):
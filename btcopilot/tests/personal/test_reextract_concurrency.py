@@ -1,16 +1,24 @@
 """FD-331: re-extraction / accept concurrency safety.
 
 These exercise the interleavings deterministically (no threads): the
-SQLite test DB ignores SELECT FOR UPDATE, so the row-lock fix for
-next_order() is only enforced on PostgreSQL in production and is covered
-here by the contiguous-allocation regression guard plus a documented
-limitation. The version-check and cursor-binding fixes ARE fully
+in-memory SQLite test DB has no row locks, so the serialization of the
+last_order counter behind reserve_order_block() is covered here by the
+contiguous-allocation regression guard, and under real contention by the
+threaded --benchmark run at the end. The version-check and cursor-binding fixes ARE fully
 exercisable on SQLite and are tested here by injecting a concurrent
 writer mid-extract / between commit-pdp's read and write.
 """
 
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch, AsyncMock
 
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import scoped_session, sessionmaker
+
 from btcopilot.extensions import db
 from btcopilot.personal.models import Discussion, Statement
 from btcopilot.schema import PDP, PDPDeltas, Person
@@ -162,7 +170,7 @@ def test_commit_pdp_survives_concurrent_version_bump(subscriber, discussion):
 
 
 def test_sequential_chat_orders_are_distinct_and_contiguous(discussion):
-    """Row-lock concurrency is PostgreSQL-only (SQLite ignores FOR UPDATE);
+    """Row-lock concurrency is PostgreSQL-only (SQLite has no row locks);
     this guards the non-concurrent invariant the lock must preserve."""
     base = max(s.order for s in discussion.statements)
     a = discussion.next_order()
@@ -179,3 +187,123 @@ def test_sequential_chat_orders_are_distinct_and_contiguous(discussion):
     assert a == base + 1
     assert b == base + 2
     assert a != b
+
+
+def test_reserve_order_block_derives_legacy_counter(discussion):
+    """Discussions from before last_order start after their highest order."""
+    base = max(s.order for s in discussion.statements)
+    assert discussion.last_order is None
+    assert discussion.reserve_order_block(3) == (base + 1, base + 3)
+    assert discussion.last_order == base + 3
+    assert discussion.reserve_order_block(1) == (base + 4, base + 4)
+
+
+def test_reserve_order_block_ignores_stale_instance(discussion):
+    """The counter is advanced in the database, not from the loaded value."""
+    discussion.reserve_order_block(2)
+    end = discussion.last_order
+    db.session.execute(
+        db.update(Discussion)
+        .where(Discussion.id == discussion.id)
+        .values(last_order=end + 10)
+        .execution_options(synchronize_session=False)
+    )
+    assert discussion.last_order == end
+    assert discussion.reserve_order_block(1) == (end + 11, end + 11)
+
+
+def test_reserve_order_block_rejects_empty(discussion):
+    with pytest.raises(ValueError):
+        discussion.reserve_order_block(0)
+
+
+def test_add_statements_after_chat_orders(discussion):
+    speaker_id = discussion.statements[0].speaker_id
+    a = discussion.next_order()
+    db.session.add(
+        Statement(discussion_id=discussion.id, speaker_id=speaker_id, text="a", order=a)
+    )
+    first = discussion.add_statements([(speaker_id, f"s{i}") for i in range(3)])
+    db.session.flush()
+    assert first == a + 1
+    orders = [
+        s.order
+        for s in Statement.query.filter_by(discussion_id=discussion.id).order_by(
+            Statement.id
+        )
+    ]
+    assert orders[-4:] == [a, a + 1, a + 2, a + 3]
+
+
+@pytest.mark.benchmark
+def test_benchmark_concurrent_order_reservation(flask_app, tmp_path):
+    """Many writers appending chat turns to one discussion at once.
+
+    Runs on its own engine, FD_TEST_POSTGRES_URL if set (row locks, the
+    production case) or else a file-backed SQLite database, where writers
+    serialize on the database lock instead. Either way every order must be
+    handed out exactly once.
+    """
+    WRITERS = 16
+    TURNS = 50  # per writer, two statements each
+
+    url = os.getenv("FD_TEST_POSTGRES_URL") or f"sqlite:///{tmp_path}/orders.db"
+    engine = create_engine(
+        url,
+        pool_size=WRITERS,
+        **({"connect_args": {"timeout": 60}} if url.startswith("sqlite") else {}),
+    )
+    db.metadata.create_all(engine)
+    session = scoped_session(sessionmaker(bind=engine))  # one per thread
+    start = threading.Barrier(WRITERS)
+
+    def writer(n):
+        start.wait()
+        waits = []
+        for turn in range(TURNS):
+            t0 = time.perf_counter()
+            discussion = session.get(Discussion, discussion_id)
+            first, _ = discussion.reserve_order_block(2)
+            session.add_all(
+                Statement(discussion_id=discussion_id, text=f"{n}.{turn}", order=order)
+                for order in (first, first + 1)
+            )
+            session.commit()
+            waits.append(time.perf_counter() - t0)
+        session.remove()
+        return waits
+
+    try:
+        with patch.object(db, "session", session):
+            discussion = Discussion(user_id=1)
+            session.add(discussion)
+            session.commit()
+            discussion_id = discussion.id
+            session.remove()
+
+            t0 = time.perf_counter()
+            with ThreadPoolExecutor(WRITERS) as pool:
+                waits = sorted(sum(pool.map(writer, range(WRITERS)), []))
+            elapsed = time.perf_counter() - t0
+
+            orders = [
+                order
+                for (order,) in session.query(Statement.order).filter_by(
+                    discussion_id=discussion_id
+                )
+            ]
+            last_order = session.get(Discussion, discussion_id).last_order
+            session.remove()
+    finally:
+        db.metadata.drop_all(engine)
+        engine.dispose()
+
+    total = WRITERS * TURNS
+    print(
+        f"\n{WRITERS} writers x {TURNS} turns on {engine.dialect.name}: "
+        f"{elapsed:.2f}s, {total / elapsed:.0f} turns/s, "
+        f"p50 {waits[total // 2] * 1000:.1f} ms, "
+        f"p99 {waits[int(total * 0.99)] * 1000:.1f} ms per turn"
+    )
+    assert sorted(orders) == list(range(1, 2 * total + 1))
+    assert last_order == 2 * total
@@ -0,0 +1,86 @@
+import random
+import time
+
+import pytest
+
+from btcopilot.personal.transcriptindex import TranscriptIndex, normalize
+
+LINES = [
+    "[disc 7] User: My brother-in-law Dave is married to Alice.",
+    "[disc 7] Assistant: Tell me more.",
+    "[disc 7] User: “Kim” is the child of Alice and Bob, I think.",
+    "[disc 7] User: Mona was always very close to her grandson Kyle growing up.",
+]
+
+
+@pytest.fixture
+def index():
+    return TranscriptIndex(LINES, statement_ids=[101, 102, 103, 104])
+
+
+def test_normalize():
+    assert normalize("  Don’t   STOP—now!\n") == "dont stop now"
+    assert normalize("ﬁne") == "fine"
+
+
+def test_exact_match_maps_to_statement(index):
+    match = index.find("kim is the CHILD of alice and bob")
+    assert match.edits == 0
+    assert match.statement_id == 103
+    assert index.normalized[match.start : match.end] == (
+        "kim is the child of alice and bob"
+    )
+
+
+def test_punctuation_and_quotes_ignored(index):
+    assert index.find('"Kim" is the child of Alice, and Bob').statement_id == 103
+    assert index.find("brother in law Dave").statement_id == 101
+
+
+def test_near_match_within_ratio(index):
+    match = index.find("Mona was always very close to her grandsun Kyle growing up")
+    assert match.edits == 1
+    assert match.statement_id == 104
+
+
+def test_paraphrase_rejected(index):
+    assert index.find("Mona was never close to her grandson Kyle growing up") is None
+    assert index.find("Dave divorced Alice.") is None
+
+
+def test_short_quotes_must_be_exact(index):
+    assert index.find("Dave is married to Alica") is None
+    assert index.find("Dave is married to Alica", max_edits=1).edits == 1
+    assert index.find("Dave is married to Alice").edits == 0
+
+
+def test_empty_quote_rejected(index):
+    assert index.find("") is None
+    assert index.find("...") is None
+
+
+@pytest.mark.benchmark
+def test_benchmark_gate_large_transcript():
+    rng = random.Random(0)
+    vocab = [f"word{i}" for i in range(2000)] + ["the", "and", "to", "of"] * 200
+    lines = [
+        f"[disc 1] User: {' '.join(rng.choices(vocab, k=25))}" for _ in range(5000)
+    ]
+    index = TranscriptIndex(lines, statement_ids=list(range(5000)))
+
+    quotes = []
+    for n in range(300):
+        words = lines[rng.randrange(5000)].split()[5:20]
+        quote = " ".join(words)
+        if n % 3 == 1:
+            quote = quote[:40] + "x" + quote[41:]
+        elif n % 3 == 2:
+            quote = " ".join(rng.choices(vocab, k=15))
+        quotes.append(quote)
+
+    start = time.perf_counter()
+    matches = [index.find(quote) for quote in quotes]
+    elapsed = time.perf_counter() - start
+    print(f"\n300 quotes against 5000 statements: {elapsed:.3f}s")
+    assert all(m is not None for m in matches[0::3])
+    assert all(m is not None and m.edits == 1 for m in matches[1::3])
@@ -24,11 +24,16 @@ def llm_response():
                 Engine,
                 "get_vector_db",
                 return_value=Mock(
-                    similarity_search_with_score=Mock(
+                    similarity_search_by_vector_with_relevance_scores=Mock(
                         return_value=[(x, 1.0) for x in sources]
                     )
                 ),
             ),
+            patch.object(
+                Engine,
+                "get_embeddings",
+                return_value=Mock(embed_query=Mock(return_value=[1.0, 0.0])),
+            ),
             patch.object(Engine, "get_llm") as llm,
             patch.object(Engine, "_chat_template") as _chat_template,
         ):
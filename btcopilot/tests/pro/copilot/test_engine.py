@@ -2,41 +2,53 @@ import pytest
 import mock
 
 from btcopilot.pro.copilot import Engine, Event
-from btcopilot.pro.copilot.engine import format_timeline_data
+from btcopilot.llmtelemetry import REGISTRY
+from btcopilot.pro.copilot.engine import SemanticCache, format_timeline_data
 
 
 ANSWER = "There is no point"
 
 
+VECTORS = {
+    "What is the point?": [1.0, 0.0, 0.0],
+    "What's the point?": [0.99, 0.05, 0.0],
+    "Where is the shift?": [0.0, 1.0, 0.0],
+}
+
+
 @pytest.fixture
 def engine(tmp_path):
     from langchain_core.documents import Document
 
-    with mock.patch.object(
-        Engine,
-        "get_vector_db",
-        similarity_search_with_score=mock.Mock(
-            return_value=[
-                Document(
-                    page_content="The term mallbock means I love you 1.",
-                    metadata={"source": "capture_1.pdf"},
-                ),
-                Document(
-                    page_content="The term mallbock means I love you 2.",
-                    metadata={"source": "capture_2.pdf"},
-                ),
-            ]
+    docs = [
+        Document(
+            page_content="The term mallbock means I love you 1.",
+            metadata={"fd_file_name": "capture_1.pdf", "fd_authors": "A", "fd_title": "T1"},
+        ),
+        Document(
+            page_content="The term mallbock means I love you 2.",
+            metadata={"fd_file_name": "capture_2.pdf", "fd_authors": "B", "fd_title": "T2"},
         ),
+    ]
+    vector_db = mock.Mock()
+    vector_db.similarity_search_by_vector_with_relevance_scores.return_value = [
+        (doc, 0.9) for doc in docs
+    ]
+    embeddings = mock.Mock()
+    embeddings.embed_query.side_effect = VECTORS.__getitem__
+    with (
+        mock.patch.object(Engine, "get_vector_db", return_value=vector_db),
+        mock.patch.object(Engine, "get_embeddings", return_value=embeddings),
+        mock.patch.object(Engine, "get_llm") as llm,
     ):
-        with mock.patch.object(Engine, "get_llm") as llm:
-            llm.return_value.invoke.return_value = ANSWER
-            yield Engine(tmp_path)
+        llm.return_value.invoke.return_value = ANSWER
+        yield Engine(tmp_path)
 
 
 def test_ask(engine):
     response = engine.ask("What is the point?")
     assert response.answer == ANSWER
-    engine.get_vector_db().similarity_search_with_score.assert_called_once()
+    engine.get_vector_db().similarity_search_by_vector_with_relevance_scores.assert_called_once()
     engine.get_llm().invoke.assert_called_once()
 
 
@@ -58,5 +70,57 @@ def test_ask_with_events(engine):
     response = engine.ask("Where is the shift?", events=events)
     s_timeseries = format_timeline_data(events)
     assert response.answer == ANSWER
-    engine.get_vector_db().similarity_search_with_score.assert_called_once()
+    engine.get_vector_db().similarity_search_by_vector_with_relevance_scores.assert_called_once()
     assert s_timeseries in engine.get_llm().invoke.call_args[0][0]
+
+
+def test_near_duplicate_question_is_answered_from_cache(engine):
+    first = engine.ask("What is the point?")
+    second = engine.ask("What's the point?")
+
+    assert second.cached and not first.cached
+    assert second.answer == first.answer and second.sources == first.sources
+    assert second.llm_time == 0.0
+    engine.get_llm().invoke.assert_called_once()
+    engine.get_vector_db().similarity_search_by_vector_with_relevance_scores.assert_called_once()
+
+
+def test_cache_is_scoped_to_timeline_and_threshold(engine):
+    events = [
+        Event(dateTime="2021-01-01", description="Bonded", people=["Alice"], variables={})
+    ]
+    engine.ask("What is the point?")
+    assert not engine.ask("What is the point?", events=events).cached
+    assert not engine.ask("Where is the shift?").cached
+    assert engine.get_llm().invoke.call_count == 3
+
+
+def test_question_embedding_is_cached(engine):
+    engine.answer_cache.clear()
+    engine.ask("What is the point?")
+    engine.answer_cache.clear()
+    engine.ask("What is the point?")
+    engine.get_embeddings().embed_query.assert_called_once()
+    assert engine.get_llm().invoke.call_count == 2
+
+
+def test_ask_records_stage_metrics(engine):
+    REGISTRY.clear()
+    engine.ask("What is the point?")
+    engine.ask("What is the point?")
+    text = REGISTRY.render()
+    assert 'copilot_llm_seconds_count{cache="miss"} 1' in text
+    assert 'copilot_total_seconds_count{cache="hit"} 1' in text
+    assert 'llm_calls_total{caller="copilot",model="gpt-4o-mini"} 1' in text
+
+
+def test_semantic_cache_expires_and_evicts():
+    now = [0.0]
+    cache = SemanticCache(threshold=0.9, maxsize=2, ttl=10, timer=lambda: now[0])
+    cache.put("a", [1, 0], "", "A")
+    cache.put("b", [0, 1], "", "B")
+    assert cache.get([1, 0.1], "") == "A"
+    cache.put("c", [1, 1], "", "C")  # evicts "b", the least recently used
+    assert cache.get([0, 1], "") is None
+    now[0] = 11
+    assert cache.get([1, 0], "") is None and len(cache) == 0
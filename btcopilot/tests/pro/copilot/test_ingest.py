@@ -2,8 +2,10 @@ import os.path
 
 import pytest
 from click.testing import CliRunner
+from langchain_core.documents import Document
 
 from btcopilot.pro.copilot import tasks
+from btcopilot.pro.copilot.tasks import ingest_sources
 
 
 @pytest.mark.e2e
@@ -18,3 +20,104 @@ def test_ingest(tmp_path):
         ["--sources-dir", SOURCE_DIR, "--data-dir", os.path.join(tmp_path, "data")],
     )
     assert result.exit_code == 0
+
+
+class FakeVectorDB:
+    def __init__(self):
+        self.docs = {}
+        self.added = []
+        self.deleted = []
+
+    def get(self, ids=None, include=None):
+        return {"ids": [i for i in ids if i in self.docs]}
+
+    async def aadd_documents(self, documents, ids):
+        self.added.append(list(ids))
+        self.docs.update(zip(ids, documents))
+
+    def delete(self, ids):
+        self.deleted.extend(ids)
+        for i in ids:
+            self.docs.pop(i, None)
+
+
+def _load_paragraphs(entry):
+    with open(entry["path"]) as f:
+        return [
+            Document(page_content=p, metadata={"fd_title": entry["title"]})
+            for p in f.read().split("\n\n")
+        ]
+
+
+def _entries(tmp_path, **texts):
+    entries = []
+    for name, text in texts.items():
+        path = tmp_path / f"{name}.md"
+        if not path.exists() or path.read_text() != text:
+            path.write_text(text)
+        entries.append({"path": str(path), "title": name, "authors": []})
+    return entries
+
+
+def _ingest(db, entries, tmp_path, **kwargs):
+    kwargs.setdefault("workers", 0)
+    return ingest_sources(
+        db,
+        entries,
+        str(tmp_path / "manifest.json"),
+        load=_load_paragraphs,
+        batch_size=2,
+        **kwargs,
+    )
+
+
+def test_ingest_is_incremental(tmp_path):
+    db = FakeVectorDB()
+    entries = _entries(tmp_path, a="one\n\ntwo\n\nthree", b="four")
+
+    stats = _ingest(db, entries, tmp_path, workers=2)
+    assert (stats["changed"], stats["added"]) == (2, 4)
+    assert [len(batch) for batch in db.added] == [2, 2]
+
+    db.added.clear()
+    stats = _ingest(db, entries, tmp_path)
+    assert (stats["changed"], stats["added"], stats["deleted"]) == (0, 0, 0)
+    assert db.added == []
+
+    entries = _entries(tmp_path, a="one\n\ntwo\n\nthree, revised", b="four")
+    stats = _ingest(db, entries, tmp_path)
+    assert (stats["changed"], stats["added"], stats["deleted"]) == (1, 1, 1)
+    assert sorted(d.page_content for d in db.docs.values()) == [
+        "four",
+        "one",
+        "three, revised",
+        "two",
+    ]
+
+    stats = _ingest(db, entries[:1], tmp_path)
+    assert stats["deleted"] == 1
+    assert "four" not in {d.page_content for d in db.docs.values()}
+
+
+def test_ingest_touched_but_unchanged_source_is_not_reloaded(tmp_path):
+    db = FakeVectorDB()
+    entries = _entries(tmp_path, a="one")
+    _ingest(db, entries, tmp_path)
+    os.utime(entries[0]["path"], (0, 0))
+
+    loads = []
+
+    def load(entry):
+        loads.append(entry)
+        return _load_paragraphs(entry)
+
+    stats = ingest_sources(
+        db, entries, str(tmp_path / "manifest.json"), load=load, workers=0
+    )
+    assert loads == [] and stats["added"] == 0
+    assert (
+        tasks.load_manifest(str(tmp_path / "manifest.json"))[entries[0]["path"]][
+            "mtime"
+        ]
+        == 0
+    )
@@ -0,0 +1,62 @@
+import types
+
+
+class InvalidRequestError(Exception):
+    pass
+
+
+class FakeList(dict):
+    """Mimics stripe.ListObject: first page in ["data"], plus auto_paging_iter()."""
+
+    def __init__(self, stripe, items, limit):
+        self._stripe = stripe
+        self._items = items
+        self._limit = limit
+        super().__init__(data=items[:limit], has_more=len(items) > limit)
+
+    def auto_paging_iter(self):
+        for start in range(0, len(self._items), self._limit):
+            self._stripe.pages_fetched += 1
+            yield from self._items[start : start + self._limit]
+
+
+class FakeStripe:
+    """
+    Offline stand-in for the parts of the stripe module that
+    extensions.sync_with_stripe() uses.
+    """
+
+    def __init__(self, subscriptions=(), customers=None):
+        self.subscriptions = {s["id"]: s for s in subscriptions}
+        self.customers = customers or {}
+        self.pages_fetched = 0
+        self.error = types.SimpleNamespace(InvalidRequestError=InvalidRequestError)
+        self.Subscription = types.SimpleNamespace(
+            list=self._list_subscriptions, modify=self._modify_subscription
+        )
+        self.Customer = types.SimpleNamespace(retrieve=self._retrieve_customer)
+
+    @staticmethod
+    def subscription(id, status="active", ended_at=None, metadata=None, **kwargs):
+        return dict(
+            id=id,
+            status=status,
+            ended_at=ended_at,
+            metadata=metadata if metadata is not None else {},
+            **kwargs,
+        )
+
+    def _list_subscriptions(self, status=None, limit=10):
+        items = [
+            s for s in self.subscriptions.values() if status in (None, s["status"])
+        ]
+        return FakeList(self, items, limit)
+
+    def _modify_subscription(self, id, metadata=None):
+        self.subscriptions[id]["metadata"].update(metadata or {})
+        return self.subscriptions[id]
+
+    def _retrieve_customer(self, id):
+        if id not in self.customers:
+            raise InvalidRequestError(f"No such customer: '{id}'")
+        return self.customers[id]
@@ -38,7 +38,10 @@ class FDEncryptionTestClient(flask.testing.FlaskClient):
         else:
             data = b""
         content_md5 = hashlib.md5(data).hexdigest()
-        content_type = "application/json" if "json" in kwargs else "text/html"
+        if kwargs.get("content_type"):
+            content_type = kwargs["content_type"]
+        else:
+            content_type = "application/json" if "json" in kwargs else "text/html"
         date = wsgiref.handlers.format_date_time(
             time.mktime(datetime.now().timetuple())
         )
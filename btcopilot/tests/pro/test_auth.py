@@ -0,0 +1,97 @@
+import wsgiref.handlers
+
+from flask import g
+from mock import patch
+
+from btcopilot import auth
+from btcopilot.extensions import db
+from btcopilot.pro.models import User
+
+
+def _get(client, path="/v1/diagrams", **kwargs):
+    # The test app context outlives requests, so drop the user resolved by
+    # the previous one to force authentication again.
+    g.pop("current_user", None)
+    return client.get(path, **kwargs)
+
+
+def test_stale_date_rejected_before_lookup(flask_app, test_user):
+    stale = wsgiref.handlers.format_date_time(0)
+    with patch.object(auth, "lookup_credentials") as lookup_credentials:
+        with flask_app.test_client(user=test_user) as client:
+            response = _get(client, headers={"Date": stale})
+    assert response.status_code == 401
+    lookup_credentials.assert_not_called()
+
+
+def test_credentials_cached_between_requests(flask_app, test_user):
+    with flask_app.test_client(user=test_user) as client:
+        assert _get(client).status_code == 200
+        with patch.object(db.session, "query", wraps=db.session.query) as query:
+            assert _get(client).status_code == 200
+    assert not any(
+        User.secret in call.args for call in query.call_args_list
+    ), "username lookup should be served from the cache"
+
+
+def test_secret_change_evicts_cached_credentials(flask_app, test_user):
+    with flask_app.test_client(user=test_user) as client:
+        assert _get(client).status_code == 200
+        assert test_user.username in auth._credentials
+
+        test_user.secret = "rotated"
+        db.session.commit()
+        assert test_user.username not in auth._credentials
+
+        # The client signs with the new secret.
+        assert _get(client).status_code == 200
+    assert auth.lookup_credentials(test_user.username).secret == b"rotated"
+
+
+def test_stale_cached_secret_is_refreshed(flask_app, test_user):
+    auth.lookup_credentials(test_user.username)
+    # Changed behind the cache's back, e.g. by another process.
+    db.session.query(User).filter_by(id=test_user.id).update({"secret": "rotated"})
+    db.session.commit()
+    db.session.expire_all()
+    with flask_app.test_client(user=test_user) as client:
+        assert _get(client).status_code == 200
+
+
+def test_bad_signature_rejected(flask_app, test_user):
+    with patch("btcopilot.sign", side_effect=["wrong", "expected", "expected"]):
+        with flask_app.test_client(user=test_user) as client:
+            response = _get(client)
+    assert response.status_code == 401
+
+
+def test_user_row_loaded_only_when_needed(flask_app, test_user):
+    with flask_app.test_client(user=test_user) as client:
+        assert _get(client).status_code == 200
+        with patch.object(db.session, "get", wraps=db.session.get) as get:
+            assert _get(client).status_code == 200
+            user = g.current_user
+            assert isinstance(user, auth.CachedUser)
+            assert user.id == test_user.id and user.has_role(test_user.roles)
+            get.assert_not_called()
+
+            assert user.first_name == test_user.first_name
+    get.assert_called_once_with(User, test_user.id)
+
+
+def test_bad_signature_keeps_shared_entry_and_rate_limits_reread(flask_app, test_user):
+    auth.lookup_credentials(test_user.username)
+    with (
+        # client signature, then ours, per request
+        patch("btcopilot.sign", side_effect=["bad", "expected"] * 3),
+        patch.object(
+            auth, "_load_credentials", wraps=auth._load_credentials
+        ) as load_credentials,
+        patch.object(auth, "invalidate_credentials") as invalidate_credentials,
+    ):
+        with flask_app.test_client(user=test_user) as client:
+            for _ in range(3):
+                assert _get(client).status_code == 401
+    assert load_credentials.call_count == 1
+    invalidate_credentials.assert_not_called()
+    assert test_user.username in auth._credentials
@@ -1,4 +1,5 @@
 from datetime import datetime
+import json
 import pickle
 from urllib.parse import quote
 
@@ -6,6 +7,7 @@ import pytest
 
 import btcopilot
 from btcopilot.extensions import db
+from btcopilot.pro import wire
 from btcopilot.pro.models import Diagram
 
 from btcopilot.tests.conftest import TEST_USER_2_ATTRS
@@ -175,6 +177,79 @@ def test_diagrams_optimistic_locking_conflict(flask_app, test_user):
     assert diagram.version == initial_version
 
 
+def test_diagrams_get_binary(flask_app, test_user):
+    diagram = test_user.free_diagram
+
+    with flask_app.test_client(user=test_user) as client:
+        response = client.get(
+            f"/v1/diagrams/{diagram.id}",
+            headers={"Accept": wire.DIAGRAM_MIMETYPE},
+        )
+        assert response.status_code == 200
+        assert response.data == diagram.data
+        assert response.headers["FD-Diagram-Version"] == str(diagram.version)
+        meta = json.loads(response.headers["FD-Diagram-Meta"])
+        assert meta["user"]["username"] == test_user.username
+        assert "data" not in meta
+
+        response = client.get(
+            f"/v1/diagrams/{diagram.id}",
+            headers={
+                "Accept": wire.DIAGRAM_MIMETYPE,
+                "If-None-Match": response.headers["ETag"],
+            },
+        )
+    assert response.status_code == 304
+    assert response.data == b""
+    assert "FD-User-Message" not in response.headers
+
+
+def test_diagrams_patch_binary(flask_app, test_user):
+    diagram = test_user.free_diagram
+    initial_version = diagram.version
+    updated_at = datetime(2026, 1, 2, 3, 4, 5)
+
+    with flask_app.test_client(user=test_user) as client:
+        response = client.patch(
+            f"/v1/diagrams/{diagram.id}",
+            data=pickle.dumps({"some": "fake"}),
+            content_type=wire.DIAGRAM_MIMETYPE,
+            headers={
+                "Accept": wire.DIAGRAM_MIMETYPE,
+                "If-Match": f'"{wire.diagram_etag(diagram)}"',
+                "FD-Diagram-Updated-At": updated_at.isoformat(),
+            },
+        )
+    assert response.status_code == 204
+    assert response.data == b""
+
+    diagram = Diagram.query.get(diagram.id)
+    assert response.headers["ETag"] == f'"{wire.diagram_etag(diagram)}"'
+    assert wire.etag_version(diagram, response.headers["ETag"]) == initial_version + 1
+    assert diagram.version == initial_version + 1
+    assert pickle.loads(diagram.data) == {"some": "fake"}
+    assert diagram.updated_at == updated_at
+
+
+def test_diagrams_patch_binary_conflict(flask_app, test_user):
+    diagram = test_user.free_diagram
+    initial_version = diagram.version
+
+    with flask_app.test_client(user=test_user) as client:
+        response = client.patch(
+            f"/v1/diagrams/{diagram.id}",
+            data=pickle.dumps({"version": "wrong"}),
+            content_type=wire.DIAGRAM_MIMETYPE,
+            headers={
+                "Accept": wire.DIAGRAM_MIMETYPE,
+                "If-Match": f'"{diagram.id}.{initial_version + 999}"',
+            },
+        )
+    assert response.status_code == 409
+    assert response.data == diagram.data
+    assert response.headers["FD-Diagram-Version"] == str(initial_version)
+
+
 def test_diagrams_patch_others_diagram_no_access(flask_app, test_user, test_user_2):
     with flask_app.test_client(user=test_user_2) as client:
         response = client.patch(
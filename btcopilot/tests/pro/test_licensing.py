@@ -18,6 +18,7 @@ from btcopilot.pro.models import (
     License,
     Policy,
 )
+from btcopilot.tests.pro.fakestripe import FakeStripe
 
 
 # STRIPE_PUBLISHABLE_KEY = 'pk_test_Su5gswjnbuKpxLKmZsnnMTMf00r8LLUZRI'
@@ -443,7 +444,7 @@ def test_licenses_cron_check_Stripe_canceled(flask_app, test_session, test_polic
     db.session.commit()
     license_id = license.id
 
-    sync_with_stripe(flask_app)
+    sync_with_stripe()
     license = License.query.get(license_id)
     assert license.canceled == True
     assert stripe.Subscription.retrieve(stripeSub["id"])["status"] == "canceled"
@@ -876,3 +877,128 @@ def test_activations_deactivate(
 
     activations = Activation.query.filter_by(license=test_license)
     assert activations.count() == 1
+
+
+def _license(user, policy, stripe_id):
+    license = License(user=user, policy=policy, active=True, stripe_id=stripe_id)
+    db.session.add(license)
+    return license
+
+
+def test_sync_with_stripe_cancels_licenses(test_user, test_policy):
+    ended = _license(test_user, test_policy, "sub_ended")
+    pending_end = _license(test_user, test_policy, "sub_pending_end")
+    running = _license(test_user, test_policy, "sub_running")
+    unknown = _license(test_user, test_policy, "sub_unknown")
+    db.session.commit()
+    stripe = FakeStripe(
+        [
+            FakeStripe.subscription("sub_ended", status="canceled", ended_at=1),
+            FakeStripe.subscription("sub_pending_end", status="canceled"),
+            FakeStripe.subscription("sub_other", status="canceled", ended_at=1),
+            FakeStripe.subscription("sub_running", metadata={"fd_id": 1}),
+        ]
+    )
+
+    with mock.patch("btcopilot.extensions.STRIPE_PAGE_SIZE", 2):
+        sync_with_stripe(stripe, chunk_size=1)
+
+    assert stripe.pages_fetched == 3  # 2 canceled pages, 1 active
+    assert (ended.active, ended.canceled) == (False, True)
+    assert (pending_end.active, pending_end.canceled) == (True, True)
+    assert (running.active, running.canceled) == (True, False)
+    assert (unknown.active, unknown.canceled) == (True, False)
+
+
+def test_sync_with_stripe_imports_manual_subscriptions(test_user, test_policy):
+    price = {
+        "id": "price_1",
+        "product": "prod_1",
+        "metadata": {"fd_id": test_policy.code},
+    }
+    stripe = FakeStripe(
+        [
+            FakeStripe.subscription(
+                "sub_manual", customer="cus_1", items={"data": [{"price": price}]}
+            ),
+            FakeStripe.subscription(
+                "sub_no_customer",
+                customer="cus_missing",
+                items={"data": [{"price": price}]},
+            ),
+        ],
+        customers={"cus_1": {"metadata": {"fd_user_id": str(test_user.id)}}},
+    )
+
+    sync_with_stripe(stripe)
+
+    license = License.query.filter_by(stripe_id="sub_manual").one()
+    assert license.user_id == test_user.id
+    assert license.policy_id == test_policy.id
+    assert stripe.subscriptions["sub_manual"]["metadata"] == {"fd_id": license.id}
+    assert stripe.subscriptions["sub_no_customer"]["metadata"] == {}
+    assert License.query.count() == 1
+
+
+def test_sync_with_stripe_relinks_imported_license(test_user, test_policy):
+    # A previous run committed the License but never wrote fd_id back.
+    imported = _license(test_user, test_policy, "sub_manual")
+    db.session.commit()
+    price = {
+        "id": "price_1",
+        "product": "prod_1",
+        "metadata": {"fd_id": test_policy.code},
+    }
+    stripe = FakeStripe(
+        [
+            FakeStripe.subscription(
+                "sub_manual", customer="cus_1", items={"data": [{"price": price}]}
+            ),
+        ],
+        customers={"cus_1": {"metadata": {"fd_user_id": str(test_user.id)}}},
+    )
+
+    sync_with_stripe(stripe)
+
+    assert License.query.count() == 1
+    assert stripe.subscriptions["sub_manual"]["metadata"] == {"fd_id": imported.id}
+
+
+@pytest.mark.benchmark
+def test_benchmark_sync_with_stripe_100k(test_user, test_policy):
+    import time
+
+    N = 100_000
+    db.session.execute(
+        License.__table__.insert(),
+        [
+            {
+                "user_id": test_user.id,
+                "policy_id": test_policy.id,
+                "key": str(uuid.uuid4()),
+                "active": True,
+                "canceled": False,
+                "stripe_id": f"sub_{i}",
+            }
+            for i in range(N)
+        ],
+    )
+    db.session.commit()
+    # Every third subscription has ended, the rest are still running.
+    stripe = FakeStripe(
+        [
+            FakeStripe.subscription(f"sub_{i}", status="canceled", ended_at=1)
+            if i % 3 == 0
+            else FakeStripe.subscription(f"sub_{i}", metadata={"fd_id": i})
+            for i in range(N)
+        ]
+    )
+
+    start = time.perf_counter()
+    sync_with_stripe(stripe)
+    elapsed = time.perf_counter() - start
+    print(f"\nsync_with_stripe, {N} licenses: {elapsed:.2f}s")
+
+    assert License.query.filter_by(active=False).count() == len(range(0, N, 3))
+    assert License.query.filter_by(canceled=True).count() == len(range(0, N, 3))
+    assert elapsed < 60
@@ -2,12 +2,15 @@
 # TODO: Test Model.function() : list[Model] (e.g. TripType.itinerary_entries)
 #
 
+import time
 import pytest
 import datetime
 from freezegun import freeze_time
 import dateutil
 
+from btcopilot import modelmixin
 from btcopilot.extensions import db
+from btcopilot.modelmixin import as_dicts
 from btcopilot.pro.models import User, License
 
 FIXED_TIME = datetime.datetime.fromisoformat("2025-01-15T12:00:00")
@@ -268,3 +271,81 @@ def test_filter_attrs():
         }
     )
     assert set(kwargs.keys()) == {"created_at", "updated_at", "username"}
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {},
+        {"include": "policy", "exclude": ["key"]},
+        {"only": ["id", "canceled"]},
+        {"update": {"extra": 1}},
+    ],
+)
+def test_as_dicts_matches_as_dict(user, kwargs):
+    assert as_dicts(user.licenses, **kwargs) == [
+        x.as_dict(**kwargs) for x in user.licenses
+    ]
+
+
+def test_as_dicts_uses_overrides(user):
+    assert as_dicts([user]) == [user.as_dict()]
+    assert as_dicts([]) == []
+
+
+def test_plan_cached_per_spec():
+    a = modelmixin._plan(License, ["policy"], None, None)
+    assert modelmixin._plan(License, ["policy"], None, None) is a
+    assert modelmixin._plan(License, "policy", None, None) is not a
+    assert modelmixin._plan(License, None, None, None) is not a
+
+
+def test_plan_copies_spec(user):
+    include = {"licenses": {"only": ["id"]}}
+    before = user.as_dict(include=include)
+    include["licenses"]["only"].append("key")
+    assert (
+        "key" not in user.as_dict(include={"licenses": {"only": ["id"]}})["licenses"][0]
+    )
+    assert user.as_dict(include=include) != before
+
+
+def test_missing_attr_warns_every_call(user, caplog):
+    for _ in range(2):
+        user.licenses[0].as_dict(include=["nonexistent"])
+    assert (
+        sum("has no attribute `nonexistent`" in r.message for r in caplog.records) == 2
+    )
+
+
+@pytest.mark.benchmark
+def test_benchmark_10k_rows(flask_app):
+    N = 10_000
+    rows = [
+        License(id=i, policy_id=1, key=f"key-{i}", user_id=i, created_at=FIXED_TIME)
+        for i in range(N)
+    ]
+
+    def timed(label, fn):
+        start = time.perf_counter()
+        out = fn()
+        print(f"{label:<40} {(time.perf_counter() - start) * 1000:8.1f} ms")
+        return out
+
+    def uncached(ModelClass, include, exclude, only):
+        # The previous implementation: walk the mapper on every call.
+        modelmixin._mappers.pop(ModelClass, None)
+        return modelmixin._compile_plan(ModelClass, include, exclude, only)
+
+    print()
+    real_plan = modelmixin._plan
+    modelmixin._plan = uncached
+    try:
+        before = timed(
+            f"as_dict() x {N}, no cache", lambda: [x.as_dict() for x in rows]
+        )
+    finally:
+        modelmixin._plan = real_plan
+    cached = timed(f"as_dict() x {N}, cached plan", lambda: [x.as_dict() for x in rows])
+    fast = timed(f"as_dicts({N} rows)", lambda: as_dicts(rows))
+    assert before == cached == fast
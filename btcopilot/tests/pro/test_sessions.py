@@ -1,6 +1,8 @@
 import pickle
 import datetime
 
+from mock import patch
+
 from btcopilot.extensions import db
 from btcopilot.pro import DEACTIVATED_VERSIONS, SESSION_EXPIRATION_DAYS
 from btcopilot.pro.models import Session
@@ -163,3 +165,54 @@ def test_sessions_init_expires_old_session(flask_app, test_session, test_license
         response = client.get("/v1/init", data=args)
 
     assert response.status_code == 404
+
+
+def test_session_payload_is_scoped_to_caller(
+    flask_app, test_session, test_user_2, test_license
+):
+    with flask_app.test_client() as client:
+        response = client.get("/v1/sessions/%s" % test_session.token)
+    data = pickle.loads(response.data)
+    assert [u["id"] for u in data["users"]] == [test_session.user.id]
+    assert all(p["public"] for p in data["policies"])
+
+
+def test_sessions_verify_etag(flask_app, test_session, test_license, test_activation):
+    with flask_app.test_client() as client:
+        first = client.get("/v1/sessions/%s" % test_session.token)
+        etag = first.headers["ETag"]
+        assert etag
+
+        unchanged = client.get(
+            "/v1/sessions/%s" % test_session.token, headers={"If-None-Match": etag}
+        )
+        assert unchanged.status_code == 304
+        assert unchanged.data == b""
+
+        test_session.user.first_name = "Changed"
+        db.session.commit()
+        changed = client.get(
+            "/v1/sessions/%s" % test_session.token, headers={"If-None-Match": etag}
+        )
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert pickle.loads(changed.data)["users"][0]["first_name"] == "Changed"
+
+
+def test_public_policies_cached_until_update_policies(flask_app):
+    from btcopilot.pro.models import Policy
+    from btcopilot.pro.models.policy import public_policies
+    from btcopilot.pro.tasks import update_policies
+
+    update_policies()
+    codes = {p["code"] for p in public_policies()}
+    assert codes == {e["code"] for e in Policy.POLICIES if e["public"]}
+
+    with patch.object(Policy, "as_dict", side_effect=AssertionError("not cached")):
+        assert {p["code"] for p in public_policies()} == codes
+
+    with patch.object(
+        Policy, "POLICIES", [dict(e, name="Renamed") for e in Policy.POLICIES]
+    ):
+        update_policies()
+    assert {p["name"] for p in public_policies()} == {"Renamed"}
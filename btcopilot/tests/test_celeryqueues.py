@@ -0,0 +1,79 @@
+import datetime
+
+import pytest
+from celery.signals import before_task_publish
+
+from btcopilot.extensions import db, celeryqueues
+from btcopilot.extensions.celeryqueues import LANES, TASKS
+from btcopilot.pro.models import Session
+
+
+@pytest.fixture
+def published():
+    messages = []
+
+    def record(sender=None, routing_key=None, properties=None, **kwargs):
+        messages.append((sender, routing_key, properties.get("priority")))
+
+    before_task_publish.connect(record)
+    yield messages
+    before_task_publish.disconnect(record)
+
+
+def test_every_task_has_a_policy(eager_celery):
+    registered = {name for name in eager_celery.tasks if not name.startswith("celery.")}
+    assert registered == set(TASKS)
+    assert {policy.lane for policy in TASKS.values()} <= set(LANES)
+
+
+@pytest.mark.parametrize("name", sorted(TASKS))
+def test_send_task_routes_to_lane(eager_celery, published, name):
+    eager_celery.send_task(name, args=[1])
+    assert published == [(name, TASKS[name].lane, TASKS[name].priority)]
+
+
+def test_unknown_task_routes_to_default(eager_celery, published):
+    eager_celery.send_task("not_a_task")
+    assert published == [("not_a_task", celeryqueues.DEFAULT_LANE, None)]
+
+
+def test_time_limits_annotated(eager_celery):
+    for name, policy in TASKS.items():
+        task = eager_celery.tasks[name]
+        assert task.soft_time_limit == policy.soft_time_limit
+        assert task.time_limit == policy.time_limit
+        assert policy.soft_time_limit < policy.time_limit
+
+
+def test_runs_eagerly(eager_celery, test_user):
+    stale = datetime.datetime.utcnow() - datetime.timedelta(days=365)
+    session = Session(user_id=test_user.id, token="stale")
+    session.updated_at = stale
+    db.session.add(session)
+    db.session.commit()
+
+    result = eager_celery.tasks["expire_stale_sessions"].delay()
+
+    assert result.successful()
+    assert Session.query.filter_by(token="stale").count() == 0
+
+
+def test_configure_worker_lane(eager_celery):
+    celeryqueues.configure_worker(eager_celery, "batch")
+    assert eager_celery.conf.worker_concurrency == LANES["batch"].concurrency
+    assert (
+        eager_celery.conf.worker_prefetch_multiplier
+        == LANES["batch"].prefetch_multiplier
+    )
+    assert set(eager_celery.amqp.queues.consume_from) == {"batch"}
+
+
+def test_configure_worker_unknown_lane(eager_celery):
+    with pytest.raises(ValueError):
+        celeryqueues.configure_worker(eager_celery, "nope")
+
+
+def test_configure_worker_without_lane_consumes_all(eager_celery, monkeypatch):
+    monkeypatch.delenv("FD_CELERY_LANE", raising=False)
+    celeryqueues.configure_worker(eager_celery)
+    assert set(eager_celery.amqp.queues.consume_from or LANES) == set(LANES)
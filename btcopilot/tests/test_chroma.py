@@ -0,0 +1,141 @@
+import hashlib
+import time
+import uuid
+
+import numpy as np
+import pytest
+from chromadb.api.types import Documents, EmbeddingFunction
+
+from btcopilot.extensions.chroma import Chroma, _where
+
+
+class HashEmbeddings(EmbeddingFunction):
+    """Deterministic stand-in for the ONNX model; counts what it embeds."""
+
+    DIMS = 16
+
+    def __init__(self):
+        self.embedded = []
+
+    def __call__(self, input: Documents):
+        self.embedded.extend(input)
+        return [self.vector(text) for text in input]
+
+    @classmethod
+    def vector(cls, text):
+        seed = int.from_bytes(hashlib.md5(text.encode()).digest()[:4], "little")
+        return np.random.default_rng(seed).standard_normal(cls.DIMS).astype(np.float32)
+
+    @staticmethod
+    def name():
+        return "test-hash"
+
+
+@pytest.fixture
+def chroma(flask_app):
+    flask_app.config["CHROMA_COLLECTION"] = f"test-{uuid.uuid4().hex}"
+    chroma = Chroma(embedding_function=HashEmbeddings())
+    chroma.init_app(flask_app)
+    with flask_app.app_context():
+        yield chroma
+        flask_app.extensions["chroma"].delete_collection(
+            flask_app.config["CHROMA_COLLECTION"]
+        )
+
+
+def _add_messages(chroma, n, batch_size=5000):
+    collection = chroma.collection()
+    for start in range(0, n, batch_size):
+        ids = range(start, min(n, start + batch_size))
+        texts = [f"message {i}" for i in ids]
+        collection.add(
+            ids=[str(i) for i in ids],
+            documents=texts,
+            embeddings=[HashEmbeddings.vector(t) for t in texts],
+            metadatas=[{"discussion_id": i % 100, "user_id": i % 10} for i in ids],
+        )
+
+
+def test_collection_handle_is_cached(chroma, flask_app):
+    assert chroma.collection() is chroma.collection()
+    chroma.init_app(flask_app)
+    assert "chroma_collection" not in flask_app.extensions
+
+
+def test_batch_matches_single_queries_and_caches_embeddings(chroma):
+    _add_messages(chroma, 300)
+    questions = ["message 7", "message 42", "message 7"]
+
+    batch = chroma.similarity_search_batch(questions, k=3)
+
+    assert [results[0][0] for results in batch] == questions
+    assert chroma.embedding_function().embedded == ["message 7", "message 42"]
+    assert chroma.similarity_search_with_score("message 42", k=3) == batch[1]
+    assert chroma.embedding_function().embedded == ["message 7", "message 42"]
+
+
+def test_metadata_filters_restrict_candidates(chroma):
+    _add_messages(chroma, 300)
+
+    results = chroma.similarity_search_with_score(
+        "message 7", k=5, discussion_id=7, user_id=7
+    )
+
+    assert [doc for doc, _ in results] == ["message 7", "message 107", "message 207"]
+
+
+def test_where_builds_chroma_filters():
+    assert _where({}) is None
+    assert _where({"discussion_id": None}) is None
+    assert _where({"user_id": 1}) == {"user_id": 1}
+    assert _where({"user_id": 1, "discussion_id": 2}) == {
+        "$and": [{"user_id": 1}, {"discussion_id": 2}]
+    }
+
+
+@pytest.mark.benchmark
+def test_benchmark_100k_messages(chroma, flask_app):
+    N, QUESTIONS, K = 100_000, 200, 10
+    start = time.perf_counter()
+    _add_messages(chroma, N)
+    print(f"\nload {N} messages: {time.perf_counter() - start:.1f}s")
+    questions = [f"message {i * 37}" for i in range(QUESTIONS)]
+
+    def timed(label, fn):
+        start = time.perf_counter()
+        out = fn()
+        per_query = (time.perf_counter() - start) / QUESTIONS * 1000
+        print(f"{label:<40} {per_query:8.2f} ms/question")
+        return out
+
+    client = flask_app.extensions["chroma"]
+    name = flask_app.config["CHROMA_COLLECTION"]
+    embed = HashEmbeddings()
+
+    def uncached():
+        # The previous implementation: look up the collection and embed the
+        # question on every call.
+        return [
+            client.get_or_create_collection(name, embedding_function=embed).query(
+                query_texts=[q], n_results=K, include=["documents", "distances"]
+            )
+            for q in questions
+        ]
+
+    timed("per-call collection lookup + embed", uncached)
+    timed(
+        "cached handle, cold embeddings",
+        lambda: [chroma.similarity_search_with_score(q, K) for q in questions],
+    )
+    single = timed(
+        "cached handle, warm embeddings",
+        lambda: [chroma.similarity_search_with_score(q, K) for q in questions],
+    )
+    batch = timed(
+        "one batched query", lambda: chroma.similarity_search_batch(questions, K)
+    )
+    timed(
+        "batched, filtered to one discussion",
+        lambda: chroma.similarity_search_batch(questions, K, discussion_id=7),
+    )
+    assert batch == single
@@ -1,4 +1,6 @@
-from btcopilot.familygraph import components, lcc_percent
+import random
+
+from btcopilot.familygraph import FamilyGraph, components, lcc_percent
 from btcopilot.schema import PairBond, Person
 
 
@@ -109,3 +111,64 @@ def test_assistant_dropped_from_graph_and_count():
 def test_empty_returns_zero():
     s = lcc_percent([_p(1, "User", primary=True), _p(2, "Assistant")], [])
     assert s == {"total": 0, "components": 0, "lcc": 0, "lcc_pct": 0.0}
+
+
+def test_graph_links_edges_that_arrive_before_their_endpoints():
+    graph = FamilyGraph()
+    graph.add_person(_p(12, "Kid", parents=100))
+    graph.add_pair_bond(_b(100, 10, 11))
+    assert graph.lcc_percent()["components"] == 1
+    graph.add_person(_p(10, "Mom"))
+    graph.add_person(_p(11, "Dad"))
+    assert graph.components() == [{10, 11, 12}]
+    assert graph.lcc_percent() == {
+        "total": 3,
+        "components": 1,
+        "lcc": 3,
+        "lcc_pct": 100.0,
+    }
+
+
+def test_graph_parents_edit_on_existing_person():
+    graph = FamilyGraph(
+        [_p(10, "Mom"), _p(11, "Dad"), _p(12, "Kid")], [_b(100, 10, 11)]
+    )
+    assert graph.lcc == 2
+    graph.add_person(Person(id=12, parents=100))
+    assert graph.lcc == 3
+    assert graph.total == 3
+
+
+def test_graph_copy_projects_without_touching_original():
+    graph = FamilyGraph(
+        [_p(1, "User", primary=True), _p(10, "Spouse"), _p(20, "Mom")],
+        [_b(100, 1, 10)],
+    )
+    projected = graph.copy()
+    projected.add([Person(id=1, parents=-10)], [_b(-10, 20, -2)])
+    assert projected.floating() == ({1, 10, 20}, [])
+    assert projected.lcc_percent()["lcc_pct"] == 100.0
+    assert graph.floating() == ({1, 10}, [{20}])
+    assert graph.lcc_percent()["lcc_pct"] == 50.0
+
+
+def test_graph_incremental_matches_rebuild():
+    rng = random.Random(0)
+    people, bonds = [], []
+    graph = FamilyGraph()
+    for i in range(300):
+        if i % 3 == 0 and len(people) > 1:
+            a, b = rng.sample(people, 2)
+            bond = _b(1000 + i, a["id"], b["id"])
+            bonds.append(bond)
+            graph.add_pair_bond(bond)
+        else:
+            parents = rng.choice(bonds)["id"] if bonds and rng.random() < 0.5 else None
+            person = _p(10 + i, f"P{i}", parents=parents)
+            people.append(person)
+            graph.add_person(person)
+        if i % 25 == 0:
+            assert graph.lcc_percent() == lcc_percent(people, bonds)
+    assert sorted(map(sorted, graph.components())) == sorted(
+        map(sorted, components(people, bonds))
+    )
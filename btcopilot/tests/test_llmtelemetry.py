@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from google.genai.errors import ServerError
+
+from btcopilot import llmtelemetry, llmutil
+from btcopilot.llmtelemetry import (
+    MetricsRegistry,
+    SQLiteSink,
+    estimate_cost,
+    llm_caller,
+    report,
+    track,
+)
+from btcopilot.schema import PDPDeltas
+
+
+class ListSink:
+    def __init__(self):
+        self.calls = []
+
+    def record(self, call):
+        self.calls.append(call)
+
+
+@pytest.fixture
+def sink():
+    sink = ListSink()
+    llmtelemetry.add_sink(sink)
+    yield sink
+    llmtelemetry.remove_sink(sink)
+
+
+def test_track_defaults_caller_to_function(sink):
+    with track("gemini_text", "gemini-2.5-flash") as call:
+        call.mark_sent()
+        call.add_usage(input_tokens=1000, output_tokens=100)
+
+    (call,) = sink.calls
+    assert call.caller == "gemini_text"
+    assert call.latency >= call.queue_wait >= 0
+    assert call.cost_usd == pytest.approx(estimate_cost("gemini-2.5-flash", 1000, 100))
+
+
+def test_llm_caller_tags_calls_inside_asyncio_run(sink):
+    async def work():
+        with track("gemini_structured", "gemini-3.6-flash"):
+            pass
+
+    with llm_caller("extract_full_pass1"):
+        asyncio.run(work())
+
+    assert sink.calls[0].caller == "extract_full_pass1"
+
+
+def test_track_records_errors(sink):
+    with pytest.raises(ValueError):
+        with track("claude_text", "claude-opus-4-6"):
+            raise ValueError("boom")
+
+    assert sink.calls[0].error == "ValueError: boom"
+
+
+def test_gemini_structured_records_retries_and_tokens(sink):
+    response = MagicMock(text="{}")
+    response.candidates = [MagicMock(finish_reason="STOP")]
+    response.usage_metadata = MagicMock(
+        prompt_token_count=5000,
+        candidates_token_count=200,
+        thoughts_token_count=300,
+        cached_content_token_count=4000,
+    )
+    client = MagicMock()
+    client.aio.models.generate_content = AsyncMock(
+        side_effect=[ServerError(503, {"error": {"message": "busy"}}), response]
+    )
+
+    with (
+        patch.object(llmutil, "_client", return_value=client),
+        patch.object(llmutil, "GEMINI_RETRY_BACKOFF", 0),
+        llm_caller("dock"),
+    ):
+        asyncio.run(llmutil.gemini_structured("prompt", PDPDeltas))
+
+    (call,) = sink.calls
+    assert call.caller == "dock"
+    assert call.retries == 1
+    assert call.input_tokens == 1000
+    assert call.cached_tokens == 4000
+    assert call.output_tokens == 200
+    assert call.thinking_tokens == 300
+    assert call.ttfb is not None
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    with patch.object(llmtelemetry, "_sinks", [registry]):
+        with llm_caller("chat"), track("claude_text", "claude-opus-4-6") as call:
+            call.add_usage(input_tokens=10, output_tokens=5)
+
+    text = registry.render()
+    assert 'llm_calls_total{caller="chat",model="claude-opus-4-6"} 1' in text
+    assert (
+        'llm_latency_seconds_bucket{caller="chat",model="claude-opus-4-6",le="+Inf"} 1'
+        in text
+    )
+
+
+def test_sqlite_sink_report_aggregates_per_caller(tmp_path):
+    path = str(tmp_path / "llm_calls.db")
+    sqlite = SQLiteSink(path)
+    with patch.object(llmtelemetry, "_sinks", [sqlite]):
+        for caller, n in (("extract_full_pass1", 10), ("sarf_review", 3)):
+            for _ in range(n):
+                with llm_caller(caller), track("gemini_structured", "gemini-x"):
+                    pass
+
+    rows = {r["caller"]: r for r in report(path)}
+    assert rows["extract_full_pass1"]["calls"] == 10
+    assert rows["sarf_review"]["calls"] == 3
+    assert rows["sarf_review"]["p95_latency"] >= rows["sarf_review"]["p50_latency"]
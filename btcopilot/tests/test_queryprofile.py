@@ -0,0 +1,101 @@
+import pytest
+
+from btcopilot import queryprofile
+from btcopilot.extensions import db
+from btcopilot.pro.models import User
+from btcopilot.queryprofile import QueryStats, RequestProfile
+
+
+@pytest.fixture
+def stats():
+    queryprofile.STATS.clear()
+    yield queryprofile.STATS
+    queryprofile.STATS.clear()
+
+
+def _profile(*queries, endpoint="e"):
+    return RequestProfile(endpoint=endpoint, queries=list(queries))
+
+
+def test_repeated_statements():
+    profile = _profile(("SELECT a", 0.001), ("SELECT b", 0.002), ("SELECT a", 0.003))
+    assert profile.count == 3
+    assert profile.repeated() == {"SELECT a": 2}
+    assert profile.duplicates == 1
+    assert profile.db_time == pytest.approx(0.006)
+    assert profile.slowest(1) == [("SELECT a", 0.003)]
+
+
+def test_stats_aggregate_per_endpoint():
+    stats = QueryStats()
+    stats.record(_profile(("SELECT a", 0.01), ("SELECT a", 0.01)))
+    stats.record(_profile(("SELECT b", 0.5)))
+    stats.record(_profile(("SELECT c", 0.001), endpoint="other"))
+
+    rows = {row["endpoint"]: row for row in stats.summary()}
+    assert rows["e"]["requests"] == 2
+    assert rows["e"]["avg_queries"] == 1.5
+    assert rows["e"]["max_queries"] == 2
+    assert rows["e"]["top_repeated"] == [("SELECT a", 1)]
+    assert rows["e"]["slowest"][0] == ("SELECT b", pytest.approx(500))
+    assert [row["endpoint"] for row in stats.summary()] == ["e", "other"]
+
+
+def test_slowest_is_bounded():
+    stats = QueryStats()
+    for i in range(queryprofile.SLOWEST_STATEMENTS * 3):
+        stats.record(_profile((f"SELECT {i}", i / 1000)))
+    slowest = stats.summary()[0]["slowest"]
+    assert len(slowest) == queryprofile.SLOWEST_STATEMENTS
+    assert slowest[0][0] == f"SELECT {queryprofile.SLOWEST_STATEMENTS * 3 - 1}"
+
+
+def test_repeated_is_bounded():
+    stats = QueryStats()
+    for i in range(queryprofile.REPEATED_STATEMENTS * 2):
+        stats.record(_profile(*[(f"SELECT {i}", 0.001)] * (i + 2)))
+    repeated = stats.endpoints["e"].repeated
+    assert len(repeated) == queryprofile.REPEATED_STATEMENTS
+    top = queryprofile.REPEATED_STATEMENTS * 2 - 1
+    assert repeated.most_common(1) == [(f"SELECT {top}", top + 1)]
+
+
+def test_enabled_defaults_to_debug_and_testing(flask_app):
+    flask_app.config.pop("QUERY_PROFILE", None)
+    assert queryprofile.enabled(flask_app)
+    flask_app.testing = False
+    assert not queryprofile.enabled(flask_app)
+    flask_app.config["QUERY_PROFILE"] = True
+    assert queryprofile.enabled(flask_app)
+
+
+def test_request_is_profiled(flask_app, test_user, stats):
+    with queryprofile.capture() as profiles:
+        with flask_app.test_client() as client:
+            client.get("/training/auth/login")
+    assert len(profiles) == 1
+    assert profiles[0].endpoint == "training.auth.login"
+    assert profiles[0].latency > 0
+    assert stats.endpoints["training.auth.login"].requests == 1
+
+
+def test_queries_outside_requests_ignored(flask_app, test_user):
+    with queryprofile.capture() as profiles:
+        User.query.all()
+    assert profiles == []
+
+
+def test_debug_headers(flask_app, test_user, stats):
+    flask_app.config["QUERY_PROFILE_HEADERS"] = True
+    with flask_app.test_client() as client:
+        response = client.get("/training/auth/login")
+    assert "X-DB-Query-Count" in response.headers
+    assert "X-DB-Time-Ms" in response.headers
+    assert "X-Request-Time-Ms" in response.headers
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+
+
+def test_no_headers_outside_debug(flask_app, test_user):
+    with flask_app.test_client() as client:
+        response = client.get("/training/auth/login")
+    assert "X-DB-Query-Count" not in response.headers
@@ -3,6 +3,7 @@ import pytest
 from unittest.mock import patch
 
 import btcopilot
+from btcopilot import queryprofile
 from btcopilot.extensions import db
 from btcopilot.pro.models import User
 from btcopilot.personal.models import Discussion, Statement, Speaker, SpeakerType
@@ -41,6 +42,23 @@ def test_admin_dashboard(admin):
     assert response.data is not None
 
 
+def test_query_profile_page(admin):
+    queryprofile.STATS.clear()
+    admin.get("/training/admin/")
+    response = admin.get("/training/admin/queries")
+    assert response.status_code == 200
+    assert b"training.admin.index" in response.data
+
+    rows = admin.get("/training/admin/queries?format=json").json
+    assert {row["endpoint"] for row in rows} >= {
+        "training.admin.index",
+        "training.admin.queries",
+    }
+
+    response = admin.post("/training/admin/queries/reset")
+    assert response.status_code == 302
+    assert set(queryprofile.STATS.endpoints) == {"training.admin.queries_reset"}
+
 def test_user_update(admin, test_user):
     response = admin.put(
         f"/training/admin/users/{test_user.id}",
@@ -2606,3 +2606,39 @@ def test_create_discussion_from_transcript_success(flask_app, auditor):
     assert len(discussion.statements) == len(ASSEMBLY_AI_TRANSCRIPT_JSON["utterances"])
     speakers = set(u["speaker"] for u in ASSEMBLY_AI_TRANSCRIPT_JSON["utterances"])
     assert len(speakers) == len(discussion.speakers) == 2
+
+
+def test_create_discussion_from_long_transcript_bulk_inserts(flask_app, auditor):
+    from sqlalchemy import event
+
+    from btcopilot.extensions import db
+    from btcopilot.personal.models.discussion import STATEMENT_INSERT_CHUNK_SIZE
+
+    utterances = [
+        {"speaker": "ABC"[i % 3], "text": f"Utterance {i}"} for i in range(3000)
+    ]
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", count)
+    try:
+        response = auditor.post(
+            f"/training/discussions/transcript?diagram_id={auditor.user.free_diagram_id}",
+            json={"text": "", "utterances": utterances},
+        )
+    finally:
+        event.remove(db.engine, "before_cursor_execute", count)
+
+    assert response.status_code == 200
+    inserts = [s for s in statements if s.startswith("INSERT INTO statements")]
+    assert len(inserts) == -(-len(utterances) // STATEMENT_INSERT_CHUNK_SIZE)
+    assert sum(s.startswith("INSERT INTO speakers") for s in statements) == 1
+
+    discussion = Discussion.query.get(response.get_json()["discussion_id"])
+    ordered = sorted(discussion.statements, key=lambda s: s.order)
+    assert [s.text for s in ordered] == [u["text"] for u in utterances]
+    assert [s.order for s in ordered] == list(range(1, len(utterances) + 1))
+    assert {s.speaker.name for s in ordered[:3]} == {"A", "B", "C"}
+    assert all(s.created_at is not None for s in ordered)
@@ -1,3 +1,7 @@
+import datetime
+
+from mock import patch
+
 import btcopilot
 from btcopilot.extensions import db
 from btcopilot.pro.models import Diagram, User
@@ -5,6 +9,8 @@ from btcopilot.personal.models import Discussion, Statement, Speaker, SpeakerTyp
 from btcopilot.schema import DiagramData
 from btcopilot.tests.pro.fdencryptiontestclient import FDEncryptionTestClient
 from btcopilot.tests.training.conftest import set_test_session
+from btcopilot.training.models import F1Snapshot, Feedback
+from btcopilot.training.tasks import refresh_f1_snapshots
 
 
 def test_audit_403(subscriber):
@@ -23,6 +29,129 @@ def test_audit_index_no_threads(auditor):
     assert response.status_code == 200
 
 
+def test_audit_index_defers_discussions_to_panels(auditor, discussion):
+    response = auditor.get("/training/audit/")
+    assert response.status_code == 200
+    assert b"Test discussion" not in response.data
+    assert (
+        f"/training/audit/diagrams/{discussion.diagram_id}/discussions".encode()
+        in response.data
+    )
+    assert b"cumulative-f1-panel" in response.data
+
+
+def test_audit_diagram_discussions_paginates_with_counts(auditor, test_user):
+    diagram_id = test_user.free_diagram_id
+    for i in range(3):
+        d = Discussion(user_id=test_user.id, diagram_id=diagram_id, summary=f"d{i}")
+        db.session.add(d)
+        db.session.flush()
+        db.session.add_all(
+            Statement(discussion_id=d.id, text=str(j), order=j) for j in range(i)
+        )
+    db.session.commit()
+
+    url = f"/training/audit/diagrams/{diagram_id}/discussions"
+    first = auditor.get(f"{url}?per_page=2").json
+    assert (first["total"], first["has_more"]) == (3, True)
+    assert "d2" in first["html"] and "d1" in first["html"]
+    assert "(2)" in first["html"] and "(1)" in first["html"]  # statement counts
+    assert "Load more (1 remaining)" in first["html"]
+
+    second = auditor.get(f"{url}?per_page=2&page=2").json
+    assert second["has_more"] is False
+    assert "d0" in second["html"]
+
+
+def test_audit_diagram_discussions_sorted_by_gt_status(auditor, test_user):
+    diagram_id = test_user.free_diagram_id
+    created_at = datetime.datetime(2026, 1, 1)
+    for i, approvals in enumerate([None, [True, False], [True, True], None]):
+        d = Discussion(
+            user_id=test_user.id,
+            diagram_id=diagram_id,
+            summary=f"d{i}",
+            created_at=created_at + datetime.timedelta(days=i),
+        )
+        db.session.add(d)
+        db.session.flush()
+        for j, approved in enumerate(approvals or []):
+            statement = Statement(discussion_id=d.id, text=str(j), order=j)
+            db.session.add(statement)
+            db.session.flush()
+            db.session.add(
+                Feedback(
+                    statement_id=statement.id,
+                    auditor_id="auditor1",
+                    feedback_type="extraction",
+                    edited_extraction={"people": []},
+                    approved=approved,
+                )
+            )
+    db.session.commit()
+
+    html = auditor.get(f"/training/audit/diagrams/{diagram_id}/discussions").json[
+        "html"
+    ]
+    # Full, Partial, then None newest first.
+    order = sorted(["d0", "d1", "d2", "d3"], key=html.index)
+    assert order == ["d2", "d1", "d3", "d0"]
+
+
+def test_audit_diagram_discussions_requires_read_access(
+    flask_app, auditor, test_user_2
+):
+    diagram = Diagram(user_id=test_user_2.id, name="Private")
+    diagram.set_diagram_data(DiagramData())
+    db.session.add(diagram)
+    db.session.commit()
+
+    response = auditor.get(f"/training/audit/diagrams/{diagram.id}/discussions")
+    assert response.status_code == 403
+
+
+def test_audit_f1_panel_serves_snapshot_and_queues_refresh(auditor, sse_redis):
+    with patch("btcopilot.extensions.celery") as celery:
+        data = auditor.get("/training/audit/f1").json
+        auditor.get("/training/audit/f1")
+    assert data["pending"] is True
+    celery.send_task.assert_called_once_with("refresh_f1_snapshots")
+
+    refresh_f1_snapshots()
+    with patch("btcopilot.extensions.celery") as celery:
+        data = auditor.get("/training/audit/f1").json
+    assert data["pending"] is False and data["stale"] is False
+    celery.send_task.assert_not_called()
+    assert F1Snapshot.query.count() == 1
+
+
+def test_beat_f1_refresh_picks_up_unapproved_gt(flask_app, test_user):
+    from btcopilot.extensions import CELERY_BEAT_SCHEDULE
+    from btcopilot.schema import PDPDeltas, Person, asdict
+
+    extraction = asdict(PDPDeltas(people=[Person(id=1, name="John")]))
+    discussion = Discussion(user_id=test_user.id, summary="GT")
+    statement = Statement(discussion=discussion, text="I'm John", pdp_deltas=extraction)
+    feedback = Feedback(
+        statement=statement,
+        auditor_id="auditor1",
+        feedback_type="extraction",
+        edited_extraction=extraction,
+        approved=True,
+        approved_at=datetime.datetime.utcnow(),
+    )
+    db.session.add_all([discussion, statement, feedback])
+    db.session.commit()
+    refresh_f1_snapshots()
+    assert F1Snapshot.latest().system.total_discussions == 1
+
+    feedback.approved = False
+    db.session.commit()
+    assert not F1Snapshot.latest().is_stale()
+    refresh_f1_snapshots(**CELERY_BEAT_SCHEDULE["refresh-f1-snapshots"]["kwargs"])
+    assert F1Snapshot.latest().system.total_discussions == 0
+
+
 def test_audit_discussion_without_read_access(flask_app, test_user, test_user_2):
     diagram = Diagram(user_id=test_user.id, name="Test Diagram")
     diagram.set_diagram_data(DiagramData())
@@ -6,7 +6,7 @@ import pytest
 from btcopilot.extensions import db
 from btcopilot.pro.models import User, Diagram
 from btcopilot.personal.models import Discussion, Statement, Speaker, SpeakerType
-from btcopilot.training.models import Feedback
+from btcopilot.training.models import Feedback, StatementMetricIndex
 from btcopilot.schema import (
     PDP,
     PDPDeltas,
@@ -225,6 +225,16 @@ def test_clear_extracted_data_admin_clears_ai_extractions(admin):
     )
     db.session.add_all([stmt1, stmt2])
     discussion.extracting = True
+    db.session.flush()
+    for outcome in (StatementMetricIndex.INDEXED, "TP"):
+        db.session.add(
+            StatementMetricIndex(
+                metric="people",
+                outcome=outcome,
+                statement_id=stmt1.id,
+                discussion_id=discussion.id,
+            )
+        )
     db.session.commit()
 
     # Admin clears AI extractions
@@ -245,6 +255,7 @@ def test_clear_extracted_data_admin_clears_ai_extractions(admin):
     assert discussion.extracting is False
     assert stmt1.pdp_deltas is None
     assert stmt2.pdp_deltas is None
+    assert not StatementMetricIndex.query.filter_by(discussion_id=discussion.id).all()
 
 
 def test_clear_extracted_data_admin_clears_specific_auditor(admin):
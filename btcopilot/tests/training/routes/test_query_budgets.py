@@ -0,0 +1,68 @@
+"""SQL statement budgets for the heaviest training pages. Each is checked
+with one and with several discussions so a per-row query (N+1) fails even if
+the small case fits."""
+
+import pytest
+
+from btcopilot.extensions import db
+from btcopilot.personal.models import Discussion, Statement, Speaker, SpeakerType
+from btcopilot.training.models import Feedback
+
+
+def _discussions(user, count, statements=4):
+    for i in range(count):
+        discussion = Discussion(
+            user_id=user.id, diagram_id=user.free_diagram_id, summary=f"Discussion {i}"
+        )
+        db.session.add(discussion)
+        db.session.flush()
+        subject = Speaker(
+            discussion_id=discussion.id, name="User", type=SpeakerType.Subject
+        )
+        expert = Speaker(
+            discussion_id=discussion.id, name="Coach", type=SpeakerType.Expert
+        )
+        db.session.add_all([subject, expert])
+        db.session.flush()
+        for order in range(statements):
+            statement = Statement(
+                discussion_id=discussion.id,
+                speaker_id=(expert if order % 2 else subject).id,
+                text=f"Statement {order}",
+                order=order,
+            )
+            db.session.add(statement)
+            db.session.flush()
+            db.session.add(
+                Feedback(
+                    statement_id=statement.id,
+                    auditor_id="auditor",
+                    feedback_type="extraction",
+                    thumbs_down=False,
+                )
+            )
+    db.session.commit()
+    return discussion
+
+
+@pytest.mark.parametrize("count", [1, 6])
+def test_admin_index(admin, test_user, query_budget, count):
+    _discussions(test_user, count)
+    with query_budget(10, repeats=0):
+        assert admin.get("/training/admin/").status_code == 200
+
+
+@pytest.mark.parametrize("count", [1, 6])
+def test_audit_index(admin, test_user, query_budget, count):
+    _discussions(test_user, count)
+    with query_budget(3, repeats=0):
+        assert admin.get("/training/audit/").status_code == 200
+
+
+@pytest.mark.parametrize("statements", [2, 20])
+def test_discussion_audit(admin, test_user, query_budget, statements):
+    discussion = _discussions(test_user, 1, statements=statements)
+    # Speakers load once each, not per statement.
+    with query_budget(11, repeats=2):
+        response = admin.get(f"/training/discussions/{discussion.id}")
+        assert response.status_code == 200
@@ -3,7 +3,7 @@ import pytest
 from btcopilot.schema import Person, Event, EventKind, PDPDeltas, asdict
 from btcopilot.extensions import db
 from btcopilot.personal.models import Statement, Discussion, Speaker, SpeakerType
-from btcopilot.training.models import Feedback
+from btcopilot.training.models import Feedback, StatementMetricIndex
 from btcopilot.training.routes.analysis import (
     _calculate_discussion_f1,
     _parse_metric_to_filters,
@@ -11,7 +11,13 @@ from btcopilot.training.routes.analysis import (
     _statement_matches_filters,
     _statement_matches_metric_filter,
 )
-from btcopilot.training.analysis_utils import calculate_statement_match_breakdown
+from btcopilot.training.analysis_utils import (
+    breakdown_index_terms,
+    calculate_statement_match_breakdown,
+    ensure_gt_statements_indexed,
+    index_terms_for_filters,
+    query_metric_index,
+)
 
 
 def create_discussion_with_gt(test_user):
@@ -169,3 +175,150 @@ def test_statement_matches_metric_filter_symptom_detection(flask_app, test_user)
     }
 
     assert _statement_matches_metric_filter(breakdown, filters) is False
+
+
+def _discussion_with_missed_person(test_user, count=1):
+    """Discussion whose statements each miss a GT person (people FN)."""
+    discussion = Discussion(user=test_user)
+    db.session.add(discussion)
+    db.session.commit()
+    speaker = Speaker(discussion=discussion, name="Client", type=SpeakerType.Subject)
+    db.session.add(speaker)
+    statements = []
+    for i in range(count):
+        statement = Statement(
+            discussion=discussion,
+            speaker=speaker,
+            text=f"My brother {i}",
+            order=i,
+            pdp_deltas=asdict(PDPDeltas(people=[Person(id=-1, name="Jane")])),
+        )
+        db.session.add(statement)
+        db.session.flush()
+        db.session.add(
+            Feedback(
+                statement_id=statement.id,
+                feedback_type="extraction",
+                edited_extraction=asdict(
+                    PDPDeltas(
+                        people=[
+                            Person(id=-1, name="Jane"),
+                            Person(id=-2, name=f"Oscar{i}"),
+                        ]
+                    )
+                ),
+                approved=True,
+                auditor_id="auditor1",
+            )
+        )
+        statements.append(statement)
+    db.session.commit()
+    return discussion, statements
+
+
+@pytest.mark.parametrize(
+    "metric",
+    [
+        "perfect_matches",
+        "aggregate_micro_f1",
+        "people_f1",
+        "events_f1",
+        "symptom_detection",
+        "symptom_value_match",
+        "relationship_people_match",
+        "structural_events_f1",
+    ],
+)
+def test_index_terms_agree_with_metric_filter(flask_app, test_user, metric):
+    _, (missed,) = _discussion_with_missed_person(test_user)
+    _, perfect = create_discussion_with_gt(test_user)
+    filters = _parse_metric_to_filters(metric)
+    terms = index_terms_for_filters(filters)
+
+    for statement in (missed, perfect):
+        breakdown = calculate_statement_match_breakdown(statement.id)
+        indexed = breakdown_index_terms(breakdown)
+        assert any(
+            (name, outcome) in indexed
+            for name, outcomes in terms
+            for outcome in outcomes
+        ) == _statement_matches_metric_filter(breakdown, filters)
+
+
+def test_system_analysis_pages_through_index(auditor, test_user):
+    _discussion_with_missed_person(test_user, count=3)
+    create_discussion_with_gt(test_user)
+
+    response = auditor.get("/training/analysis/?metric=people_f1")
+    assert response.status_code == 200
+    assert b"4 ground truth statements are not indexed yet" in response.data
+    assert StatementMetricIndex.query.count() == 0
+
+    response = auditor.post("/training/analysis/reindex?metric=people_f1")
+    assert response.status_code == 302
+    assert "metric=people_f1" in response.location
+
+    response = auditor.get("/training/analysis/?metric=people_f1&per_page=2")
+    assert response.status_code == 200
+    assert b"3 statements" in response.data
+    assert b"Oscar1" in response.data
+    assert b"Oscar2" not in response.data
+
+    response = auditor.get("/training/analysis/?metric=people_f1&per_page=2&page=2")
+    assert response.status_code == 200
+    assert b"Oscar2" in response.data
+    assert b"not indexed yet" not in response.data
+
+    # 4 GT statements indexed, each with a marker row.
+    assert (
+        StatementMetricIndex.query.filter_by(
+            metric=StatementMetricIndex.INDEXED
+        ).count()
+        == 4
+    )
+
+
+def test_metric_index_invalidated_when_feedback_changes(flask_app, test_user):
+    discussion, (statement,) = _discussion_with_missed_person(test_user)
+    ensure_gt_statements_indexed()
+    db.session.commit()
+    terms = index_terms_for_filters(_parse_metric_to_filters("people_f1"))
+    assert query_metric_index(terms) == ([statement.id], 1)
+
+    feedback = Feedback.query.filter_by(statement_id=statement.id).one()
+    feedback.edited_extraction = asdict(PDPDeltas(people=[Person(id=-1, name="Jane")]))
+    db.session.commit()
+
+    assert (
+        StatementMetricIndex.query.filter_by(discussion_id=discussion.id).count() == 0
+    )
+    assert ensure_gt_statements_indexed() == 1
+    db.session.commit()
+    assert query_metric_index(terms) == ([], 0)
+
+
+def test_metric_index_kept_when_chat_appends_statements(flask_app, test_user):
+    discussion, (statement,) = _discussion_with_missed_person(test_user)
+    ensure_gt_statements_indexed()
+    db.session.commit()
+    indexed = StatementMetricIndex.query.filter_by(discussion_id=discussion.id).count()
+
+    db.session.add(
+        Statement(discussion=discussion, text="Later turn", order=statement.order + 1)
+    )
+    db.session.commit()
+
+    assert (
+        StatementMetricIndex.query.filter_by(discussion_id=discussion.id).count()
+        == indexed
+    )
+
+
+def test_refresh_f1_snapshots_fills_metric_index(flask_app, test_user):
+    from btcopilot.training.tasks import refresh_f1_snapshots
+
+    _discussion_with_missed_person(test_user, count=2)
+    refresh_f1_snapshots()
+
+    terms = index_terms_for_filters(_parse_metric_to_filters("people_f1"))
+    assert query_metric_index(terms)[1] == 2
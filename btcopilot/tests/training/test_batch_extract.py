@@ -0,0 +1,163 @@
+import asyncio
+import json
+
+from mock import patch, AsyncMock
+
+from btcopilot import pdp
+from btcopilot.extensions import db
+from btcopilot.llmutil import EXTRACTION_MODEL, gemini_structured
+from btcopilot.personal.models import Discussion, Statement
+from btcopilot.schema import DiagramData, PDPDeltas, Person
+from btcopilot.training.batch_extract import (
+    BatchCheckpoint,
+    BatchCollector,
+    BatchRequest,
+    FakeBatchBackend,
+    run_batched,
+)
+
+EMPTY = json.dumps({"people": [], "events": [], "pair_bonds": [], "delete": []})
+
+
+def _person_reply(request):
+    name = request.prompt.split(":")[0]
+    return json.dumps({"people": [{"id": -1, "name": name}]})
+
+
+async def _pipeline(tag, steps):
+    names = []
+    for step in range(steps):
+        deltas = await gemini_structured(f"{tag}{step}: go", PDPDeltas, prefix="rules")
+        names.append(deltas.people[0].name)
+    return names
+
+
+def _run(collector, jobs):
+    return asyncio.run(collector.run(jobs))
+
+
+def test_requests_from_all_jobs_share_one_batch_per_round():
+    backend = FakeBatchBackend(_person_reply)
+    collector = BatchCollector(backend_for=lambda model: backend, poll_interval=0)
+
+    outcomes = _run(
+        collector,
+        {
+            "a": lambda: _pipeline("a", 3),
+            "b": lambda: _pipeline("b", 1),
+        },
+    )
+
+    assert outcomes == {"a": ["a0", "a1", "a2"], "b": ["b0"]}
+    assert [[r.key for r in reqs] for reqs in backend.jobs.values()] == [
+        ["a-0", "b-0"],
+        ["a-1"],
+        ["a-2"],
+    ]
+    assert backend.jobs["fake-1"][0].prefix == "rules"
+
+
+def test_resume_replays_checkpoint_without_resubmitting(tmp_path):
+    first = FakeBatchBackend(_person_reply)
+    run_batched(
+        {"a": lambda: _pipeline("a", 2)},
+        checkpoint_dir=str(tmp_path),
+        backend_for=lambda model: first,
+        poll_interval=0,
+    )
+
+    second = FakeBatchBackend(_person_reply)
+    outcomes = run_batched(
+        {"a": lambda: _pipeline("a", 2), "b": lambda: _pipeline("b", 1)},
+        checkpoint_dir=str(tmp_path),
+        backend_for=lambda model: second,
+        poll_interval=0,
+    )
+
+    assert outcomes == {"a": ["a0", "a1"], "b": ["b0"]}
+    assert [[r.key for r in reqs] for reqs in second.jobs.values()] == [["b-0"]]
+
+
+def test_resume_polls_in_flight_job_instead_of_resubmitting(tmp_path):
+    backend = FakeBatchBackend(_person_reply)
+    # The interrupted run submitted this job and recorded it before polling.
+    request = BatchRequest(
+        key="a-0", model=EXTRACTION_MODEL, prompt="a0: go", response_format=PDPDeltas
+    )
+    job_id = asyncio.run(backend.submit(EXTRACTION_MODEL, [request]))
+    BatchCheckpoint(str(tmp_path)).save_job(EXTRACTION_MODEL, job_id, ["a-0"])
+
+    outcomes = run_batched(
+        {"a": lambda: _pipeline("a", 1)},
+        checkpoint_dir=str(tmp_path),
+        backend_for=lambda model: backend,
+        poll_interval=0,
+    )
+
+    assert outcomes == {"a": ["a0"]}
+    assert list(backend.jobs) == [job_id]
+    assert BatchCheckpoint(str(tmp_path)).jobs == {}
+
+
+def test_failed_item_falls_back_to_direct_call():
+    def respond(request):
+        raise RuntimeError("INTERNAL")
+
+    backend = FakeBatchBackend(respond)
+    collector = BatchCollector(backend_for=lambda model: backend, poll_interval=0)
+    direct = PDPDeltas(people=[Person(id=-1, name="direct")])
+
+    async def job():
+        return await gemini_structured("go", PDPDeltas, model="claude-fable-5")
+
+    with patch(
+        "btcopilot.llmutil.claude_structured", AsyncMock(return_value=direct)
+    ) as claude_structured:
+        outcomes = _run(collector, {"a": job})
+
+    assert outcomes["a"].people[0].name == "direct"
+    claude_structured.assert_awaited_once()
+    assert (
+        json.loads(collector.checkpoint.responses["a-0"].text)["people"][0]["name"]
+        == "direct"
+    )
+
+
+def test_job_exceptions_are_returned_per_tag():
+    backend = FakeBatchBackend(lambda request: '{"people": [}')
+    collector = BatchCollector(backend_for=lambda model: backend, poll_interval=0)
+
+    outcomes = _run(
+        collector,
+        {"bad": lambda: _pipeline("bad", 1), "none": lambda: asyncio.sleep(0)},
+    )
+
+    assert isinstance(outcomes["bad"], json.JSONDecodeError)
+    assert outcomes["none"] is None
+
+
+def test_extract_full_passes_are_batched_across_discussions(test_user):
+    discussions = []
+    for i in range(2):
+        discussion = Discussion(user_id=test_user.id, summary=f"disc {i}")
+        db.session.add(discussion)
+        db.session.flush()
+        db.session.add(
+            Statement(discussion_id=discussion.id, text=f"hello {i}", order=0)
+        )
+        discussions.append(discussion)
+    db.session.commit()
+
+    backend = FakeBatchBackend(lambda request: EMPTY)
+    outcomes = run_batched(
+        {d.id: lambda d=d: pdp.extract_full(d, DiagramData()) for d in discussions},
+        backend_for=lambda model: backend,
+        poll_interval=0,
+    )
+
+    for d in discussions:
+        result_pdp, _ = outcomes[d.id]
+        assert result_pdp.people == []
+    callers = [{r.caller for r in reqs} for reqs in backend.jobs.values()]
+    assert callers == [{"extract_full_pass1"}, {"extract_full_pass2"}]
+    assert all(len(reqs) == 2 for reqs in backend.jobs.values())
@@ -0,0 +1,113 @@
+import asyncio
+import json
+
+from btcopilot.extensions import db
+from btcopilot.personal.models import Discussion, Speaker, SpeakerType, Statement
+from btcopilot.training.corpus_eval import (
+    DiscussionSnapshot,
+    load_gt_discussions,
+    load_results,
+    run_corpus,
+)
+from btcopilot.training.models import Feedback
+
+
+def _gt_discussion(test_user, summary):
+    discussion = Discussion(user_id=test_user.id, summary=summary)
+    db.session.add(discussion)
+    db.session.flush()
+    speaker = Speaker(
+        discussion_id=discussion.id, name="Client", type=SpeakerType.Subject
+    )
+    db.session.add(speaker)
+    db.session.flush()
+    statement = Statement(
+        discussion_id=discussion.id, speaker_id=speaker.id, text="My mom", order=0
+    )
+    db.session.add(statement)
+    db.session.flush()
+    db.session.add(
+        Feedback(
+            statement_id=statement.id,
+            auditor_id="auditor@example.com",
+            feedback_type="extraction",
+            approved=True,
+            edited_extraction={"people": [{"id": -1, "name": "Mom"}]},
+        )
+    )
+    db.session.commit()
+    return discussion
+
+
+def _snapshots(n):
+    return [
+        DiscussionSnapshot(id=i, summary=f"disc {i}", discussion_date=None)
+        for i in range(1, n + 1)
+    ]
+
+
+def test_load_gt_discussions_snapshots_statements_and_gt(test_user):
+    discussion = _gt_discussion(test_user, "first")
+    _gt_discussion(test_user, "second")
+    db.session.expire_all()
+
+    snapshots = load_gt_discussions()
+
+    assert [s.summary for s in snapshots] == ["first", "second"]
+    snapshot = snapshots[0]
+    assert snapshot.id == discussion.id
+    assert snapshot.statements[0].speaker.type == SpeakerType.Subject
+    assert [p.name for p in snapshot.gt_pdp.people] == ["Mom"]
+    assert (
+        snapshot.conversation_history()
+        == Discussion.query.get(discussion.id).conversation_history()
+    )
+
+
+def test_run_corpus_bounds_concurrency_and_streams_results(tmp_path):
+    in_flight = 0
+    peak = 0
+
+    async def extract(snapshot):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if snapshot.id == 3:
+            raise ValueError("bad output")
+        return snapshot.id * 10
+
+    def score(snapshot, extracted, elapsed):
+        return {"discussion_id": snapshot.id, "value": extracted}
+
+    path = str(tmp_path / "results.jsonl")
+    results, errors = run_corpus(
+        _snapshots(6), extract, score, concurrency=2, results_path=path
+    )
+
+    assert peak == 2
+    assert [r["value"] for r in results] == [10, 20, 40, 50, 60]
+    assert errors == [(3, "bad output")]
+    assert sorted(load_results(path)) == [1, 2, 4, 5, 6]
+
+
+def test_run_corpus_resume_skips_completed(tmp_path):
+    path = tmp_path / "results.jsonl"
+    path.write_text(json.dumps({"discussion_id": 1, "value": "saved"}) + "\n")
+    extracted_ids = []
+
+    async def extract(snapshot):
+        extracted_ids.append(snapshot.id)
+        return "fresh"
+
+    def score(snapshot, extracted, elapsed):
+        return {"discussion_id": snapshot.id, "value": extracted}
+
+    results, _ = run_corpus(
+        _snapshots(2), extract, score, results_path=str(path), resume=True
+    )
+
+    assert extracted_ids == [2]
+    assert [r["value"] for r in results] == ["saved", "fresh"]
+    assert sorted(load_results(str(path))) == [1, 2]
@@ -0,0 +1,124 @@
+"""Tests for persisted eval-harness runs and run-to-run diffs."""
+
+import numpy as np
+import pytest
+
+from btcopilot.schema import Person
+from btcopilot.training.eval_harness import build_eval_result
+from btcopilot.training.eval_store import (
+    _permutation_pvalues,
+    diff_runs,
+    format_diff,
+    load_run,
+    save_run,
+)
+from btcopilot.training.f1_metrics import (
+    CumulativeF1Metrics,
+    EntityMatchResult,
+    calculate_f1_from_counts,
+    match_rows,
+)
+
+
+def _metrics(disc_id, people_tp, people_fn, events_tp=1, events_fn=1):
+    people = calculate_f1_from_counts(people_tp, 0, people_fn)
+    events = calculate_f1_from_counts(events_tp, 0, events_fn)
+    matches = [
+        {
+            "entity_type": "People",
+            "outcome": "TP",
+            "ai_id": -i,
+            "gt_id": i,
+            "label": f"p{i}",
+        }
+        for i in range(1, people_tp + 1)
+    ] + [
+        {
+            "entity_type": "People",
+            "outcome": "FN",
+            "ai_id": None,
+            "gt_id": i,
+            "label": f"p{i}",
+        }
+        for i in range(people_tp + 1, people_tp + people_fn + 1)
+    ]
+    return CumulativeF1Metrics(
+        discussion_id=disc_id,
+        discussion_summary=f"disc {disc_id}",
+        auditor_id="auditor@example.com",
+        aggregate_micro_f1=people.f1,
+        people_f1=people.f1,
+        events_f1=events.f1,
+        people_metrics=people,
+        events_metrics=events,
+        matches=matches,
+    )
+
+
+def _save(tmp_path, name, metrics, **config):
+    result = build_eval_result(metrics)
+    return save_run(
+        result, metrics, {"models": {}, "prompts": config}, name, str(tmp_path)
+    )
+
+
+def test_save_and_load_run_round_trips(tmp_path):
+    metrics = [_metrics(1, 2, 1), _metrics(2, 1, 0)]
+    path = _save(tmp_path, "base", metrics, DATA_EXTRACTION_PROMPT="abc")
+
+    run = load_run("base", str(tmp_path))
+
+    assert run.name == "base"
+    assert run.config["prompts"] == {"DATA_EXTRACTION_PROMPT": "abc"}
+    assert run.discussions.num_rows == 2 * 5  # five entity types per discussion
+    assert run.matches.num_rows == 4
+    assert load_run(path).discussions.equals(run.discussions)
+
+
+def test_diff_runs_reports_deltas_significance_and_flipped_items(tmp_path):
+    ids = range(1, 7)
+    _save(tmp_path, "base", [_metrics(i, 1, 2) for i in ids], P="old")
+    _save(tmp_path, "head", [_metrics(i, 3, 0) for i in ids], P="new")
+
+    diff = diff_runs(load_run("base", str(tmp_path)), load_run("head", str(tmp_path)))
+
+    by_type = {e.entity_type: e for e in diff.entities}
+    assert diff.discussion_ids == list(ids)
+    assert by_type["People"].mean_delta == pytest.approx(1 - 0.5)
+    assert by_type["People"].improved == 6
+    # All six deltas positive: only 2 of the 64 sign patterns are as extreme.
+    assert by_type["People"].permutation_pvalue == pytest.approx(2 / 64)
+    assert by_type["People"].t_pvalue < 0.001
+    assert by_type["Events"].mean_delta == 0
+    assert by_type["Events"].permutation_pvalue == 1.0
+    assert len(diff.fixed) == 12 and diff.broken == []
+    assert "prompts changed: P" in format_diff(diff)
+
+
+def test_permutation_pvalues_match_per_column_computation():
+    rng = np.random.default_rng(1)
+    deltas = rng.normal(0.05, 0.1, size=(20, 3))
+
+    together = _permutation_pvalues(deltas, permutations=2000)
+    separately = [
+        _permutation_pvalues(deltas[:, [i]], permutations=2000)[0] for i in range(3)
+    ]
+
+    np.testing.assert_allclose(together, separately)
+
+
+def test_match_rows_flattens_outcomes():
+    mom, dad = Person(id=1, name="Mom"), Person(id=2, name="Dad")
+    result = EntityMatchResult(
+        matched_pairs=[(Person(id=-1, name="Mom"), mom)],
+        ai_unmatched=[Person(id=-3, name="Aunt")],
+        gt_unmatched=[dad],
+    )
+
+    rows = match_rows("People", result)
+
+    assert [(r["outcome"], r["ai_id"], r["gt_id"], r["label"]) for r in rows] == [
+        ("TP", -1, 1, "Mom"),
+        ("FP", -3, None, "Aunt"),
+        ("FN", None, 2, "Dad"),
+    ]
@@ -0,0 +1,82 @@
+import json
+
+from btcopilot.training.sse import (
+    sse_manager,
+    discussion_channel,
+    format_event,
+    SSE_HISTORY_SIZE,
+)
+
+
+def _frames(events, n):
+    return [next(events) for _ in range(n)]
+
+
+def test_publish_reaches_subscriber(sse_redis):
+    channel = discussion_channel(1)
+    q = sse_manager.subscribe(channel)
+    other = sse_manager.subscribe(discussion_channel(2))
+    try:
+        event_id = sse_manager.publish({"type": "extracting"}, channel=channel)
+
+        event = q.get(timeout=1)
+        assert event == {"id": event_id, "data": '{"type": "extracting"}'}
+        assert other.get(timeout=0.01) is None
+    finally:
+        sse_manager.unsubscribe(q)
+        sse_manager.unsubscribe(other)
+    assert q not in sse_manager.subscribers
+
+
+def test_resume_from_last_event_id(sse_redis):
+    channel = discussion_channel(1)
+    first, second, third = [
+        sse_manager.publish({"n": n}, channel=channel) for n in range(3)
+    ]
+
+    q = sse_manager.subscribe(channel, last_event_id=str(first))
+    try:
+        fourth = sse_manager.publish({"n": 3}, channel=channel)
+        ids = [q.get(timeout=1)["id"] for _ in range(3)]
+        assert q.get(timeout=0.01) is None
+    finally:
+        sse_manager.unsubscribe(q)
+    assert ids == [second, third, fourth]
+
+
+def test_history_is_capped(sse_redis):
+    channel = discussion_channel(1)
+    for n in range(SSE_HISTORY_SIZE + 5):
+        sse_manager.publish({"n": n}, channel=channel)
+    assert sse_redis.llen(f"sse:history:{channel}") == SSE_HISTORY_SIZE
+
+
+def test_stream_frames_heartbeats_and_cleanup(sse_redis):
+    beats = []
+    events = sse_manager.stream(
+        discussion_channel(1), heartbeat=0.01, on_heartbeat=lambda: beats.append(1)
+    )
+    connected, ping = _frames(iter(events), 2)
+    assert json.loads(connected[len("data: ") :])["type"] == "connected"
+    assert ping == 'data: {"type": "ping"}\n\n'
+    assert beats
+
+    event_id = sse_manager.publish("line one\nline two", channel=discussion_channel(1))
+    assert next(iter(events)) == (f"id: {event_id}\ndata: line one\ndata: line two\n\n")
+
+    events.close()
+    assert sse_manager.subscribers == []
+
+
+def test_stream_released_if_never_iterated(sse_redis):
+    sse_manager.stream(discussion_channel(1)).close()
+    assert sse_manager.subscribers == []
+
+
+def test_publish_without_redis_is_best_effort(flask_app):
+    assert sse_manager.publish({"type": "ping"}) is None
+
+
+def test_format_event():
+    assert format_event("{}", 7) == "id: 7\ndata: {}\n\n"
+    assert format_event("") == "data: \n\n"
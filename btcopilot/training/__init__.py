@@ -39,3 +39,4 @@ def init_celery(celery):
         retry_jitter=True,
         max_retries=5,
     )
+    celery.task(tasks.refresh_f1_snapshots, name="refresh_f1_snapshots")
@@ -77,7 +77,6 @@ with app.app_context():
         ai_log.info("New discussion created")
         print("\n\nDiscussion created")
 
-    num_statements = 0
     while True:
         try:
             statement = input("You: ".ljust(8))
@@ -86,10 +85,5 @@ with app.app_context():
         response = ask(discussion, statement)
         print("AI: ".ljust(8) + response.statement)
 
-        # Update the summary every 2 statements
-        num_statements += 1
-        if num_statements % 2 == 0:
-            discussion.update_summary()
-            ai_log.info(f"Discussion {discussion.id} summary updated")
-
+        # ask() keeps discussion.summary current as rolling chat context
         db.session.commit()
@@ -12,6 +12,8 @@ from dataclasses import dataclass, field, asdict
 from typing import Any
 
 from flask import current_app, has_app_context
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import aliased
 
 from btcopilot.schema import Person, Event, PDPDeltas, from_dict
 
@@ -549,3 +551,170 @@ def calculate_statement_match_breakdown(
     _set_cached_breakdown(statement_id, breakdown)
 
     return breakdown
+
+
+# Inverted metric index
+#
+# system_analysis asks "which statements have a FP/FN for metric X?" across the
+# whole GT corpus. Instead of recomputing every breakdown per request, each
+# breakdown is flattened into (metric, outcome) terms stored in
+# StatementMetricIndex, and the route pages through matching statement ids.
+#
+# The index is only written by ensure_gt_statements_indexed(), from the
+# refresh_f1_snapshots task and the analysis reindex POST; page views read it.
+
+ENTITY_INDEX_METRICS = ("people", "events", "pair_bonds")
+PERFECT_MATCH = ("aggregate_micro_f1", "perfect")
+
+
+def breakdown_index_terms(breakdown: StatementMatchBreakdown) -> set[tuple[str, str]]:
+    """(metric, outcome) pairs present in a breakdown."""
+    terms = set()
+    for metric, matches in zip(
+        ENTITY_INDEX_METRICS,
+        (
+            breakdown.people_matches,
+            breakdown.event_matches,
+            breakdown.pair_bond_matches,
+        ),
+    ):
+        terms.update((metric, m.match_type) for m in matches)
+    for m in breakdown.sarf_matches:
+        terms.add((f"{m.variable_name}_detection", m.detection_match))
+        if m.value_match:
+            terms.add((f"{m.variable_name}_value_match", m.value_match))
+        if m.people_match:
+            terms.add((f"{m.variable_name}_people_match", m.people_match))
+    if breakdown.f1_metrics.aggregate_micro_f1 == 1.0:
+        terms.add(PERFECT_MATCH)
+    return terms
+
+
+def index_terms_for_filters(filters: dict) -> list[tuple[str, list[str]]]:
+    """
+    Index terms equivalent to analysis._statement_matches_metric_filter(): a
+    statement matches the filters iff it has a row for any (metric, outcome).
+    """
+    if filters.get("perfect_only"):
+        return [(PERFECT_MATCH[0], [PERFECT_MATCH[1]])]
+
+    sarf_variable = filters.get("sarf_variable")
+    sarf_level = filters.get("sarf_level")
+    if sarf_variable:
+        if sarf_level == "detection":
+            return [(f"{sarf_variable}_detection", ["FP", "FN"])]
+        elif sarf_level in ("value_match", "people_match"):
+            return [(f"{sarf_variable}_{sarf_level}", ["mismatch"])]
+
+    match_types = filters.get("match_types", [])
+    if not match_types:
+        return []
+    entity_type = filters.get("entity_type", "all")
+    if entity_type in ENTITY_INDEX_METRICS:
+        return [(entity_type, match_types)]
+    return [(metric, match_types) for metric in ENTITY_INDEX_METRICS]
+
+
+def index_breakdown(
+    statement_id: int, discussion_id: int, breakdown: StatementMatchBreakdown | None
+):
+    """Replace a statement's index rows. Staged in db.session, not committed."""
+    from btcopilot.extensions import db
+    from btcopilot.training.models import StatementMetricIndex
+
+    StatementMetricIndex.query.filter_by(statement_id=statement_id).delete()
+    terms = {(StatementMetricIndex.INDEXED, "")}
+    if breakdown is not None:
+        terms |= breakdown_index_terms(breakdown)
+    db.session.add_all(
+        StatementMetricIndex(
+            metric=metric,
+            outcome=outcome,
+            statement_id=statement_id,
+            discussion_id=discussion_id,
+        )
+        for metric, outcome in sorted(terms)
+    )
+
+
+def unindexed_gt_statements():
+    """Query of (statement_id, discussion_id) for approved GT statements that
+    have no index rows yet."""
+    from btcopilot.extensions import db
+    from btcopilot.personal.models import Statement
+    from btcopilot.training.models import Feedback, StatementMetricIndex
+
+    marker = aliased(StatementMetricIndex)
+    return (
+        db.session.query(Feedback.statement_id, Statement.discussion_id)
+        .join(Statement, Feedback.statement_id == Statement.id)
+        .outerjoin(
+            marker,
+            and_(
+                marker.statement_id == Feedback.statement_id,
+                marker.metric == StatementMetricIndex.INDEXED,
+            ),
+        )
+        .filter(
+            Feedback.approved == True,
+            Feedback.feedback_type == "extraction",
+            marker.id.is_(None),
+        )
+        .distinct()
+    )
+
+
+def ensure_gt_statements_indexed() -> int:
+    """Index approved GT statements that have no index rows yet.
+
+    Returns the number of statements (re)indexed; callers commit.
+    """
+    pending = unindexed_gt_statements().all()
+    for statement_id, discussion_id in pending:
+        index_breakdown(
+            statement_id,
+            discussion_id,
+            calculate_statement_match_breakdown(statement_id),
+        )
+    return len(pending)
+
+
+def query_metric_index(
+    terms: list[tuple[str, list[str]]], page: int = 1, per_page: int = 50
+) -> tuple[list[int], int]:
+    """One page of statement ids matching any term, plus the total count.
+
+    Ordered by discussion then statement id so a page groups by discussion.
+    """
+    from btcopilot.extensions import db
+    from btcopilot.training.models import StatementMetricIndex
+
+    if not terms:
+        return [], 0
+    matches = (
+        db.session.query(
+            StatementMetricIndex.discussion_id, StatementMetricIndex.statement_id
+        )
+        .filter(
+            or_(
+                *(
+                    and_(
+                        StatementMetricIndex.metric == metric,
+                        StatementMetricIndex.outcome.in_(outcomes),
+                    )
+                    for metric, outcomes in terms
+                )
+            )
+        )
+        .distinct()
+    )
+    total = matches.count()
+    rows = (
+        matches.order_by(
+            StatementMetricIndex.discussion_id, StatementMetricIndex.statement_id
+        )
+        .limit(per_page)
+        .offset((page - 1) * per_page)
+        .all()
+    )
+    return [statement_id for _, statement_id in rows], total
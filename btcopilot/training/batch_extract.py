@@ -0,0 +1,415 @@
+"""
+Batch-API mode for offline extraction evaluations.
+
+run_extract_full_f1 and connectivity_check call extract_full() once per GT
+discussion. Interactively that is ~3 sequential LLM calls per discussion, each
+at full price and rate limit. In batch mode every discussion's extract_full()
+runs as its own task with a BatchCollector installed (llmutil.batch_collector),
+so gemini_structured() parks each request instead of sending it. Once every
+task is parked, the collector submits all parked requests as one provider batch
+job per model, waits for it, and hands the answers back. The rounds fall out of
+the pipeline's own data dependencies:
+
+    round 1: pass-1 prompts for every discussion
+    round 2: pass-2 prompts (+ pass-1 validation retries)
+    round 3: SARF reviews (+ pass-2 retries), ...
+
+Long discussions that extract in windows just take more rounds.
+
+Answers are appended to a checkpoint directory as they arrive, and the id of an
+in-flight job is recorded before polling, so an interrupted run re-executes the
+(deterministic) pipeline against the saved answers and picks up the pending job
+instead of resubmitting. Items a batch fails to answer fall back to a direct
+gemini_structured() call.
+
+Usage:
+    uv run python -m btcopilot.training.run_extract_full_f1 --batch \\
+        --checkpoint-dir instance/batch/f1-2026-10-19
+"""
+
+import asyncio
+import contextvars
+import itertools
+import json
+import logging
+import os
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+
+from btcopilot import llmutil
+from btcopilot.llmtelemetry import current_caller, estimate_cost
+from btcopilot.schema import asdict
+
+_log = logging.getLogger(__name__)
+
+BATCH_POLL_INTERVAL = int(os.getenv("BTCOPILOT_BATCH_POLL_INTERVAL", "30"))  # seconds
+
+GEMINI_BATCH_DONE_STATES = {"JOB_STATE_SUCCEEDED", "JOB_STATE_PARTIALLY_SUCCEEDED"}
+GEMINI_BATCH_FAILED_STATES = {
+    "JOB_STATE_FAILED",
+    "JOB_STATE_CANCELLED",
+    "JOB_STATE_EXPIRED",
+}
+
+
+@dataclass
+class BatchRequest:
+    key: str
+    model: str
+    prompt: str
+    response_format: type
+    prefix: str | None = None
+    caller: str | None = None
+
+
+@dataclass
+class BatchResult:
+    text: str | None = None
+    truncated: bool = False
+    error: str | None = None
+
+
+# --- Backends ---
+
+
+class GeminiBatchBackend:
+    async def submit(self, model: str, requests: list[BatchRequest]) -> str:
+        from google.genai import types
+
+        src = [
+            types.InlinedRequest(
+                contents=(r.prefix or "") + r.prompt,
+                config=llmutil.gemini_structured_config(r.response_format),
+                metadata={"key": r.key},
+            )
+            for r in requests
+        ]
+        job = await llmutil._client().aio.batches.create(
+            model=model,
+            src=src,
+            config=types.CreateBatchJobConfig(display_name=f"extract-{len(src)}"),
+        )
+        return job.name
+
+    async def done(self, job_id: str) -> bool:
+        job = await llmutil._client().aio.batches.get(name=job_id)
+        state = job.state.name
+        if state in GEMINI_BATCH_FAILED_STATES:
+            raise RuntimeError(f"Gemini batch {job_id} ended in {state}: {job.error}")
+        return state in GEMINI_BATCH_DONE_STATES
+
+    async def results(self, job_id: str, keys: list[str]) -> dict[str, BatchResult]:
+        job = await llmutil._client().aio.batches.get(name=job_id)
+        results = {}
+        # Inlined responses come back in request order.
+        for key, item in zip(keys, job.dest.inlined_responses):
+            if item.error or item.response is None:
+                results[key] = BatchResult(error=str(item.error))
+                continue
+            llmutil._record_gemini_usage(item.response)
+            finish_reason = item.response.candidates[0].finish_reason
+            results[key] = BatchResult(
+                text=item.response.text, truncated=finish_reason == "MAX_TOKENS"
+            )
+        return results
+
+
+class AnthropicBatchBackend:
+    async def submit(self, model: str, requests: list[BatchRequest]) -> str:
+        client = llmutil._extraction_anthropic_client()
+        batch = await client.messages.batches.create(
+            requests=[
+                {
+                    "custom_id": r.key,
+                    "params": {
+                        "model": model,
+                        "max_tokens": 32000,
+                        "thinking": {"type": "adaptive"},
+                        "messages": [
+                            {
+                                "role": "user",
+                                "content": llmutil.claude_structured_content(
+                                    r.prompt, r.response_format, r.prefix
+                                ),
+                            }
+                        ],
+                    },
+                }
+                for r in requests
+            ]
+        )
+        return batch.id
+
+    async def done(self, job_id: str) -> bool:
+        client = llmutil._extraction_anthropic_client()
+        batch = await client.messages.batches.retrieve(job_id)
+        return batch.processing_status == "ended"
+
+    async def results(self, job_id: str, keys: list[str]) -> dict[str, BatchResult]:
+        client = llmutil._extraction_anthropic_client()
+        usage = llmutil.CLAUDE_STRUCTURED_USAGE
+        results = {}
+        async for entry in await client.messages.batches.results(job_id):
+            if entry.result.type != "succeeded":
+                results[entry.custom_id] = BatchResult(error=entry.result.type)
+                continue
+            message = entry.result.message
+            usage["calls"] += 1
+            usage["input_tokens"] += message.usage.input_tokens
+            usage["output_tokens"] += message.usage.output_tokens
+            usage["cost_usd"] += estimate_cost(
+                message.model, message.usage.input_tokens, message.usage.output_tokens
+            )
+            text = next(b.text for b in message.content if b.type == "text")
+            results[entry.custom_id] = BatchResult(
+                text=text, truncated=message.stop_reason == "max_tokens"
+            )
+        return results
+
+
+class FakeBatchBackend:
+    """In-process stand-in for a provider batch API, for tests and dry runs.
+
+    `respond(request)` returns the reply text for each request (raising marks
+    that item failed); a job reports done after `polls` status checks."""
+
+    def __init__(self, respond, polls: int = 1):
+        self.respond = respond
+        self.polls = polls
+        self.jobs: dict[str, list[BatchRequest]] = {}
+        self._checks = Counter()
+
+    async def submit(self, model: str, requests: list[BatchRequest]) -> str:
+        job_id = f"fake-{len(self.jobs) + 1}"
+        self.jobs[job_id] = list(requests)
+        return job_id
+
+    async def done(self, job_id: str) -> bool:
+        self._checks[job_id] += 1
+        return self._checks[job_id] >= self.polls
+
+    async def results(self, job_id: str, keys: list[str]) -> dict[str, BatchResult]:
+        results = {}
+        for request in self.jobs[job_id]:
+            try:
+                results[request.key] = BatchResult(text=self.respond(request))
+            except Exception as e:
+                results[request.key] = BatchResult(error=str(e))
+        return results
+
+
+_gemini_backend = GeminiBatchBackend()
+_anthropic_backend = AnthropicBatchBackend()
+
+
+def default_backend(model: str):
+    if llmutil._is_claude_model(model):
+        return _anthropic_backend
+    return _gemini_backend
+
+
+# --- Checkpoint ---
+
+
+class BatchCheckpoint:
+    """Answers received so far (responses.jsonl, append-only) and in-flight
+    job ids (jobs.json) under `directory`. With no directory, memory only."""
+
+    def __init__(self, directory: str | None = None):
+        self.directory = directory
+        self.responses: dict[str, BatchResult] = {}
+        self.jobs: dict[str, dict] = {}
+        if not directory:
+            return
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self._path("responses.jsonl")):
+            with open(self._path("responses.jsonl")) as f:
+                for line in f:
+                    if line.strip():
+                        row = json.loads(line)
+                        self.responses[row["key"]] = BatchResult(
+                            text=row["text"], truncated=row.get("truncated", False)
+                        )
+        if os.path.exists(self._path("jobs.json")):
+            with open(self._path("jobs.json")) as f:
+                self.jobs = json.load(f)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def save_response(self, key: str, result: BatchResult):
+        self.responses[key] = result
+        if not self.directory:
+            return
+        with open(self._path("responses.jsonl"), "a") as f:
+            row = {"key": key, "text": result.text, "truncated": result.truncated}
+            f.write(json.dumps(row) + "\n")
+
+    def save_job(self, model: str, job_id: str, keys: list[str]):
+        self.jobs[model] = {"id": job_id, "keys": keys}
+        self._write_jobs()
+
+    def clear_job(self, model: str):
+        self.jobs.pop(model, None)
+        self._write_jobs()
+
+    def _write_jobs(self):
+        if not self.directory:
+            return
+        with open(self._path("jobs.json"), "w") as f:
+            json.dump(self.jobs, f, indent=2)
+
+
+# --- Collector ---
+
+
+_request_keys = contextvars.ContextVar("batch_request_keys")
+
+
+class BatchCollector:
+    def __init__(
+        self,
+        backend_for=default_backend,
+        checkpoint: BatchCheckpoint | None = None,
+        poll_interval: float = BATCH_POLL_INTERVAL,
+    ):
+        self.backend_for = backend_for
+        self.checkpoint = checkpoint or BatchCheckpoint()
+        self.poll_interval = poll_interval
+        self.rounds = 0
+        self._pending: list[tuple[BatchRequest, asyncio.Future]] = []
+        self._changed = asyncio.Event()
+
+    async def run(self, jobs: dict) -> dict:
+        """Run `jobs[tag]()` for every tag with their LLM requests batched.
+
+        Returns {tag: result}, with the exception in place of the result for
+        jobs that raised."""
+        tasks = {
+            tag: asyncio.create_task(self._run_job(tag, factory))
+            for tag, factory in jobs.items()
+        }
+        for task in tasks.values():
+            task.add_done_callback(lambda _task: self._changed.set())
+
+        while live := sum(not task.done() for task in tasks.values()):
+            if len(self._pending) < live:
+                self._changed.clear()
+                await self._changed.wait()
+                continue
+            await self._flush()
+
+        return {tag: task.exception() or task.result() for tag, task in tasks.items()}
+
+    async def _run_job(self, tag, factory):
+        # Keys are (job tag, request number). The pipeline is deterministic
+        # given its answers, so a resumed run asks the same keys in order even
+        # though prompts embed fresh cursor nonces.
+        _request_keys.set((tag, itertools.count()))
+        llmutil.batch_collector.set(self)
+        return await factory()
+
+    async def submit(self, model, prompt, response_format, prefix=None):
+        tag, counter = _request_keys.get()
+        key = f"{tag}-{next(counter)}"
+        result = self.checkpoint.responses.get(key)
+        if result is None:
+            future = asyncio.get_running_loop().create_future()
+            request = BatchRequest(
+                key=key,
+                model=model,
+                prompt=prompt,
+                response_format=response_format,
+                prefix=prefix,
+                caller=current_caller(),
+            )
+            self._pending.append((request, future))
+            self._changed.set()
+            result = await future
+
+        if result.error is not None:
+            _log.warning(f"Batch item {key} failed ({result.error}); calling directly")
+            token = llmutil.batch_collector.set(None)
+            try:
+                parsed = await llmutil.gemini_structured(
+                    prompt, response_format, model=model, prefix=prefix
+                )
+            finally:
+                llmutil.batch_collector.reset(token)
+            self.checkpoint.save_response(
+                key, BatchResult(text=json.dumps(asdict(parsed)))
+            )
+            return parsed
+
+        if result.truncated:
+            raise llmutil.OutputTruncatedError(
+                "LLM response truncated due to token limit. Input data too large."
+            )
+        return llmutil.parse_structured_text(result.text, response_format)
+
+    async def _flush(self):
+        pending, self._pending = self._pending, []
+        self.rounds += 1
+        by_model = defaultdict(list)
+        for request, _future in pending:
+            by_model[request.model].append(request)
+        answers = {}
+        for results in await asyncio.gather(
+            *(self._run_batch(model, requests) for model, requests in by_model.items())
+        ):
+            answers.update(results)
+        for request, future in pending:
+            future.set_result(
+                answers.get(request.key, BatchResult(error="missing from batch"))
+            )
+
+    async def _run_batch(self, model: str, requests: list[BatchRequest]) -> dict:
+        backend = self.backend_for(model)
+        keys = [r.key for r in requests]
+        callers = Counter(r.caller for r in requests)
+        try:
+            job = self.checkpoint.jobs.get(model)
+            if job and job["keys"] == keys:
+                job_id = job["id"]
+                _log.info(f"Resuming batch {job_id} ({len(keys)} {model} requests)")
+            else:
+                job_id = await backend.submit(model, requests)
+                self.checkpoint.save_job(model, job_id, keys)
+                _log.info(
+                    f"Submitted batch {job_id}: {len(keys)} {model} requests "
+                    f"{dict(callers)}"
+                )
+            while not await backend.done(job_id):
+                await asyncio.sleep(self.poll_interval)
+            results = await backend.results(job_id, keys)
+        except Exception as e:
+            _log.exception(f"Batch for {model} failed")
+            self.checkpoint.clear_job(model)
+            return {key: BatchResult(error=f"batch failed: {e}") for key in keys}
+
+        for key, result in results.items():
+            if result.error is None:
+                self.checkpoint.save_response(key, result)
+        self.checkpoint.clear_job(model)
+        return results
+
+
+def run_batched(
+    jobs: dict,
+    checkpoint_dir: str | None = None,
+    backend_for=default_backend,
+    poll_interval: float = BATCH_POLL_INTERVAL,
+) -> dict:
+    """Synchronous entry point for the training scripts: see BatchCollector.run()."""
+
+    async def _run():
+        collector = BatchCollector(
+            backend_for=backend_for,
+            checkpoint=BatchCheckpoint(checkpoint_dir),
+            poll_interval=poll_interval,
+        )
+        outcomes = await collector.run(jobs)
+        _log.info(f"Batch extraction finished in {collector.rounds} round(s)")
+        return outcomes
+
+    return asyncio.run(_run())
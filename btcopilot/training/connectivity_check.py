@@ -14,6 +14,13 @@ Usage:
     # Measure a single GT discussion:
     uv run python -m btcopilot.training.connectivity_check --discussion 50
 
+    # 16 extractions in flight, stats streamed to JSONL, resumable:
+    uv run python -m btcopilot.training.connectivity_check --concurrency 16 \
+        --results instance/lcc/run.jsonl --resume
+
+    # Extract all GT discussions through the provider batch API, resumable:
+    uv run python -m btcopilot.training.connectivity_check --batch --checkpoint-dir instance/batch/lcc
+
     # Measure a server diagram from the DB (committed state, no extraction):
     uv run python -m btcopilot.training.connectivity_check --diagram 1924
 
@@ -37,53 +44,54 @@ from btcopilot.familygraph import (
     person_parents,
 )
 from btcopilot.schema import DiagramData
+from btcopilot.training.corpus_eval import (
+    EVAL_CONCURRENCY,
+    load_gt_discussions,
+    run_corpus,
+)
 from btcopilot import pdp as pdp_mod
 
 # ── extraction-based measurement ──────────────────────────────────────────────
 
 
-def _measure_gt_discussions(discussion_id=None):
-    nest_asyncio.apply()
-
-    from btcopilot.training.models import Feedback
-    from btcopilot.personal.models import Statement, Discussion
-
-    query = (
-        Feedback.query.join(Statement, Feedback.statement_id == Statement.id)
-        .filter(Feedback.approved == True)
-        .filter(Feedback.feedback_type == "extraction")
-    )
-    if discussion_id:
-        query = query.filter(Statement.discussion_id == discussion_id)
-    disc_ids = sorted(
-        {
-            fb.statement.discussion_id
-            for fb in query.all()
-            if fb.statement and fb.statement.discussion_id
-        }
-    )
-
-    if not disc_ids:
+def _measure_gt_discussions(
+    discussion_id=None,
+    batch=False,
+    checkpoint_dir=None,
+    concurrency=EVAL_CONCURRENCY,
+    results_path=None,
+    resume=False,
+):
+    snapshots = load_gt_discussions(discussion_id, with_gt=False)
+    if not snapshots:
         print("No GT discussions found.")
         return
 
-    print(f"Measuring connectivity on {len(disc_ids)} GT discussion(s)...\n")
-    totals = []
-    for disc_id in disc_ids:
-        disc = Discussion.query.get(disc_id)
-        diagram_data = DiagramData()
-        try:
-            ai_pdp, _ = asyncio.run(pdp_mod.extract_full(disc, diagram_data))
-        except Exception as e:
-            print(f"  Disc {disc_id}: EXTRACTION FAILED — {e}")
-            continue
+    print(f"Measuring connectivity on {len(snapshots)} GT discussion(s)...\n")
+
+    async def extract(snapshot):
+        ai_pdp, _ = await pdp_mod.extract_full(snapshot, DiagramData())
+        return ai_pdp
+
+    def score(snapshot, ai_pdp, elapsed):
         stats = lcc_percent(ai_pdp.people, ai_pdp.pair_bonds)
         print(
-            f"  Disc {disc_id} ({disc.summary or ''}): "
+            f"  Disc {snapshot.id} ({snapshot.summary or ''}): "
             f"{stats['total']} people, {stats['components']} components, "
             f"LCC {stats['lcc_pct']}%"
         )
-        totals.append(stats)
+        return {"discussion_id": snapshot.id, **stats}
+
+    totals, _errors = run_corpus(
+        snapshots,
+        extract,
+        score,
+        concurrency=concurrency,
+        results_path=results_path,
+        resume=resume,
+        batch=batch,
+        checkpoint_dir=checkpoint_dir,
+    )
 
     if len(totals) > 1:
         avg_lcc = round(sum(s["lcc_pct"] for s in totals) / len(totals), 1)
@@ -213,7 +221,35 @@ def main():
         type=str,
         help="Comma-separated discussion IDs; accumulate then dump disconnected people",
     )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="GT measurement: extract all discussions through the batch API",
+    )
+    parser.add_argument(
+        "--checkpoint-dir",
+        type=str,
+        help="With --batch: save batch answers here and resume from them",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=EVAL_CONCURRENCY,
+        help="GT measurement: discussions extracted at once (default %(default)s)",
+    )
+    parser.add_argument(
+        "--results",
+        type=str,
+        help="GT measurement: append per-discussion stats to this JSONL file",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip discussions already in the --results file",
+    )
     args = parser.parse_args()
+    if args.resume and not args.results:
+        parser.error("--resume requires --results")
 
     app = create_app()
     with app.app_context():
@@ -226,7 +262,14 @@ def main():
             disc_ids = [int(x.strip()) for x in args.dump_disconnected.split(",")]
             _dump_disconnected(disc_ids)
         else:
-            _measure_gt_discussions(args.discussion)
+            _measure_gt_discussions(
+                args.discussion,
+                batch=args.batch,
+                checkpoint_dir=args.checkpoint_dir,
+                concurrency=args.concurrency,
+                results_path=args.results,
+                resume=args.resume,
+            )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,210 @@
+"""
+Concurrent corpus evaluation runner shared by run_extract_full_f1 and
+connectivity_check.
+
+All DB reads happen up front: GT discussions are loaded with their statements
+and speakers in two queries and copied into plain dataclasses (plus the GT PDP
+when scoring needs it), so extraction tasks never share a SQLAlchemy session.
+Extractions then run concurrently in one event loop, bounded by a semaphore,
+and each scored result is appended to a JSONL file as soon as it lands.
+`resume=True` skips discussions already present in that file.
+"""
+
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import date
+
+from sqlalchemy.orm import joinedload, selectinload
+
+from btcopilot import pdp
+from btcopilot.personal.models import Discussion, Statement
+from btcopilot.personal.models.speaker import SpeakerType
+from btcopilot.schema import PDP
+
+EVAL_CONCURRENCY = int(os.getenv("BTCOPILOT_EVAL_CONCURRENCY", "8"))
+
+
+@dataclass
+class SpeakerSnapshot:
+    name: str | None
+    type: SpeakerType | None = None
+
+
+@dataclass
+class StatementSnapshot:
+    id: int
+    order: int | None
+    text: str | None
+    speaker: SpeakerSnapshot | None = None
+
+
+@dataclass
+class DiscussionSnapshot:
+    """Detached copy of a Discussion holding what extract_full() reads."""
+
+    id: int
+    summary: str | None
+    discussion_date: date | None
+    statements: list[StatementSnapshot] = field(default_factory=list)
+    gt_pdp: PDP | None = None
+    extracted_through_order: int | None = None
+
+    conversation_history = Discussion.conversation_history
+
+
+def _snapshot(discussion: Discussion) -> DiscussionSnapshot:
+    statements = []
+    for s in sorted(discussion.statements, key=lambda s: (s.order or 0, s.id or 0)):
+        speaker = None
+        if s.speaker:
+            speaker = SpeakerSnapshot(name=s.speaker.name, type=s.speaker.type)
+        statements.append(
+            StatementSnapshot(id=s.id, order=s.order, text=s.text, speaker=speaker)
+        )
+    return DiscussionSnapshot(
+        id=discussion.id,
+        summary=discussion.summary,
+        discussion_date=discussion.discussion_date,
+        statements=statements,
+    )
+
+
+def load_gt_discussions(
+    discussion_id: int | None = None, with_gt: bool = True
+) -> list[DiscussionSnapshot]:
+    """Snapshots of every discussion with approved extraction GT, ordered by id.
+
+    with_gt: also build each discussion's cumulative GT PDP from the auditor
+    whose approved feedback marks it as GT."""
+    from btcopilot.training.models import Feedback
+
+    query = (
+        Feedback.query.join(Statement, Feedback.statement_id == Statement.id)
+        .filter(Feedback.approved == True)
+        .filter(Feedback.feedback_type == "extraction")
+    )
+    if discussion_id:
+        query = query.filter(Statement.discussion_id == discussion_id)
+    auditors = {}
+    for disc_id, auditor_id in query.order_by(Feedback.id).with_entities(
+        Statement.discussion_id, Feedback.auditor_id
+    ):
+        if disc_id:
+            auditors.setdefault(disc_id, auditor_id)
+    if not auditors:
+        return []
+
+    discussions = (
+        Discussion.query.options(
+            selectinload(Discussion.statements).joinedload(Statement.speaker)
+        )
+        .filter(Discussion.id.in_(auditors))
+        .order_by(Discussion.id)
+        .all()
+    )
+    snapshots = []
+    for discussion in discussions:
+        snapshot = _snapshot(discussion)
+        if with_gt and discussion.statements:
+            last_stmt = max(
+                discussion.statements, key=lambda s: (s.order or 0, s.id or 0)
+            )
+            snapshot.gt_pdp = pdp.cumulative(
+                discussion, last_stmt, auditor_id=auditors[discussion.id]
+            )
+        snapshots.append(snapshot)
+    return snapshots
+
+
+def load_results(path: str) -> dict[int, dict]:
+    """Completed results in a JSONL results file, keyed by discussion id."""
+    results = {}
+    if not os.path.exists(path):
+        return results
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                results[row["discussion_id"]] = row
+    return results
+
+
+def run_corpus(
+    snapshots: list[DiscussionSnapshot],
+    extract,
+    score,
+    concurrency: int = EVAL_CONCURRENCY,
+    results_path: str | None = None,
+    resume: bool = False,
+    batch: bool = False,
+    checkpoint_dir: str | None = None,
+) -> tuple[list[dict], list[tuple[int, str]]]:
+    """Extract and score every snapshot.
+
+    extract(snapshot) is a coroutine returning the extraction;
+    score(snapshot, extracted, elapsed) returns the JSON-serializable result
+    dict (it must include "discussion_id"). With batch=True extractions go
+    through training.batch_extract instead of the semaphore.
+
+    Returns (results in snapshot order, [(discussion_id, error)])."""
+    done = load_results(results_path) if resume and results_path else {}
+    if done:
+        print(f"Resuming: {len(done)} discussion(s) already in {results_path}\n")
+    todo = [s for s in snapshots if s.id not in done]
+    results = dict(done)
+    errors = []
+
+    out = None
+    if results_path:
+        os.makedirs(os.path.dirname(results_path) or ".", exist_ok=True)
+        out = open(results_path, "a" if resume else "w")
+
+    def finish(snapshot, extracted, elapsed):
+        if isinstance(extracted, Exception):
+            print(
+                f"  Disc {snapshot.id}: EXTRACTION FAILED ({elapsed:.1f}s) — {extracted}"
+            )
+            errors.append((snapshot.id, str(extracted)))
+            return
+        result = score(snapshot, extracted, elapsed)
+        results[snapshot.id] = result
+        if out:
+            out.write(json.dumps(result, default=str) + "\n")
+            out.flush()
+
+    try:
+        if batch:
+            from btcopilot.training.batch_extract import run_batched
+
+            start = time.time()
+            outcomes = run_batched(
+                {s.id: lambda s=s: extract(s) for s in todo},
+                checkpoint_dir=checkpoint_dir,
+            )
+            for snapshot in todo:
+                finish(snapshot, outcomes[snapshot.id], time.time() - start)
+        else:
+            asyncio.run(_run_concurrently(todo, extract, finish, concurrency))
+    finally:
+        if out:
+            out.close()
+
+    return [results[s.id] for s in snapshots if s.id in results], errors
+
+
+async def _run_concurrently(snapshots, extract, finish, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(snapshot):
+        async with semaphore:
+            start = time.time()
+            try:
+                extracted = await extract(snapshot)
+            except Exception as e:
+                extracted = e
+            finish(snapshot, extracted, time.time() - start)
+
+    await asyncio.gather(*(one(s) for s in snapshots))
@@ -12,12 +12,18 @@ Usage (standalone):
     uv run python -m btcopilot.training.eval_harness
     uv run python -m btcopilot.training.eval_harness --json
     uv run python -m btcopilot.training.eval_harness --ids 50 51 52
+
+    # Persist a run, then compare two saved runs without recomputing (see
+    # eval_store.py):
+    uv run python -m btcopilot.training.eval_harness --save baseline
+    uv run python -m btcopilot.training.eval_harness --diff baseline new-pass2
 """
 
 import json
 import logging
 from dataclasses import dataclass, field, asdict
 
+from btcopilot.training import eval_store
 from btcopilot.training.f1_metrics import (
     F1Metrics,
     CumulativeF1Metrics,
@@ -296,6 +302,12 @@ def run_eval(discussion_ids: list[int] | None = None) -> EvalResult:
 
     Must be called within a Flask app context.
     """
+    return build_eval_result(collect_metrics(discussion_ids))
+
+
+def collect_metrics(
+    discussion_ids: list[int] | None = None,
+) -> list[CumulativeF1Metrics]:
     if discussion_ids:
         metrics = []
         for disc_id in discussion_ids:
@@ -309,7 +321,7 @@ def run_eval(discussion_ids: list[int] | None = None) -> EvalResult:
         system = calculate_all_cumulative_f1(include_synthetic=True)
         metrics = system.per_discussion
 
-    return build_eval_result(metrics)
+    return metrics
 
 
 def main():
@@ -325,13 +337,41 @@ def main():
     parser.add_argument(
         "--json", action="store_true", help="Output machine-readable JSON"
     )
+    parser.add_argument(
+        "--save",
+        nargs="?",
+        const="",
+        metavar="NAME",
+        help="Persist this run (default name: timestamp + git sha)",
+    )
+    parser.add_argument(
+        "--diff",
+        nargs=2,
+        metavar=("BASE", "HEAD"),
+        help="Compare two saved runs; no evaluation is run",
+    )
+    parser.add_argument(
+        "--runs-dir", default=eval_store.EVAL_RUNS_DIR, help="Saved runs directory"
+    )
     args = parser.parse_args()
 
+    if args.diff:
+        diff = eval_store.diff_runs(
+            eval_store.load_run(args.diff[0], args.runs_dir),
+            eval_store.load_run(args.diff[1], args.runs_dir),
+        )
+        if args.json:
+            print(json.dumps(asdict(diff), indent=2))
+        else:
+            print(eval_store.format_diff(diff))
+        sys.exit(0)
+
     from btcopilot.app import create_app
 
     app = create_app()
     with app.app_context():
-        result = run_eval(discussion_ids=args.ids)
+        metrics = collect_metrics(discussion_ids=args.ids)
+        result = build_eval_result(metrics)
 
         if result.discussion_count == 0:
             print("No discussions with approved GT found.")
@@ -348,6 +388,16 @@ def main():
             )
             print(json.dumps(format_json(result), indent=2), file=sys.stderr)
 
+        if args.save is not None:
+            path = eval_store.save_run(
+                result,
+                metrics,
+                eval_store.run_config(discussion_ids=args.ids),
+                name=args.save or None,
+                runs_dir=args.runs_dir,
+            )
+            print(f"\nSaved run to {path}", file=sys.stderr)
+
         sys.exit(0)
 
 
@@ -0,0 +1,377 @@
+"""
+Persisted eval-harness runs and run-to-run diffs.
+
+A saved run is a directory under EVAL_RUNS_DIR holding two zstd-compressed
+Arrow IPC files:
+
+  discussions.arrow  one row per (discussion, entity type) with the F1
+                     breakdown; the run config (models, prompt hashes, git
+                     sha) is stored as JSON in the schema metadata
+  matches.arrow      one row per matched / unmatched entity (TP/FP/FN)
+
+diff_runs() compares two saved runs from those files alone: per-entity-type
+mean F1 deltas over the discussions both runs scored, with a paired t-test and
+a sign-flip permutation test computed across all entity types at once, plus
+the GT items each run fixed or broke relative to the other.
+
+Usage:
+    uv run python -m btcopilot.training.eval_harness --save baseline
+    uv run python -m btcopilot.training.eval_harness --save new-pass2
+    uv run python -m btcopilot.training.eval_harness --diff baseline new-pass2
+"""
+
+import hashlib
+import json
+import logging
+import os
+import subprocess
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import numpy as np
+
+_log = logging.getLogger(__name__)
+
+EVAL_RUNS_DIR = os.getenv("BTCOPILOT_EVAL_RUNS_DIR", "instance/eval_runs")
+PERMUTATIONS = 10_000
+
+DISCUSSIONS_FILE = "discussions.arrow"
+MATCHES_FILE = "matches.arrow"
+
+
+def _git_sha() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(__file__),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _prompt_hashes() -> dict[str, str]:
+    from btcopilot.personal import prompts
+
+    return {
+        name: hashlib.sha256(value.encode()).hexdigest()[:12]
+        for name, value in sorted(vars(prompts).items())
+        if name.isupper() and isinstance(value, str)
+    }
+
+
+def run_config(**extra) -> dict:
+    """What produced a run: models, prompt hashes and code version."""
+    from btcopilot import llmutil
+
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "git_sha": _git_sha(),
+        "models": {
+            "extraction": llmutil.EXTRACTION_MODEL,
+            "extraction_large": llmutil.EXTRACTION_MODEL_LARGE,
+            "sarf_review": llmutil.SARF_REVIEW_MODEL,
+        },
+        "prompts": _prompt_hashes(),
+        **extra,
+    }
+
+
+# --- Writing / reading ---
+
+
+def _write_table(path: str, table):
+    import pyarrow as pa
+
+    options = pa.ipc.IpcWriteOptions(compression="zstd")
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema, options=options) as writer:
+            writer.write_table(table)
+
+
+def _read_table(path: str):
+    import pyarrow as pa
+
+    with pa.memory_map(path) as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def save_run(
+    result, metrics, config: dict, name: str | None = None, runs_dir=EVAL_RUNS_DIR
+) -> str:
+    """Persist an EvalResult plus the match rows of its CumulativeF1Metrics.
+
+    Returns the run directory."""
+    import pyarrow as pa
+
+    name = name or (
+        datetime.now().strftime("%Y%m%d-%H%M%S")
+        + (f"-{config['git_sha'][:7]}" if config.get("git_sha") else "")
+    )
+    path = os.path.join(runs_dir, name)
+    os.makedirs(path, exist_ok=True)
+
+    rows = [(d, e) for d in result.per_discussion for e in d.entity_types]
+    discussions = pa.table(
+        {
+            "discussion_id": pa.array([d.discussion_id for d, _ in rows], pa.int64()),
+            "summary": pa.array([d.summary for d, _ in rows]).dictionary_encode(),
+            "auditor_id": pa.array([d.auditor_id for d, _ in rows]).dictionary_encode(),
+            "aggregate_f1": pa.array([d.aggregate_f1 for d, _ in rows], pa.float64()),
+            "entity_type": pa.array(
+                [e.entity_type for _, e in rows]
+            ).dictionary_encode(),
+            "f1": pa.array([e.f1 for _, e in rows], pa.float64()),
+            "precision": pa.array([e.precision for _, e in rows], pa.float64()),
+            "recall": pa.array([e.recall for _, e in rows], pa.float64()),
+            "tp": pa.array([e.tp for _, e in rows], pa.int32()),
+            "fp": pa.array([e.fp for _, e in rows], pa.int32()),
+            "fn": pa.array([e.fn for _, e in rows], pa.int32()),
+            "ai_count": pa.array([e.ai_count for _, e in rows], pa.int32()),
+            "gt_count": pa.array([e.gt_count for _, e in rows], pa.int32()),
+        }
+    ).replace_schema_metadata({"config": json.dumps(config)})
+    _write_table(os.path.join(path, DISCUSSIONS_FILE), discussions)
+
+    match_rows = [(m.discussion_id, row) for m in metrics for row in m.matches]
+    matches = pa.table(
+        {
+            "discussion_id": pa.array([d for d, _ in match_rows], pa.int64()),
+            "entity_type": pa.array(
+                [r["entity_type"] for _, r in match_rows], pa.string()
+            ).dictionary_encode(),
+            "outcome": pa.array(
+                [r["outcome"] for _, r in match_rows], pa.string()
+            ).dictionary_encode(),
+            "ai_id": pa.array([r["ai_id"] for _, r in match_rows], pa.int64()),
+            "gt_id": pa.array([r["gt_id"] for _, r in match_rows], pa.int64()),
+            "label": pa.array([r["label"] for _, r in match_rows], pa.string()),
+        }
+    )
+    _write_table(os.path.join(path, MATCHES_FILE), matches)
+    _log.info(f"Saved eval run to {path}")
+    return path
+
+
+@dataclass
+class StoredRun:
+    name: str
+    config: dict
+    discussions: object  # pyarrow.Table
+    matches: object  # pyarrow.Table
+
+
+def load_run(ref: str, runs_dir=EVAL_RUNS_DIR) -> StoredRun:
+    """Load a run by directory path or by name under runs_dir."""
+    path = ref if os.path.isdir(ref) else os.path.join(runs_dir, ref)
+    if not os.path.isdir(path):
+        raise FileNotFoundError(f"No saved eval run at {path}")
+    discussions = _read_table(os.path.join(path, DISCUSSIONS_FILE))
+    config = json.loads(discussions.schema.metadata[b"config"])
+    return StoredRun(
+        name=os.path.basename(os.path.normpath(path)),
+        config=config,
+        discussions=discussions,
+        matches=_read_table(os.path.join(path, MATCHES_FILE)),
+    )
+
+
+# --- Diffing ---
+
+
+@dataclass
+class EntityDiff:
+    entity_type: str
+    n: int
+    base_mean_f1: float
+    head_mean_f1: float
+    mean_delta: float
+    improved: int
+    regressed: int
+    t_pvalue: float
+    permutation_pvalue: float
+
+
+@dataclass
+class RunDiff:
+    base: str
+    head: str
+    base_config: dict
+    head_config: dict
+    discussion_ids: list[int] = field(default_factory=list)
+    only_base: list[int] = field(default_factory=list)
+    only_head: list[int] = field(default_factory=list)
+    entities: list[EntityDiff] = field(default_factory=list)
+    fixed: list[dict] = field(default_factory=list)  # GT items FN -> TP
+    broken: list[dict] = field(default_factory=list)  # GT items TP -> FN
+
+
+def _f1_matrix(table, discussion_ids: np.ndarray, entity_types: list[str]):
+    """(discussions x entity types) F1 matrix, with the per-discussion
+    aggregate F1 as the last column."""
+    if not len(discussion_ids):
+        return np.zeros((0, len(entity_types)))
+    columns = np.asarray(entity_types[:-1])  # sorted
+    ids = table.column("discussion_id").to_numpy()
+    types = np.asarray(table.column("entity_type").cast("string").to_pylist())
+    keep = np.isin(ids, discussion_ids) & np.isin(types, columns)
+    rows = np.searchsorted(discussion_ids, ids[keep])
+    cols = np.searchsorted(columns, types[keep])
+
+    matrix = np.zeros((len(discussion_ids), len(entity_types)))
+    matrix[rows, cols] = table.column("f1").to_numpy()[keep]
+    matrix[rows, -1] = table.column("aggregate_f1").to_numpy()[keep]
+    return matrix
+
+
+def _paired_t_pvalues(deltas: np.ndarray) -> np.ndarray:
+    from scipy import stats
+
+    n = deltas.shape[0]
+    if n < 2:
+        return np.ones(deltas.shape[1])
+    mean = deltas.mean(axis=0)
+    se = deltas.std(axis=0, ddof=1) / np.sqrt(n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.where(se > 0, mean / se, np.where(mean == 0, 0.0, np.inf))
+    return 2 * stats.t.sf(np.abs(t), df=n - 1)
+
+
+def _permutation_pvalues(
+    deltas: np.ndarray, permutations: int = PERMUTATIONS, seed: int = 0
+) -> np.ndarray:
+    """Two-sided sign-flip test of mean delta == 0, all columns at once.
+    Enumerates every sign pattern when that is cheaper than sampling."""
+    n = deltas.shape[0]
+    if n == 0:
+        return np.ones(deltas.shape[1])
+    if 2**n <= permutations:
+        patterns = np.arange(2**n)[:, None] >> np.arange(n) & 1
+        signs = 1 - 2 * patterns
+    else:
+        rng = np.random.default_rng(seed)
+        signs = rng.choice([-1, 1], size=(permutations, n))
+    null = np.abs(signs @ deltas) / n
+    observed = np.abs(deltas.mean(axis=0))
+    extreme = (null >= observed - 1e-12).sum(axis=0)
+    if 2**n <= permutations:
+        return extreme / signs.shape[0]
+    return (extreme + 1) / (signs.shape[0] + 1)
+
+
+def _gt_outcomes(matches, discussion_ids: set[int]) -> dict[tuple, tuple[str, str]]:
+    outcomes = {}
+    for row in matches.to_pylist():
+        if row["gt_id"] is None or row["discussion_id"] not in discussion_ids:
+            continue
+        key = (row["discussion_id"], row["entity_type"], row["gt_id"])
+        outcomes[key] = (row["outcome"], row["label"])
+    return outcomes
+
+
+def diff_runs(base: StoredRun, head: StoredRun) -> RunDiff:
+    base_ids = set(base.discussions.column("discussion_id").to_pylist())
+    head_ids = set(head.discussions.column("discussion_id").to_pylist())
+    common = np.array(sorted(base_ids & head_ids), dtype=np.int64)
+    entity_types = sorted(
+        set(base.discussions.column("entity_type").cast("string").to_pylist())
+        & set(head.discussions.column("entity_type").cast("string").to_pylist())
+    ) + ["Aggregate"]
+
+    diff = RunDiff(
+        base=base.name,
+        head=head.name,
+        base_config=base.config,
+        head_config=head.config,
+        discussion_ids=common.tolist(),
+        only_base=sorted(base_ids - head_ids),
+        only_head=sorted(head_ids - base_ids),
+    )
+
+    base_f1 = _f1_matrix(base.discussions, common, entity_types)
+    head_f1 = _f1_matrix(head.discussions, common, entity_types)
+    deltas = head_f1 - base_f1
+    n = len(common)
+    t_p = _paired_t_pvalues(deltas)
+    perm_p = _permutation_pvalues(deltas)
+    for i, entity_type in enumerate(entity_types):
+        diff.entities.append(
+            EntityDiff(
+                entity_type=entity_type,
+                n=n,
+                base_mean_f1=float(base_f1[:, i].mean()) if n else 0.0,
+                head_mean_f1=float(head_f1[:, i].mean()) if n else 0.0,
+                mean_delta=float(deltas[:, i].mean()) if n else 0.0,
+                improved=int((deltas[:, i] > 0).sum()),
+                regressed=int((deltas[:, i] < 0).sum()),
+                t_pvalue=float(t_p[i]),
+                permutation_pvalue=float(perm_p[i]),
+            )
+        )
+
+    common_set = set(common.tolist())
+    base_outcomes = _gt_outcomes(base.matches, common_set)
+    head_outcomes = _gt_outcomes(head.matches, common_set)
+    for key in sorted(base_outcomes.keys() & head_outcomes.keys()):
+        (before, label), (after, _) = base_outcomes[key], head_outcomes[key]
+        item = {
+            "discussion_id": key[0],
+            "entity_type": key[1],
+            "gt_id": key[2],
+            "label": label,
+        }
+        if before == "FN" and after == "TP":
+            diff.fixed.append(item)
+        elif before == "TP" and after == "FN":
+            diff.broken.append(item)
+    return diff
+
+
+def format_diff(diff: RunDiff, max_items: int = 20) -> str:
+    lines = ["=" * 80, f"EVAL DIFF  {diff.base}  ->  {diff.head}", "=" * 80]
+    for label, key in (("models", "models"), ("git", "git_sha")):
+        before, after = diff.base_config.get(key), diff.head_config.get(key)
+        if before != after:
+            lines.append(f"  {label}: {before} -> {after}")
+    changed = sorted(
+        name
+        for name in diff.base_config.get("prompts", {}).keys()
+        | diff.head_config.get("prompts", {}).keys()
+        if diff.base_config.get("prompts", {}).get(name)
+        != diff.head_config.get("prompts", {}).get(name)
+    )
+    if changed:
+        lines.append(f"  prompts changed: {', '.join(changed)}")
+    lines.append(f"  {len(diff.discussion_ids)} discussions in both runs")
+    if diff.only_base or diff.only_head:
+        lines.append(
+            f"  only in base: {diff.only_base}  only in head: {diff.only_head}"
+        )
+    lines.append("")
+    lines.append(
+        f"  {'Entity Type':<12} {'Base':>6} {'Head':>6} {'Delta':>7} "
+        f"{'+':>3} {'-':>3} {'p(t)':>7} {'p(perm)':>8}"
+    )
+    lines.append(f"  {'-' * 60}")
+    for e in diff.entities:
+        lines.append(
+            f"  {e.entity_type:<12} {e.base_mean_f1:>6.3f} {e.head_mean_f1:>6.3f} "
+            f"{e.mean_delta:>+7.3f} {e.improved:>3} {e.regressed:>3} "
+            f"{e.t_pvalue:>7.3f} {e.permutation_pvalue:>8.3f}"
+        )
+    for title, items in (
+        ("Fixed (FN -> TP)", diff.fixed),
+        ("Broken (TP -> FN)", diff.broken),
+    ):
+        lines.append("")
+        lines.append(f"{title}: {len(items)}")
+        for item in items[:max_items]:
+            lines.append(
+                f"  disc {item['discussion_id']} {item['entity_type']:<10} {item['label']}"
+            )
+        if len(items) > max_items:
+            lines.append(f"  ... {len(items) - max_items} more")
+    lines.append("=" * 80)
+    return "\n".join(lines)
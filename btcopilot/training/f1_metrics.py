@@ -199,6 +199,8 @@ class CumulativeF1Metrics:
     ai_events_count: int = 0
     gt_people_count: int = 0
     gt_events_count: int = 0
+    # One row per matched pair / unmatched item; see match_rows()
+    matches: list[dict] = field(default_factory=list)
 
 
 def parse_date_flexible(date_str: str | None) -> datetime | None:
@@ -1236,6 +1238,50 @@ def _augment_duplicate_person_id_map(
             _log.debug(f"Duplicate person map: AI {ai_person.id} -> GT {best_gt_id}")
 
 
+def _match_label(item) -> str:
+    if isinstance(item, Person):
+        return item.name or ""
+    if isinstance(item, Event):
+        kind = item.kind.value if item.kind else ""
+        return f"{kind}: {item.description or ''}".strip()
+    return f"{item.person_a}+{item.person_b}"
+
+
+def match_rows(entity_type: str, result: EntityMatchResult) -> list[dict]:
+    """Flatten a match result into outcome rows (TP/FP/FN) for storage."""
+    rows = [
+        {
+            "entity_type": entity_type,
+            "outcome": "TP",
+            "ai_id": ai.id,
+            "gt_id": gt.id,
+            "label": _match_label(gt),
+        }
+        for ai, gt in result.matched_pairs
+    ]
+    rows += [
+        {
+            "entity_type": entity_type,
+            "outcome": "FP",
+            "ai_id": ai.id,
+            "gt_id": None,
+            "label": _match_label(ai),
+        }
+        for ai in result.ai_unmatched
+    ]
+    rows += [
+        {
+            "entity_type": entity_type,
+            "outcome": "FN",
+            "ai_id": None,
+            "gt_id": gt.id,
+            "label": _match_label(gt),
+        }
+        for gt in result.gt_unmatched
+    ]
+    return rows
+
+
 def calculate_cumulative_f1(discussion_id: int) -> CumulativeF1Metrics:
     from btcopilot.personal.models import Discussion, Statement
     from btcopilot.training.models import Feedback
@@ -1363,6 +1409,11 @@ def calculate_cumulative_f1(discussion_id: int) -> CumulativeF1Metrics:
     metrics.aggregate_micro_f1 = calculate_f1_from_counts(
         total_tp, total_fp, total_fn
     ).f1
+    metrics.matches = (
+        match_rows("People", people_result)
+        + match_rows("Events", events_result)
+        + match_rows("PairBonds", bonds_result)
+    )
 
     if events_result.matched_pairs:
         sarf_f1s, sarf_counts = calculate_sarf_macro_f1(events_result.matched_pairs)
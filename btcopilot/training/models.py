@@ -1,3 +1,5 @@
+import pickle
+
 from sqlalchemy import (
     Column,
     Integer,
@@ -7,8 +9,16 @@ from sqlalchemy import (
     JSON,
     ForeignKey,
     DateTime,
+    Index,
+    LargeBinary,
+    delete,
+    event,
+    func,
+    inspect,
+    or_,
+    select,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import Session, relationship
 
 from btcopilot.extensions import db
 from btcopilot.modelmixin import ModelMixin
@@ -58,3 +68,130 @@ class ReconciliationNote(db.Model, ModelMixin):
     created_by = Column(String(255), nullable=False)
 
     statement = relationship("Statement", backref="reconciliation_notes")
+
+
+class StatementMetricIndex(db.Model, ModelMixin):
+    """Inverted index from (metric, outcome) to statement, for system analysis.
+
+    Rows are derived from StatementMatchBreakdown by
+    analysis_utils.ensure_gt_statements_indexed(), run by the
+    refresh_f1_snapshots task and the analysis reindex action only; breakdowns
+    computed while rendering the analysis views are not written back. Every
+    indexed statement also gets an INDEXED marker row, so statements whose
+    breakdown is None are not recomputed on each refresh. All rows for a
+    discussion are dropped when its extraction feedback or existing statements
+    change (see _invalidate_metric_index; bulk updates must delete them
+    explicitly) and rebuilt on the next refresh.
+    """
+
+    __tablename__ = "statement_metric_index"
+
+    INDEXED = "indexed"
+
+    metric = Column(String(50), nullable=False)  # e.g. 'people', 'symptom_detection'
+    outcome = Column(String(20), nullable=False)  # 'TP', 'FP', 'FN', 'mismatch'...
+    statement_id = Column(
+        Integer, ForeignKey("statements.id", ondelete="CASCADE"), nullable=False
+    )
+    discussion_id = Column(
+        Integer, ForeignKey("discussions.id", ondelete="CASCADE"), nullable=False
+    )
+
+    index = Index(
+        "index_statement_metric_lookup", metric, outcome, discussion_id, statement_id
+    )
+    discussion_index = Index("index_statement_metric_discussion", discussion_id)
+
+
+def _breakdown_inputs_changed(statement) -> bool:
+    attrs = inspect(statement).attrs
+    return any(attrs[name].history.has_changes() for name in ("pdp_deltas", "order"))
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_metric_index(session, flush_context):
+    """Drop index rows for discussions whose breakdown inputs were just flushed.
+
+    New statements are ignored: a chat turn appends statements without GT, and
+    breakdowns only read the statements before their own.
+    """
+    from btcopilot.personal.models import Statement
+
+    discussion_ids = set()
+    statement_ids = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Feedback) and obj.feedback_type == "extraction":
+            statement_ids.add(obj.statement_id)
+        elif (
+            isinstance(obj, Statement)
+            and obj not in session.new
+            and (obj in session.deleted or _breakdown_inputs_changed(obj))
+        ):
+            discussion_ids.add(obj.discussion_id)
+    discussion_ids.discard(None)
+    statement_ids.discard(None)
+    if not discussion_ids and not statement_ids:
+        return
+
+    column = StatementMetricIndex.discussion_id
+    session.connection().execute(
+        delete(StatementMetricIndex).where(
+            or_(
+                column.in_(discussion_ids),
+                column.in_(
+                    select(Statement.discussion_id).where(
+                        Statement.id.in_(statement_ids)
+                    )
+                ),
+            )
+        )
+    )
+
+
+class F1Snapshot(db.Model, ModelMixin):
+    """Precomputed SystemCumulativeF1 for dashboard cards.
+
+    Refreshed by the refresh_f1_snapshots celery task (beat schedule, and on
+    demand when a dashboard finds the snapshot stale) so no page request has to
+    run calculate_all_cumulative_f1() itself.
+    """
+
+    __tablename__ = "f1_snapshots"
+
+    include_synthetic = Column(Boolean, nullable=False, default=True)
+    data = Column(LargeBinary, nullable=False)  # pickled SystemCumulativeF1
+
+    @property
+    def system(self):
+        return pickle.loads(self.data)
+
+    @classmethod
+    def latest(cls, include_synthetic: bool = True) -> "F1Snapshot | None":
+        return (
+            cls.query.filter_by(include_synthetic=include_synthetic)
+            .order_by(cls.id.desc())
+            .first()
+        )
+
+    @classmethod
+    def capture(cls, include_synthetic: bool = True) -> "F1Snapshot":
+        """Compute a new snapshot and drop the older ones. Caller commits."""
+        from btcopilot.training.f1_metrics import calculate_all_cumulative_f1
+
+        system = calculate_all_cumulative_f1(include_synthetic=include_synthetic)
+        snapshot = cls(include_synthetic=include_synthetic, data=pickle.dumps(system))
+        db.session.add(snapshot)
+        db.session.flush()
+        cls.query.filter(
+            cls.include_synthetic == include_synthetic, cls.id != snapshot.id
+        ).delete()
+        return snapshot
+
+    def is_stale(self) -> bool:
+        """True if GT was approved after this snapshot was taken.
+
+        Un-approvals, GT edits, re-extractions and deletes don't bump
+        approved_at; the beat schedule's forced refresh picks those up.
+        """
+        last_approved_at = db.session.query(func.max(Feedback.approved_at)).scalar()
+        return bool(last_approved_at and last_approved_at > self.created_at)
@@ -2,14 +2,23 @@ import json
 import logging
 from datetime import datetime
 
-from flask import Blueprint, render_template, request, jsonify, current_app
+from flask import (
+    Blueprint,
+    render_template,
+    request,
+    jsonify,
+    current_app,
+    redirect,
+    url_for,
+)
 from sqlalchemy.orm import subqueryload
 from sqlalchemy import func, case
 
 import btcopilot
-from btcopilot import auth
+from btcopilot import auth, queryprofile
 from btcopilot.auth import minimum_role
 from btcopilot.extensions import db
+from btcopilot.modelmixin import as_dicts
 from btcopilot.pro.models import User, License, Diagram
 from btcopilot.schema import DiagramData
 from btcopilot.personal.models import Discussion, Statement
@@ -286,6 +295,27 @@ def index():
     )
 
 
+@bp.route("/queries", methods=["GET"])
+def queries():
+    """SQL statements per request for each endpoint since the last reset."""
+    if request.args.get("format") == "json":
+        return jsonify(queryprofile.STATS.summary())
+    return render_template(
+        "admin_queries.html",
+        endpoints=queryprofile.STATS.summary(),
+        profiling=queryprofile.enabled(current_app),
+        breadcrumbs=get_breadcrumbs("queries"),
+        current_user=auth.current_user(),
+        btcopilot=btcopilot,
+    )
+
+
+@bp.route("/queries/reset", methods=["POST"])
+def queries_reset():
+    queryprofile.STATS.clear()
+    return redirect(url_for("training.admin.queries"))
+
+
 @bp.route("/users", methods=["GET"])
 def users_list():
     current_user = auth.current_user()
@@ -380,16 +410,13 @@ def user_details(user_id):
     user_data = build_user_summary(user, include_discussion_count=True)
 
     # Add full discussions data
-    user_data["discussions"] = [
-        discussion.as_dict(include=["summary", "last_topic", "statements"])
-        for diagram in user.diagrams
-        for discussion in diagram.discussions
-    ]
+    user_data["discussions"] = as_dicts(
+        [discussion for diagram in user.diagrams for discussion in diagram.discussions],
+        include=["summary", "last_topic", "statements"],
+    )
 
     # Add detailed license data
-    user_data["licenses"] = [
-        license.as_dict(include=["policy", "activations"]) for license in user.licenses
-    ]
+    user_data["licenses"] = as_dicts(user.licenses, include=["policy", "activations"])
 
     return jsonify(user_data)
 
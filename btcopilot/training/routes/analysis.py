@@ -9,7 +9,8 @@ Provides two analysis views:
 import logging
 from collections import defaultdict
 
-from flask import Blueprint, render_template, request, abort, jsonify, url_for
+from flask import Blueprint, render_template, request, abort, jsonify, url_for, redirect
+from sqlalchemy.orm import joinedload
 
 import btcopilot
 from btcopilot import auth
@@ -18,7 +19,13 @@ from btcopilot.training.utils import get_breadcrumbs, get_discussion_breadcrumbs
 from btcopilot.auth import minimum_role
 from btcopilot.personal.models import Statement
 from btcopilot.training.models import Feedback
-from btcopilot.training.analysis_utils import calculate_statement_match_breakdown
+from btcopilot.training.analysis_utils import (
+    calculate_statement_match_breakdown,
+    ensure_gt_statements_indexed,
+    index_terms_for_filters,
+    query_metric_index,
+    unindexed_gt_statements,
+)
 from btcopilot.training.f1_metrics import calculate_statement_f1
 
 _log = logging.getLogger(__name__)
@@ -27,6 +34,9 @@ bp = Blueprint("analysis", __name__, url_prefix="/analysis")
 
 SARF_ORDER = ["symptom", "anxiety", "relationship", "functioning"]
 
+SYSTEM_ANALYSIS_PAGE_SIZE = 50
+SYSTEM_ANALYSIS_MAX_PAGE_SIZE = 200
+
 
 def _calculate_discussion_f1(statement_breakdowns):
     if not statement_breakdowns:
@@ -469,9 +479,14 @@ def _statement_matches_metric_filter(breakdown, filters):
 @minimum_role(btcopilot.ROLE_AUDITOR)
 def system_analysis():
     """
-    URL: /training/analysis?metric=<metric_name>
+    URL: /training/analysis?metric=<metric_name>[&page=N&per_page=M]
     Entry: Clickable metrics in F1 dashboard card
 
+    Matching statements come from the StatementMetricIndex; only the current
+    page's statements, breakdowns and speakers are loaded. This view only reads
+    the index: GT statements not indexed yet are counted and left to
+    refresh_f1_snapshots or the reindex action below.
+
     Supported metrics:
     - aggregate_micro_f1, people_f1, events_f1, pair_bonds_f1
     - symptom_detection, symptom_value_match
@@ -484,44 +499,53 @@ def system_analysis():
         abort(400, "metric parameter required")
 
     filters = _parse_metric_to_filters(metric_name)
-
-    approved_feedbacks = (
-        Feedback.query.filter(
-            Feedback.approved == True, Feedback.feedback_type == "extraction"
-        )
-        .join(Statement)
-        .all()
+    page = max(request.args.get("page", 1, type=int), 1)
+    per_page = min(
+        max(request.args.get("per_page", SYSTEM_ANALYSIS_PAGE_SIZE, type=int), 1),
+        SYSTEM_ANALYSIS_MAX_PAGE_SIZE,
     )
 
-    matching_statements = []
-    for feedback in approved_feedbacks:
-        breakdown = calculate_statement_match_breakdown(feedback.statement_id)
-        if breakdown and _statement_matches_metric_filter(breakdown, filters):
-            statement = Statement.query.get(feedback.statement_id)
-            display_blocks = _preprocess_breakdown_for_display(breakdown)
-            matching_statements.append(
-                {
-                    "statement": statement,
-                    "breakdown": breakdown,
-                    "discussion": statement.discussion,
-                    "display_blocks": display_blocks,
-                }
-            )
+    unindexed_statements = unindexed_gt_statements().count()
+    statement_ids, total_statements = query_metric_index(
+        index_terms_for_filters(filters), page=page, per_page=per_page
+    )
 
     from btcopilot.personal.models import Speaker
     from btcopilot.personal.models.speaker import SpeakerType
 
+    statements = {
+        s.id: s
+        for s in Statement.query.options(joinedload(Statement.discussion))
+        .filter(Statement.id.in_(statement_ids))
+        .all()
+    }
+
     discussions_map = defaultdict(list)
-    for item in matching_statements:
-        discussions_map[item["discussion"].id].append(item)
+    for statement_id in statement_ids:
+        statement = statements.get(statement_id)
+        breakdown = calculate_statement_match_breakdown(statement_id)
+        if not statement or not breakdown:
+            continue
+        discussions_map[statement.discussion_id].append(
+            {
+                "statement": statement,
+                "breakdown": breakdown,
+                "discussion": statement.discussion,
+                "display_blocks": _preprocess_breakdown_for_display(breakdown),
+            }
+        )
+
+    speakers_by_discussion = defaultdict(list)
+    for speaker in (
+        Speaker.query.filter(Speaker.discussion_id.in_(list(discussions_map)))
+        .order_by(Speaker.id)
+        .all()
+    ):
+        speakers_by_discussion[speaker.discussion_id].append(speaker)
 
     speaker_maps = {}
     for discussion_id in discussions_map.keys():
-        unique_speakers = (
-            Speaker.query.filter(Speaker.discussion_id == discussion_id)
-            .order_by(Speaker.id)
-            .all()
-        )
+        unique_speakers = speakers_by_discussion[discussion_id]
         subject_speakers = [s for s in unique_speakers if s.type == SpeakerType.Subject]
         expert_speakers = [s for s in unique_speakers if s.type == SpeakerType.Expert]
 
@@ -548,8 +572,32 @@ def system_analysis():
         metric_name=metric_name,
         metric_display=_get_metric_display_name(metric_name),
         discussions_map=discussions_map,
-        total_statements=len(matching_statements),
+        total_statements=total_statements,
+        page=page,
+        per_page=per_page,
+        total_pages=max((total_statements + per_page - 1) // per_page, 1),
+        unindexed_statements=unindexed_statements,
         speaker_maps=speaker_maps,
         breadcrumbs=breadcrumbs,
         current_user=auth.current_user(),
     )
+
+
+@bp.route("/reindex", methods=["POST"])
+@minimum_role(btcopilot.ROLE_AUDITOR)
+def reindex_system_analysis():
+    """
+    URL: POST /training/analysis/reindex?metric=<metric_name>
+    Entry: "Index now" button on the system-wide analysis page
+
+    Indexes GT statements missing from the StatementMetricIndex, then returns
+    to the analysis page.
+    """
+    indexed = ensure_gt_statements_indexed()
+    db.session.commit()
+    _log.info(f"Indexed {indexed} GT statements for system analysis")
+    return redirect(
+        url_for(
+            "training.analysis.system_analysis", metric=request.args.get("metric")
+        )
+    )
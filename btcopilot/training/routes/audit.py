@@ -1,19 +1,22 @@
 import logging
-from flask import Blueprint, render_template, request, session
+from flask import Blueprint, abort, jsonify, render_template, request, session
+from sqlalchemy import func
 
 import btcopilot
 from btcopilot import auth
 from btcopilot.auth import minimum_role
 from btcopilot.extensions import db
-from btcopilot.pro.models import User, Diagram, License, AccessRight
-from btcopilot.personal.models import Discussion
+from btcopilot.pro.models import User, Diagram, AccessRight
+from btcopilot.personal.models import Discussion, Statement
+from btcopilot.training.models import F1Snapshot
+from btcopilot.training.sse import sse_manager
 from btcopilot.training.utils import (
     get_breadcrumbs,
     get_auditor_id,
     get_discussion_gt_statuses,
+    gt_status_rank,
     GTStatus,
 )
-from btcopilot.training.f1_metrics import calculate_all_cumulative_f1
 
 
 _log = logging.getLogger(__name__)
@@ -29,87 +32,187 @@ bp = Blueprint(
 bp = minimum_role(btcopilot.ROLE_AUDITOR)(bp)
 
 
-@bp.route("/")
-def index():
-    current_user = auth.current_user()
+AUDIT_DISCUSSIONS_PAGE_SIZE = 20
+AUDIT_DISCUSSIONS_MAX_PAGE_SIZE = 100
+
+# Stale F1 cards queue at most one refresh per window, across all processes.
+F1_REFRESH_LOCK_KEY = "training:f1-refresh-queued"
+F1_REFRESH_LOCK_SECONDS = 60
+
 
-    # Admins can view other users' audit dashboards via ?user_id=X
+def _viewing_user():
+    """The auditor whose dashboard is shown.
+
+    Admins can view other users' audit dashboards via ?user_id=X.
+    """
+    current_user = auth.current_user()
     target_user_id = request.args.get("user_id", type=int)
     if target_user_id and current_user.has_role(btcopilot.ROLE_ADMIN):
         viewing_user_id = target_user_id
     else:
         viewing_user_id = current_user.id
-
-    # Load target user's data with all relationships
-    auditor = User.query.options(
-        db.subqueryload(User.diagrams)
-        .subqueryload(Diagram.discussions)
-        .subqueryload(Discussion.statements),
-        db.subqueryload(User.licenses).subqueryload(License.policy),
-        db.subqueryload(User.licenses).subqueryload(License.activations),
-    ).get(viewing_user_id)
-
+    auditor = db.session.get(User, viewing_user_id)
     if not auditor:
-        from flask import abort
-
         abort(404)
+    return current_user, auditor
+
+
+@bp.route("/")
+def index():
+    """Dashboard shell.
+
+    Only diagram headers are rendered here. Each diagram's discussions and the
+    system F1 card are fetched as JSON panels (diagram_discussions, f1_panel),
+    so first paint costs the same few queries however many discussions the
+    auditor has.
+    """
+    current_user, auditor = _viewing_user()
+
+    diagrams = (
+        Diagram.query.options(db.defer(Diagram.data))
+        .filter(Diagram.user_id == auditor.id)
+        .all()
+    )
 
     # Get diagrams with granted access
-    shared_diagrams_query = (
+    shared_diagrams_with_rights = (
         db.session.query(Diagram, AccessRight)
         .join(AccessRight, AccessRight.diagram_id == Diagram.id)
         .filter(AccessRight.user_id == auditor.id)
-        .options(
-            db.subqueryload(Diagram.discussions).subqueryload(Discussion.statements)
-        )
+        .options(db.defer(Diagram.data), db.joinedload(Diagram.user))
+        .all()
     )
-    shared_diagrams_with_rights = shared_diagrams_query.all()
-
-    # Get all discussions from owned and shared diagrams
-    all_discussions = []
-    for diagram in auditor.diagrams:
-        for discussion in diagram.discussions:
-            all_discussions.append(discussion)
-    for diagram, access_right in shared_diagrams_with_rights:
-        for discussion in diagram.discussions:
-            all_discussions.append(discussion)
-
-    # Compute GT statuses for all discussions
-    discussion_ids = [d.id for d in all_discussions]
-    gt_statuses = get_discussion_gt_statuses(discussion_ids)
-
-    # Sort: Full GT first, then Partial, then None; within each group by created_at desc
-    gt_sort_order = {GTStatus.Full: 0, GTStatus.Partial: 1, GTStatus.None_: 2}
-
-    def sort_key(d):
-        gt = gt_statuses.get(d.id, {})
-        status = gt.get("status", GTStatus.None_)
-        return (
-            gt_sort_order.get(status, 2),
-            -(d.created_at.timestamp() if d.created_at else 0),
-        )
-
-    all_discussions.sort(key=sort_key)
-
-    cumulative_f1 = calculate_all_cumulative_f1()
 
     breadcrumbs = get_breadcrumbs("audit")
 
     # Add user info to breadcrumbs if viewing another user (admin only)
-    viewing_other_user = viewing_user_id != current_user.id
+    viewing_other_user = auditor.id != current_user.id
     if viewing_other_user:
         breadcrumbs.append({"title": auditor.username, "url": None})
 
     return render_template(
         "auditor_dashboard.html",
         user=auditor,
-        user_discussions=all_discussions,
+        diagrams=diagrams,
         shared_diagrams_with_rights=shared_diagrams_with_rights,
         current_user=current_user,
         btcopilot=btcopilot,
         breadcrumbs=breadcrumbs,
-        cumulative_f1=cumulative_f1,
         viewing_other_user=viewing_other_user,
-        gt_statuses=gt_statuses,
+    )
+
+
+@bp.route("/diagrams/<int:diagram_id>/discussions")
+def diagram_discussions(diagram_id):
+    """One page of a diagram's discussions as a JSON panel.
+
+    Statement counts and GT statuses are SQL aggregates over the page only.
+    Discussions are ordered Full GT first, then Partial, then None, newest
+    first within each group.
+    """
+    current_user, auditor = _viewing_user()
+
+    diagram = db.session.get(Diagram, diagram_id, options=[db.defer(Diagram.data)])
+    if not diagram:
+        return jsonify({"error": "Diagram not found"}), 404
+    if not (
+        current_user.has_role(btcopilot.ROLE_ADMIN)
+        or diagram.check_read_access(auditor)
+    ):
+        return jsonify({"error": "Access denied"}), 403
+
+    page = max(request.args.get("page", 1, type=int), 1)
+    per_page = min(
+        max(request.args.get("per_page", AUDIT_DISCUSSIONS_PAGE_SIZE, type=int), 1),
+        AUDIT_DISCUSSIONS_MAX_PAGE_SIZE,
+    )
+
+    query = Discussion.query.filter(Discussion.diagram_id == diagram_id)
+    total = query.count()
+    gt_ranks, gt_rank = gt_status_rank(
+        db.select(Discussion.id).where(Discussion.diagram_id == diagram_id)
+    )
+    discussions = (
+        query.outerjoin(gt_ranks, gt_ranks.c.discussion_id == Discussion.id)
+        .options(db.load_only(Discussion.id, Discussion.summary, Discussion.user_id))
+        .order_by(gt_rank, Discussion.created_at.desc(), Discussion.id.desc())
+        .limit(per_page)
+        .offset((page - 1) * per_page)
+        .all()
+    )
+    discussion_ids = [d.id for d in discussions]
+
+    statement_counts = {}
+    if discussion_ids:
+        statement_counts = dict(
+            db.session.query(Statement.discussion_id, func.count(Statement.id))
+            .filter(Statement.discussion_id.in_(discussion_ids))
+            .group_by(Statement.discussion_id)
+            .all()
+        )
+
+    has_more = page * per_page < total
+    html = render_template(
+        "partials/diagram_discussions_page.html",
+        diagram=diagram,
+        discussions=discussions,
+        statement_counts=statement_counts,
+        gt_statuses=get_discussion_gt_statuses(discussion_ids),
         GTStatus=GTStatus,
+        user=auditor,
+        current_user=current_user,
+        btcopilot=btcopilot,
+        page=page,
+        per_page=per_page,
+        total=total,
+        has_more=has_more,
+    )
+    return jsonify(
+        html=html, page=page, per_page=per_page, total=total, has_more=has_more
+    )
+
+
+def _queue_f1_refresh(celery):
+    """Queue refresh_f1_snapshots unless another request queued it recently."""
+    try:
+        first = sse_manager.redis().set(
+            F1_REFRESH_LOCK_KEY, 1, nx=True, ex=F1_REFRESH_LOCK_SECONDS
+        )
+    except Exception as e:
+        _log.warning(f"Could not take the F1 refresh lock: {e}")
+        first = True
+    if first:
+        celery.send_task("refresh_f1_snapshots")
+
+
+@bp.route("/f1")
+def f1_panel():
+    """System F1 card from the latest F1Snapshot, as a JSON panel.
+
+    A missing or stale snapshot queues refresh_f1_snapshots, at most once per
+    F1_REFRESH_LOCK_SECONDS; the card keeps showing the previous snapshot
+    until the worker replaces it. Without a celery worker configured the first
+    snapshot is computed inline.
+    """
+    from btcopilot.extensions import celery
+
+    snapshot = F1Snapshot.latest(include_synthetic=True)
+    stale = snapshot is None or snapshot.is_stale()
+    if stale:
+        if celery is not None:
+            _queue_f1_refresh(celery)
+        elif snapshot is None:
+            snapshot = F1Snapshot.capture(include_synthetic=True)
+            db.session.commit()
+            stale = False
+
+    html = render_template(
+        "partials/cumulative_f1_card.html",
+        cumulative_f1=snapshot.system if snapshot else None,
+    )
+    return jsonify(
+        html=html,
+        pending=snapshot is None,
+        stale=stale,
+        computed_at=snapshot.created_at.isoformat() if snapshot else None,
     )
@@ -11,6 +11,7 @@ from btcopilot.auth import minimum_role
 from btcopilot.extensions import db
 from btcopilot.personal.models import Discussion, SpeakerType, Statement
 from btcopilot.schema import asdict as schema_asdict
+from btcopilot.llmtelemetry import llm_caller
 from btcopilot.llmutil import gemini_calibration
 from btcopilot.training.models import Feedback
 from btcopilot.training.sarfdefinitions import definitions_for_event, linkify_passages
@@ -58,9 +59,13 @@ async def batch_llm_calls(prompts, system_instruction):
     results = []
     for batch_num, batch in enumerate(batches, 1):
         _log.info(f"  Batch {batch_num}/{len(batches)}: {len(batch)} calls...")
-        batch_results = await asyncio.gather(
-            *[gemini_calibration(p, system_instruction=system_instruction) for p in batch]
-        )
+        with llm_caller("calibration_batch"):
+            batch_results = await asyncio.gather(
+                *[
+                    gemini_calibration(p, system_instruction=system_instruction)
+                    for p in batch
+                ]
+            )
         results.extend(batch_results)
         if batch_num < len(batches):
             _log.info(f"  Waiting {LLM_BATCH_DELAY}s for token quota reset...")
@@ -193,9 +198,12 @@ def calibrate_event():
     _log.info(f"  Cumulative PDP: {len(cum_pdp.people)} people, {len(cum_pdp.events)} events")
     _log.info(f"  Definitions: {list(defs.keys())}")
     _log.info(f"  Calling LLM ({len(prompt)} chars)...")
-    analysis = asyncio.run(
-        gemini_calibration(prompt, system_instruction=CODING_ADVISOR_SYSTEM, deep=True)
-    )
+    with llm_caller("calibration_advice"):
+        analysis = asyncio.run(
+            gemini_calibration(
+                prompt, system_instruction=CODING_ADVISOR_SYSTEM, deep=True
+            )
+        )
     _log.info(f"  LLM response: {len(analysis)} chars")
 
     analysis = linkify_passages(analysis)
@@ -34,7 +34,8 @@ from btcopilot.schema import (
     asdict,
 )
 from btcopilot.personal.models import Discussion, DiscussionStatus, Statement, Speaker, SpeakerType
-from btcopilot.training.models import Feedback
+from btcopilot.training.analysis_utils import invalidate_discussion_cache
+from btcopilot.training.models import Feedback, StatementMetricIndex
 from btcopilot.training.utils import get_breadcrumbs, get_auditor_id, get_discussion_breadcrumbs
 
 
@@ -135,47 +136,23 @@ def _create_assembly_ai_transcript(data: dict):
     db.session.add(discussion)
     db.session.flush()
 
-    speakers_map = {}
-
-    if transcript_data.get("utterances"):
+    utterances = transcript_data.get("utterances") or []
+    if utterances:
         # Create speakers and statements from utterances
-        for order, utterance in enumerate(transcript_data["utterances"]):
-            speaker_label = utterance.get("speaker", "Unknown")
-            if speaker_label not in speakers_map:
-                speaker = Speaker(
-                    discussion_id=discussion.id,
-                    name=speaker_label,
-                    type=SpeakerType.Subject,  # Default to Subject
-                )
-                db.session.add(speaker)
-                db.session.flush()
-                speakers_map[speaker_label] = speaker
-
-            statement = Statement(
-                discussion_id=discussion.id,
-                speaker_id=speakers_map[speaker_label].id,
-                text=utterance.get("text", ""),
-                order=order,  # Use enumerate order for reliable sorting
-            )
-            db.session.add(statement)
-    else:
-        # No speaker diarization, create single speaker with full text
-        speaker = Speaker(
-            discussion_id=discussion.id,
-            name="Speaker",
-            type=SpeakerType.Subject,
+        speakers_map = discussion.resolve_speakers(
+            [u.get("speaker", "Unknown") for u in utterances]
         )
-        db.session.add(speaker)
-        db.session.flush()
-
-        # Create single statement with full transcript
-        statement = Statement(
-            discussion_id=discussion.id,
-            speaker_id=speaker.id,
-            text=transcript_data.get("text", ""),
-            order=0,  # Single statement gets order 0
+        discussion.add_statements(
+            [
+                (speakers_map[u.get("speaker", "Unknown")], u.get("text", ""))
+                for u in utterances
+            ]
         )
-        db.session.add(statement)
+    else:
+        # No speaker diarization, create single speaker with full text
+        speakers_map = {}
+        speaker_id = discussion.resolve_speakers(["Speaker"])["Speaker"]
+        discussion.add_statements([(speaker_id, transcript_data.get("text", ""))])
 
     db.session.commit()
 
@@ -1146,6 +1123,10 @@ def clear_extracted_data(discussion_id):
         Statement.query.filter_by(discussion_id=discussion_id).update(
             {"pdp_deltas": None}, synchronize_session=False
         )
+        # The bulk update bypasses _invalidate_metric_index; drop the index
+        # rows and cached breakdowns so the next refresh rebuilds them.
+        StatementMetricIndex.query.filter_by(discussion_id=discussion_id).delete()
+        invalidate_discussion_cache(discussion_id)
 
         # Reset extraction progress
         discussion.extracting = False
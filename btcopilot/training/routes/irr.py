@@ -8,6 +8,7 @@ import btcopilot
 from btcopilot import auth
 from btcopilot.auth import minimum_role
 from btcopilot.extensions import db
+from btcopilot.llmtelemetry import llm_caller
 from btcopilot.llmutil import gemini_calibration_sync
 from btcopilot.personal.models import Discussion, Speaker, SpeakerType, Statement
 from btcopilot.training.irr_metrics import (
@@ -578,7 +579,10 @@ def generate_statement_review(discussion_id: int, statement_id: int):
     _log.info(
         f"Statement review: discussion={discussion_id} statement={statement_id} coders={len(feedbacks)}"
     )
-    raw = gemini_calibration_sync(prompt, STATEMENT_REVIEW_SYSTEM, max_output_tokens=1024).strip()
+    with llm_caller("irr_statement_review"):
+        raw = gemini_calibration_sync(
+            prompt, STATEMENT_REVIEW_SYSTEM, max_output_tokens=1024
+        ).strip()
 
     triage = "DISCUSS"
     questions: list[str] = []
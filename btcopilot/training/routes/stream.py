@@ -1,12 +1,16 @@
 import logging
-import queue
 from datetime import datetime
-from flask import Blueprint, jsonify, Response
+from flask import Blueprint, jsonify
 
 import btcopilot
 from btcopilot import auth
 from btcopilot.auth import minimum_role
-from btcopilot.training.sse import sse_manager
+from btcopilot.training.sse import (
+    sse_manager,
+    event_stream_response,
+    last_event_id,
+    TRAINING_CHANNEL,
+)
 
 _log = logging.getLogger(__name__)
 
@@ -27,41 +31,9 @@ def stream():
 
     _log.info(f"New SSE client connected")
 
-    def event_stream():
-        q = sse_manager.subscribe()
-        _log.info(
-            f"SSE client subscribed, total subscribers: {len(sse_manager.subscribers)}"
-        )
-
-        # Send initial connection message
-        yield 'data: {"type": "connected", "message": "SSE connection established"}\n\n'
-
-        try:
-            while True:
-                try:
-                    message = q.get(timeout=30)
-                    _log.info(f"Sending SSE message: {message}")
-                    yield f"data: {message}\n\n"
-                except queue.Empty:
-                    # Send heartbeat
-                    _log.debug("Sending SSE heartbeat")
-                    yield 'data: {"type": "ping"}\n\n'
-        except GeneratorExit:
-            _log.info("SSE client disconnected")
-            pass
-        finally:
-            sse_manager.unsubscribe(q)
-            _log.info(
-                f"SSE client unsubscribed, remaining subscribers: {len(sse_manager.subscribers)}"
-            )
-
-    response = Response(event_stream(), mimetype="text/event-stream")
-    response.headers["Cache-Control"] = "no-cache"
-    response.headers["Connection"] = "keep-alive"
-    response.headers["Access-Control-Allow-Origin"] = "*"
-    response.headers["Access-Control-Allow-Headers"] = "Cache-Control"
-    response.headers["X-Accel-Buffering"] = "no"  # Disable nginx buffering
-    return response
+    return event_stream_response(
+        sse_manager.stream(TRAINING_CHANNEL, last_event_id=last_event_id())
+    )
 
 
 @bp.route("/test-sse")
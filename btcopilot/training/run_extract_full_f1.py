@@ -9,19 +9,28 @@ Usage:
     uv run python -m btcopilot.training.run_extract_full_f1
     uv run python -m btcopilot.training.run_extract_full_f1 --discussion 50
     uv run python -m btcopilot.training.run_extract_full_f1 --model gemini-2.5-flash
+
+    # 16 extractions in flight, results streamed to JSONL; rerun with --resume
+    # after a crash to skip discussions already scored:
+    uv run python -m btcopilot.training.run_extract_full_f1 --concurrency 16 \
+        --results instance/f1/run.jsonl --resume
+
+    # All discussions through the provider batch API, resumable:
+    uv run python -m btcopilot.training.run_extract_full_f1 --batch --checkpoint-dir instance/batch/f1
 """
 
 import argparse
-import asyncio
 import os
 import sys
 import time
 
-import nest_asyncio
-
 from btcopilot.app import create_app
 from btcopilot.schema import DiagramData, PDP
-from btcopilot.training.models import Feedback
+from btcopilot.training.corpus_eval import (
+    EVAL_CONCURRENCY,
+    load_gt_discussions,
+    run_corpus,
+)
 from btcopilot.training.f1_metrics import (
     match_people,
     match_events,
@@ -33,9 +42,130 @@ from btcopilot.training.f1_metrics import (
 from btcopilot import pdp
 
 
-def run_extract_full_f1(discussion_id=None, model=None, sarf_model=None):
-    nest_asyncio.apply()
+def _score_discussion(snapshot, ai_pdp, elapsed):
+    disc_id = snapshot.id
+    gt_pdp = snapshot.gt_pdp or PDP()
 
+    # Match and score
+    people_result, id_map = match_people(
+        ai_pdp.people, gt_pdp.people, ai_pdp.pair_bonds, gt_pdp.pair_bonds
+    )
+    events_result = match_events(ai_pdp.events, gt_pdp.events, id_map)
+    bonds_result = match_pair_bonds(ai_pdp.pair_bonds, gt_pdp.pair_bonds, id_map)
+    child_of_result = match_child_of(
+        ai_pdp.people, gt_pdp.people,
+        ai_pdp.pair_bonds, gt_pdp.pair_bonds, id_map,
+    )
+
+    if os.environ.get("F1_DUMP_ERRORS"):
+        name_by_id = {p.id: p.name for p in ai_pdp.people}
+        gt_name_by_id = {p.id: p.name for p in gt_pdp.people}
+        print(f"\n  [DUMP disc {disc_id}] AI events not in GT (FP):")
+        for e in events_result.ai_unmatched:
+            print(
+                f"    FP kind={getattr(e.kind, 'value', e.kind)} dt={e.dateTime} "
+                f"person={name_by_id.get(e.person, e.person)} "
+                f"child={name_by_id.get(e.child, e.child)} desc={e.description!r}"
+            )
+        print(f"  [DUMP disc {disc_id}] GT events missed (FN):")
+        for e in events_result.gt_unmatched:
+            print(
+                f"    FN kind={getattr(e.kind, 'value', e.kind)} dt={e.dateTime} "
+                f"person={gt_name_by_id.get(e.person, e.person)} "
+                f"child={gt_name_by_id.get(e.child, e.child)} desc={e.description!r}"
+            )
+        print(f"  [DUMP disc {disc_id}] AI bonds not in GT (FP):")
+        for b in bonds_result.ai_unmatched:
+            print(
+                f"    FP {name_by_id.get(b.person_a, b.person_a)} + "
+                f"{name_by_id.get(b.person_b, b.person_b)}"
+            )
+        print(f"  [DUMP disc {disc_id}] GT bonds missed (FN):")
+        for b in bonds_result.gt_unmatched:
+            print(
+                f"    FN {gt_name_by_id.get(b.person_a, b.person_a)} + "
+                f"{gt_name_by_id.get(b.person_b, b.person_b)}"
+            )
+
+    people_f1_metrics = calculate_f1_from_counts(
+        len(people_result.matched_pairs),
+        len(people_result.ai_unmatched),
+        len(people_result.gt_unmatched),
+    )
+    events_f1_metrics = calculate_f1_from_counts(
+        len(events_result.matched_pairs),
+        len(events_result.ai_unmatched),
+        len(events_result.gt_unmatched),
+    )
+    bonds_f1_metrics = calculate_f1_from_counts(
+        len(bonds_result.matched_pairs),
+        len(bonds_result.ai_unmatched),
+        len(bonds_result.gt_unmatched),
+    )
+    child_of_f1_metrics = calculate_f1_from_counts(
+        len(child_of_result.matched_pairs),
+        len(child_of_result.ai_unmatched),
+        len(child_of_result.gt_unmatched),
+    )
+
+    total_tp = people_f1_metrics.tp + events_f1_metrics.tp + bonds_f1_metrics.tp
+    total_fp = people_f1_metrics.fp + events_f1_metrics.fp + bonds_f1_metrics.fp
+    total_fn = people_f1_metrics.fn + events_f1_metrics.fn + bonds_f1_metrics.fn
+    aggregate = calculate_f1_from_counts(total_tp, total_fp, total_fn)
+
+    sarf = {}
+    if events_result.matched_pairs:
+        sarf, _ = calculate_sarf_macro_f1(events_result.matched_pairs)
+
+    result = {
+        "discussion_id": disc_id,
+        "summary": snapshot.summary,
+        "people_f1": people_f1_metrics.f1,
+        "events_f1": events_f1_metrics.f1,
+        "pair_bonds_f1": bonds_f1_metrics.f1,
+        "pair_bonds_precision": bonds_f1_metrics.precision,
+        "pair_bonds_recall": bonds_f1_metrics.recall,
+        "child_of_f1": child_of_f1_metrics.f1,
+        "child_of_precision": child_of_f1_metrics.precision,
+        "child_of_recall": child_of_f1_metrics.recall,
+        "child_of_tp": child_of_f1_metrics.tp,
+        "child_of_fp": child_of_f1_metrics.fp,
+        "child_of_fn": child_of_f1_metrics.fn,
+        "aggregate_f1": aggregate.f1,
+        "ai_people": len(ai_pdp.people),
+        "gt_people": len(gt_pdp.people),
+        "ai_events": len(ai_pdp.events),
+        "gt_events": len(gt_pdp.events),
+        "ai_bonds": len(ai_pdp.pair_bonds),
+        "gt_bonds": len(gt_pdp.pair_bonds),
+        "people_tp": people_f1_metrics.tp,
+        "people_fp": people_f1_metrics.fp,
+        "people_fn": people_f1_metrics.fn,
+        "events_tp": events_f1_metrics.tp,
+        "events_fp": events_f1_metrics.fp,
+        "events_fn": events_f1_metrics.fn,
+        "sarf": sarf,
+        "elapsed": elapsed,
+    }
+
+    print(
+        f"Disc {disc_id} ({snapshot.summary}): "
+        f"People={people_f1_metrics.f1:.3f} Events={events_f1_metrics.f1:.3f} "
+        f"Bonds={bonds_f1_metrics.f1:.3f} Agg={aggregate.f1:.3f} ({elapsed:.1f}s)"
+    )
+    return result
+
+
+def run_extract_full_f1(
+    discussion_id=None,
+    model=None,
+    sarf_model=None,
+    batch=False,
+    checkpoint_dir=None,
+    concurrency=EVAL_CONCURRENCY,
+    results_path=None,
+    resume=False,
+):
     if model:
         import btcopilot.llmutil as llmutil
 
@@ -45,169 +175,34 @@ def run_extract_full_f1(discussion_id=None, model=None, sarf_model=None):
     if sarf_model:
         print(f"Using SARF review model (Pass 3): {sarf_model}\n")
 
-    from btcopilot.personal.models import Discussion, Statement
-
-    # Find discussions with approved GT
-    query = (
-        Feedback.query.join(Statement, Feedback.statement_id == Statement.id)
-        .filter(Feedback.approved == True)
-        .filter(Feedback.feedback_type == "extraction")
-    )
-    if discussion_id:
-        query = query.filter(Statement.discussion_id == discussion_id)
+    # Discussions with approved GT, loaded up front with their GT PDPs
+    snapshots = load_gt_discussions(discussion_id)
 
-    disc_ids = sorted(
-        set(r[0] for r in query.with_entities(Statement.discussion_id).all())
-    )
-
-    if not disc_ids:
+    if not snapshots:
         print("No discussions with approved GT found.")
         return None
 
-    print(f"Validating extraction on {len(disc_ids)} discussion(s)...\n")
+    print(f"Validating extraction on {len(snapshots)} discussion(s)...\n")
 
-    results = []
     run_start = time.time()
 
-    errors = []
-
-    for disc_id in disc_ids:
-        discussion = Discussion.query.get(disc_id)
-        discussion.extracted_through_order = None
-        print(f"Disc {disc_id} ({discussion.summary})...", end=" ", flush=True)
-        disc_start = time.time()
-
-        # Build empty DiagramData for fresh extraction
-        diagram_data = DiagramData()
-
-        try:
-            ai_pdp, _ = asyncio.run(pdp.extract_full(discussion, diagram_data, sarf_review_model=sarf_model))
-        except Exception as e:
-            elapsed = time.time() - disc_start
-            print(f"EXTRACTION FAILED ({elapsed:.1f}s): {e}")
-            errors.append((disc_id, str(e)))
-            continue
-
-        # Build GT PDP from approved feedback
-        approved_fb = (
-            Feedback.query.join(Statement, Feedback.statement_id == Statement.id)
-            .filter(Statement.discussion_id == disc_id)
-            .filter(Feedback.approved == True)
-            .filter(Feedback.feedback_type == "extraction")
-            .first()
-        )
-        auditor_id = approved_fb.auditor_id
-        last_stmt = max(discussion.statements, key=lambda s: (s.order or 0, s.id or 0))
-        gt_pdp = pdp.cumulative(discussion, last_stmt, auditor_id=auditor_id)
-
-        # Match and score
-        people_result, id_map = match_people(
-            ai_pdp.people, gt_pdp.people, ai_pdp.pair_bonds, gt_pdp.pair_bonds
-        )
-        events_result = match_events(ai_pdp.events, gt_pdp.events, id_map)
-        bonds_result = match_pair_bonds(ai_pdp.pair_bonds, gt_pdp.pair_bonds, id_map)
-        child_of_result = match_child_of(
-            ai_pdp.people, gt_pdp.people,
-            ai_pdp.pair_bonds, gt_pdp.pair_bonds, id_map,
-        )
-
-        if os.environ.get("F1_DUMP_ERRORS"):
-            name_by_id = {p.id: p.name for p in ai_pdp.people}
-            gt_name_by_id = {p.id: p.name for p in gt_pdp.people}
-            print(f"\n  [DUMP disc {disc_id}] AI events not in GT (FP):")
-            for e in events_result.ai_unmatched:
-                print(
-                    f"    FP kind={getattr(e.kind, 'value', e.kind)} dt={e.dateTime} "
-                    f"person={name_by_id.get(e.person, e.person)} "
-                    f"child={name_by_id.get(e.child, e.child)} desc={e.description!r}"
-                )
-            print(f"  [DUMP disc {disc_id}] GT events missed (FN):")
-            for e in events_result.gt_unmatched:
-                print(
-                    f"    FN kind={getattr(e.kind, 'value', e.kind)} dt={e.dateTime} "
-                    f"person={gt_name_by_id.get(e.person, e.person)} "
-                    f"child={gt_name_by_id.get(e.child, e.child)} desc={e.description!r}"
-                )
-            print(f"  [DUMP disc {disc_id}] AI bonds not in GT (FP):")
-            for b in bonds_result.ai_unmatched:
-                print(
-                    f"    FP {name_by_id.get(b.person_a, b.person_a)} + "
-                    f"{name_by_id.get(b.person_b, b.person_b)}"
-                )
-            print(f"  [DUMP disc {disc_id}] GT bonds missed (FN):")
-            for b in bonds_result.gt_unmatched:
-                print(
-                    f"    FN {gt_name_by_id.get(b.person_a, b.person_a)} + "
-                    f"{gt_name_by_id.get(b.person_b, b.person_b)}"
-                )
-
-        people_f1_metrics = calculate_f1_from_counts(
-            len(people_result.matched_pairs),
-            len(people_result.ai_unmatched),
-            len(people_result.gt_unmatched),
-        )
-        events_f1_metrics = calculate_f1_from_counts(
-            len(events_result.matched_pairs),
-            len(events_result.ai_unmatched),
-            len(events_result.gt_unmatched),
-        )
-        bonds_f1_metrics = calculate_f1_from_counts(
-            len(bonds_result.matched_pairs),
-            len(bonds_result.ai_unmatched),
-            len(bonds_result.gt_unmatched),
-        )
-        child_of_f1_metrics = calculate_f1_from_counts(
-            len(child_of_result.matched_pairs),
-            len(child_of_result.ai_unmatched),
-            len(child_of_result.gt_unmatched),
-        )
-
-        total_tp = people_f1_metrics.tp + events_f1_metrics.tp + bonds_f1_metrics.tp
-        total_fp = people_f1_metrics.fp + events_f1_metrics.fp + bonds_f1_metrics.fp
-        total_fn = people_f1_metrics.fn + events_f1_metrics.fn + bonds_f1_metrics.fn
-        aggregate = calculate_f1_from_counts(total_tp, total_fp, total_fn)
-
-        sarf = {}
-        if events_result.matched_pairs:
-            sarf, _ = calculate_sarf_macro_f1(events_result.matched_pairs)
-
-        elapsed = time.time() - disc_start
-        result = {
-            "discussion_id": disc_id,
-            "summary": discussion.summary,
-            "people_f1": people_f1_metrics.f1,
-            "events_f1": events_f1_metrics.f1,
-            "pair_bonds_f1": bonds_f1_metrics.f1,
-            "pair_bonds_precision": bonds_f1_metrics.precision,
-            "pair_bonds_recall": bonds_f1_metrics.recall,
-            "child_of_f1": child_of_f1_metrics.f1,
-            "child_of_precision": child_of_f1_metrics.precision,
-            "child_of_recall": child_of_f1_metrics.recall,
-            "child_of_tp": child_of_f1_metrics.tp,
-            "child_of_fp": child_of_f1_metrics.fp,
-            "child_of_fn": child_of_f1_metrics.fn,
-            "aggregate_f1": aggregate.f1,
-            "ai_people": len(ai_pdp.people),
-            "gt_people": len(gt_pdp.people),
-            "ai_events": len(ai_pdp.events),
-            "gt_events": len(gt_pdp.events),
-            "ai_bonds": len(ai_pdp.pair_bonds),
-            "gt_bonds": len(gt_pdp.pair_bonds),
-            "people_tp": people_f1_metrics.tp,
-            "people_fp": people_f1_metrics.fp,
-            "people_fn": people_f1_metrics.fn,
-            "events_tp": events_f1_metrics.tp,
-            "events_fp": events_f1_metrics.fp,
-            "events_fn": events_f1_metrics.fn,
-            "sarf": sarf,
-            "elapsed": elapsed,
-        }
-        results.append(result)
-
-        print(
-            f"People={people_f1_metrics.f1:.3f} Events={events_f1_metrics.f1:.3f} "
-            f"Bonds={bonds_f1_metrics.f1:.3f} Agg={aggregate.f1:.3f} ({elapsed:.1f}s)"
+    async def extract(snapshot):
+        # Fresh extraction into an empty DiagramData
+        ai_pdp, _ = await pdp.extract_full(
+            snapshot, DiagramData(), sarf_review_model=sarf_model
         )
+        return ai_pdp
+
+    results, errors = run_corpus(
+        snapshots,
+        extract,
+        _score_discussion,
+        concurrency=concurrency,
+        results_path=results_path,
+        resume=resume,
+        batch=batch,
+        checkpoint_dir=checkpoint_dir,
+    )
 
     # Summary
     if not results:
@@ -279,13 +274,24 @@ def run_extract_full_f1(discussion_id=None, model=None, sarf_model=None):
         for disc_id, err in errors:
             print(f"  Disc {disc_id}: {err[:100]}")
 
-    from btcopilot.llmutil import CLAUDE_STRUCTURED_USAGE as cu
+    from btcopilot.llmutil import (
+        CLAUDE_STRUCTURED_USAGE as cu,
+        GEMINI_STRUCTURED_USAGE as gu,
+    )
 
     if cu["calls"]:
-        cost = cu["input_tokens"] / 1e6 * 10 + cu["output_tokens"] / 1e6 * 50
         print(
             f"\nClaude usage: {cu['calls']} calls, "
-            f"in={cu['input_tokens']} out={cu['output_tokens']}, est ${cost:.2f}"
+            f"in={cu['input_tokens']} out={cu['output_tokens']} "
+            f"cache_read={cu['cache_read_input_tokens']} "
+            f"cache_write={cu['cache_creation_input_tokens']}, "
+            f"est ${cu['cost_usd']:.2f}"
+        )
+    if gu["calls"]:
+        print(
+            f"Gemini usage: {gu['calls']} calls, "
+            f"in={gu['input_tokens']} out={gu['output_tokens']} "
+            f"cached={gu['cached_input_tokens']}"
         )
 
     return {
@@ -320,12 +326,47 @@ def main():
         type=str,
         help="Override SARF review model (Pass 3)",
     )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Submit each extraction pass for all discussions as one batch job",
+    )
+    parser.add_argument(
+        "--checkpoint-dir",
+        type=str,
+        help="With --batch: save batch answers here and resume from them",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=EVAL_CONCURRENCY,
+        help="Discussions extracted at once (default %(default)s)",
+    )
+    parser.add_argument(
+        "--results",
+        type=str,
+        help="Append per-discussion results to this JSONL file as they finish",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip discussions already in the --results file",
+    )
     args = parser.parse_args()
+    if args.resume and not args.results:
+        parser.error("--resume requires --results")
 
     app = create_app()
     with app.app_context():
         result = run_extract_full_f1(
-            discussion_id=args.discussion, model=args.model, sarf_model=args.sarf_model
+            discussion_id=args.discussion,
+            model=args.model,
+            sarf_model=args.sarf_model,
+            batch=args.batch,
+            checkpoint_dir=args.checkpoint_dir,
+            concurrency=args.concurrency,
+            results_path=args.results,
+            resume=args.resume,
         )
         sys.exit(0 if result and result["count"] > 0 else 1)
 
@@ -1,52 +1,232 @@
-"""Server-sent events manager for real-time updates"""
+"""Server-sent events manager for real-time updates
+
+Publishers (request handlers, celery tasks) write to Redis pub/sub channels
+keyed by discussion, diagram or the training app as a whole; each streaming
+endpoint holds one Redis subscription and relays it to its client. Events get
+ids from a single Redis counter and the last SSE_HISTORY_SIZE of each channel
+are kept so a reconnecting client that sends Last-Event-ID gets what it missed
+before the live feed resumes.
+
+The Redis client comes from SSE_REDIS_URL, falling back to CELERY_BROKER_URL,
+and is stored in app.extensions["sse_redis"] (tests put a fakeredis there).
+"""
 
 import logging
 import json
-import queue
 import threading
+import time
+
+from flask import current_app, request, Response
 
 _log = logging.getLogger(__name__)
 
+SSE_HEARTBEAT_SECONDS = 15
+SSE_HISTORY_SIZE = 100
+SSE_HISTORY_TTL = 3600
+
+TRAINING_CHANNEL = "training"
+
+
+def discussion_channel(discussion_id: int) -> str:
+    return f"discussion:{discussion_id}"
+
+
+def diagram_channel(diagram_id: int) -> str:
+    return f"diagram:{diagram_id}"
+
+
+def _channel_key(channel: str) -> str:
+    return f"sse:channel:{channel}"
+
+
+def _history_key(channel: str) -> str:
+    return f"sse:history:{channel}"
+
+
+_SEQ_KEY = "sse:seq"
+
+
+def _parse_event_id(value) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def format_event(data: str, event_id: int | None = None) -> str:
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines += [f"data: {line}" for line in data.splitlines() or [""]]
+    return "\n".join(lines) + "\n\n"
+
+
+def last_event_id():
+    """EventSource resends the last id it saw as a header on reconnect."""
+    return request.headers.get("Last-Event-ID") or request.args.get("lastEventId")
+
+
+def event_stream_response(events):
+    response = Response(events, mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["Connection"] = "keep-alive"
+    response.headers["Access-Control-Allow-Origin"] = "*"
+    response.headers["Access-Control-Allow-Headers"] = "Cache-Control"
+    response.headers["X-Accel-Buffering"] = "no"  # Disable nginx buffering
+    return response
+
+
+class Subscription:
+    """One client's view of a channel: missed events first, then live ones."""
+
+    def __init__(self, client, channel: str, last_event_id: int | None = None):
+        self.channel = channel
+        self._pubsub = client.pubsub(ignore_subscribe_messages=True)
+        # Subscribe before reading history so nothing published in between is
+        # lost; duplicates are dropped by id below.
+        self._pubsub.subscribe(_channel_key(channel))
+        self._backlog = []
+        if last_event_id is not None:
+            for raw in client.lrange(_history_key(channel), 0, -1):
+                event = json.loads(raw)
+                if event["id"] > last_event_id:
+                    self._backlog.append(event)
+        self.last_event_id = last_event_id or 0
+
+    def get(self, timeout: float) -> dict | None:
+        """The next {"id", "data"} event, or None after `timeout` seconds."""
+        while self._backlog:
+            event = self._backlog.pop(0)
+            if event["id"] > self.last_event_id:
+                self.last_event_id = event["id"]
+                return event
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            message = self._pubsub.get_message(timeout=remaining)
+            if message is None or message["type"] != "message":
+                continue
+            event = json.loads(message["data"])
+            if event["id"] > self.last_event_id:
+                self.last_event_id = event["id"]
+                return event
+
+    def close(self):
+        self._pubsub.close()
+
+
+class EventStream:
+    """SSE frames for a Response. The WSGI server calls close() when the
+    response ends, even if the client left before the first frame, so the
+    subscription is always released."""
+
+    def __init__(self, frames, on_close):
+        self._frames = frames
+        self._on_close = on_close
+
+    def __iter__(self):
+        return self._frames
+
+    def close(self):
+        self._frames.close()
+        self._on_close()
+
 
 class SSEManager:
     def __init__(self):
         self.subscribers = []
         self._lock = threading.Lock()
 
-    def subscribe(self):
-        return
-        q = queue.Queue()
+    def redis(self):
+        client = current_app.extensions.get("sse_redis")
+        if client is None:
+            import redis
+
+            url = current_app.config.get("SSE_REDIS_URL") or current_app.config.get(
+                "CELERY_BROKER_URL", "redis://localhost:6379/0"
+            )
+            client = redis.from_url(url)
+            current_app.extensions["sse_redis"] = client
+        return client
+
+    def subscribe(self, channel: str = TRAINING_CHANNEL, last_event_id=None):
+        q = Subscription(self.redis(), channel, _parse_event_id(last_event_id))
         with self._lock:
             self.subscribers.append(q)
         return q
 
     def unsubscribe(self, q):
-        return
         with self._lock:
-            if q in self.subscribers:
-                self.subscribers.remove(q)
-
-    def publish(self, message):
-        return
+            if q not in self.subscribers:
+                return
+            self.subscribers.remove(q)
+        q.close()
         _log.info(
-            f"Publishing SSE message to {len(self.subscribers)} subscribers: {message}"
+            f"SSE client unsubscribed, remaining subscribers: {len(self.subscribers)}"
         )
-        with self._lock:
-            dead_queues = []
-            for q in self.subscribers:
-                try:
-                    q.put(message, block=False)
-                    _log.debug(f"Message queued successfully")
-                except queue.Full:
-                    _log.warning(f"Queue full, removing subscriber")
-                    dead_queues.append(q)
-            # Clean up dead queues
-            for q in dead_queues:
-                self.subscribers.remove(q)
+
+    def publish(self, message, channel: str = TRAINING_CHANNEL) -> int | None:
+        """
+        Send `message` (a JSON string, or anything json.dumps() accepts) to
+        every subscriber of `channel`. Returns the event id, or None if Redis
+        is unavailable; progress updates are best-effort and never fail the
+        publisher.
+        """
+        if not isinstance(message, str):
+            message = json.dumps(message)
+        try:
+            client = self.redis()
+            event_id = client.incr(_SEQ_KEY)
+            payload = json.dumps({"id": event_id, "data": message})
+            pipe = client.pipeline()
+            pipe.rpush(_history_key(channel), payload)
+            pipe.ltrim(_history_key(channel), -SSE_HISTORY_SIZE, -1)
+            pipe.expire(_history_key(channel), SSE_HISTORY_TTL)
+            pipe.publish(_channel_key(channel), payload)
+            pipe.execute()
+        except Exception as e:
+            _log.warning(f"Could not publish SSE message to {channel}: {e}")
+            return None
+        _log.debug(f"Published SSE message {event_id} to {channel}")
+        return event_id
+
+    def stream(
+        self,
+        channel: str = TRAINING_CHANNEL,
+        last_event_id=None,
+        heartbeat: float = SSE_HEARTBEAT_SECONDS,
+        on_heartbeat=None,
+    ):
+        """
+        Subscribe now (inside the request) and return a generator of SSE
+        frames for a streaming Response. A ping is sent after `heartbeat`
+        idle seconds, and `on_heartbeat()` is called at least that often.
+        """
+        q = self.subscribe(channel, last_event_id)
         _log.info(
-            f"SSE message published to {len(self.subscribers) - len(dead_queues)} active subscribers"
+            f"SSE client subscribed to {channel}, total subscribers: {len(self.subscribers)}"
         )
 
+        def event_stream():
+            # Send initial connection message
+            yield 'data: {"type": "connected", "message": "SSE connection established"}\n\n'
+            last_beat = time.monotonic()
+            try:
+                while True:
+                    event = q.get(timeout=heartbeat)
+                    if time.monotonic() - last_beat >= heartbeat:
+                        last_beat = time.monotonic()
+                        if on_heartbeat:
+                            on_heartbeat()
+                    if event is not None:
+                        yield format_event(event["data"], event["id"])
+                    else:
+                        yield 'data: {"type": "ping"}\n\n'
+            except GeneratorExit:
+                _log.info("SSE client disconnected")
+
+        return EventStream(event_stream(), lambda: self.unsubscribe(q))
+
 
 # Global SSE manager instance
 sse_manager = SSEManager()
@@ -7,6 +7,7 @@ from btcopilot.tests.personal.synthetic import (
     DEPRECATED_PERSONAS,
 )
 from btcopilot.personal.chat import ask
+from btcopilot.training.sse import sse_manager
 
 
 _log = logging.getLogger(__name__)
@@ -49,14 +50,20 @@ def generate_synthetic_discussion(
     )
 
     def on_progress(turn_num, total, user_text, ai_text):
-        self.update_state(
-            state="PROGRESS",
-            meta={
-                "current": turn_num,
-                "total": total,
-                "user_text": user_text[:100] if user_text else "",
-                "ai_text": ai_text[:100] if ai_text else "",
-            },
+        meta = {
+            "current": turn_num,
+            "total": total,
+            "user_text": user_text[:100] if user_text else "",
+            "ai_text": ai_text[:100] if ai_text else "",
+        }
+        self.update_state(state="PROGRESS", meta=meta)
+        sse_manager.publish(
+            {
+                "type": "synthetic",
+                "task_id": self.request.id,
+                "status": "progress",
+                **meta,
+            }
         )
 
     result = simulator.run(
@@ -78,6 +85,15 @@ def generate_synthetic_discussion(
         f"({len(result.turns) // 2} turns)"
     )
 
+    sse_manager.publish(
+        {
+            "type": "synthetic",
+            "task_id": self.request.id,
+            "status": "complete",
+            "discussion_id": result.discussionId,
+        }
+    )
+
     return {
         "success": True,
         "discussion_id": result.discussionId,
@@ -87,3 +103,26 @@ def generate_synthetic_discussion(
             result.coverage.coverageRate if result.coverage else None
         ),
     }
+
+
+def refresh_f1_snapshots(force: bool = False):
+    """Recompute the dashboard F1 snapshot if GT was approved since the last
+    one, and index GT statements missing from the system analysis metric index.
+
+    Dashboards queue it on demand when they see a stale snapshot, so duplicates
+    are common; they return early once the snapshot is fresh. The beat schedule
+    passes force=True to catch GT changes that is_stale() can't see.
+    """
+    from btcopilot.training.analysis_utils import ensure_gt_statements_indexed
+    from btcopilot.training.models import F1Snapshot
+
+    indexed = ensure_gt_statements_indexed()
+    if indexed:
+        db.session.commit()
+        _log.info(f"Indexed {indexed} GT statements for system analysis")
+
+    snapshot = F1Snapshot.latest()
+    if force or snapshot is None or snapshot.is_stale():
+        F1Snapshot.capture()
+        db.session.commit()
+        _log.info("Refreshed F1 snapshot")
@@ -3,7 +3,7 @@
 from enum import Enum
 
 from flask import url_for
-from sqlalchemy import func
+from sqlalchemy import and_, case, func
 
 from btcopilot import auth
 import btcopilot
@@ -22,6 +22,8 @@ def get_discussion_gt_statuses(discussion_ids):
 
     Only one auditor's feedbacks are approved per discussion (via bulk approve).
     Status is Full when all of that auditor's edited feedbacks are approved.
+
+    Two aggregate queries regardless of how many discussions are passed.
     """
     from btcopilot.training.models import Feedback
     from btcopilot.personal.models import Statement
@@ -29,50 +31,43 @@ def get_discussion_gt_statuses(discussion_ids):
     if not discussion_ids:
         return {}
 
-    result = {}
-    for did in discussion_ids:
-        # Find the approved auditor for this discussion (if any)
-        approved_auditor = (
-            db.session.query(Feedback.auditor_id)
-            .join(Statement)
-            .filter(
-                Statement.discussion_id == did,
-                Feedback.feedback_type == "extraction",
-                Feedback.approved == True,
-            )
-            .first()
+    # The approved auditor per discussion (if any)
+    approved_auditors = dict(
+        db.session.query(Statement.discussion_id, func.min(Feedback.auditor_id))
+        .join(Feedback, Feedback.statement_id == Statement.id)
+        .filter(
+            Statement.discussion_id.in_(discussion_ids),
+            Feedback.feedback_type == "extraction",
+            Feedback.approved == True,
         )
+        .group_by(Statement.discussion_id)
+        .all()
+    )
 
-        if not approved_auditor:
-            result[did] = {"total": 0, "approved": 0, "status": GTStatus.None_}
-            continue
-
-        auditor_id = approved_auditor[0]
-
-        # Count that auditor's feedbacks with edited_extraction
-        total = (
-            Feedback.query.join(Statement)
-            .filter(
-                Statement.discussion_id == did,
-                Feedback.feedback_type == "extraction",
-                Feedback.auditor_id == auditor_id,
-                Feedback.edited_extraction.isnot(None),
+    # Each auditor's edited / approved feedback counts per discussion
+    counts = {}
+    if approved_auditors:
+        for did, auditor_id, total, approved in (
+            db.session.query(
+                Statement.discussion_id,
+                Feedback.auditor_id,
+                func.count(Feedback.id),
+                func.count(case((Feedback.approved == True, Feedback.id))),
             )
-            .count()
-        )
-
-        # Count that auditor's approved feedbacks
-        approved = (
-            Feedback.query.join(Statement)
+            .join(Feedback, Feedback.statement_id == Statement.id)
             .filter(
-                Statement.discussion_id == did,
+                Statement.discussion_id.in_(list(approved_auditors)),
                 Feedback.feedback_type == "extraction",
-                Feedback.auditor_id == auditor_id,
                 Feedback.edited_extraction.isnot(None),
-                Feedback.approved == True,
             )
-            .count()
-        )
+            .group_by(Statement.discussion_id, Feedback.auditor_id)
+        ):
+            counts[(did, auditor_id)] = (total, approved)
+
+    result = {}
+    for did in discussion_ids:
+        auditor_id = approved_auditors.get(did)
+        total, approved = counts.get((did, auditor_id), (0, 0))
 
         if total == 0:
             status = GTStatus.None_
@@ -86,6 +81,75 @@ def get_discussion_gt_statuses(discussion_ids):
     return result
 
 
+GT_STATUS_ORDER = {GTStatus.Full: 0, GTStatus.Partial: 1, GTStatus.None_: 2}
+
+
+def gt_status_rank(discussion_ids):
+    """
+    SQL sort key for GT status, Full (0) before Partial (1) before None (2).
+
+    Returns (subquery, rank): outer join the subquery on its discussion_id and
+    order by rank. Same rules as get_discussion_gt_statuses(), so paged lists
+    can be sorted by status in SQL; `discussion_ids` may be a select().
+    """
+    from btcopilot.training.models import Feedback
+    from btcopilot.personal.models import Statement
+
+    approved_auditors = (
+        db.session.query(
+            Statement.discussion_id.label("discussion_id"),
+            func.min(Feedback.auditor_id).label("auditor_id"),
+        )
+        .join(Feedback, Feedback.statement_id == Statement.id)
+        .filter(
+            Statement.discussion_id.in_(discussion_ids),
+            Feedback.feedback_type == "extraction",
+            Feedback.approved == True,
+        )
+        .group_by(Statement.discussion_id)
+        .subquery()
+    )
+    counts = (
+        db.session.query(
+            Statement.discussion_id.label("discussion_id"),
+            Feedback.auditor_id.label("auditor_id"),
+            func.count(Feedback.id).label("total"),
+            func.count(case((Feedback.approved == True, Feedback.id))).label(
+                "approved"
+            ),
+        )
+        .join(Feedback, Feedback.statement_id == Statement.id)
+        .filter(
+            Statement.discussion_id.in_(discussion_ids),
+            Feedback.feedback_type == "extraction",
+            Feedback.edited_extraction.isnot(None),
+        )
+        .group_by(Statement.discussion_id, Feedback.auditor_id)
+        .subquery()
+    )
+    ranks = (
+        db.session.query(
+            approved_auditors.c.discussion_id,
+            case(
+                (
+                    counts.c.approved == counts.c.total,
+                    GT_STATUS_ORDER[GTStatus.Full],
+                ),
+                else_=GT_STATUS_ORDER[GTStatus.Partial],
+            ).label("rank"),
+        )
+        .join(
+            counts,
+            and_(
+                counts.c.discussion_id == approved_auditors.c.discussion_id,
+                counts.c.auditor_id == approved_auditors.c.auditor_id,
+            ),
+        )
+        .subquery()
+    )
+    return ranks, func.coalesce(ranks.c.rank, GT_STATUS_ORDER[GTStatus.None_])
+
+
 def get_breadcrumbs(current_page=None):
     breadcrumbs = []
 
@@ -95,6 +159,9 @@ def get_breadcrumbs(current_page=None):
         breadcrumbs.append({"title": "Account", "url": None})
     elif current_page == "admin":
         breadcrumbs.append({"title": "Admin", "url": None})
+    elif current_page == "queries":
+        breadcrumbs.append({"title": "Admin", "url": url_for("training.admin.index")})
+        breadcrumbs.append({"title": "Query Profile", "url": None})
     elif current_page == "thread":
         breadcrumbs.append({"title": "Coding", "url": url_for("training.audit.index")})
     elif current_page == "prompts":